@@ -0,0 +1,7 @@
+"""Banc de mesure des chemins coûteux du pipeline V2 sur cohortes synthétiques.
+
+Les cohortes sont générées de façon déterministe à partir d'une graine et de
+trois axes de taille : individus, marqueurs et porteurs. Chaque mesure
+s'exécute dans un processus neuf afin que le pic de mémoire relevé appartienne
+à la seule fonction mesurée. Voir `python -m benchmarks.runner --help`.
+"""
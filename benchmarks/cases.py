@@ -0,0 +1,323 @@
+"""Cas mesurés : fonctions coûteuses du pipeline appliquées aux cohortes synthétiques.
+
+`setup` écrit les fichiers d'un cas une fois par taille, dans le processus
+principal. `prepare` s'exécute dans le processus de mesure, hors chronométrage,
+et retourne l'appel exact à chronométrer. Les outils externes sont remplacés
+par des substituts qui restituent des sorties précalculées : seul le code
+Python du pipeline est mesuré, lancement des substituts compris.
+"""
+
+from __future__ import annotations
+
+import tempfile
+from collections.abc import Callable
+from functools import partial
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from benchmarks import cohorts
+from benchmarks.cohorts import CohortSize
+from effet_fondateur.audit import file_digests, hash_files
+from effet_fondateur.contracts import validate_tsv_table
+from effet_fondateur.dating import gamma
+from effet_fondateur.founder import infer_target_centered_ibs
+from effet_fondateur.io import open_plink_bed, write_plink_bed
+from effet_fondateur.kinship import king_robust_pairs
+from effet_fondateur.ld import publish_local_ld
+from effet_fondateur.phasing.execution import (
+    _genotype_columns,
+    _mendel_errors,
+    _transmissions,
+)
+from effet_fondateur.references.harmonization import (
+    _AlleleCodes,
+    _harmonization_rows,
+    _load_study_variants,
+    _parse_reference_variants,
+)
+from effet_fondateur.roh.analysis import _burden_rows, _normalise_segments
+from effet_fondateur.stages.analyze_population_structure import (
+    _fit_and_project,
+    _fit_and_project_randomized,
+)
+from effet_fondateur.stages.convert_acpa import _read_source_to_spool
+
+
+@dataclass(frozen=True)
+class BenchmarkCase:
+    """Fonction mesurée, préparation de ses fichiers et construction de l'appel."""
+
+    name: str
+    target: str
+    prepare: Callable[[CohortSize, Path], Callable[[], Any]]
+    setup: Callable[[CohortSize, Path], None] | None = None
+
+
+PCA_PARAMETERS = {
+    "requested_components": 10,
+    "outlier_components": 4,
+    "min_informative_variants": 2,
+    "min_reference_call_rate": 0.95,
+    "pca_block_variants": 1000,
+    "randomized_oversampling": 10,
+    "randomized_power_iterations": 2,
+    "randomized_seed": 5,
+}
+
+
+def _output_dir(case_dir: Path) -> Path:
+    # Un dossier neuf par répétition : aucune sortie précédente n'est réutilisée.
+    return Path(tempfile.mkdtemp(prefix="output_", dir=case_dir))
+
+
+def _setup_acpa(size: CohortSize, case_dir: Path) -> None:
+    cohorts.write_acpa_source(size, case_dir / "source.txt")
+
+
+def _prepare_acpa(size: CohortSize, case_dir: Path) -> Callable[[], Any]:
+    spool_path = _output_dir(case_dir) / "sample.calls"
+    return lambda: _read_source_to_spool(
+        case_dir / "source.txt", spool_path, cohorts.ACPA_ASSEMBLY, {}
+    )
+
+
+def _setup_table(size: CohortSize, case_dir: Path) -> None:
+    cohorts.write_variant_metrics(size, case_dir / "qc_variant_metrics.tsv")
+
+
+def _prepare_table(size: CohortSize, case_dir: Path) -> Callable[[], Any]:
+    return lambda: validate_tsv_table(
+        case_dir / "qc_variant_metrics.tsv", "qc_variant_metrics.schema.json"
+    )
+
+
+def _setup_hashing(size: CohortSize, case_dir: Path) -> None:
+    cohorts.write_acpa_source(size, case_dir / "source.txt")
+    cohorts.write_variant_metrics(size, case_dir / "qc_variant_metrics.tsv")
+    cohorts.write_founder_inputs(size, case_dir / "founder")
+
+
+def _prepare_hashing(size: CohortSize, case_dir: Path) -> Callable[[], Any]:
+    paths = sorted(path for path in case_dir.rglob("*") if path.is_file())
+    return lambda: hash_files(paths, partial(file_digests, algorithms=("sha256", "md5")))
+
+
+def _reference_indices(size: CohortSize) -> np.ndarray:
+    # Les porteurs sont projetés sans contribuer aux axes, comme à l'étape 09.
+    return np.arange(size.carriers, size.samples)
+
+
+def _prepare_pca(size: CohortSize, case_dir: Path) -> Callable[[], Any]:
+    dosages = cohorts.dosage_matrix(size)
+    return lambda: _fit_and_project(dosages, _reference_indices(size), PCA_PARAMETERS)
+
+
+def _prepare_randomized_pca(size: CohortSize, case_dir: Path) -> Callable[[], Any]:
+    dosages = cohorts.dosage_matrix(size)
+    return lambda: _fit_and_project_randomized(
+        lambda start, stop: dosages[:, start:stop],
+        size.samples,
+        size.markers,
+        _reference_indices(size),
+        PCA_PARAMETERS,
+    )
+
+
+def _setup_founder(size: CohortSize, case_dir: Path) -> None:
+    cohorts.write_founder_inputs(size, case_dir)
+
+
+def _prepare_founder(size: CohortSize, case_dir: Path) -> Callable[[], Any]:
+    output_dir = _output_dir(case_dir)
+    return lambda: infer_target_centered_ibs(
+        phased_bcf_path=case_dir / "phased.bcf",
+        carrier_haplotypes_path=case_dir / "carrier_haplotypes.tsv",
+        cohorts_path=case_dir / "cohorts_frozen.tsv",
+        samples_master_path=case_dir / "samples.master.tsv",
+        genetic_map_path=case_dir / "target_genetic_map.tsv",
+        output_dir=output_dir,
+        bcftools_command=str(case_dir / "bcftools"),
+        timeout_seconds=3600,
+        minimum_independent_carriers=3,
+        minimum_flank_markers=1,
+    )
+
+
+def _setup_local_ld(size: CohortSize, case_dir: Path) -> None:
+    cohorts.write_local_ld_inputs(size, case_dir)
+
+
+def _prepare_local_ld(size: CohortSize, case_dir: Path) -> Callable[[], Any]:
+    variants = cohorts.local_ld_variants(size)
+    counts = cohorts.local_ld_keep_counts(size)
+    output_dir = _output_dir(case_dir)
+    window_bp = cohorts.LD_WINDOW_VARIANTS * cohorts.REGION_SPACING_BP
+    window_cm = (cohorts.LD_WINDOW_VARIANTS + 0.5) * cohorts.REGION_SPACING_CM
+    return lambda: publish_local_ld(
+        plink_executable=str(case_dir / "plink"),
+        dataset_prefix=case_dir / "region",
+        variants=variants,
+        cohort_keep_paths={cohort_id: case_dir / f"{cohort_id}.keep" for cohort_id in counts},
+        cohort_sample_counts=counts,
+        cohort_independent={cohort_id: cohort_id != "family_noncarriers" for cohort_id in counts},
+        output_dir=output_dir,
+        minimum_samples=3,
+        primary_samples=20,
+        minimum_called_samples_per_pair=3,
+        minimum_variant_maf=0.05,
+        minimum_pairs_per_bin=1,
+        max_pair_distance_bp=window_bp,
+        max_pair_distance_cm=window_cm,
+        distance_bins_cm=[window_cm / 2, window_cm],
+        max_pair_count=cohorts.LD_WINDOW_VARIANTS * size.markers,
+        timeout_seconds=3600,
+    )
+
+
+def _prepare_roh(size: CohortSize, case_dir: Path) -> Callable[[], Any]:
+    raw_rows = cohorts.roh_segments(size)
+    fam_pairs = list(zip(cohorts.family_ids(size), cohorts.sample_ids(size)))
+    sample_by_pair = {pair: pair[1] for pair in fam_pairs}
+
+    def run() -> list[dict[str, str]]:
+        segments = _normalise_segments(
+            scope="GENOMEWIDE_BURDEN", dataset_id="benchmark", cohort_id="controls_unrelated",
+            raw_rows=raw_rows, sample_by_pair=sample_by_pair,
+            target_chromosome=cohorts.TARGET_CHROMOSOME, target_bp=cohorts.REGION_START_BP,
+        )
+        return _burden_rows(
+            cohort_id="controls_unrelated", fam_pairs=fam_pairs,
+            sample_by_pair=sample_by_pair, segments=segments, evaluated=True,
+            denominator_kb=2_800_000.0, denominator_source="benchmark",
+        )
+
+    return run
+
+
+def _setup_harmonization(size: CohortSize, case_dir: Path) -> None:
+    _, study_lines = cohorts.harmonization_variants(size)
+    (case_dir / "study.bim").write_text("".join(study_lines), encoding="utf-8")
+
+
+def _prepare_harmonization(size: CohortSize, case_dir: Path) -> Callable[[], Any]:
+    reference_rows, _ = cohorts.harmonization_variants(size)
+    study_variants = _load_study_variants(case_dir / "study.bim")
+    chromosome = int(cohorts.TARGET_CHROMOSOME)
+
+    def run() -> list[dict[str, Any]]:
+        codes = _AlleleCodes()
+        reference = _parse_reference_variants(iter(reference_rows), chromosome, codes)
+        return _harmonization_rows(
+            study_variants, reference, codes, "GRCh38", cohorts.region_variant_id(0)
+        )
+
+    return run
+
+
+def _setup_kinship(size: CohortSize, case_dir: Path) -> None:
+    dosages = cohorts.dosage_matrix(size)
+    write_plink_bed(
+        case_dir / "kinship_panel.bed",
+        size.samples,
+        [np.where(np.isnan(dosages), -1, dosages).astype(np.int8)],
+    )
+
+
+def _prepare_kinship(size: CohortSize, case_dir: Path) -> Callable[[], Any]:
+    bed = open_plink_bed(case_dir / "kinship_panel.bed", size.samples, size.markers)
+    return lambda: king_robust_pairs(
+        bed, cohorts.family_ids(size), minimum_kinship=0.0221, threads=4
+    )
+
+
+def _prepare_phasing_checks(size: CohortSize, case_dir: Path) -> Callable[[], Any]:
+    haplotypes = cohorts.phased_haplotypes(size).reshape(size.samples, 2, size.markers)
+    # GT tels que `bcftools query` les restitue, variant par variant.
+    texts = np.array(["0|0", "0|1", "1|0", "1|1"])
+    genotype_rows = texts[2 * haplotypes[:, 0] + haplotypes[:, 1]].T.tolist()
+    keys = [
+        (cohorts.TARGET_CHROMOSOME, 1 + index, cohorts.region_variant_id(index), "A", "G")
+        for index in range(size.markers)
+    ]
+    samples = cohorts.sample_ids(size)
+    # Trios d'individus consécutifs : l'enfant, puis le père et la mère.
+    pedigree = [
+        (samples[index], samples[index + 1], samples[index + 2])
+        for index in range(0, size.samples - 2, 3)
+    ]
+    target_index = cohorts.region_target_index(size)
+
+    def run() -> tuple[int, list[dict[str, Any]]]:
+        genotypes = _genotype_columns(keys, genotype_rows, None)
+        return (
+            _mendel_errors(genotypes, samples, pedigree),
+            _transmissions(genotypes, target_index, samples, pedigree),
+        )
+
+    return run
+
+
+def _prepare_gamma(
+    estimator: Callable[..., gamma.GammaEstimate],
+) -> Callable[[CohortSize, Path], Callable[[], Any]]:
+    def prepare(size: CohortSize, case_dir: Path) -> Callable[[], Any]:
+        left, right = cohorts.shared_lengths_cm(size)
+        return lambda: estimator(left, right, confidence_level=0.95)
+
+    return prepare
+
+
+CASES = {
+    case.name: case
+    for case in (
+        BenchmarkCase(
+            "acpa_spool", "stages.convert_acpa._read_source_to_spool", _prepare_acpa, _setup_acpa
+        ),
+        BenchmarkCase(
+            "tsv_validation", "contracts.tables.validate_tsv_table", _prepare_table, _setup_table
+        ),
+        BenchmarkCase(
+            "artifact_hashing", "audit.checksums.hash_files+file_digests", _prepare_hashing, _setup_hashing
+        ),
+        BenchmarkCase("pca_exact", "stages.analyze_population_structure._fit_and_project", _prepare_pca),
+        BenchmarkCase(
+            "pca_randomized",
+            "stages.analyze_population_structure._fit_and_project_randomized",
+            _prepare_randomized_pca,
+        ),
+        BenchmarkCase(
+            "founder_ibs", "founder.local_ibs.infer_target_centered_ibs", _prepare_founder, _setup_founder
+        ),
+        BenchmarkCase("local_ld", "ld.local.publish_local_ld", _prepare_local_ld, _setup_local_ld),
+        BenchmarkCase(
+            "reference_harmonization",
+            "references.harmonization._parse_reference_variants+_harmonization_rows",
+            _prepare_harmonization,
+            _setup_harmonization,
+        ),
+        BenchmarkCase(
+            "kinship_king_robust", "kinship.king_robust_pairs", _prepare_kinship, _setup_kinship
+        ),
+        BenchmarkCase(
+            "phasing_family_checks",
+            "phasing.execution._genotype_columns+_mendel_errors+_transmissions",
+            _prepare_phasing_checks,
+        ),
+        BenchmarkCase(
+            "roh_segments", "roh.analysis._normalise_segments+_burden_rows", _prepare_roh
+        ),
+        BenchmarkCase(
+            "gamma_independent",
+            "dating.gamma.estimate_independent_gamma",
+            _prepare_gamma(gamma.estimate_independent_gamma),
+        ),
+        BenchmarkCase(
+            "gamma_correlated",
+            "dating.gamma.estimate_correlated_gamma",
+            _prepare_gamma(gamma.estimate_correlated_gamma),
+        ),
+    )
+}
@@ -0,0 +1,479 @@
+"""Cohortes synthétiques déterministes dimensionnées par individus, marqueurs et porteurs.
+
+Toutes les valeurs dérivent d'une graine et de la taille : deux appels avec la
+même `CohortSize` produisent des fichiers identiques octet pour octet. Les
+individus `sample_000001` à `sample_<porteurs>` sont les porteurs ; leur
+haplotype H1 recopie un haplotype fondateur sur un segment aléatoire centré
+sur le variant cible. Les analyses régionales (IBS, LD local) utilisent l'axe
+des marqueurs comme nombre de variants de la région.
+"""
+
+from __future__ import annotations
+
+import csv
+import sys
+import zlib
+from collections.abc import Iterable
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+
+BASES = "ACGT"
+ACPA_ASSEMBLY = "hg38"
+TARGET_CHROMOSOME = "19"
+REGION_START_BP = 1_000_000
+REGION_SPACING_BP = 1_000
+REGION_SPACING_CM = 0.001
+# Chaque variant régional est apparié à ses dix successeurs pour le LD local.
+LD_WINDOW_VARIANTS = 10
+MISSING_RATE = 0.01
+
+
+class BenchmarkError(ValueError):
+    """Signale une taille de cohorte synthétique inutilisable."""
+
+
+@dataclass(frozen=True)
+class CohortSize:
+    """Dimensions d'une cohorte synthétique et graine de génération."""
+
+    samples: int
+    markers: int
+    carriers: int
+    seed: int = 20240601
+
+    @property
+    def key(self) -> str:
+        return f"s{self.samples}_m{self.markers}_c{self.carriers}_seed{self.seed}"
+
+    def as_dict(self) -> dict[str, int]:
+        return {
+            "samples": self.samples,
+            "markers": self.markers,
+            "carriers": self.carriers,
+            "seed": self.seed,
+        }
+
+
+def validate_cohort_size(size: CohortSize) -> None:
+    """Refuse une taille pour laquelle une fonction mesurée refuserait d'opérer."""
+    if size.carriers < 3:
+        raise BenchmarkError("benchmark_too_few_carriers")
+    if size.samples < size.carriers + 3:
+        raise BenchmarkError("benchmark_too_few_samples")
+    if size.markers < 4 * LD_WINDOW_VARIANTS:
+        raise BenchmarkError("benchmark_too_few_markers")
+
+
+def _generator(size: CohortSize, stream: str) -> np.random.Generator:
+    # Un flux par artefact : ajouter un générateur ne modifie pas les autres.
+    return np.random.default_rng([size.seed, zlib.crc32(stream.encode("ascii"))])
+
+
+def sample_ids(size: CohortSize) -> list[str]:
+    return [f"sample_{index:06d}" for index in range(1, size.samples + 1)]
+
+
+def family_ids(size: CohortSize) -> list[str]:
+    return [f"family_{index:06d}" for index in range(1, size.samples + 1)]
+
+
+def _write_tsv(path: Path, columns: Iterable[str], rows: Iterable[Iterable[str]]) -> None:
+    with path.open("w", encoding="utf-8", newline="") as handle:
+        writer = csv.writer(handle, delimiter="\t", lineterminator="\n")
+        writer.writerow(columns)
+        writer.writerows(rows)
+
+
+def _write_executable(path: Path, script: str) -> Path:
+    path.write_text(f"#!{sys.executable}\n{script}", encoding="utf-8")
+    path.chmod(0o755)
+    return path
+
+
+def write_acpa_source(size: CohortSize, path: Path) -> Path:
+    """Écrit l'export ACPA d'un individu : une ligne par marqueur autosomique."""
+    generator = _generator(size, "acpa")
+    bases = np.array(list(BASES))
+    reference = generator.integers(0, 4, size=size.markers)
+    alternate = (reference + generator.integers(1, 4, size=size.markers)) % 4
+    alternate_copies = generator.binomial(2, generator.uniform(0.05, 0.5, size=size.markers))
+    first = np.where(alternate_copies == 2, alternate, reference)
+    second = np.where(alternate_copies >= 1, alternate, reference)
+    missing = generator.random(size.markers) < MISSING_RATE
+    without_rsid = generator.random(size.markers) < 0.05
+    with path.open("w", encoding="utf-8", newline="") as handle:
+        handle.write("# Array Type Name: CytoScan 750K Accel Array\n")
+        handle.write(f"# UCSC Genomic Version: {ACPA_ASSEMBLY}\n")
+        handle.write(
+            "Probe Set ID\tForward Strand Base Calls\tdbSNP RS ID\tChromosome\t"
+            "Chromosomal Position\n"
+        )
+        for index in range(size.markers):
+            chromosome = 1 + index * 22 // size.markers
+            call = "--" if missing[index] else bases[first[index]] + bases[second[index]]
+            rsid = "." if without_rsid[index] else f"rs{index + 1}"
+            handle.write(
+                f"probe_{index + 1:07d}\t{call}\t{rsid}\t{chromosome}\t"
+                f"{10_000 + index * REGION_SPACING_BP}\n"
+            )
+    return path
+
+
+def write_variant_metrics(size: CohortSize, path: Path) -> Path:
+    """Écrit une table `qc_variant_metrics` d'une ligne par marqueur."""
+    generator = _generator(size, "variant_metrics")
+    missing_counts = generator.binomial(size.samples, MISSING_RATE, size=size.markers)
+    frequencies = generator.uniform(0.0, 0.5, size=size.markers)
+    batch_rates = generator.uniform(0.0, 0.05, size=(size.markers, 2))
+    statuses = generator.choice(["PASS", "ALERT", "EXCLUDED"], p=[0.9, 0.07, 0.03], size=size.markers)
+    alleles = generator.permutation(np.tile(np.arange(4), (size.markers, 1)), axis=1)
+    rows = []
+    for index in range(size.markers):
+        low, high = sorted(batch_rates[index])
+        rows.append([
+            f"var_{index + 1:07d}", str(1 + index * 22 // size.markers),
+            str(10_000 + index * REGION_SPACING_BP),
+            BASES[alleles[index, 0]], BASES[alleles[index, 1]],
+            str(missing_counts[index]), str(size.samples),
+            f"{missing_counts[index] / size.samples:.6f}", f"{frequencies[index]:.6f}",
+            str(2 * (size.samples - missing_counts[index])),
+            f"{low:.6f}", f"{high:.6f}", f"{high - low:.6f}",
+            statuses[index],
+            "HIGH_MISSINGNESS" if statuses[index] == "EXCLUDED" else "",
+            "BATCH_MISSINGNESS_DELTA" if statuses[index] == "ALERT" else "",
+        ])
+    _write_tsv(path, [
+        "VARIANT_ID", "CHROMOSOME", "POSITION_BP", "A1", "A2", "N_MISS", "N_GENO",
+        "F_MISS", "MAF", "NCHROBS", "BATCH_MIN_F_MISS", "BATCH_MAX_F_MISS",
+        "BATCH_MISSINGNESS_DELTA", "QC_STATUS", "EXCLUSION_CODE", "ALERT_CODES",
+    ], rows)
+    return path
+
+
+def dosage_matrix(size: CohortSize) -> np.ndarray:
+    """Dosages float64 individus × marqueurs, `nan` si manquant."""
+    generator = _generator(size, "dosages")
+    frequencies = generator.uniform(0.02, 0.5, size=size.markers)
+    dosages = generator.binomial(2, frequencies, size=(size.samples, size.markers)).astype(np.float64)
+    dosages[generator.random(dosages.shape) < MISSING_RATE] = np.nan
+    return dosages
+
+
+def _region_positions(size: CohortSize) -> tuple[np.ndarray, np.ndarray]:
+    indexes = np.arange(size.markers)
+    return REGION_START_BP + indexes * REGION_SPACING_BP, indexes * REGION_SPACING_CM
+
+
+def region_target_index(size: CohortSize) -> int:
+    return size.markers // 2
+
+
+def region_variant_id(index: int) -> str:
+    return f"region_{index + 1:06d}"
+
+
+def phased_haplotypes(size: CohortSize) -> np.ndarray:
+    """Allèles uint8 de forme (2 × individus) × marqueurs, H1 puis H2 par individu.
+
+    Seul l'haplotype H1 des porteurs porte l'allèle alternatif au variant cible ;
+    il recopie le fondateur sur une longueur géométrique de chaque côté.
+    """
+    generator = _generator(size, "haplotypes")
+    frequencies = generator.uniform(0.05, 0.5, size=size.markers)
+    haplotypes = (generator.random((2 * size.samples, size.markers)) < frequencies).astype(np.uint8)
+    target = region_target_index(size)
+    founder = (generator.random(size.markers) < frequencies).astype(np.uint8)
+    mean_arm = max(2, size.markers // 10)
+    for carrier in range(size.carriers):
+        left = max(0, target - int(generator.geometric(1 / mean_arm)))
+        right = min(size.markers - 1, target + int(generator.geometric(1 / mean_arm)))
+        haplotypes[2 * carrier, left : right + 1] = founder[left : right + 1]
+    haplotypes[:, target] = 0
+    haplotypes[0 : 2 * size.carriers : 2, target] = 1
+    return haplotypes
+
+
+def write_founder_inputs(size: CohortSize, directory: Path) -> dict[str, Path]:
+    """Écrit les tables d'entrée de l'IBS local et un `bcftools` de substitution.
+
+    Le substitut restitue une sortie `bcftools query` précalculée : la mesure
+    porte sur le décodage et les comparaisons Python, pas sur bcftools.
+    """
+    directory.mkdir(parents=True, exist_ok=True)
+    samples = sample_ids(size)
+    families = family_ids(size)
+    haplotypes = phased_haplotypes(size)
+    positions, positions_cm = _region_positions(size)
+    target = region_target_index(size)
+    genotype_text = np.array(["0|0", "0|1", "1|0", "1|1"])
+    query_path = directory / "query.txt"
+    with query_path.open("w", encoding="utf-8") as handle:
+        for index in range(size.markers):
+            codes = 2 * haplotypes[0::2, index] + haplotypes[1::2, index]
+            handle.write(
+                f"{region_variant_id(index)}\t{positions[index]}\t"
+                + "\t".join(genotype_text[codes].tolist()) + "\n"
+            )
+    samples_list_path = directory / "samples.txt"
+    samples_list_path.write_text("".join(f"{sample_id}\n" for sample_id in samples), encoding="utf-8")
+    bcftools_path = _write_executable(directory / "bcftools", f"""import shutil
+import sys
+
+arguments = sys.argv[1:]
+if arguments == ["--version"]:
+    print("bcftools 1.21")
+elif arguments[:2] == ["query", "--list-samples"]:
+    with open({str(samples_list_path)!r}, encoding="utf-8") as handle:
+        shutil.copyfileobj(handle, sys.stdout)
+elif arguments[:2] == ["query", "--format"]:
+    with open({str(query_path)!r}, encoding="utf-8") as handle:
+        shutil.copyfileobj(handle, sys.stdout)
+else:
+    raise SystemExit(9)
+""")
+    bcf_path = directory / "phased.bcf"
+    bcf_path.write_bytes(b"synthetic")
+    map_path = directory / "target_genetic_map.tsv"
+    _write_tsv(map_path, [
+        "DATASET_ID", "VARIANT_ORDER", "VARIANT_ID", "CHROMOSOME", "POSITION_BP",
+        "POSITION_CM", "MAP_STATUS", "LEFT_MAP_BP", "LEFT_MAP_CM", "RIGHT_MAP_BP",
+        "RIGHT_MAP_CM", "LOCAL_RATE_CM_PER_MB", "IS_TARGET_VARIANT",
+    ], (
+        [
+            "benchmark", str(index + 1), region_variant_id(index), TARGET_CHROMOSOME,
+            str(positions[index]), f"{positions_cm[index]:.6f}", "EXACT",
+            str(positions[index]), f"{positions_cm[index]:.6f}",
+            str(positions[index]), f"{positions_cm[index]:.6f}", "1",
+            "true" if index == target else "false",
+        ]
+        for index in range(size.markers)
+    ))
+    carriers_path = directory / "carrier_haplotypes.tsv"
+    _write_tsv(carriers_path, [
+        "SAMPLE_ORDER", "SAMPLE_ID", "TARGET_VARIANT_ID", "EXPLICIT_GENOTYPE",
+        "PHASED_GT", "ALT_COPY_COUNT", "CARRIER_HAPLOTYPE", "PHASE_CONFIDENCE",
+        "CONFIDENCE_STATUS", "RELIABILITY_STATUS", "UNRELIABLE_REASON",
+    ], (
+        [
+            str(index + 1), sample_id, region_variant_id(target),
+            "A/G", "1|0", "1", "H1", "0.99", "SCORED_PASS", "PASS", "",
+        ] if index < size.carriers else [
+            str(index + 1), sample_id, region_variant_id(target),
+            "A/A", "0|0", "0", "NONE", "", "NOT_APPLICABLE_HOMOZYGOUS", "PASS", "",
+        ]
+        for index, sample_id in enumerate(samples)
+    ))
+    cohorts_path = directory / "cohorts_frozen.tsv"
+    _write_tsv(cohorts_path, [
+        "COHORT_ID", "SAMPLE_ID", "ROLE", "INCLUDED", "EXCLUSION_CODE",
+        "DECISION_SOURCE", "INDEPENDENT_UNIT_ID", "FAMILY_REPRESENTATIVE",
+    ], (
+        [
+            "target_carriers_independent", sample_id, "CARRIER", "true", "",
+            "benchmark", f"unit_{index + 1:06d}", "true",
+        ] if index < size.carriers else [
+            "controls_unrelated", sample_id, "CONTROL", "true", "",
+            "benchmark", f"control_unit_{index + 1:06d}", "true",
+        ]
+        for index, sample_id in enumerate(samples)
+    ))
+    samples_path = directory / "samples.master.tsv"
+    _write_tsv(samples_path, [
+        "SAMPLE_ID", "SOURCE_FILE", "FID", "IID", "PID", "MID", "SEX",
+        "CLINICAL_STATUS", "GROUP_LABEL", "TARGET_GENOTYPE", "TARGET_GENOTYPE_SOURCE",
+        "ARRAY_BATCH", "INCLUDE_GENOMEWIDE", "INCLUDE_TARGET_CHROMOSOME", "NOTES_CODE",
+    ], (
+        [
+            sample_id, f"{sample_id}.txt", family_id, sample_id, "0", "0", "UNKNOWN",
+            "UNKNOWN", "CASE" if index < size.carriers else "CONTROL",
+            "A/G" if index < size.carriers else "A/A", "explicit", "batch_1",
+            "true", "true", "",
+        ]
+        for index, (sample_id, family_id) in enumerate(zip(samples, families))
+    ))
+    return {
+        "bcf": bcf_path, "map": map_path, "carriers": carriers_path,
+        "cohorts": cohorts_path, "samples": samples_path, "bcftools": bcftools_path,
+    }
+
+
+def local_ld_variants(size: CohortSize) -> list[dict[str, Any]]:
+    """Variants régionaux au format attendu par `publish_local_ld`."""
+    generator = _generator(size, "local_ld_variants")
+    positions, positions_cm = _region_positions(size)
+    alleles = generator.permutation(np.tile(np.arange(4), (size.markers, 1)), axis=1)
+    target = region_target_index(size)
+    return [
+        {
+            "VARIANT_ORDER": index + 1, "VARIANT_ID": region_variant_id(index),
+            "CHROMOSOME": TARGET_CHROMOSOME, "POSITION_BP": int(positions[index]),
+            "POSITION_CM": float(positions_cm[index]),
+            "A1": BASES[alleles[index, 0]], "A2": BASES[alleles[index, 1]],
+            "IS_TARGET_VARIANT": index == target,
+        }
+        for index in range(size.markers)
+    ]
+
+
+def local_ld_keep_counts(size: CohortSize) -> dict[str, int]:
+    return {
+        "controls_unrelated": size.samples - size.carriers,
+        "target_carriers_independent": size.carriers,
+        "family_noncarriers": 0,
+    }
+
+
+def write_local_ld_inputs(size: CohortSize, directory: Path) -> dict[str, Path]:
+    """Écrit les rapports PLINK précalculés, les `.keep` et un `plink` de substitution.
+
+    Le substitut copie le rapport correspondant à la commande reçue ; seules
+    la lecture des rapports et la construction des tables sont mesurées.
+    """
+    directory.mkdir(parents=True, exist_ok=True)
+    generator = _generator(size, "local_ld_reports")
+    variants = local_ld_variants(size)
+    frequencies = np.where(
+        generator.random(size.markers) < 0.05, 0.0, generator.uniform(0.01, 0.5, size=size.markers)
+    )
+    dosages = generator.binomial(2, frequencies, size=(size.samples, size.markers)).astype(str)
+    dosages[generator.random(dosages.shape) < MISSING_RATE] = "NA"
+    reports = directory / "reports"
+    reports.mkdir(exist_ok=True)
+    with (reports / "report.frq").open("w", encoding="utf-8") as handle:
+        handle.write("CHR SNP A1 A2 MAF NCHROBS\n")
+        for variant, frequency in zip(variants, frequencies):
+            handle.write(
+                f"{variant['CHROMOSOME']} {variant['VARIANT_ID']} {variant['A1']} "
+                f"{variant['A2']} {frequency:.6g} {2 * size.samples}\n"
+            )
+    with (reports / "report.traw").open("w", encoding="utf-8") as handle:
+        handle.write(
+            "CHR SNP (C)M POS COUNTED ALT "
+            + " ".join(f"{family}_{sample}" for family, sample in zip(family_ids(size), sample_ids(size)))
+            + "\n"
+        )
+        for index, variant in enumerate(variants):
+            handle.write(
+                f"{variant['CHROMOSOME']} {variant['VARIANT_ID']} {variant['POSITION_CM']:.6f} "
+                f"{variant['POSITION_BP']} {variant['A1']} {variant['A2']} "
+                + " ".join(dosages[:, index].tolist()) + "\n"
+            )
+    pairs = [
+        (first, second)
+        for first in range(size.markers)
+        for second in range(first + 1, min(first + LD_WINDOW_VARIANTS + 1, size.markers))
+    ]
+    values = generator.random((len(pairs), 2))
+    for name, header, with_dprime in (
+        ("report.r2.ld", "CHR_A BP_A SNP_A MAF_A CHR_B BP_B SNP_B MAF_B R2\n", False),
+        ("report.dprime.ld", "CHR_A BP_A SNP_A MAF_A CHR_B BP_B SNP_B MAF_B R2 DP\n", True),
+    ):
+        with (reports / name).open("w", encoding="utf-8") as handle:
+            handle.write(header)
+            for (first, second), (r2, dprime) in zip(pairs, values):
+                left, right = variants[first], variants[second]
+                handle.write(
+                    f"{left['CHROMOSOME']} {left['POSITION_BP']} {left['VARIANT_ID']} "
+                    f"{frequencies[first]:.6g} {right['CHROMOSOME']} {right['POSITION_BP']} "
+                    f"{right['VARIANT_ID']} {frequencies[second]:.6g} {r2:.6g}"
+                    + (f" {dprime:.6g}\n" if with_dprime else "\n")
+                )
+    plink_path = _write_executable(directory / "plink", f"""import pathlib
+import shutil
+import sys
+
+arguments = sys.argv[1:]
+reports = pathlib.Path({str(reports)!r})
+output_prefix = pathlib.Path(arguments[arguments.index("--out") + 1])
+if "--freq" in arguments:
+    shutil.copyfile(reports / "report.frq", output_prefix.with_suffix(".frq"))
+    shutil.copyfile(reports / "report.traw", output_prefix.with_suffix(".traw"))
+elif "dprime" in arguments:
+    shutil.copyfile(reports / "report.dprime.ld", output_prefix.with_suffix(".ld"))
+else:
+    shutil.copyfile(reports / "report.r2.ld", output_prefix.with_suffix(".ld"))
+""")
+    keep_paths = {}
+    samples = sample_ids(size)
+    families = family_ids(size)
+    members = {
+        "controls_unrelated": range(size.carriers, size.samples),
+        "target_carriers_independent": range(size.carriers),
+        "family_noncarriers": range(0),
+    }
+    for cohort_id, indexes in members.items():
+        keep_path = directory / f"{cohort_id}.keep"
+        keep_path.write_text(
+            "".join(f"{families[index]}\t{samples[index]}\n" for index in indexes), encoding="utf-8"
+        )
+        keep_paths[cohort_id] = keep_path
+    return {"plink": plink_path, **keep_paths}
+
+
+def roh_segments(size: CohortSize) -> list[dict[str, str]]:
+    """Segments bruts au format `.hom` de PLINK, un par 500 marqueurs et par individu."""
+    generator = _generator(size, "roh")
+    per_sample = max(1, size.markers // 500)
+    count = size.samples * per_sample
+    chromosomes = generator.integers(1, 23, size=count)
+    starts = generator.integers(1, 200_000_000, size=count)
+    lengths_kb = generator.exponential(2_500, size=count) + 1_000
+    snp_counts = np.maximum(50, (lengths_kb / 20).astype(np.int64))
+    rows = []
+    for index, (sample_id, family_id) in enumerate(
+        (sample_id, family_id)
+        for sample_id, family_id in zip(sample_ids(size), family_ids(size))
+        for _ in range(per_sample)
+    ):
+        start = int(starts[index])
+        stop = start + int(lengths_kb[index] * 1000)
+        rows.append({
+            "FID": family_id, "IID": sample_id, "PHE": "-9",
+            "CHR": str(chromosomes[index]), "SNP1": f"snp_{start}", "SNP2": f"snp_{stop}",
+            "POS1": str(start), "POS2": str(stop), "KB": f"{lengths_kb[index]:.3f}",
+            "NSNP": str(snp_counts[index]),
+            "DENSITY": f"{lengths_kb[index] / snp_counts[index]:.3f}",
+            "PHOM": "1", "PHET": "0",
+        })
+    return rows
+
+
+def shared_lengths_cm(size: CohortSize) -> tuple[list[float], list[float]]:
+    """Longueurs gauche et droite partagées par porteur, en centimorgans."""
+    generator = _generator(size, "gamma")
+    lengths = generator.exponential(5.0, size=(2, size.carriers)) + 0.1
+    return lengths[0].tolist(), lengths[1].tolist()
+
+
+def harmonization_variants(size: CohortSize) -> tuple[list[list[str]], list[str]]:
+    """Variants normalisés de la référence et lignes `.bim` de l'étude sur la région.
+
+    La référence a deux variants par marqueur de l'étude, dont un multiallélique
+    sur dix ; l'étude inverse un marqueur sur trois et en omet un allèle sur vingt.
+    """
+    generator = _generator(size, "harmonization")
+    positions, _ = _region_positions(size)
+    bases = np.array(list(BASES))
+    ref_indexes = generator.integers(0, 4, size=size.markers)
+    alt_indexes = (ref_indexes + generator.integers(1, 4, size=size.markers)) % 4
+    reference_rows = []
+    study_lines = []
+    for index, position in enumerate(positions.tolist()):
+        ref, alt = str(bases[ref_indexes[index]]), str(bases[alt_indexes[index]])
+        reference_rows.append([TARGET_CHROMOSOME, str(position), f"rs{index}", ref, alt])
+        if index % 10 == 0:
+            other = next(base for base in BASES if base not in (ref, alt))
+            reference_rows.append([TARGET_CHROMOSOME, str(position), ".", ref, other])
+        else:
+            reference_rows.append([TARGET_CHROMOSOME, str(position + 1), ".", ref, alt])
+        allele_1, allele_2 = (ref, alt) if index % 3 else (alt, ref)
+        if index % 20 == 0:
+            allele_2 = "0"
+        study_lines.append(
+            f"{TARGET_CHROMOSOME}\t{region_variant_id(index)}\t0\t{position}\t{allele_1}\t{allele_2}\n"
+        )
+    return reference_rows, study_lines
@@ -0,0 +1,198 @@
+"""Exécute les cas mesurés et ajoute les résultats à un historique JSON.
+
+Chaque répétition s'exécute dans un processus lancé par `spawn` et retiré après
+une seule tâche : le pic de mémoire résidente (`ru_maxrss`) n'hérite ni du
+processus principal ni d'une répétition précédente. Le pic relevé juste avant
+l'appel est conservé séparément, afin de distinguer la mémoire des entrées de
+celle consommée par la fonction mesurée.
+"""
+
+from __future__ import annotations
+
+import argparse
+import itertools
+import multiprocessing
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections.abc import Sequence
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any
+
+from benchmarks.cases import CASES
+from benchmarks.cohorts import BenchmarkError, CohortSize, validate_cohort_size
+from effet_fondateur.audit import atomic_write_json, read_json
+from effet_fondateur.orchestrator.state import utc_now
+
+
+HISTORY_SCHEMA_VERSION = "1.0.0"
+DEFAULT_HISTORY_PATH = Path(__file__).resolve().parent / "results" / "history.json"
+
+
+def _peak_rss_bytes() -> int:
+    # Linux exprime `ru_maxrss` en kio, macOS en octets.
+    scale = 1 if sys.platform == "darwin" else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+
+def _measure(case_name: str, size: CohortSize, case_dir: Path) -> dict[str, Any]:
+    """Prépare puis chronomètre un appel dans le processus de mesure."""
+    call = CASES[case_name].prepare(size, case_dir)
+    baseline_rss_bytes = _peak_rss_bytes()
+    start = time.perf_counter()
+    call()
+    wall_seconds = time.perf_counter() - start
+    return {
+        "wall_seconds": wall_seconds,
+        "baseline_rss_bytes": baseline_rss_bytes,
+        "peak_rss_bytes": _peak_rss_bytes(),
+    }
+
+
+def run_case(case_name: str, size: CohortSize, work_dir: Path, repeat: int) -> dict[str, Any]:
+    """Prépare les fichiers d'un cas puis mesure `repeat` appels isolés."""
+    case = CASES[case_name]
+    case_dir = work_dir / size.key / case_name
+    case_dir.mkdir(parents=True, exist_ok=True)
+    if case.setup is not None:
+        case.setup(size, case_dir)
+    measurements = []
+    for _ in range(repeat):
+        with ProcessPoolExecutor(
+            max_workers=1,
+            mp_context=multiprocessing.get_context("spawn"),
+            max_tasks_per_child=1,
+        ) as executor:
+            measurements.append(executor.submit(_measure, case_name, size, case_dir).result())
+    wall_seconds = [measurement["wall_seconds"] for measurement in measurements]
+    return {
+        "case": case_name,
+        "target": case.target,
+        "size": size.as_dict(),
+        "wall_seconds": wall_seconds,
+        "min_seconds": min(wall_seconds),
+        "median_seconds": statistics.median(wall_seconds),
+        "baseline_rss_bytes": max(measurement["baseline_rss_bytes"] for measurement in measurements),
+        "peak_rss_bytes": max(measurement["peak_rss_bytes"] for measurement in measurements),
+    }
+
+
+def _git_revision() -> str | None:
+    try:
+        completed = subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=Path(__file__).resolve().parent,
+            capture_output=True,
+            check=False,
+            text=True,
+            timeout=10,
+        )
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    if completed.returncode != 0:
+        return None
+    return completed.stdout.strip() or None
+
+
+def _read_history(path: Path) -> dict[str, Any]:
+    if not path.is_file():
+        return {"schema_version": HISTORY_SCHEMA_VERSION, "runs": []}
+    history = read_json(path)
+    if history.get("schema_version") != HISTORY_SCHEMA_VERSION or not isinstance(
+        history.get("runs"), list
+    ):
+        raise BenchmarkError("benchmark_history_invalid")
+    return history
+
+
+def _previous_result(history: dict[str, Any], result: dict[str, Any]) -> dict[str, Any] | None:
+    for run in reversed(history["runs"]):
+        for previous in run["results"]:
+            if previous["case"] == result["case"] and previous["size"] == result["size"]:
+                return previous
+    return None
+
+
+def _format_result(result: dict[str, Any], previous: dict[str, Any] | None) -> str:
+    size = CohortSize(**result["size"])
+    line = (
+        f"{result['case']:<18} {size.key:<32} médiane {result['median_seconds']:.4f} s "
+        f"min {result['min_seconds']:.4f} s pic RSS {result['peak_rss_bytes'] / 2**20:.1f} Mio"
+    )
+    if previous is not None and previous["median_seconds"] > 0:
+        line += f" (×{result['median_seconds'] / previous['median_seconds']:.2f} vs précédent)"
+    return line
+
+
+def _build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="benchmarks",
+        description="Mesure les fonctions coûteuses du pipeline sur des cohortes synthétiques.",
+    )
+    parser.add_argument("--samples", type=int, nargs="+", default=[200])
+    parser.add_argument("--markers", type=int, nargs="+", default=[5000])
+    parser.add_argument("--carriers", type=int, nargs="+", default=[12])
+    parser.add_argument("--seed", type=int, default=20240601)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--case", dest="cases", choices=sorted(CASES), action="append")
+    parser.add_argument("--history", type=Path, default=DEFAULT_HISTORY_PATH)
+    parser.add_argument("--label", default=None, help="Étiquette libre de la série de mesures.")
+    parser.add_argument(
+        "--work-dir",
+        type=Path,
+        default=None,
+        help="Conserve les cohortes générées dans ce dossier au lieu d'un dossier temporaire.",
+    )
+    return parser
+
+
+def main(arguments: Sequence[str] | None = None) -> int:
+    parsed = _build_parser().parse_args(arguments)
+    if parsed.repeat < 1:
+        print("--repeat doit être un entier positif", file=sys.stderr)
+        return 2
+    sizes = [
+        CohortSize(samples, markers, carriers, parsed.seed)
+        for samples, markers, carriers in itertools.product(
+            parsed.samples, parsed.markers, parsed.carriers
+        )
+    ]
+    try:
+        for size in sizes:
+            validate_cohort_size(size)
+        history = _read_history(parsed.history)
+    except BenchmarkError as error:
+        print(error, file=sys.stderr)
+        return 2
+    case_names = parsed.cases or list(CASES)
+    with tempfile.TemporaryDirectory(prefix="effet_fondateur_bench_") as temporary:
+        work_dir = parsed.work_dir or Path(temporary)
+        results = []
+        for size in sizes:
+            for case_name in case_names:
+                result = run_case(case_name, size, work_dir, parsed.repeat)
+                print(_format_result(result, _previous_result(history, result)))
+                results.append(result)
+    history["runs"].append({
+        "recorded_at": utc_now(),
+        "label": parsed.label,
+        "git_revision": _git_revision(),
+        "python_version": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "repeat": parsed.repeat,
+        "results": results,
+    })
+    parsed.history.parent.mkdir(parents=True, exist_ok=True)
+    atomic_write_json(parsed.history, history)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
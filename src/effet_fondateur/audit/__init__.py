@@ -1,12 +1,17 @@
 """Écriture atomique et traçabilité des runs V2."""
 
-from .checksums import md5_file, sha256_file
+from .checksums import file_digests, hash_files, md5_file, sha256_file
 from .io import append_json_event, atomic_write_json, read_json
+from .tracing import trace_span, traced
 
 __all__ = [
     "append_json_event",
     "atomic_write_json",
+    "file_digests",
+    "hash_files",
     "md5_file",
     "read_json",
     "sha256_file",
+    "trace_span",
+    "traced",
 ]
@@ -1,24 +1,97 @@
-"""Calcul d'empreintes reproductibles pour les artefacts du pipeline."""
+"""Calcul d'empreintes reproductibles pour les artefacts du pipeline.
+
+`file_digests` calcule toutes les empreintes demandées en une seule lecture,
+par blocs de `HASH_CHUNK_SIZE` relus dans un même tampon. `hash_files` répartit
+plusieurs fichiers sur un pool de fils partagé par tout le processus : hashlib
+libère le GIL pendant le calcul, et la taille du pool borne le nombre de
+lectures simultanées, quel que soit le nombre d'étapes en cours.
+"""
 
 from __future__ import annotations
 
 import hashlib
+import os
+import threading
+from collections.abc import Callable, Iterable
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import Any, TypeVar
+
+from .tracing import traced
+
+
+HASH_CHUNK_SIZE = 8 * 1024 * 1024
+HASHING_WORKERS = min(8, os.cpu_count() or 1)
+
+_T = TypeVar("_T")
+
+# Pool du processus courant ; le pid associé détecte un processus forké, dont
+# les fils du pool parent n'existent plus.
+_pool_lock = threading.Lock()
+_pool: tuple[int, ThreadPoolExecutor] | None = None
+
+
+def _new_digest(algorithm: str) -> Any:
+    if algorithm == "md5":
+        # MD5 fournisseur des fichiers publics, sans usage cryptographique.
+        return hashlib.md5(usedforsecurity=False)
+    return hashlib.new(algorithm)
 
 
-def md5_file(path: Path, chunk_size: int = 1024 * 1024) -> str:
+@traced("file_digests", "hashing")
+def file_digests(
+    path: Path,
+    algorithms: Iterable[str] = ("sha256",),
+    chunk_size: int = HASH_CHUNK_SIZE,
+) -> dict[str, str]:
+    """Calcule plusieurs empreintes d'un fichier en une seule lecture."""
+    digests = {algorithm: _new_digest(algorithm) for algorithm in algorithms}
+    with path.open("rb", buffering=0) as input_file:
+        # Un petit document n'alloue que sa taille, pas un bloc complet.
+        buffer = bytearray(min(chunk_size, os.fstat(input_file.fileno()).st_size or 1))
+        view = memoryview(buffer)
+        while size := input_file.readinto(buffer):
+            for digest in digests.values():
+                digest.update(view[:size])
+    return {algorithm: digest.hexdigest() for algorithm, digest in digests.items()}
+
+
+def md5_file(path: Path, chunk_size: int = HASH_CHUNK_SIZE) -> str:
     """Calcule le MD5 fournisseur d'un fichier public sans usage cryptographique."""
-    digest = hashlib.md5(usedforsecurity=False)
-    with path.open("rb") as input_file:
-        while chunk := input_file.read(chunk_size):
-            digest.update(chunk)
-    return digest.hexdigest()
+    return file_digests(path, ("md5",), chunk_size)["md5"]
 
 
-def sha256_file(path: Path, chunk_size: int = 1024 * 1024) -> str:
+def sha256_file(path: Path, chunk_size: int = HASH_CHUNK_SIZE) -> str:
     """Calcule l'empreinte SHA-256 d'un fichier sans le charger en mémoire."""
-    digest = hashlib.sha256()
-    with path.open("rb") as input_file:
-        while chunk := input_file.read(chunk_size):
-            digest.update(chunk)
-    return digest.hexdigest()
+    return file_digests(path, ("sha256",), chunk_size)["sha256"]
+
+
+def _hashing_pool() -> ThreadPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None or _pool[0] != os.getpid():
+            _pool = (
+                os.getpid(),
+                ThreadPoolExecutor(HASHING_WORKERS, thread_name_prefix="hashing"),
+            )
+        return _pool[1]
+
+
+def hash_files(
+    paths: Iterable[Path],
+    hasher: Callable[[Path], _T] = sha256_file,
+) -> list[_T]:
+    """Applique `hasher` à chaque fichier dans le pool partagé, dans l'ordre reçu.
+
+    La première exception levée par `hasher`, dans l'ordre des fichiers, est
+    propagée. `hasher` ne doit pas lui-même appeler `hash_files`.
+    """
+    paths = list(paths)
+    if len(paths) <= 1:
+        return [hasher(path) for path in paths]
+    futures = [_hashing_pool().submit(hasher, path) for path in paths]
+    try:
+        return [future.result() for future in futures]
+    finally:
+        for future in futures:
+            future.cancel()
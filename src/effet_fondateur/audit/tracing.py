@@ -0,0 +1,187 @@
+"""Intervalles chronométrés d'un run au format Chrome trace-event.
+
+Un intervalle (`trace_span`, `traced`) n'écrit rien tant que le processus n'a
+pas de trace active. L'orchestrateur active la trace de son run avec
+`run_tracing` ; les scripts d'étape et leurs processus auxiliaires la
+reçoivent par les variables d'environnement de `tracing_environment`.
+
+Chaque processus écrit ses propres événements complets (`"ph": "X"`), une
+ligne JSON par intervalle, dans `trace/` à la racine du run : aucun verrou
+n'est partagé entre processus. `export_chrome_trace` fusionne ces fragments
+dans `trace.json`, lisible hors ligne par Perfetto ou `chrome://tracing`, avec
+un couloir par processus et par fil. Les horodatages sont ceux de l'horloge
+murale, pour aligner des processus et des reprises successives.
+"""
+
+from __future__ import annotations
+
+import functools
+import json
+import os
+import threading
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, TextIO, TypeVar
+from uuid import uuid4
+
+from .io import atomic_write_json
+
+
+TRACE_DIR_VARIABLE = "EFFET_FONDATEUR_TRACE_DIR"
+TRACE_LABEL_VARIABLE = "EFFET_FONDATEUR_TRACE_LABEL"
+TRACE_FRAGMENTS_DIR = "trace"
+TRACE_FILE_NAME = "trace.json"
+
+_Function = TypeVar("_Function", bound=Callable[..., Any])
+
+
+class _TraceWriter:
+    """Fragment de trace d'un processus ; partagé par ses fils sous un verrou."""
+
+    def __init__(self, trace_dir: Path, label: str) -> None:
+        trace_dir.mkdir(parents=True, exist_ok=True)
+        self.trace_dir = trace_dir
+        self.label = label
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+        self._named_threads: set[int] = set()
+        path = trace_dir / f"{label}.{self._pid}.{uuid4().hex[:8]}.jsonl"
+        self._output: TextIO = path.open("a", encoding="utf-8")
+        self._write({"name": "process_name", "ph": "M", "pid": self._pid, "args": {"name": label}})
+
+    def _write(self, event: dict[str, Any]) -> None:
+        self._output.write(json.dumps(event, ensure_ascii=False, sort_keys=True))
+        self._output.write("\n")
+        self._output.flush()
+
+    def record(
+        self, name: str, category: str, started_us: float, duration_us: float, args: dict[str, Any]
+    ) -> None:
+        thread_id = threading.get_native_id()
+        with self._lock:
+            if self._output.closed:
+                return
+            if thread_id not in self._named_threads:
+                self._named_threads.add(thread_id)
+                self._write({
+                    "name": "thread_name",
+                    "ph": "M",
+                    "pid": self._pid,
+                    "tid": thread_id,
+                    "args": {"name": threading.current_thread().name},
+                })
+            self._write({
+                "name": name,
+                "cat": category,
+                "ph": "X",
+                "ts": started_us,
+                "dur": duration_us,
+                "pid": self._pid,
+                "tid": thread_id,
+                "args": args,
+            })
+
+    def close(self) -> None:
+        with self._lock:
+            self._output.close()
+
+
+# Trace du processus courant : `None` si inactive. Le pid associé détecte un
+# processus forké, qui ouvre alors son propre fragment.
+_state_lock = threading.Lock()
+_state: tuple[int, _TraceWriter | None] | None = None
+
+
+def _active_writer() -> _TraceWriter | None:
+    global _state
+    state = _state
+    if state is not None and state[0] == os.getpid():
+        return state[1]
+    with _state_lock:
+        if _state is None or _state[0] != os.getpid():
+            trace_dir = os.environ.get(TRACE_DIR_VARIABLE)
+            writer = None
+            if trace_dir:
+                label = os.environ.get(TRACE_LABEL_VARIABLE) or "process"
+                writer = _TraceWriter(Path(trace_dir), label)
+            _state = (os.getpid(), writer)
+        return _state[1]
+
+
+@contextmanager
+def trace_span(name: str, category: str = "effet_fondateur", **args: Any) -> Iterator[None]:
+    """Chronomètre le bloc ; `args` doit rester agrégé et sérialisable en JSON."""
+    writer = _active_writer()
+    if writer is None:
+        yield
+        return
+    started_us = time.time_ns() / 1000
+    started_clock = time.perf_counter_ns()
+    try:
+        yield
+    finally:
+        duration_us = (time.perf_counter_ns() - started_clock) / 1000
+        writer.record(name, category, started_us, duration_us, args)
+
+
+def traced(name: str, category: str = "effet_fondateur") -> Callable[[_Function], _Function]:
+    """Décore une fonction pour chronométrer chacun de ses appels."""
+
+    def decorate(function: _Function) -> _Function:
+        @functools.wraps(function)
+        def wrapper(*arguments: Any, **keywords: Any) -> Any:
+            with trace_span(name, category):
+                return function(*arguments, **keywords)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorate
+
+
+def tracing_environment(label: str) -> dict[str, str]:
+    """Variables à transmettre à un processus enfant pour qu'il trace sous `label`."""
+    writer = _active_writer()
+    if writer is None:
+        return {}
+    return {TRACE_DIR_VARIABLE: str(writer.trace_dir), TRACE_LABEL_VARIABLE: label}
+
+
+@contextmanager
+def run_tracing(run_dir: Path, label: str = "orchestrator") -> Iterator[None]:
+    """Active la trace du run pour le processus courant, puis exporte `trace.json`."""
+    global _state
+    writer = _TraceWriter(run_dir / TRACE_FRAGMENTS_DIR, label)
+    with _state_lock:
+        previous_state = _state
+        _state = (os.getpid(), writer)
+    try:
+        yield
+    finally:
+        with _state_lock:
+            _state = previous_state
+        writer.close()
+        export_chrome_trace(run_dir)
+
+
+def export_chrome_trace(run_dir: Path) -> Path:
+    """Fusionne tous les fragments du run, reprises comprises, dans `trace.json`."""
+    metadata_events: list[dict[str, Any]] = []
+    span_events: list[dict[str, Any]] = []
+    for fragment_path in sorted((run_dir / TRACE_FRAGMENTS_DIR).glob("*.jsonl")):
+        with fragment_path.open(encoding="utf-8") as fragment:
+            for line in fragment:
+                try:
+                    event = json.loads(line)
+                except json.JSONDecodeError:
+                    # Dernière ligne d'un processus interrompu pendant l'écriture.
+                    continue
+                (metadata_events if event.get("ph") == "M" else span_events).append(event)
+    span_events.sort(key=lambda event: (event["ts"], -event["dur"]))
+    trace_path = run_dir / TRACE_FILE_NAME
+    atomic_write_json(
+        trace_path,
+        {"displayTimeUnit": "ms", "traceEvents": [*metadata_events, *span_events]},
+    )
+    return trace_path
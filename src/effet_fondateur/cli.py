@@ -15,7 +15,110 @@ from effet_fondateur.contracts import (
     validate_tsv_table,
 )
 from effet_fondateur.contracts.samples import SAMPLES_SCHEMA_NAME
-from effet_fondateur.orchestrator import PipelineError, resume_pipeline, run_pipeline
+from effet_fondateur.orchestrator import (
+    PipelineError,
+    ProfilingPolicy,
+    StageCache,
+    VerificationPolicy,
+    resume_pipeline,
+    run_pipeline,
+)
+from effet_fondateur.orchestrator.resources import (
+    collect_run_resources,
+    format_attempt_table,
+    format_stage_table,
+)
+
+
+def _add_stage_cache_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--stage-cache",
+        type=Path,
+        default=None,
+        help="Dossier du cache d'étapes partagé entre runs, adressé par signature.",
+    )
+    parser.add_argument(
+        "--stage-cache-max-mb",
+        type=int,
+        default=None,
+        help="Taille maximale du cache d'étapes ; les entrées les moins récentes sont retirées.",
+    )
+
+
+def _add_verification_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--verify",
+        choices=("full", "fast"),
+        default="full",
+        help="full relit chaque fichier ; fast réutilise les empreintes des fichiers inchangés.",
+    )
+    parser.add_argument(
+        "--verify-sample-rate",
+        type=float,
+        default=0.0,
+        help="Fraction des fichiers inchangés tout de même relus en mode fast.",
+    )
+
+
+def _add_execution_mode_argument(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--execution-mode",
+        choices=("subprocess", "warm"),
+        default="subprocess",
+        help="subprocess lance un interpréteur par étape ; warm forke un serveur préchauffé.",
+    )
+
+
+def _add_profiling_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--profile",
+        choices=("cprofile", "tracemalloc", "sampling"),
+        default=None,
+        help="Profileur appliqué aux étapes exécutées ; diagnostic écrit dans leur dossier.",
+    )
+    parser.add_argument(
+        "--profile-stage",
+        action="append",
+        default=[],
+        metavar="STAGE_NAME",
+        help="Étape à profiler, répétable ; par défaut toutes les étapes exécutées.",
+    )
+
+
+def _add_trace_argument(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--trace",
+        action="store_true",
+        help="Écrire la chronologie des étapes et des outils dans trace.json (Perfetto).",
+    )
+
+
+def _profiling(parsed_arguments: argparse.Namespace) -> ProfilingPolicy | None:
+    if parsed_arguments.profile is None:
+        if parsed_arguments.profile_stage:
+            raise PipelineError("--profile-stage exige --profile.")
+        return None
+    return ProfilingPolicy(
+        mode=parsed_arguments.profile,
+        stages=tuple(parsed_arguments.profile_stage),
+    )
+
+
+def _verification(parsed_arguments: argparse.Namespace) -> VerificationPolicy:
+    return VerificationPolicy(
+        mode=parsed_arguments.verify,
+        sample_rate=parsed_arguments.verify_sample_rate,
+    )
+
+
+def _stage_cache(parsed_arguments: argparse.Namespace) -> StageCache | None:
+    if parsed_arguments.stage_cache is None:
+        return None
+    max_bytes = parsed_arguments.stage_cache_max_mb
+    return StageCache(
+        root=parsed_arguments.stage_cache,
+        max_bytes=None if max_bytes is None else max_bytes * 1024 * 1024,
+    )
 
 
 def _build_parser() -> argparse.ArgumentParser:
@@ -35,12 +138,34 @@ def _build_parser() -> argparse.ArgumentParser:
     )
     run_parser.add_argument("--config", type=Path, required=True)
     run_parser.add_argument("--runs-dir", type=Path, default=Path("data/runs"))
+    run_parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="Nombre maximal d'étapes indépendantes exécutées simultanément.",
+    )
+    _add_stage_cache_arguments(run_parser)
+    _add_verification_arguments(run_parser)
+    _add_execution_mode_argument(run_parser)
+    _add_profiling_arguments(run_parser)
+    _add_trace_argument(run_parser)
 
     resume_parser = subparsers.add_parser(
         "resume",
         help="Reprendre un run V2 après validation de son état.",
     )
     resume_parser.add_argument("--run-dir", type=Path, required=True)
+    resume_parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="Nombre maximal d'étapes indépendantes exécutées simultanément.",
+    )
+    _add_stage_cache_arguments(resume_parser)
+    _add_verification_arguments(resume_parser)
+    _add_execution_mode_argument(resume_parser)
+    _add_profiling_arguments(resume_parser)
+    _add_trace_argument(resume_parser)
 
     samples_parser = subparsers.add_parser(
         "validate-samples",
@@ -55,6 +180,17 @@ def _build_parser() -> argparse.ArgumentParser:
     )
     cohorts_parser.add_argument("--table", type=Path, required=True)
     cohorts_parser.add_argument("--samples-master", type=Path, required=True)
+
+    stats_parser = subparsers.add_parser(
+        "stats",
+        help="Tabuler en TSV les ressources consommées par les étapes d'un ou plusieurs runs.",
+    )
+    stats_parser.add_argument("run_dirs", type=Path, nargs="+", metavar="run-dir")
+    stats_parser.add_argument(
+        "--by-stage",
+        action="store_true",
+        help="Une ligne par étape avec les pics observés, au lieu d'une ligne par tentative.",
+    )
     return parser
 
 
@@ -73,7 +209,16 @@ def main(arguments: Sequence[str] | None = None) -> int:
 
     if parsed_arguments.command == "run":
         try:
-            run_dir = run_pipeline(parsed_arguments.config, parsed_arguments.runs_dir)
+            run_dir = run_pipeline(
+                parsed_arguments.config,
+                parsed_arguments.runs_dir,
+                jobs=parsed_arguments.jobs,
+                stage_cache=_stage_cache(parsed_arguments),
+                verification=_verification(parsed_arguments),
+                execution_mode=parsed_arguments.execution_mode,
+                profiling=_profiling(parsed_arguments),
+                trace=parsed_arguments.trace,
+            )
         except (ConfigurationError, PipelineError, OSError, ValueError) as error:
             parser.error(str(error))
         print(f"Run V2 créé : {run_dir}")
@@ -81,7 +226,15 @@ def main(arguments: Sequence[str] | None = None) -> int:
 
     if parsed_arguments.command == "resume":
         try:
-            run_dir = resume_pipeline(parsed_arguments.run_dir)
+            run_dir = resume_pipeline(
+                parsed_arguments.run_dir,
+                jobs=parsed_arguments.jobs,
+                stage_cache=_stage_cache(parsed_arguments),
+                verification=_verification(parsed_arguments),
+                execution_mode=parsed_arguments.execution_mode,
+                profiling=_profiling(parsed_arguments),
+                trace=parsed_arguments.trace,
+            )
         except (ConfigurationError, PipelineError, OSError, ValueError) as error:
             parser.error(str(error))
         print(f"Run V2 repris : {run_dir}")
@@ -114,6 +267,19 @@ def main(arguments: Sequence[str] | None = None) -> int:
         print(f"Cohortes valides : {validated_table.row_count} lignes")
         return 0
 
+    if parsed_arguments.command == "stats":
+        try:
+            records = [
+                record
+                for run_dir in parsed_arguments.run_dirs
+                for record in collect_run_resources(run_dir)
+            ]
+        except (PipelineError, OSError, ValueError) as error:
+            parser.error(str(error))
+        formatter = format_stage_table if parsed_arguments.by_stage else format_attempt_table
+        print(formatter(records), end="")
+        return 0
+
     parser.error(f"Commande inconnue : {parsed_arguments.command}")
     return 2
 
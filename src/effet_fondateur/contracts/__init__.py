@@ -3,19 +3,32 @@
 from .artifacts import build_file_artifact
 from .cohorts import validate_cohorts_frozen
 from .configuration import ConfigurationError, load_pipeline_config
-from .documents import DocumentValidationError, validate_json_document
+from .documents import DocumentValidationError, document_validator, validate_json_document
 from .samples import validate_samples_master
-from .tables import TableValidationError, ValidatedTable, validate_tsv_table
+from .sidecars import TableColumns, load_table_columns, write_table_sidecar
+from .tables import (
+    TableStream,
+    TableValidationError,
+    ValidatedTable,
+    stream_tsv_table,
+    validate_tsv_table,
+)
 
 __all__ = [
     "ConfigurationError",
     "DocumentValidationError",
+    "TableColumns",
+    "TableStream",
     "TableValidationError",
     "ValidatedTable",
     "build_file_artifact",
+    "document_validator",
     "load_pipeline_config",
+    "load_table_columns",
+    "stream_tsv_table",
     "validate_cohorts_frozen",
     "validate_json_document",
     "validate_samples_master",
     "validate_tsv_table",
+    "write_table_sidecar",
 ]
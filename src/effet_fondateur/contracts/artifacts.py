@@ -6,6 +6,8 @@ from pathlib import Path
 from typing import Literal
 
 from effet_fondateur.audit import sha256_file
+from effet_fondateur.contracts.sidecars import write_table_sidecar
+from effet_fondateur.contracts.tables import TableValidationError, ValidatedTable
 
 
 Sensitivity = Literal["public", "internal", "sensitive_genetic"]
@@ -26,16 +28,36 @@ def build_file_artifact(
     sample_set_id: str | None = None,
     variant_set_id: str | None = None,
     sensitivity: Sensitivity = "internal",
+    columnar_table: ValidatedTable | None = None,
 ) -> dict[str, str | None]:
-    """Décrit un fichier existant et calcule son empreinte au dernier moment."""
-    return {
+    """Décrit un fichier existant et calcule son empreinte au dernier moment.
+
+    `columnar_table` est la table que l'étape a déjà validée pour ce fichier :
+    son compagnon `.columns.npz` est écrit à côté, sans relire ni revalider le
+    TSV. Son empreinte est déclarée dans `columnar_sidecar_sha256` : les
+    contrôles d'intégrité la vérifient comme celle du TSV, et
+    `load_table_columns` ignore un compagnon qui ne lui correspond plus.
+    """
+    sha256 = sha256_file(physical_path)
+    sidecar_sha256 = None
+    if columnar_table is not None:
+        if (
+            columnar_table.path != physical_path
+            or columnar_table.schema_name != schema_name
+            or columnar_table.sha256 != sha256
+        ):
+            raise TableValidationError(
+                f"Table validée sans rapport avec l'artefact : {published_path}"
+            )
+        sidecar_sha256 = sha256_file(write_table_sidecar(columnar_table))
+    artifact = {
         "artifact_id": artifact_id,
         "artifact_type": artifact_type,
         "path": published_path,
         "media_type": media_type,
         "schema_name": schema_name,
         "schema_version": schema_version,
-        "sha256": sha256_file(physical_path),
+        "sha256": sha256,
         "producer_stage": producer_stage,
         "producer_signature": producer_signature,
         "assembly": assembly,
@@ -43,3 +65,6 @@ def build_file_artifact(
         "variant_set_id": variant_set_id,
         "sensitivity": sensitivity,
     }
+    if sidecar_sha256 is not None:
+        artifact["columnar_sidecar_sha256"] = sidecar_sha256
+    return artifact
@@ -16,17 +16,27 @@ class DocumentValidationError(ValueError):
     """Signale qu'un document ne respecte pas son schéma versionné."""
 
 
-def validate_json_document(
-    document: dict[str, Any],
-    schema_name: str,
-    schemas_dir: Path = DEFAULT_SCHEMAS_DIR,
-) -> None:
-    """Valide un objet Python avec un schéma JSON local nommé explicitement."""
-    schema_path = schemas_dir / schema_name
+# Un validateur est réutilisé tant que le texte du schéma est inchangé : la
+# clé inclut ce texte, de sorte qu'un schéma modifié sur disque est recompilé.
+_DOCUMENT_VALIDATORS: dict[
+    tuple[Path, str, str | None], jsonschema.Draft202012Validator
+] = {}
+
+
+def document_validator(
+    schema_path: Path, definition: str | None = None
+) -> jsonschema.Draft202012Validator:
+    """Charge, contrôle et compile un schéma de document, une fois par contenu."""
     try:
-        schema = json.loads(schema_path.read_text(encoding="utf-8"))
+        schema_text = schema_path.read_text(encoding="utf-8")
     except FileNotFoundError as error:
         raise DocumentValidationError(f"Schéma introuvable : {schema_path}") from error
+    cache_key = (schema_path, schema_text, definition)
+    validator = _DOCUMENT_VALIDATORS.get(cache_key)
+    if validator is not None:
+        return validator
+    try:
+        schema = json.loads(schema_text)
     except json.JSONDecodeError as error:
         raise DocumentValidationError(f"Schéma JSON invalide : {schema_path}") from error
 
@@ -35,16 +45,44 @@ def validate_json_document(
     except jsonschema.SchemaError as error:
         raise DocumentValidationError(f"Schéma non conforme : {schema_path}") from error
 
+    if definition is not None:
+        if definition not in schema.get("$defs", {}):
+            raise DocumentValidationError(
+                f"Définition absente du schéma {schema_path} : {definition}"
+            )
+        # Les références internes `#/$defs/...` restent résolues dans ce schéma.
+        schema = {
+            "$schema": schema["$schema"],
+            "$defs": schema["$defs"],
+            "$ref": f"#/$defs/{definition}",
+        }
     validator = jsonschema.Draft202012Validator(
         schema,
         format_checker=jsonschema.Draft202012Validator.FORMAT_CHECKER,
     )
+    _DOCUMENT_VALIDATORS[cache_key] = validator
+    return validator
+
+
+def validate_json_document(
+    document: dict[str, Any],
+    schema_name: str,
+    schemas_dir: Path = DEFAULT_SCHEMAS_DIR,
+    definition: str | None = None,
+) -> None:
+    """Valide un objet Python avec un schéma JSON local nommé explicitement.
+
+    Avec `definition`, seul le fragment `#/$defs/<definition>` du schéma
+    s'applique.
+    """
+    validator = document_validator(schemas_dir / schema_name, definition)
     errors = sorted(validator.iter_errors(document), key=lambda item: list(item.absolute_path))
     if errors:
         first_error = errors[0]
         validation_path = ".".join(str(part) for part in first_error.absolute_path)
         validation_path = validation_path or "<racine>"
         raise DocumentValidationError(
-            f"Document invalide pour {schema_name} à {validation_path} : "
+            f"Document invalide pour {schema_name}"
+            f"{'' if definition is None else f'#/$defs/{definition}'} à {validation_path} : "
             f"{first_error.message}"
         )
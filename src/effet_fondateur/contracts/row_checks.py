@@ -0,0 +1,222 @@
+"""Compilation des schémas de ligne TSV en prédicats Python spécialisés.
+
+Le prédicat compilé répond seulement « ligne valide ou non » ; il reproduit
+exactement la sémantique Draft 2020-12 des mots-clés utilisés par les schémas
+tabulaires. Un mot-clé non pris en charge rend le schéma non compilable : la
+validation complète par jsonschema reste alors appliquée à chaque ligne.
+"""
+
+from __future__ import annotations
+
+import re
+from collections.abc import Callable, Mapping
+from typing import Any
+
+
+Check = Callable[[Any], bool]
+
+# Mots-clés sans effet sur la validité. `format` n'est qu'une annotation tant
+# que le validateur de table est construit sans vérificateur de formats.
+_ANNOTATIONS = frozenset({
+    "$schema", "$id", "$comment", "$defs", "title", "description",
+    "examples", "default", "deprecated", "readOnly", "writeOnly", "format",
+})
+_REFERENCE_PREFIX = "#/$defs/"
+
+
+class UnsupportedSchemaError(Exception):
+    """Signale un mot-clé hors du sous-ensemble compilé."""
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+_TYPE_CHECKS: dict[str, Check] = {
+    "string": lambda value: isinstance(value, str),
+    "boolean": lambda value: isinstance(value, bool),
+    "null": lambda value: value is None,
+    "number": _is_number,
+    "integer": lambda value: (isinstance(value, int) and not isinstance(value, bool)) or (
+        isinstance(value, float) and value.is_integer()
+    ),
+    "object": lambda value: isinstance(value, dict),
+    "array": lambda value: isinstance(value, list),
+}
+
+
+def _json_equal(first: Any, second: Any) -> bool:
+    # JSON distingue les booléens des nombres, contrairement à `True == 1`.
+    if isinstance(first, bool) or isinstance(second, bool):
+        return isinstance(first, bool) and isinstance(second, bool) and first is second
+    if isinstance(first, list) and isinstance(second, list):
+        return len(first) == len(second) and all(map(_json_equal, first, second))
+    if isinstance(first, dict) and isinstance(second, dict):
+        return first.keys() == second.keys() and all(
+            _json_equal(first[key], second[key]) for key in first
+        )
+    return first == second
+
+
+def _conjunction(checks: list[Check]) -> Check:
+    if not checks:
+        return lambda value: True
+    if len(checks) == 1:
+        return checks[0]
+    if len(checks) == 2:
+        first, second = checks
+        return lambda value: first(value) and second(value)
+    return lambda value: all(check(value) for check in checks)
+
+
+def _type_check(declared: str | list[str]) -> Check:
+    names = [declared] if isinstance(declared, str) else list(declared)
+    try:
+        checks = [_TYPE_CHECKS[name] for name in names]
+    except KeyError as error:
+        raise UnsupportedSchemaError(f"type:{error.args[0]}") from error
+    if len(checks) == 1:
+        return checks[0]
+    return lambda value: any(check(value) for check in checks)
+
+
+def _enum_check(members: list[Any]) -> Check:
+    if all(isinstance(member, str) for member in members):
+        allowed = frozenset(members)
+        return lambda value: isinstance(value, str) and value in allowed
+    return lambda value: any(_json_equal(value, member) for member in members)
+
+
+def _bound_check(keyword: str, bound: Any) -> Check:
+    if not _is_number(bound):
+        raise UnsupportedSchemaError(keyword)
+    comparisons: dict[str, Check] = {
+        "minimum": lambda value: value >= bound,
+        "maximum": lambda value: value <= bound,
+        "exclusiveMinimum": lambda value: value > bound,
+        "exclusiveMaximum": lambda value: value < bound,
+    }
+    comparison = comparisons[keyword]
+    return lambda value: not _is_number(value) or comparison(value)
+
+
+class _Compiler:
+    def __init__(self, root: Mapping[str, Any]) -> None:
+        self._root = root
+        self._references: dict[str, Check] = {}
+        self._resolving: set[str] = set()
+
+    def reference(self, reference: str) -> Check:
+        if not reference.startswith(_REFERENCE_PREFIX):
+            raise UnsupportedSchemaError(f"$ref:{reference}")
+        if reference in self._references:
+            return self._references[reference]
+        if reference in self._resolving:
+            raise UnsupportedSchemaError(f"$ref_recursive:{reference}")
+        try:
+            target = self._root["$defs"][reference.removeprefix(_REFERENCE_PREFIX)]
+        except KeyError as error:
+            raise UnsupportedSchemaError(f"$ref_missing:{reference}") from error
+        self._resolving.add(reference)
+        try:
+            check = self.compile(target)
+        finally:
+            self._resolving.discard(reference)
+        self._references[reference] = check
+        return check
+
+    def compile(self, schema: Any) -> Check:
+        if schema is True:
+            return lambda value: True
+        if schema is False:
+            return lambda value: False
+        if not isinstance(schema, Mapping):
+            raise UnsupportedSchemaError("schema_not_object")
+        checks: list[Check] = []
+        object_keywords = {"properties", "required", "additionalProperties"}
+        for keyword, argument in schema.items():
+            if keyword in _ANNOTATIONS or keyword in object_keywords:
+                continue
+            if keyword in {"if", "then", "else"}:
+                continue
+            checks.append(self._keyword(keyword, argument))
+        if "if" in schema:
+            checks.append(self._conditional(schema))
+        if object_keywords & schema.keys():
+            checks.append(self._object(schema))
+        return _conjunction(checks)
+
+    def _keyword(self, keyword: str, argument: Any) -> Check:
+        if keyword == "$ref":
+            return self.reference(argument)
+        if keyword == "type":
+            return _type_check(argument)
+        if keyword == "enum":
+            return _enum_check(list(argument))
+        if keyword == "const":
+            return lambda value: _json_equal(value, argument)
+        if keyword == "pattern":
+            expression = re.compile(argument)
+            return lambda value: not isinstance(value, str) or expression.search(value) is not None
+        if keyword == "minLength":
+            return lambda value: not isinstance(value, str) or len(value) >= argument
+        if keyword == "maxLength":
+            return lambda value: not isinstance(value, str) or len(value) <= argument
+        if keyword in {"minimum", "maximum", "exclusiveMinimum", "exclusiveMaximum"}:
+            return _bound_check(keyword, argument)
+        if keyword in {"allOf", "anyOf", "oneOf"}:
+            checks = [self.compile(option) for option in argument]
+            if keyword == "allOf":
+                return _conjunction(checks)
+            if keyword == "anyOf":
+                return lambda value: any(check(value) for check in checks)
+            return lambda value: sum(1 for check in checks if check(value)) == 1
+        if keyword == "not":
+            negated = self.compile(argument)
+            return lambda value: not negated(value)
+        raise UnsupportedSchemaError(keyword)
+
+    def _conditional(self, schema: Mapping[str, Any]) -> Check:
+        condition = self.compile(schema["if"])
+        then_check = self.compile(schema.get("then", True))
+        else_check = self.compile(schema.get("else", True))
+        return lambda value: then_check(value) if condition(value) else else_check(value)
+
+    def _object(self, schema: Mapping[str, Any]) -> Check:
+        properties = tuple(
+            (name, self.compile(subschema))
+            for name, subschema in schema.get("properties", {}).items()
+        )
+        required = tuple(schema.get("required", ()))
+        additional = schema.get("additionalProperties", True)
+        known = frozenset(name for name, _ in properties)
+        additional_check = None if additional is True else self.compile(additional)
+
+        def check(value: Any) -> bool:
+            if not isinstance(value, dict):
+                return True
+            for name in required:
+                if name not in value:
+                    return False
+            for name, property_check in properties:
+                if name in value and not property_check(value[name]):
+                    return False
+            if additional_check is not None:
+                for name, item in value.items():
+                    if name not in known and not additional_check(item):
+                        return False
+            return True
+
+        return check
+
+
+def compile_schema_check(schema: Mapping[str, Any]) -> Check | None:
+    """Compile un schéma racine, ou retourne `None` s'il sort du sous-ensemble.
+
+    Les références locales `#/$defs/...` sont résolues depuis `schema`. Un
+    prédicat retourné n'accepte jamais une valeur que jsonschema refuserait.
+    """
+    try:
+        return _Compiler(schema).compile(schema)
+    except (UnsupportedSchemaError, re.error, TypeError):
+        return None
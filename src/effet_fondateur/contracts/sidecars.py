@@ -0,0 +1,265 @@
+"""Compagnons colonnaires typés des tables TSV publiées.
+
+Le TSV reste la source auditée : le compagnon `.columns.npz` n'est qu'une copie
+en colonnes de la table déjà validée, liée à l'empreinte exacte du TSV. Son
+propre SHA-256 est déclaré dans l'artefact du TSV et vérifié avec les autres
+empreintes de l'étape. Un lecteur ne l'utilise que si cette empreinte déclarée,
+celle du TSV, le schéma et sa version correspondent ; sinon la table est
+revalidée depuis le texte.
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import os
+import tempfile
+import zipfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from effet_fondateur.audit import sha256_file
+from effet_fondateur.contracts.documents import DEFAULT_SCHEMAS_DIR
+from effet_fondateur.contracts.tables import (
+    TableValidationError,
+    ValidatedTable,
+    validate_tsv_table,
+)
+
+
+SIDECAR_SUFFIX = ".columns.npz"
+SIDECAR_FORMAT_VERSION = "1.0.0"
+# Horodatage fixe des membres de l'archive : deux écritures d'une même table
+# produisent les mêmes octets, donc la même empreinte déclarée.
+_SIDECAR_MEMBER_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+
+
+def table_sidecar_path(table_path: Path) -> Path:
+    """Retourne le chemin du compagnon colonnaire d'une table TSV."""
+    return table_path.with_name(table_path.name + SIDECAR_SUFFIX)
+
+
+@dataclass(frozen=True)
+class TableColumns:
+    """Table validée exposée en colonnes NumPy.
+
+    `flags` couvre les colonnes booléennes et `text` toutes les autres, avec
+    une chaîne vide pour une cellule nulle ; `nulls` marque les cellules
+    décodées en `None`. `numbers` s'ajoute à `text` pour les colonnes dont
+    toutes les valeurs sont des nombres finis, avec NaN pour une cellule nulle.
+    """
+
+    path: Path
+    schema_name: str
+    schema_version: str
+    sha256: str
+    columns: tuple[str, ...]
+    row_count: int
+    from_sidecar: bool
+    text: dict[str, np.ndarray]
+    nulls: dict[str, np.ndarray]
+    flags: dict[str, np.ndarray]
+    numbers: dict[str, np.ndarray]
+
+    def rows(self) -> tuple[dict[str, Any], ...]:
+        """Reconstruit les lignes telles que `validate_tsv_table` les retourne."""
+        values: list[list[Any]] = []
+        for column in self.columns:
+            if column in self.flags:
+                decoded: list[Any] = self.flags[column].tolist()
+            else:
+                decoded = self.text[column].tolist()
+            for index in np.flatnonzero(self.nulls[column]).tolist():
+                decoded[index] = None
+            values.append(decoded)
+        return tuple(dict(zip(self.columns, row)) for row in zip(*values))
+
+
+def _column_arrays(values: list[Any]) -> dict[str, np.ndarray]:
+    nulls = np.fromiter((value is None for value in values), dtype=np.bool_, count=len(values))
+    if values and all(isinstance(value, bool) for value in values):
+        return {"flags": np.array(values, dtype=np.bool_), "nulls": nulls}
+    arrays = {
+        "text": np.array(["" if value is None else value for value in values], dtype=np.str_),
+        "nulls": nulls,
+    }
+    try:
+        numbers = [math.nan if value is None else float(value) for value in values]
+    except (TypeError, ValueError):
+        return arrays
+    if all(math.isfinite(number) for number, null in zip(numbers, nulls.tolist()) if not null):
+        arrays["numbers"] = np.array(numbers, dtype=np.float64)
+    return arrays
+
+
+def _columns_from_table(
+    table: ValidatedTable, columns: tuple[str, ...]
+) -> dict[str, dict[str, np.ndarray]]:
+    return {column: _column_arrays([row[column] for row in table.rows]) for column in columns}
+
+
+def _schema_contract(schema_name: str, schemas_dir: Path) -> tuple[str, tuple[str, ...]]:
+    schema_path = schemas_dir / schema_name
+    try:
+        table_contract = json.loads(schema_path.read_text(encoding="utf-8"))["x-tsv"]
+        return table_contract["schema_version"], tuple(table_contract["columns"])
+    except (OSError, ValueError, KeyError) as error:
+        raise TableValidationError(f"Schéma sans contrat TSV : {schema_path}") from error
+
+
+def _table_columns(
+    table_path: Path,
+    schema_name: str,
+    schema_version: str,
+    sha256: str,
+    columns: tuple[str, ...],
+    row_count: int,
+    arrays: dict[str, dict[str, np.ndarray]],
+    from_sidecar: bool,
+) -> TableColumns:
+    return TableColumns(
+        path=table_path,
+        schema_name=schema_name,
+        schema_version=schema_version,
+        sha256=sha256,
+        columns=columns,
+        row_count=row_count,
+        from_sidecar=from_sidecar,
+        text={column: arrays[column]["text"] for column in columns if "text" in arrays[column]},
+        nulls={column: arrays[column]["nulls"] for column in columns},
+        flags={column: arrays[column]["flags"] for column in columns if "flags" in arrays[column]},
+        numbers={
+            column: arrays[column]["numbers"] for column in columns if "numbers" in arrays[column]
+        },
+    )
+
+
+def _write_archive(output_file: Any, payload: dict[str, np.ndarray]) -> None:
+    """Écrit un `.npz` non compressé lisible par `np.load`, sans horodatage variable."""
+    with zipfile.ZipFile(output_file, "w", compression=zipfile.ZIP_STORED) as archive:
+        for name, array in payload.items():
+            member = zipfile.ZipInfo(f"{name}.npy", date_time=_SIDECAR_MEMBER_DATE_TIME)
+            with archive.open(member, "w", force_zip64=True) as member_file:
+                np.lib.format.write_array(member_file, np.asanyarray(array), allow_pickle=False)
+
+
+def write_table_sidecar(table: ValidatedTable, schemas_dir: Path = DEFAULT_SCHEMAS_DIR) -> Path:
+    """Écrit atomiquement le compagnon colonnaire d'une table déjà validée."""
+    _, columns = _schema_contract(table.schema_name, schemas_dir)
+    arrays = _columns_from_table(table, columns)
+    metadata = {
+        "format_version": SIDECAR_FORMAT_VERSION,
+        "schema_name": table.schema_name,
+        "schema_version": table.schema_version,
+        "source_sha256": table.sha256,
+        "columns": list(columns),
+        "row_count": table.row_count,
+    }
+    payload = {"metadata": np.array(json.dumps(metadata, sort_keys=True))}
+    for index, column in enumerate(columns):
+        for kind, array in arrays[column].items():
+            payload[f"{kind}_{index}"] = array
+    sidecar_path = table_sidecar_path(table.path)
+    file_descriptor, temporary_name = tempfile.mkstemp(
+        prefix=f".{sidecar_path.name}.", suffix=".tmp", dir=sidecar_path.parent
+    )
+    temporary_path = Path(temporary_name)
+    try:
+        with os.fdopen(file_descriptor, "wb") as output_file:
+            _write_archive(output_file, payload)
+        os.replace(temporary_path, sidecar_path)
+    except BaseException:
+        temporary_path.unlink(missing_ok=True)
+        raise
+    return sidecar_path
+
+
+def _read_sidecar(
+    table_path: Path,
+    schema_name: str,
+    schema_version: str,
+    columns: tuple[str, ...],
+    sha256: str,
+    sidecar_sha256: str,
+) -> tuple[int, dict[str, dict[str, np.ndarray]]] | None:
+    sidecar_path = table_sidecar_path(table_path)
+    if not sidecar_path.is_file():
+        return None
+    try:
+        # Les métadonnées se recopient : seule l'empreinte déclarée couvre le contenu.
+        if sha256_file(sidecar_path) != sidecar_sha256:
+            return None
+        with np.load(sidecar_path, allow_pickle=False) as archive:
+            metadata = json.loads(str(archive["metadata"]))
+            row_count = metadata.get("row_count")
+            if not isinstance(row_count, int) or metadata != {
+                "format_version": SIDECAR_FORMAT_VERSION,
+                "schema_name": schema_name,
+                "schema_version": schema_version,
+                "source_sha256": sha256,
+                "columns": list(columns),
+                "row_count": row_count,
+            }:
+                return None
+            arrays = {
+                column: {
+                    kind: archive[f"{kind}_{index}"]
+                    for kind in ("text", "flags", "nulls", "numbers")
+                    if f"{kind}_{index}" in archive.files
+                }
+                for index, column in enumerate(columns)
+            }
+    except (OSError, ValueError, KeyError, AttributeError, zipfile.BadZipFile):
+        return None
+    if any(
+        "nulls" not in column_arrays
+        or ("text" in column_arrays) == ("flags" in column_arrays)
+        or any(array.shape != (row_count,) for array in column_arrays.values())
+        for column_arrays in arrays.values()
+    ):
+        return None
+    return row_count, arrays
+
+
+def load_table_columns(
+    table_path: Path,
+    schema_name: str,
+    schemas_dir: Path = DEFAULT_SCHEMAS_DIR,
+    *,
+    expected_sha256: str | None = None,
+    expected_sidecar_sha256: str | None = None,
+) -> TableColumns:
+    """Charge une table en colonnes, depuis son compagnon s'il est à jour.
+
+    `expected_sha256`, lorsqu'il provient d'un artefact dont l'empreinte vient
+    d'être vérifiée, évite de relire le TSV pour le comparer au compagnon. Le
+    compagnon n'est lu que si son SHA-256 égale `expected_sidecar_sha256`,
+    l'empreinte `columnar_sidecar_sha256` de ce même artefact. Sans elle, ou
+    si le compagnon est absent, illisible ou périmé, la table est validée
+    depuis le TSV, comme avec `validate_tsv_table`.
+    """
+    schema_version, columns = _schema_contract(schema_name, schemas_dir)
+    sha256 = expected_sha256 or sha256_file(table_path)
+    sidecar = (
+        _read_sidecar(
+            table_path, schema_name, schema_version, columns, sha256, expected_sidecar_sha256
+        )
+        if expected_sidecar_sha256 is not None
+        else None
+    )
+    if sidecar is not None:
+        row_count, arrays = sidecar
+        return _table_columns(
+            table_path, schema_name, schema_version, sha256, columns,
+            row_count, arrays, from_sidecar=True,
+        )
+    table = validate_tsv_table(table_path, schema_name, schemas_dir)
+    if expected_sha256 is not None and table.sha256 != expected_sha256:
+        raise TableValidationError(f"Empreinte TSV inattendue : {table_path}")
+    return _table_columns(
+        table_path, schema_name, table.schema_version, table.sha256, columns,
+        table.row_count, _columns_from_table(table, columns), from_sidecar=False,
+    )
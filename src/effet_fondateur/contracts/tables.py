@@ -3,15 +3,19 @@
 from __future__ import annotations
 
 import csv
+import hashlib
+import io
 import json
+from collections.abc import Callable, Iterator, Sequence
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Any
+from typing import Any, BinaryIO
 
 import jsonschema
 
-from effet_fondateur.audit import sha256_file
-from effet_fondateur.contracts.documents import DEFAULT_SCHEMAS_DIR
+from effet_fondateur.audit import trace_span
+from effet_fondateur.contracts.documents import DEFAULT_SCHEMAS_DIR, document_validator
+from effet_fondateur.contracts.row_checks import Check, compile_schema_check
 
 
 class TableValidationError(ValueError):
@@ -104,15 +108,43 @@ def _validation_column(error: jsonschema.ValidationError) -> str:
     return "<ligne>"
 
 
-def validate_tsv_table(
-    table_path: Path,
-    schema_name: str,
-    schemas_dir: Path = DEFAULT_SCHEMAS_DIR,
-) -> ValidatedTable:
-    """Valide l'en-tête et chaque ligne TSV sans journaliser leur contenu."""
-    schema = _load_table_schema(schema_name, schemas_dir)
-    table_contract = schema["x-tsv"]
-    expected_columns = table_contract["columns"]
+@dataclass(frozen=True)
+class _CompiledRowContract:
+    """Validateur complet, prédicat compilé et décodage par colonne d'un schéma."""
+
+    validator: jsonschema.Draft202012Validator
+    row_check: Check | None
+    # (colonne, null autorisé, booléen attendu) ; `None` si une référence de
+    # colonne ne se résout pas : le décodage générique lève alors l'erreur.
+    column_decoders: tuple[tuple[str, bool, bool], ...] | None
+
+
+# Un schéma ne change pas pendant un processus : la clé est son contenu
+# canonique, de sorte qu'un schéma modifié sur disque est recompilé.
+_COMPILED_CONTRACTS: dict[tuple[str, str], _CompiledRowContract] = {}
+_READ_BUFFER_BYTES = 1024 * 1024
+
+
+def _column_decoders(
+    schema: dict[str, Any], expected_columns: list[str]
+) -> tuple[tuple[str, bool, bool], ...] | None:
+    decoders = []
+    for column in expected_columns:
+        try:
+            column_schema = _resolve_property_schema(
+                schema["$defs"]["row"]["properties"][column], schema
+            )
+        except (KeyError, TableValidationError):
+            return None
+        decoders.append((column, _allows_null(column_schema), _expects_boolean(column_schema)))
+    return tuple(decoders)
+
+
+def _compiled_row_contract(schema_name: str, schema: dict[str, Any]) -> _CompiledRowContract:
+    cache_key = (schema_name, json.dumps(schema, sort_keys=True))
+    contract = _COMPILED_CONTRACTS.get(cache_key)
+    if contract is not None:
+        return contract
     row_schema = {
         "$schema": schema["$schema"],
         "$defs": schema["$defs"],
@@ -122,64 +154,242 @@ def validate_tsv_table(
         jsonschema.Draft202012Validator.check_schema(row_schema)
     except jsonschema.SchemaError as error:
         raise TableValidationError(f"Schéma de ligne non conforme : {schema_name}") from error
-    validator = jsonschema.Draft202012Validator(row_schema)
-    observed_primary_keys: set[tuple[Any, ...]] = set()
+    contract = _CompiledRowContract(
+        validator=jsonschema.Draft202012Validator(row_schema),
+        row_check=compile_schema_check(row_schema),
+        column_decoders=_column_decoders(schema, schema["x-tsv"]["columns"]),
+    )
+    _COMPILED_CONTRACTS[cache_key] = contract
+    return contract
 
-    try:
-        input_file = table_path.open("r", encoding="utf-8", newline="")
-    except FileNotFoundError as error:
-        raise TableValidationError(f"Table TSV introuvable : {table_path}") from error
-
-    rows: list[dict[str, Any]] = []
-    with input_file:
-        reader = csv.DictReader(input_file, delimiter="\t")
-        if reader.fieldnames != expected_columns:
-            raise TableValidationError(
-                f"En-tête invalide pour {table_path}; ordre ou colonnes non conformes."
-            )
-        for line_number, raw_row in enumerate(reader, start=2):
-            if None in raw_row or any(raw_row[column] is None for column in expected_columns):
-                raise TableValidationError(
-                    f"Ligne {line_number} : nombre de champs différent de l'en-tête."
-                )
-            decoded_row = {
-                column: _decode_value(
-                    raw_row[column],
-                    schema["$defs"]["row"]["properties"][column],
-                    table_contract["null_value"],
-                    table_contract["boolean_values"],
-                    schema,
-                )
-                for column in expected_columns
-            }
-            errors = sorted(
-                validator.iter_errors(decoded_row),
-                key=lambda item: list(item.absolute_path),
-            )
-            if errors:
-                first_error = errors[0]
-                # La valeur individuelle n'est volontairement pas recopiée dans
-                # l'erreur : ligne, colonne et contrainte suffisent au diagnostic.
+
+class _HashingReader(io.RawIOBase):
+    """Lecteur brut qui calcule l'empreinte des octets au fil de la lecture."""
+
+    def __init__(self, raw_file: BinaryIO) -> None:
+        self._raw_file = raw_file
+        self.digest = hashlib.sha256()
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer: Any) -> int:
+        count = self._raw_file.readinto(buffer)
+        if count:
+            self.digest.update(memoryview(buffer)[:count])
+        return count
+
+    def close(self) -> None:
+        self._raw_file.close()
+        super().close()
+
+
+class TableStream:
+    """Lignes TSV validées à la demande, projetées et filtrées à la lecture.
+
+    Chaque ligne du fichier est validée, y compris celles que `where` écarte :
+    une lecture complète offre la même garantie que `validate_tsv_table`.
+    L'empreinte est calculée pendant cette même lecture et n'est disponible
+    qu'une fois le flux épuisé.
+    """
+
+    def __init__(
+        self,
+        table_path: Path,
+        schema_name: str,
+        schemas_dir: Path = DEFAULT_SCHEMAS_DIR,
+        *,
+        columns: Sequence[str] | None = None,
+        where: Callable[[dict[str, Any]], bool] | None = None,
+    ) -> None:
+        self.path = table_path
+        self.schema_name = schema_name
+        self._schema = _load_table_schema(schema_name, schemas_dir)
+        self._contract = _compiled_row_contract(schema_name, self._schema)
+        self.schema_version: str = self._schema["x-tsv"]["schema_version"]
+        expected_columns = self._schema["x-tsv"]["columns"]
+        if columns is not None:
+            unknown_columns = sorted(set(columns) - set(expected_columns))
+            if unknown_columns:
                 raise TableValidationError(
-                    f"Ligne {line_number}, colonne {_validation_column(first_error)} : "
-                    f"contrainte {first_error.validator} non satisfaite."
+                    f"Colonnes de projection absentes du schéma {schema_name} : "
+                    f"{', '.join(unknown_columns)}"
                 )
-            primary_key = tuple(
-                decoded_row[column] for column in table_contract["primary_key"]
-            )
-            if primary_key in observed_primary_keys:
+            columns = tuple(columns)
+        self._columns = columns
+        self._where = where
+        self._started = False
+        self._sha256: str | None = None
+        self._row_count = 0
+
+    @property
+    def sha256(self) -> str:
+        """Retourne l'empreinte du fichier, connue seulement après lecture complète."""
+        if self._sha256 is None:
+            raise TableValidationError(f"Table TSV non entièrement validée : {self.path}")
+        return self._sha256
+
+    @property
+    def row_count(self) -> int:
+        """Retourne le nombre de lignes validées, filtre `where` non appliqué."""
+        if self._sha256 is None:
+            raise TableValidationError(f"Table TSV non entièrement validée : {self.path}")
+        return self._row_count
+
+    def consume(self) -> str:
+        """Valide les lignes restantes sans les conserver et retourne l'empreinte."""
+        for _ in self:
+            pass
+        return self.sha256
+
+    def __iter__(self) -> Iterator[dict[str, Any]]:
+        if self._started:
+            raise TableValidationError(f"Flux TSV déjà parcouru : {self.path}")
+        self._started = True
+        return self._rows()
+
+    def _rows(self) -> Iterator[dict[str, Any]]:
+        schema = self._schema
+        contract = self._contract
+        table_contract = schema["x-tsv"]
+        expected_columns = table_contract["columns"]
+        null_value = table_contract["null_value"]
+        boolean_values = table_contract["boolean_values"]
+        primary_key_columns = table_contract["primary_key"]
+        column_count = len(expected_columns)
+        observed_primary_keys: set[tuple[Any, ...]] = set()
+        projection = self._columns
+        where = self._where
+
+        try:
+            raw_file = self.path.open("rb", buffering=0)
+        except FileNotFoundError as error:
+            raise TableValidationError(f"Table TSV introuvable : {self.path}") from error
+
+        hashing_reader = _HashingReader(raw_file)
+        with io.TextIOWrapper(
+            io.BufferedReader(hashing_reader, buffer_size=_READ_BUFFER_BYTES),
+            encoding="utf-8",
+            newline="",
+        ) as input_file:
+            reader = csv.reader(input_file, delimiter="\t")
+            # Comme `csv.DictReader`, l'en-tête est la première ligne et les lignes
+            # vides suivantes sont ignorées sans compter dans la numérotation.
+            if next(reader, None) != expected_columns:
                 raise TableValidationError(
-                    f"Ligne {line_number} : clé primaire TSV dupliquée."
+                    f"En-tête invalide pour {self.path}; ordre ou colonnes non conformes."
                 )
-            observed_primary_keys.add(primary_key)
-            rows.append(decoded_row)
+            for line_number, raw_values in enumerate(
+                (values for values in reader if values), start=2
+            ):
+                if len(raw_values) != column_count:
+                    raise TableValidationError(
+                        f"Ligne {line_number} : nombre de champs différent de l'en-tête."
+                    )
+                if contract.column_decoders is None:
+                    decoded_row = {
+                        column: _decode_value(
+                            raw_value,
+                            schema["$defs"]["row"]["properties"][column],
+                            null_value,
+                            boolean_values,
+                            schema,
+                        )
+                        for column, raw_value in zip(expected_columns, raw_values)
+                    }
+                else:
+                    decoded_row = {}
+                    for (column, allows_null, expects_boolean), raw_value in zip(
+                        contract.column_decoders, raw_values
+                    ):
+                        if allows_null and raw_value == null_value:
+                            decoded_row[column] = None
+                        elif expects_boolean and raw_value in boolean_values:
+                            decoded_row[column] = boolean_values[raw_value]
+                        else:
+                            decoded_row[column] = raw_value
+                if contract.row_check is None or not contract.row_check(decoded_row):
+                    errors = sorted(
+                        contract.validator.iter_errors(decoded_row),
+                        key=lambda item: list(item.absolute_path),
+                    )
+                    if errors:
+                        first_error = errors[0]
+                        # La valeur individuelle n'est volontairement pas recopiée dans
+                        # l'erreur : ligne, colonne et contrainte suffisent au diagnostic.
+                        raise TableValidationError(
+                            f"Ligne {line_number}, colonne {_validation_column(first_error)} : "
+                            f"contrainte {first_error.validator} non satisfaite."
+                        )
+                primary_key = tuple(decoded_row[column] for column in primary_key_columns)
+                if primary_key in observed_primary_keys:
+                    raise TableValidationError(
+                        f"Ligne {line_number} : clé primaire TSV dupliquée."
+                    )
+                observed_primary_keys.add(primary_key)
+                self._row_count += 1
+                if where is not None and not where(decoded_row):
+                    continue
+                if projection is not None:
+                    decoded_row = {column: decoded_row[column] for column in projection}
+                yield decoded_row
+
+        if not self._row_count and not table_contract.get("allow_empty", False):
+            raise TableValidationError(f"Table TSV sans ligne de données : {self.path}")
+        self._sha256 = hashing_reader.digest.hexdigest()
+
+
+def stream_tsv_table(
+    table_path: Path,
+    schema_name: str,
+    schemas_dir: Path = DEFAULT_SCHEMAS_DIR,
+    *,
+    columns: Sequence[str] | None = None,
+    where: Callable[[dict[str, Any]], bool] | None = None,
+) -> TableStream:
+    """Prépare une lecture validée ligne à ligne, sans matérialiser la table.
+
+    `columns` restreint les colonnes des lignes produites et `where` écarte des
+    lignes après leur validation. Le schéma et la projection sont contrôlés dès
+    l'appel ; le fichier n'est ouvert qu'au début de l'itération.
+    """
+    return TableStream(table_path, schema_name, schemas_dir, columns=columns, where=where)
 
-    if not rows and not table_contract.get("allow_empty", False):
-        raise TableValidationError(f"Table TSV sans ligne de données : {table_path}")
+
+def validate_tsv_table(
+    table_path: Path,
+    schema_name: str,
+    schemas_dir: Path = DEFAULT_SCHEMAS_DIR,
+) -> ValidatedTable:
+    """Valide l'en-tête et chaque ligne TSV sans journaliser leur contenu.
+
+    Chaque ligne passe d'abord par le prédicat compilé du schéma ; jsonschema
+    n'est appelé que pour une ligne refusée, afin de produire le message exact.
+    """
+    with trace_span("validate_tsv_table", "contracts", schema=schema_name):
+        stream = stream_tsv_table(table_path, schema_name, schemas_dir)
+        rows = tuple(stream)
     return ValidatedTable(
         path=table_path,
         schema_name=schema_name,
-        schema_version=table_contract["schema_version"],
-        sha256=sha256_file(table_path),
-        rows=tuple(rows),
+        schema_version=stream.schema_version,
+        sha256=stream.sha256,
+        rows=rows,
     )
+
+
+def preload_schema_validators(schemas_dir: Path = DEFAULT_SCHEMAS_DIR) -> int:
+    """Compile à l'avance les validateurs de tous les schémas d'un dossier.
+
+    Les schémas tabulaires reçoivent leur contrat de ligne compilé, les autres
+    leur validateur de document. Retourne le nombre de schémas préchargés.
+    """
+    schema_count = 0
+    for schema_path in sorted(schemas_dir.glob("*.schema.json")):
+        schema = json.loads(schema_path.read_text(encoding="utf-8"))
+        if "x-tsv" in schema:
+            _compiled_row_contract(schema_path.name, schema)
+        else:
+            document_validator(schema_path)
+        schema_count += 1
+    return schema_count
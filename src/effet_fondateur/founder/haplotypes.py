@@ -0,0 +1,191 @@
+"""Matrice d'haplotypes phasés compactée en plans de bits par marqueur."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Sequence
+
+import numpy as np
+
+
+BOTH_HAPLOTYPES = -1
+
+# Nombre de zéros avant le premier bit à 1 (ordre MSB d'abord de `np.packbits`)
+# et après le dernier bit à 1, pour chaque valeur d'octet non nulle.
+_LEADING_ZEROS = np.array(
+    [8 - value.bit_length() for value in range(256)], dtype=np.int64
+)
+_TRAILING_ZEROS = np.array(
+    [8 if value == 0 else (value & -value).bit_length() - 1 for value in range(256)],
+    dtype=np.int64,
+)
+
+
+@lru_cache(maxsize=256)
+def _genotype_code(genotype: str) -> tuple[int, int, int, int]:
+    """Décode un GT en (allèle H1, appel H1, allèle H2, appel H2)."""
+    if "|" not in genotype:
+        return (0, 0, 0, 0)
+    alleles = genotype.split("|")
+    if len(alleles) != 2 or any(value not in {"0", "1", "."} for value in alleles):
+        return (0, 0, 0, 0)
+    return (
+        int(alleles[0] == "1"),
+        int(alleles[0] != "."),
+        int(alleles[1] == "1"),
+        int(alleles[1] != "."),
+    )
+
+
+def decode_phased_genotypes(genotypes: Sequence[str]) -> tuple[np.ndarray, np.ndarray]:
+    """Retourne les allèles et appels d'un marqueur, deux haplotypes par échantillon.
+
+    Un génotype non phasé, multiallélique ou illisible n'est appelé sur aucun
+    haplotype : il ne peut ni prolonger un segment ni compter comme discordance
+    observée.
+    """
+    codes = np.array([_genotype_code(genotype) for genotype in genotypes], dtype=np.uint8)
+    codes = codes.reshape(len(genotypes), 4)
+    return codes[:, [0, 2]].reshape(-1), codes[:, [1, 3]].reshape(-1)
+
+
+def _first_set_bits(packed: np.ndarray, absent: int) -> np.ndarray:
+    """Indice du premier bit à 1 de chaque ligne, ou `absent` si aucun."""
+    nonzero = packed != 0
+    first_byte = nonzero.argmax(axis=-1)
+    byte_values = np.take_along_axis(packed, first_byte[..., None], axis=-1)[..., 0]
+    indexes = first_byte * 8 + _LEADING_ZEROS[byte_values]
+    return np.where(nonzero.any(axis=-1), indexes, absent)
+
+
+def _last_set_bits(packed: np.ndarray, absent: int) -> np.ndarray:
+    """Indice du dernier bit à 1 de chaque ligne, ou `absent` si aucun."""
+    nonzero = packed != 0
+    last_byte = packed.shape[-1] - 1 - nonzero[..., ::-1].argmax(axis=-1)
+    byte_values = np.take_along_axis(packed, last_byte[..., None], axis=-1)[..., 0]
+    indexes = last_byte * 8 + 7 - _TRAILING_ZEROS[byte_values]
+    return np.where(nonzero.any(axis=-1), indexes, absent)
+
+
+def _packed_mask(marker_count: int, selected: np.ndarray) -> np.ndarray:
+    mask = np.zeros(marker_count, dtype=bool)
+    mask[selected] = True
+    return np.packbits(mask)
+
+
+@dataclass(frozen=True)
+class HaplotypePlanes:
+    """Plans de bits d'un ensemble ordonné d'haplotypes."""
+
+    alleles: np.ndarray
+    called: np.ndarray
+
+    def __len__(self) -> int:
+        return self.alleles.shape[0]
+
+    def consensus_mismatches(self) -> np.ndarray:
+        """Marque les marqueurs non appelés ou discordants dans l'ensemble."""
+        all_called = np.bitwise_and.reduce(self.called, axis=0)
+        any_alternate = np.bitwise_or.reduce(self.alleles, axis=0)
+        all_alternate = np.bitwise_and.reduce(self.alleles, axis=0)
+        return (any_alternate ^ all_alternate) | ~all_called
+
+    def pairwise_mismatches(self, rows: slice) -> np.ndarray:
+        """Compare un bloc d'haplotypes à tout l'ensemble par XOR sur les plans."""
+        return (
+            (self.alleles[rows, None, :] ^ self.alleles[None, :, :])
+            | ~(self.called[rows, None, :] & self.called[None, :, :])
+        )
+
+
+@dataclass(frozen=True)
+class HaplotypeMatrix:
+    """Allèles phasés de tous les échantillons, un bit par marqueur.
+
+    La ligne `2 * échantillon + haplotype` de chaque plan contient les marqueurs
+    dans l'ordre génomique ; `alleles` vaut 1 pour l'allèle alternatif et
+    `called` vaut 1 lorsque l'allèle est observé. Les bits de remplissage du
+    dernier octet ne sont jamais appelés.
+    """
+
+    marker_count: int
+    alleles: np.ndarray
+    called: np.ndarray
+
+    @classmethod
+    def from_marker_rows(
+        cls,
+        allele_rows: Sequence[np.ndarray],
+        called_rows: Sequence[np.ndarray],
+        marker_order: Sequence[int],
+    ) -> HaplotypeMatrix:
+        """Compacte des lignes décodées par marqueur selon l'ordre génomique final."""
+        order = np.asarray(marker_order, dtype=np.int64)
+        alleles = np.packbits(np.asarray(allele_rows, dtype=np.uint8)[order], axis=0)
+        called = np.packbits(np.asarray(called_rows, dtype=np.uint8)[order], axis=0)
+        return cls(
+            marker_count=len(order),
+            alleles=np.ascontiguousarray(alleles.T),
+            called=np.ascontiguousarray(called.T),
+        )
+
+    def select(self, haplotypes: Sequence[tuple[int, int]]) -> HaplotypePlanes:
+        """Extrait des haplotypes `(échantillon, 0|1|-1)`.
+
+        L'index `-1` désigne un porteur homozygote : le marqueur n'est appelé
+        que si les deux haplotypes sont observés et identiques.
+        """
+        byte_count = self.alleles.shape[1]
+        alleles = np.zeros((len(haplotypes), byte_count), dtype=np.uint8)
+        called = np.zeros((len(haplotypes), byte_count), dtype=np.uint8)
+        for row, (sample_index, haplotype_index) in enumerate(haplotypes):
+            first = 2 * sample_index
+            if haplotype_index == BOTH_HAPLOTYPES:
+                alleles[row] = self.alleles[first]
+                called[row] = (
+                    self.called[first]
+                    & self.called[first + 1]
+                    & ~(self.alleles[first] ^ self.alleles[first + 1])
+                )
+            else:
+                alleles[row] = self.alleles[first + haplotype_index]
+                called[row] = self.called[first + haplotype_index]
+        return HaplotypePlanes(alleles=alleles, called=called)
+
+    def unpack(self, planes: HaplotypePlanes) -> tuple[np.ndarray, np.ndarray]:
+        """Décompacte des plans en matrices haplotype × marqueur de booléens."""
+        alleles = np.unpackbits(planes.alleles, axis=1, count=self.marker_count)
+        called = np.unpackbits(planes.called, axis=1, count=self.marker_count)
+        return alleles.astype(bool), called.astype(bool)
+
+    def segment_bounds(
+        self, mismatches: np.ndarray, target_index: int
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Bornes inclusives des segments partagés autour de la cible.
+
+        Chaque ligne de `mismatches` marque les marqueurs non partagés. Une
+        discordance sur la cible réduit le segment à la cible seule.
+        """
+        right_mask = _packed_mask(
+            self.marker_count, np.arange(target_index, self.marker_count)
+        )
+        left_mask = _packed_mask(self.marker_count, np.arange(0, target_index + 1))
+        first_right = _first_set_bits(mismatches & right_mask, self.marker_count)
+        last_left = _last_set_bits(mismatches & left_mask, -1)
+        target_shared = first_right != target_index
+        left = np.where(target_shared, last_left + 1, target_index)
+        right = np.where(target_shared, first_right - 1, target_index)
+        return left, right
+
+    def signature_matches(
+        self,
+        reference: HaplotypePlanes,
+        background: HaplotypePlanes,
+        signature_indexes: Sequence[int],
+    ) -> tuple[int, int]:
+        """Compte les haplotypes de fond complets et identiques à la référence."""
+        mask = _packed_mask(self.marker_count, np.asarray(signature_indexes, dtype=np.int64))
+        complete = np.all((background.called & mask) == mask, axis=1)
+        identical = np.all(((background.alleles ^ reference.alleles[0]) & mask) == 0, axis=1)
+        return int(complete.sum()), int((complete & identical).sum())
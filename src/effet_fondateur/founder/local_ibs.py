@@ -4,13 +4,20 @@ from __future__ import annotations
 
 import csv
 import json
-import subprocess
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Any
+from typing import Any, Iterator
+
+import numpy as np
 
 from effet_fondateur.audit import atomic_write_json
-from effet_fondateur.contracts import validate_tsv_table
+from effet_fondateur.contracts import stream_tsv_table
+from effet_fondateur.founder.haplotypes import (
+    BOTH_HAPLOTYPES,
+    HaplotypeMatrix,
+    decode_phased_genotypes,
+)
+from effet_fondateur.io import CommandStreamError, stream_command_lines
 
 
 class FounderAnalysisError(ValueError):
@@ -25,7 +32,6 @@ class Variant:
     position_bp: int
     position_cm: float
     is_target: bool
-    genotypes: tuple[str, ...]
 
 
 @dataclass(frozen=True)
@@ -88,6 +94,8 @@ DISCORDANCE_COLUMNS = (
     "VARIANT_ID", "POSITION_BP", "POSITION_CM", "SIDE", "CARRIER_ALLELES",
     "CALLED_CARRIER_COUNT", "DISTINCT_ALLELE_COUNT", "MARKER_STATUS",
 )
+# Borne mémoire d'un bloc de comparaisons paires × octets de marqueurs.
+PAIR_BLOCK_BYTES = 32 * 1024 * 1024
 
 
 def _write_tsv(path: Path, columns: tuple[str, ...], rows: list[dict[str, Any]]) -> None:
@@ -98,42 +106,45 @@ def _write_tsv(path: Path, columns: tuple[str, ...], rows: list[dict[str, Any]])
         writer.writerows(rows)
 
 
-def _run_bcftools(command: str, arguments: list[str], timeout_seconds: float) -> str:
+def _bcftools_lines(command: str, arguments: list[str], timeout_seconds: float) -> Iterator[str]:
     try:
-        completed = subprocess.run(
-            [command, *arguments], check=False, capture_output=True, text=True,
-            timeout=timeout_seconds,
-        )
-    except (OSError, subprocess.TimeoutExpired) as error:
-        raise FounderAnalysisError("bcftools_query_unavailable") from error
-    if completed.returncode != 0:
-        raise FounderAnalysisError(f"bcftools_query_failed:{completed.returncode}")
-    return completed.stdout
+        yield from stream_command_lines([command, *arguments], timeout_seconds)
+    except CommandStreamError as error:
+        if error.return_code is None:
+            raise FounderAnalysisError("bcftools_query_unavailable") from error
+        raise FounderAnalysisError(f"bcftools_query_failed:{error.return_code}") from error
 
 
 def _load_variants(
     bcf_path: Path, map_path: Path, bcftools_command: str, timeout_seconds: float
-) -> tuple[tuple[str, ...], tuple[Variant, ...], str]:
-    map_table = validate_tsv_table(map_path, "target_genetic_map.schema.json")
-    map_rows = {row["VARIANT_ID"]: row for row in map_table.rows}
-    target_rows = [row for row in map_table.rows if row["IS_TARGET_VARIANT"]]
-    if len(target_rows) != 1:
+) -> tuple[tuple[str, ...], tuple[Variant, ...], HaplotypeMatrix, str]:
+    map_table = stream_tsv_table(
+        map_path, "target_genetic_map.schema.json",
+        columns=("VARIANT_ID", "POSITION_BP", "POSITION_CM", "IS_TARGET_VARIANT"),
+    )
+    map_rows = {row["VARIANT_ID"]: row for row in map_table}
+    if sum(bool(row["IS_TARGET_VARIANT"]) for row in map_rows.values()) != 1:
         raise FounderAnalysisError("target_map_variant_missing_or_ambiguous")
     sample_ids = tuple(
-        line for line in _run_bcftools(
+        line for line in _bcftools_lines(
             bcftools_command, ["query", "--list-samples", str(bcf_path)], timeout_seconds
-        ).splitlines() if line
+        ) if line
     )
     if not sample_ids or len(sample_ids) != len(set(sample_ids)):
         raise FounderAnalysisError("phased_sample_ids_invalid")
-    query = _run_bcftools(
+    query = _bcftools_lines(
         bcftools_command,
         ["query", "--format", "%ID\\t%POS[\\t%GT]\\n", str(bcf_path)],
         timeout_seconds,
     )
     variants: list[Variant] = []
+    allele_rows: list[np.ndarray] = []
+    called_rows: list[np.ndarray] = []
     observed_ids: set[str] = set()
-    for line in query.splitlines():
+    # Chaque GT est décodé une seule fois ; toutes les comparaisons suivantes
+    # travaillent sur les plans de bits compactés. La sortie de bcftools est
+    # consommée en flux : seul le marqueur courant existe sous forme de texte.
+    for line in query:
         fields = line.split("\t")
         if len(fields) != len(sample_ids) + 2:
             raise FounderAnalysisError("phased_variant_column_count_mismatch")
@@ -149,51 +160,23 @@ def _load_variants(
                 position_bp=int(position_text),
                 position_cm=float(map_row["POSITION_CM"]),
                 is_target=bool(map_row["IS_TARGET_VARIANT"]),
-                genotypes=tuple(genotypes),
             )
         )
+        alleles, called = decode_phased_genotypes(genotypes)
+        allele_rows.append(alleles)
+        called_rows.append(called)
         observed_ids.add(variant_id)
     if observed_ids != set(map_rows):
         raise FounderAnalysisError("phased_variant_map_set_mismatch")
-    variants.sort(key=lambda variant: (variant.position_bp, variant.variant_id))
-    if sum(variant.is_target for variant in variants) != 1:
+    order = sorted(
+        range(len(variants)),
+        key=lambda index: (variants[index].position_bp, variants[index].variant_id),
+    )
+    ordered_variants = tuple(variants[index] for index in order)
+    if sum(variant.is_target for variant in ordered_variants) != 1:
         raise FounderAnalysisError("target_phased_variant_missing_or_ambiguous")
-    return sample_ids, tuple(variants), map_table.sha256
-
-
-def _allele(genotype: str, haplotype_index: int) -> str | None:
-    if "|" not in genotype:
-        return None
-    alleles = genotype.split("|")
-    if len(alleles) != 2 or any(value not in {"0", "1", "."} for value in alleles):
-        return None
-    if haplotype_index == -1:
-        return alleles[0] if alleles[0] == alleles[1] and alleles[0] != "." else None
-    value = alleles[haplotype_index]
-    return None if value == "." else value
-
-
-def _shared_segment(
-    variants: tuple[Variant, ...], haplotypes: tuple[tuple[int, int], ...]
-) -> Segment:
-    target_index = next(index for index, variant in enumerate(variants) if variant.is_target)
-
-    def shared(index: int) -> bool:
-        alleles = {
-            _allele(variants[index].genotypes[sample_index], haplotype_index)
-            for sample_index, haplotype_index in haplotypes
-        }
-        return None not in alleles and len(alleles) == 1
-
-    if not shared(target_index):
-        return Segment(target_index, target_index, target_index)
-    left_index = target_index
-    while left_index > 0 and shared(left_index - 1):
-        left_index -= 1
-    right_index = target_index
-    while right_index + 1 < len(variants) and shared(right_index + 1):
-        right_index += 1
-    return Segment(left_index, target_index, right_index)
+    matrix = HaplotypeMatrix.from_marker_rows(allele_rows, called_rows, order)
+    return sample_ids, ordered_variants, matrix, map_table.sha256
 
 
 def _decimal(value: float) -> str:
@@ -224,24 +207,39 @@ def infer_target_centered_ibs(
     """Publie une analyse IBS exacte, centrée sur la mutation et sans prétention IBD."""
     if minimum_independent_carriers < 2 or minimum_flank_markers < 1:
         raise FounderAnalysisError("invalid_founder_analysis_threshold")
-    sample_ids, variants, map_version = _load_variants(
+    sample_ids, variants, matrix, map_version = _load_variants(
         phased_bcf_path, genetic_map_path, bcftools_command, timeout_seconds
     )
     sample_indexes = {sample_id: index for index, sample_id in enumerate(sample_ids)}
-    carrier_rows = validate_tsv_table(
-        carrier_haplotypes_path, "carrier_haplotypes.schema.json"
-    ).rows
-    cohort_rows = validate_tsv_table(cohorts_path, "cohorts_frozen.schema.json").rows
-    sample_rows = validate_tsv_table(samples_master_path, "samples_master.schema.json").rows
-    families = {row["SAMPLE_ID"]: row["FID"] for row in sample_rows}
-    assignments = {row["SAMPLE_ID"]: row for row in carrier_rows}
+    # Les trois tables sont validées en entier mais seules les colonnes et les
+    # lignes utiles aux tables de correspondance restent en mémoire.
+    assignments = {
+        row["SAMPLE_ID"]: row
+        for row in stream_tsv_table(
+            carrier_haplotypes_path, "carrier_haplotypes.schema.json",
+            columns=("SAMPLE_ID", "CARRIER_HAPLOTYPE", "RELIABILITY_STATUS", "PHASE_CONFIDENCE"),
+        )
+    }
+    cohort_rows = list(stream_tsv_table(
+        cohorts_path, "cohorts_frozen.schema.json",
+        columns=("COHORT_ID", "SAMPLE_ID", "INDEPENDENT_UNIT_ID", "ROLE"),
+        where=lambda row: bool(row["INCLUDED"]) and row["COHORT_ID"] in {
+            "target_carriers_independent", "controls_unrelated", "target_chromosome_all_qc",
+        },
+    ))
     independent_rows = [
-        row for row in cohort_rows
-        if row["COHORT_ID"] == "target_carriers_independent" and row["INCLUDED"]
+        row for row in cohort_rows if row["COHORT_ID"] == "target_carriers_independent"
     ]
+    families = {
+        row["SAMPLE_ID"]: row["FID"]
+        for row in stream_tsv_table(
+            samples_master_path, "samples_master.schema.json", columns=("SAMPLE_ID", "FID")
+        )
+    }
     selected: list[CarrierHaplotype] = []
     excluded_rows: list[dict[str, str]] = []
-    target_variant = next(variant for variant in variants if variant.is_target)
+    target_index = next(index for index, variant in enumerate(variants) if variant.is_target)
+    target_variant = variants[target_index]
     for cohort_row in independent_rows:
         sample_id = cohort_row["SAMPLE_ID"]
         assignment = assignments.get(sample_id)
@@ -270,9 +268,12 @@ def infer_target_centered_ibs(
         haplotype_index = {
             "H1": 0,
             "H2": 1,
-            "BOTH": -1,
+            "BOTH": BOTH_HAPLOTYPES,
         }[assignment["CARRIER_HAPLOTYPE"]]
-        if _allele(target_variant.genotypes[sample_indexes[sample_id]], haplotype_index) != "1":
+        target_alleles, target_called = matrix.unpack(
+            matrix.select(((sample_indexes[sample_id], haplotype_index),))
+        )
+        if not (target_called[0, target_index] and target_alleles[0, target_index]):
             raise FounderAnalysisError("target_carrier_haplotype_discordant")
         selected.append(CarrierHaplotype(
             independent_unit_id=cohort_row["INDEPENDENT_UNIT_ID"], sample_id=sample_id,
@@ -286,7 +287,11 @@ def infer_target_centered_ibs(
     carrier_keys = tuple(
         (sample_indexes[carrier.sample_id], carrier.haplotype_index) for carrier in selected
     )
-    segment = _shared_segment(variants, carrier_keys)
+    carrier_planes = matrix.select(carrier_keys)
+    consensus_left, consensus_right = matrix.segment_bounds(
+        carrier_planes.consensus_mismatches()[None, :], target_index
+    )
+    segment = Segment(int(consensus_left[0]), target_index, int(consensus_right[0]))
     segment_values = _segment_values(variants, segment)
     enough_carriers = len(selected) >= minimum_independent_carriers
     enough_flanks = (
@@ -296,16 +301,26 @@ def infer_target_centered_ibs(
     status = "SUPPORTED_IBS_CANDIDATE" if enough_carriers and enough_flanks else (
         "INSUFFICIENT_CARRIERS" if not enough_carriers else "INSUFFICIENT_INFORMATIVE_MARKERS"
     )
+    # Toutes les paires sont comparées par blocs de lignes : la mémoire reste
+    # bornée par PAIR_BLOCK_BYTES quel que soit le nombre de porteurs.
+    carrier_count = len(selected)
+    pair_left = np.empty((carrier_count, carrier_count), dtype=np.int64)
+    pair_right = np.empty((carrier_count, carrier_count), dtype=np.int64)
+    block_rows = max(1, PAIR_BLOCK_BYTES // (carrier_count * carrier_planes.alleles.shape[1]))
+    for block_start in range(0, carrier_count, block_rows):
+        rows = slice(block_start, min(block_start + block_rows, carrier_count))
+        pair_left[rows], pair_right[rows] = matrix.segment_bounds(
+            carrier_planes.pairwise_mismatches(rows), target_index
+        )
     sharing_rows: list[dict[str, str]] = []
-    pair_segments: dict[tuple[str, str], Segment] = {}
     for first_index, first in enumerate(selected):
-        for second in selected[first_index:]:
-            pair_segment = _shared_segment(variants, (
-                (sample_indexes[first.sample_id], first.haplotype_index),
-                (sample_indexes[second.sample_id], second.haplotype_index),
-            ))
-            pair_segments[(first.independent_unit_id, second.independent_unit_id)] = pair_segment
-            pair_segments[(second.independent_unit_id, first.independent_unit_id)] = pair_segment
+        for second_index in range(first_index, carrier_count):
+            second = selected[second_index]
+            pair_segment = Segment(
+                int(pair_left[first_index, second_index]),
+                target_index,
+                int(pair_right[first_index, second_index]),
+            )
             values = _segment_values(variants, pair_segment)
             sharing_rows.append({
                 "INDEPENDENT_UNIT_ID_1": first.independent_unit_id,
@@ -313,25 +328,18 @@ def infer_target_centered_ibs(
                 "INDEPENDENT_UNIT_ID_2": second.independent_unit_id,
                 "SAMPLE_ID_2": second.sample_id, "CARRIER_HAPLOTYPE_ID_2": second.haplotype_id,
                 **values,
-                "PAIR_STATUS": "SELF" if first == second else (
+                "PAIR_STATUS": "SELF" if first_index == second_index else (
                     "SHARED" if int(values["LEFT_MARKER_COUNT"]) >= minimum_flank_markers and int(values["RIGHT_MARKER_COUNT"]) >= minimum_flank_markers else "INSUFFICIENT"
                 ),
             })
     segment_rows = list(excluded_rows)
-    for carrier in selected:
-        comparisons = [
-            pair_segments[(carrier.independent_unit_id, other.independent_unit_id)]
-            for other in selected
-            if other != carrier
-        ]
-        if not comparisons:
-            comparisons = [
-                pair_segments[(carrier.independent_unit_id, carrier.independent_unit_id)]
-            ]
+    # Un porteur unique n'a que sa propre comparaison, comme dans la matrice.
+    others = ~np.eye(carrier_count, dtype=bool) if carrier_count > 1 else np.ones((1, 1), dtype=bool)
+    for carrier_index, carrier in enumerate(selected):
         individual_segment = Segment(
-            left_index=min(pair.left_index for pair in comparisons),
+            left_index=int(pair_left[carrier_index][others[carrier_index]].min()),
             target_index=segment.target_index,
-            right_index=max(pair.right_index for pair in comparisons),
+            right_index=int(pair_right[carrier_index][others[carrier_index]].max()),
         )
         individual_values = _segment_values(variants, individual_segment)
         segment_rows.append({
@@ -349,9 +357,13 @@ def infer_target_centered_ibs(
             "SEGMENT_STATUS": "INCLUDED" if status == "SUPPORTED_IBS_CANDIDATE" else "INSUFFICIENT",
             "EXCLUSION_CODE": "" if status == "SUPPORTED_IBS_CANDIDATE" else status,
         })
+    carrier_alleles, carrier_called = matrix.unpack(carrier_planes)
     discordance_rows: list[dict[str, str]] = []
     for index, variant in enumerate(variants):
-        alleles = [_allele(variant.genotypes[sample_index], haplotype_index) for sample_index, haplotype_index in carrier_keys]
+        alleles = [
+            ("1" if allele else "0") if called else None
+            for allele, called in zip(carrier_alleles[:, index], carrier_called[:, index])
+        ]
         called = [allele for allele in alleles if allele is not None]
         side = "TARGET" if variant.is_target else ("LEFT" if index < segment.target_index else "RIGHT")
         marker_status = "MISSING" if len(called) != len(alleles) else ("CONCORDANT" if len(set(called)) <= 1 else "DISCORDANT")
@@ -364,27 +376,23 @@ def infer_target_centered_ibs(
         })
     signature_indexes = [index for index in range(segment.left_index, segment.right_index + 1) if index != segment.target_index]
     background_ids = {
-        row["SAMPLE_ID"] for row in cohort_rows
-        if row["COHORT_ID"] == "controls_unrelated" and row["INCLUDED"]
+        row["SAMPLE_ID"] for row in cohort_rows if row["COHORT_ID"] == "controls_unrelated"
     }
     background_ids.update(
         row["SAMPLE_ID"] for row in cohort_rows
-        if row["COHORT_ID"] == "target_chromosome_all_qc" and row["INCLUDED"] and row["ROLE"] != "CARRIER"
+        if row["COHORT_ID"] == "target_chromosome_all_qc" and row["ROLE"] != "CARRIER"
     )
     background_haplotypes = 0
     matching_background = 0
     if selected and signature_indexes:
-        reference_sample_index, reference_haplotype_index = carrier_keys[0]
-        signature = tuple(_allele(variants[index].genotypes[reference_sample_index], reference_haplotype_index) for index in signature_indexes)
+        background_keys: list[tuple[int, int]] = []
         for sample_id in sorted(background_ids):
             if sample_id not in sample_indexes:
                 raise FounderAnalysisError("background_sample_identity_mismatch")
-            for haplotype_index in (0, 1):
-                observed = tuple(_allele(variants[index].genotypes[sample_indexes[sample_id]], haplotype_index) for index in signature_indexes)
-                if None not in observed:
-                    background_haplotypes += 1
-                    if observed == signature:
-                        matching_background += 1
+            background_keys.extend((sample_indexes[sample_id], haplotype_index) for haplotype_index in (0, 1))
+        background_haplotypes, matching_background = matrix.signature_matches(
+            matrix.select(carrier_keys[:1]), matrix.select(background_keys), signature_indexes
+        )
     frequency = matching_background / background_haplotypes if background_haplotypes else 0.0
     consensus_rows = [{
         "ANALYSIS_ID": "primary_exact_ibs", "TARGET_VARIANT_ID": target_variant.variant_id,
@@ -0,0 +1,31 @@
+"""Lecture en flux des sorties volumineuses d'outils et de fichiers génétiques."""
+
+from .bcftools import (
+    CommandStreamError,
+    CommandStreamer,
+    buffered_command_lines,
+    stream_command_lines,
+    stream_query_rows,
+)
+from .bed import (
+    MISSING_DOSAGE,
+    PlinkBed,
+    PlinkBedError,
+    open_plink_bed,
+    pack_dosages,
+    write_plink_bed,
+)
+
+__all__ = [
+    "CommandStreamError",
+    "CommandStreamer",
+    "MISSING_DOSAGE",
+    "PlinkBed",
+    "PlinkBedError",
+    "buffered_command_lines",
+    "open_plink_bed",
+    "pack_dosages",
+    "stream_command_lines",
+    "stream_query_rows",
+    "write_plink_bed",
+]
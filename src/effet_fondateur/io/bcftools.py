@@ -0,0 +1,116 @@
+"""Itération en flux sur la sortie texte de `bcftools query`.
+
+Une fenêtre phasée de référence produit plusieurs gigaoctets de texte : la
+sortie est lue ligne par ligne depuis le tube, sans jamais être conservée en
+entier. Le tube borné impose la contre-pression : bcftools attend tant que
+l'appelant n'a pas consommé les lignes précédentes.
+"""
+
+from __future__ import annotations
+
+import subprocess
+import threading
+from collections.abc import Callable, Iterator, Sequence
+from pathlib import Path
+
+from effet_fondateur.audit import trace_span
+
+
+READ_BUFFER_BYTES = 1024 * 1024
+
+CommandStreamer = Callable[[Sequence[str], float], Iterator[str]]
+
+
+class CommandStreamError(RuntimeError):
+    """Signale un outil absent, interrompu par le délai ou terminé en échec.
+
+    `return_code` vaut `None` lorsque le processus n'a pas pu démarrer ou a été
+    arrêté à l'expiration du délai.
+    """
+
+    def __init__(self, command: Sequence[str], return_code: int | None) -> None:
+        self.command = tuple(command)
+        self.return_code = return_code
+        reason = "indisponible ou hors délai" if return_code is None else f"code {return_code}"
+        super().__init__(f"Commande en échec ({reason}) : {self.command[0] if self.command else ''}")
+
+
+def stream_command_lines(
+    command: Sequence[str], timeout_seconds: float
+) -> Iterator[str]:
+    """Produit les lignes de sortie standard d'une commande, sans fin de ligne.
+
+    Le délai couvre toute la durée de vie du processus, consommation comprise.
+    Le code retour n'est contrôlé qu'après la dernière ligne : l'appelant qui
+    valide les enregistrements au fil de l'eau peut donc échouer avant. Si
+    l'itération est abandonnée, le processus est arrêté et attendu.
+    """
+    with trace_span("command_stream", "tool", executable=Path(command[0]).name if command else ""):
+        yield from _process_lines(command, timeout_seconds)
+
+
+def _process_lines(command: Sequence[str], timeout_seconds: float) -> Iterator[str]:
+    try:
+        process = subprocess.Popen(
+            list(command),
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            encoding="utf-8",
+            bufsize=READ_BUFFER_BYTES,
+        )
+    except OSError as error:
+        raise CommandStreamError(command, None) from error
+    expired = threading.Event()
+
+    def expire() -> None:
+        expired.set()
+        process.kill()
+
+    timer = threading.Timer(timeout_seconds, expire)
+    timer.daemon = True
+    timer.start()
+    try:
+        assert process.stdout is not None
+        for line in process.stdout:
+            yield line[:-1] if line.endswith("\n") else line
+        return_code = process.wait()
+    finally:
+        timer.cancel()
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+        if process.stdout is not None:
+            process.stdout.close()
+    if expired.is_set():
+        raise CommandStreamError(command, None)
+    if return_code != 0:
+        raise CommandStreamError(command, return_code)
+
+
+def buffered_command_lines(
+    runner: Callable[[Sequence[str], float], subprocess.CompletedProcess[str]],
+) -> CommandStreamer:
+    """Adapte un exécuteur injecté à sortie capturée à l'interface de flux."""
+
+    def stream(command: Sequence[str], timeout_seconds: float) -> Iterator[str]:
+        try:
+            completed = runner(command, timeout_seconds)
+        except (OSError, subprocess.TimeoutExpired) as error:
+            raise CommandStreamError(command, None) from error
+        if completed.returncode != 0:
+            raise CommandStreamError(command, completed.returncode)
+        yield from completed.stdout.splitlines()
+
+    return stream
+
+
+def stream_query_rows(
+    command: Sequence[str],
+    timeout_seconds: float,
+    streamer: CommandStreamer = stream_command_lines,
+) -> Iterator[list[str]]:
+    """Produit les champs tabulés de chaque ligne d'un `bcftools query`."""
+    for line in streamer(command, timeout_seconds):
+        yield line.split("\t")
@@ -0,0 +1,167 @@
+"""Lecture et écriture natives des fichiers PLINK `.bed` en mode SNP-major.
+
+Le fichier est projeté en mémoire : seuls les octets des variants demandés sont
+lus. Chaque variant occupe `ceil(n_individus / 4)` octets, quatre génotypes de
+deux bits par octet, le premier individu dans les bits de poids faible. Les
+dosages produits comptent l'allèle A1 (cinquième colonne du `.bim`), comme
+l'export PLINK `--recode A`.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterable, Iterator, Sequence
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+
+BED_MAGIC = b"\x6c\x1b\x01"
+MISSING_DOSAGE = -1
+
+# Code PLINK à deux bits -> nombre d'allèles A1 : 00 homozygote A1, 01 manquant,
+# 10 hétérozygote, 11 homozygote A2.
+_CODE_DOSAGES = np.array([2, MISSING_DOSAGE, 1, 0], dtype=np.int8)
+# Octet -> dosages des quatre individus qu'il contient, dans l'ordre du `.fam`.
+_BYTE_DOSAGES = _CODE_DOSAGES[
+    (np.arange(256, dtype=np.uint8)[:, None] >> np.array([0, 2, 4, 6], dtype=np.uint8)) & 3
+]
+# Dosage + 1 -> code PLINK : manquant 01, 0 copie A1 11, 1 copie 10, 2 copies 00.
+_DOSAGE_CODES = np.array([1, 3, 2, 0], dtype=np.uint8)
+
+
+class PlinkBedError(ValueError):
+    """Signale un fichier `.bed` illisible ou incohérent avec `.bim`/`.fam`."""
+
+
+def _indexes(selection: Sequence[int] | np.ndarray | None, count: int, name: str) -> np.ndarray | None:
+    if selection is None:
+        return None
+    indexes = np.asarray(selection, dtype=np.int64)
+    if indexes.ndim != 1 or (indexes.size and (indexes.min() < 0 or indexes.max() >= count)):
+        raise PlinkBedError(f"plink_bed_{name}_index_out_of_range")
+    return indexes
+
+
+@dataclass(frozen=True)
+class PlinkBed:
+    """Vue en lecture seule d'un `.bed` SNP-major validé."""
+
+    path: Path
+    sample_count: int
+    variant_count: int
+    _packed: np.ndarray
+
+    @property
+    def bytes_per_variant(self) -> int:
+        return (self.sample_count + 3) // 4
+
+    def read_dosages(
+        self,
+        variants: Sequence[int] | np.ndarray | None = None,
+        samples: Sequence[int] | np.ndarray | None = None,
+    ) -> np.ndarray:
+        """Retourne une matrice int8 individus × variants, `-1` si manquant.
+
+        Sans sélection, tous les variants et individus sont décodés dans
+        l'ordre des fichiers `.bim` et `.fam`.
+        """
+        variant_indexes = _indexes(variants, self.variant_count, "variant")
+        sample_indexes = _indexes(samples, self.sample_count, "sample")
+        packed = self._packed if variant_indexes is None else self._packed[variant_indexes]
+        if sample_indexes is None:
+            dosages = _BYTE_DOSAGES[packed].reshape(packed.shape[0], -1)[:, : self.sample_count]
+        else:
+            shifts = ((sample_indexes & 3) * 2).astype(np.uint8)
+            codes = (packed[:, sample_indexes >> 2] >> shifts) & 3
+            dosages = _CODE_DOSAGES[codes]
+        return np.ascontiguousarray(dosages.T)
+
+    def iter_dosage_blocks(
+        self,
+        block_variant_count: int,
+        samples: Sequence[int] | np.ndarray | None = None,
+    ) -> Iterator[tuple[int, np.ndarray]]:
+        """Décode les variants par blocs contigus pour borner la mémoire.
+
+        Chaque élément est `(indice du premier variant, dosages individus ×
+        variants du bloc)`.
+        """
+        if isinstance(block_variant_count, bool) or block_variant_count <= 0:
+            raise PlinkBedError("plink_bed_invalid_block_size")
+        for start in range(0, self.variant_count, block_variant_count):
+            stop = min(start + block_variant_count, self.variant_count)
+            yield start, self.read_dosages(np.arange(start, stop), samples)
+
+
+def open_plink_bed(path: Path, sample_count: int, variant_count: int) -> PlinkBed:
+    """Projette un `.bed` en mémoire après contrôle de l'en-tête et de la taille.
+
+    Les effectifs proviennent du `.fam` et du `.bim` déjà validés : une taille
+    différente révèle un jeu PLINK tronqué ou incohérent.
+    """
+    if sample_count <= 0 or variant_count < 0:
+        raise PlinkBedError("plink_bed_invalid_dimensions")
+    bytes_per_variant = (sample_count + 3) // 4
+    try:
+        with path.open("rb") as input_file:
+            header = input_file.read(len(BED_MAGIC))
+        size = path.stat().st_size
+    except OSError as error:
+        raise PlinkBedError("plink_bed_unreadable") from error
+    if header != BED_MAGIC:
+        raise PlinkBedError("invalid_plink_bed_header")
+    if size != len(BED_MAGIC) + bytes_per_variant * variant_count:
+        raise PlinkBedError("plink_bed_size_mismatch")
+    if variant_count == 0:
+        packed = np.zeros((0, bytes_per_variant), dtype=np.uint8)
+    else:
+        packed = np.memmap(
+            path,
+            dtype=np.uint8,
+            mode="r",
+            offset=len(BED_MAGIC),
+            shape=(variant_count, bytes_per_variant),
+        )
+    return PlinkBed(
+        path=path,
+        sample_count=sample_count,
+        variant_count=variant_count,
+        _packed=packed,
+    )
+
+
+def pack_dosages(dosages: np.ndarray) -> np.ndarray:
+    """Encode une matrice individus × variants en octets SNP-major.
+
+    L'entrée suit la convention de `PlinkBed.read_dosages` ; la sortie contient
+    une ligne d'octets par variant, les bits de remplissage restant nuls.
+    """
+    values = np.asarray(dosages)
+    if values.ndim != 2 or values.shape[0] <= 0:
+        raise PlinkBedError("plink_bed_invalid_dimensions")
+    if values.size and (values.min() < MISSING_DOSAGE or values.max() > 2):
+        raise PlinkBedError("plink_bed_invalid_dosage")
+    sample_count, variant_count = values.shape
+    bytes_per_variant = (sample_count + 3) // 4
+    codes = np.zeros((variant_count, bytes_per_variant * 4), dtype=np.uint8)
+    codes[:, :sample_count] = _DOSAGE_CODES[values.T.astype(np.int16) + 1]
+    codes = codes.reshape(variant_count, bytes_per_variant, 4)
+    return codes[..., 0] | codes[..., 1] << 2 | codes[..., 2] << 4 | codes[..., 3] << 6
+
+
+def write_plink_bed(path: Path, sample_count: int, blocks: Iterable[np.ndarray]) -> int:
+    """Écrit un `.bed` SNP-major à partir de blocs de dosages individus × variants.
+
+    Retourne le nombre de variants écrits ; les blocs sont encodés l'un après
+    l'autre afin que la mémoire ne dépende pas de la taille du jeu complet.
+    """
+    variant_count = 0
+    with path.open("wb") as output_file:
+        output_file.write(BED_MAGIC)
+        for block in blocks:
+            if block.shape[0] != sample_count:
+                raise PlinkBedError("plink_bed_sample_count_mismatch")
+            output_file.write(pack_dosages(block).tobytes())
+            variant_count += block.shape[1]
+    return variant_count
@@ -0,0 +1,9 @@
+"""Calcul natif de l'apparentement KING-robust."""
+
+from effet_fondateur.kinship.king_robust import (
+    KinshipComputationError,
+    KinshipPair,
+    king_robust_pairs,
+)
+
+__all__ = ["KinshipComputationError", "KinshipPair", "king_robust_pairs"]
@@ -0,0 +1,188 @@
+"""Estimation native de l'apparentement KING-robust sur un panel PLINK.
+
+Pour une paire d'individus, seuls les marqueurs génotypés chez les deux
+comptent : `N_SNP`, les doubles hétérozygotes `N_AaAa`, les homozygotes
+opposés `N_AA,aa` et les hétérozygotes `N_Aa` de chacun. Le kinship d'une paire
+de même famille est `(N_AaAa - 2 N_AA,aa) / (N_Aa(1) + N_Aa(2))` ; entre
+familles, l'estimateur robuste à la structure divise par le plus petit des deux
+`N_Aa` :
+
+    1/2 - (N_Aa(1) + N_Aa(2) - 2 N_AaAa + 4 N_AA,aa) / (4 min N_Aa)
+
+Ce sont les estimateurs de `king --kinship`. Les comptes sont des produits de
+matrices d'indicateurs sur des tuiles d'individus, accumulés par blocs de
+variants lus dans le `.bed` projeté en mémoire ; chaque couple de tuiles est
+confié au pool de fils, numpy libérant le GIL pendant les produits.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+import numpy as np
+
+from effet_fondateur.io import PlinkBed
+
+
+KINSHIP_TILE_SAMPLES = 1024
+# Produits float32 exacts : un bloc compte au plus 2**24 marqueurs.
+KINSHIP_BLOCK_VARIANTS = 4096
+
+
+class KinshipComputationError(ValueError):
+    """Signale un paramètre invalide du calcul natif d'apparentement."""
+
+
+@dataclass(frozen=True)
+class KinshipPair:
+    """Statistiques KING d'une paire, indices dans l'ordre du `.fam`."""
+
+    sample_index_1: int
+    sample_index_2: int
+    n_snp: int
+    hethet: float
+    ibs0: float
+    kinship: float
+    within_family: bool
+
+
+def _positive_count(value: int, name: str) -> int:
+    if isinstance(value, bool) or not isinstance(value, int) or value <= 0:
+        raise KinshipComputationError(f"invalid_kinship_parameter:{name}")
+    return value
+
+
+def _indicators(dosages: np.ndarray) -> tuple[np.ndarray, ...]:
+    """Indicateurs float32 observé, hétérozygote, 0 et 2 copies A1."""
+    return tuple(
+        np.ascontiguousarray(mask, dtype=np.float32)
+        for mask in (dosages >= 0, dosages == 1, dosages == 0, dosages == 2)
+    )
+
+
+def _tile_counts(
+    bed: PlinkBed,
+    left: np.ndarray,
+    right: np.ndarray,
+    block_variant_count: int,
+) -> dict[str, np.ndarray]:
+    """Comptes KING de toutes les paires `left` × `right`, en float64."""
+    shape = (left.size, right.size)
+    counts = {
+        name: np.zeros(shape, dtype=np.float64)
+        for name in ("n_snp", "hethet", "opposite", "het_1", "het_2")
+    }
+    diagonal = left is right
+    samples = left if diagonal else np.concatenate((left, right))
+    for _, dosages in bed.iter_dosage_blocks(block_variant_count, samples):
+        observed, het, reference, alternate = _indicators(dosages)
+        split = left.size
+        if diagonal:
+            observed_2, het_2, reference_2, alternate_2 = observed, het, reference, alternate
+        else:
+            observed, observed_2 = observed[:split], observed[split:]
+            het, het_2 = het[:split], het[split:]
+            reference, reference_2 = reference[:split], reference[split:]
+            alternate, alternate_2 = alternate[:split], alternate[split:]
+        counts["n_snp"] += observed @ observed_2.T
+        counts["hethet"] += het @ het_2.T
+        counts["opposite"] += reference @ alternate_2.T
+        counts["opposite"] += alternate @ reference_2.T
+        counts["het_1"] += het @ observed_2.T
+        counts["het_2"] += observed @ het_2.T
+    return counts
+
+
+def _tile_pairs(
+    bed: PlinkBed,
+    left: np.ndarray,
+    right: np.ndarray,
+    families: np.ndarray,
+    minimum_kinship: float,
+    block_variant_count: int,
+) -> list[KinshipPair]:
+    counts = _tile_counts(bed, left, right, block_variant_count)
+    n_snp = counts["n_snp"]
+    hethet = counts["hethet"]
+    opposite = counts["opposite"]
+    het_sum = counts["het_1"] + counts["het_2"]
+    het_min = np.minimum(counts["het_1"], counts["het_2"])
+    within = families[left][:, None] == families[right][None, :]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        kinship = np.where(
+            within,
+            (hethet - 2 * opposite) / het_sum,
+            0.5 - (het_sum - 2 * hethet + 4 * opposite) / (4 * het_min),
+        )
+    # Une paire sans marqueur commun ni hétérozygote n'a pas de kinship
+    # mesurable ; entre familles, seules les paires du degré demandé sont gardées.
+    reported = (n_snp > 0) & np.where(within, het_sum > 0, het_min > 0)
+    reported &= within | (kinship >= minimum_kinship)
+    if left is right:
+        reported &= np.triu(np.ones(reported.shape, dtype=bool), k=1)
+    rows, columns = np.nonzero(reported)
+    return [
+        KinshipPair(
+            int(left[row]),
+            int(right[column]),
+            int(n_snp[row, column]),
+            float(hethet[row, column] / n_snp[row, column]),
+            float(opposite[row, column] / n_snp[row, column]),
+            float(kinship[row, column]),
+            bool(within[row, column]),
+        )
+        for row, column in zip(rows.tolist(), columns.tolist())
+    ]
+
+
+def king_robust_pairs(
+    bed: PlinkBed,
+    family_ids: Sequence[str],
+    *,
+    minimum_kinship: float,
+    threads: int,
+    tile_sample_count: int = KINSHIP_TILE_SAMPLES,
+    block_variant_count: int = KINSHIP_BLOCK_VARIANTS,
+) -> list[KinshipPair]:
+    """Calcule les paires KING-robust publiables d'un `.bed`.
+
+    Comme `king --kinship`, toutes les paires d'une même famille sont publiées
+    et, entre familles, seulement celles dont le kinship atteint
+    `minimum_kinship`. Les paires sont triées par indices du `.fam`.
+    """
+    if len(family_ids) != bed.sample_count:
+        raise KinshipComputationError("kinship_family_count_mismatch")
+    threads = _positive_count(threads, "threads")
+    tile_sample_count = _positive_count(tile_sample_count, "tile_sample_count")
+    block_variant_count = _positive_count(block_variant_count, "block_variant_count")
+    if block_variant_count > 2**24:
+        raise KinshipComputationError("invalid_kinship_parameter:block_variant_count")
+    families = np.array(family_ids, dtype=object)
+    tiles = [
+        np.arange(start, min(start + tile_sample_count, bed.sample_count))
+        for start in range(0, bed.sample_count, tile_sample_count)
+    ]
+    tasks = [
+        (tiles[first], tiles[second])
+        for first in range(len(tiles))
+        for second in range(first, len(tiles))
+    ]
+    # Chaque tâche garde cinq matrices float64 d'une tuile : le nombre de fils
+    # borne aussi la mémoire de travail.
+    with ThreadPoolExecutor(
+        max_workers=min(threads, len(tasks)), thread_name_prefix="kinship"
+    ) as executor:
+        tile_pairs = list(
+            executor.map(
+                lambda task: _tile_pairs(
+                    bed, *task, families, minimum_kinship, block_variant_count
+                ),
+                tasks,
+            )
+        )
+    return sorted(
+        (pair for pairs in tile_pairs for pair in pairs),
+        key=lambda pair: (pair.sample_index_1, pair.sample_index_2),
+    )
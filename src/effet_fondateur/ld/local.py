@@ -12,7 +12,7 @@ from dataclasses import dataclass
 from pathlib import Path
 from typing import Any, Iterable
 
-from effet_fondateur.audit import atomic_write_json
+from effet_fondateur.audit import atomic_write_json, traced
 from effet_fondateur.contracts import validate_json_document, validate_tsv_table
 
 
@@ -84,6 +84,7 @@ def _read_whitespace(path: Path, *, allow_header_only: bool = False) -> list[dic
     return [dict(zip(header, row, strict=True)) for row in lines[1:]]
 
 
+@traced("plink", "tool")
 def _run_plink(executable: str, arguments: list[str], timeout_seconds: int) -> None:
     try:
         completed = subprocess.run(
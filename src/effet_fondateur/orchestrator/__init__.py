@@ -1,14 +1,20 @@
 """Orchestration reproductible des étapes du pipeline V2."""
 
+from .cache import StageCache
+from .digests import VerificationPolicy
 from .errors import IntegrityError, PipelineError, StageExecutionError
 from .models import StageDefinition
 from .pipeline import resume_pipeline, run_pipeline
+from .profiling import ProfilingPolicy
 
 __all__ = [
     "IntegrityError",
     "PipelineError",
+    "ProfilingPolicy",
+    "StageCache",
     "StageDefinition",
     "StageExecutionError",
+    "VerificationPolicy",
     "resume_pipeline",
     "run_pipeline",
 ]
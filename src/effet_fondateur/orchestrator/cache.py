@@ -0,0 +1,200 @@
+"""Cache partagé entre runs des étapes publiées, adressé par signature.
+
+Une entrée contient l'arbre publié d'une étape, lié physiquement depuis le run
+qui l'a produit. La signature d'étape couvre déjà le code, les paramètres, la
+configuration et les empreintes des entrées : deux runs de même signature
+doivent produire les mêmes artefacts. L'entrée reste néanmoins revalidée
+intégralement par le runner avant toute publication dans un nouveau run.
+"""
+
+from __future__ import annotations
+
+import fcntl
+import os
+import re
+import shutil
+import tempfile
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from effet_fondateur.audit import atomic_write_json, read_json, traced
+from effet_fondateur.orchestrator.errors import PipelineError
+from effet_fondateur.orchestrator.models import StageDefinition
+from effet_fondateur.orchestrator.state import utc_now
+
+
+ENTRY_DOCUMENT_NAME = "stage_cache_entry.json"
+SIGNATURE_PATTERN = re.compile(r"^[a-f0-9]{64}$")
+
+
+@dataclass(frozen=True)
+class StageCache:
+    """Dossier du cache et borne optionnelle de sa taille en octets."""
+
+    root: Path
+    max_bytes: int | None = None
+
+
+def validate_stage_cache(cache: StageCache) -> None:
+    """Refuse une borne de taille inutilisable avant de créer un run."""
+    if cache.max_bytes is not None and (
+        isinstance(cache.max_bytes, bool)
+        or not isinstance(cache.max_bytes, int)
+        or cache.max_bytes <= 0
+    ):
+        raise PipelineError(
+            f"La taille maximale du cache d'étapes doit être un entier positif : {cache.max_bytes}"
+        )
+
+
+def _entries_dir(cache: StageCache) -> Path:
+    entries_dir = cache.root / "entries"
+    entries_dir.mkdir(parents=True, exist_ok=True)
+    return entries_dir
+
+
+def _entry_dir(cache: StageCache, signature: str) -> Path:
+    if SIGNATURE_PATTERN.fullmatch(signature) is None:
+        raise PipelineError(f"Signature d'étape invalide pour le cache : {signature}")
+    return _entries_dir(cache) / signature
+
+
+@contextmanager
+def _exclusive_lock(cache: StageCache) -> Iterator[None]:
+    # Plusieurs runs, voire plusieurs processus, partagent le même cache : le
+    # verrou couvre publication, restauration et éviction.
+    cache.root.mkdir(parents=True, exist_ok=True)
+    with (cache.root / ".lock").open("a+b") as lock_file:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+
+def _touch(document_path: Path) -> None:
+    # Horodatage explicite en nanosecondes : l'horloge grossière du noyau
+    # confondrait des accès rapprochés et fausserait l'ordre LRU.
+    now = time.time_ns()
+    os.utime(document_path, ns=(now, now))
+
+
+def _link_tree(source_dir: Path, destination_dir: Path) -> int:
+    """Lie chaque fichier par lien physique, ou le copie hors du même volume."""
+    total_bytes = 0
+    for source_path in sorted(source_dir.rglob("*")):
+        destination_path = destination_dir / source_path.relative_to(source_dir)
+        if source_path.is_symlink():
+            raise PipelineError(f"Lien symbolique refusé dans une étape : {source_path}")
+        if source_path.is_dir():
+            destination_path.mkdir(parents=True, exist_ok=True)
+            continue
+        destination_path.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            os.link(source_path, destination_path)
+        except OSError:
+            shutil.copy2(source_path, destination_path)
+        total_bytes += source_path.stat().st_size
+    return total_bytes
+
+
+def _evict(cache: StageCache) -> list[str]:
+    """Retire les entrées les moins récemment utilisées au-delà de la borne."""
+    if cache.max_bytes is None:
+        return []
+    entries: list[tuple[int, int, Path]] = []
+    for entry_dir in _entries_dir(cache).iterdir():
+        document_path = entry_dir / ENTRY_DOCUMENT_NAME
+        if entry_dir.name.startswith(".") or not document_path.is_file():
+            continue
+        entries.append(
+            (document_path.stat().st_mtime_ns, read_json(document_path)["size_bytes"], entry_dir)
+        )
+    entries.sort(key=lambda entry: (entry[0], entry[2].name))
+    total_bytes = sum(size_bytes for _, size_bytes, _ in entries)
+    evicted: list[str] = []
+    for _, size_bytes, entry_dir in entries:
+        if total_bytes <= cache.max_bytes:
+            break
+        shutil.rmtree(entry_dir)
+        total_bytes -= size_bytes
+        evicted.append(entry_dir.name)
+    return evicted
+
+
+@traced("store_stage", "cache")
+def store_stage(
+    cache: StageCache,
+    stage_dir: Path,
+    definition: StageDefinition,
+    signature: str,
+    run_id: str,
+) -> bool:
+    """Ajoute l'arbre publié d'une étape au cache s'il n'y figure pas déjà."""
+    entry_dir = _entry_dir(cache, signature)
+    with _exclusive_lock(cache):
+        if entry_dir.exists():
+            _touch(entry_dir / ENTRY_DOCUMENT_NAME)
+            return False
+        staging_dir = Path(tempfile.mkdtemp(prefix=f".{signature}.", dir=entry_dir.parent))
+        try:
+            size_bytes = _link_tree(stage_dir, staging_dir / "stage")
+            atomic_write_json(
+                staging_dir / ENTRY_DOCUMENT_NAME,
+                {
+                    "schema_version": "1.0.0",
+                    "signature": signature,
+                    "stage_id": definition.stage_id,
+                    "stage_name": definition.stage_name,
+                    "source_run_id": run_id,
+                    "stored_at": utc_now(),
+                    "size_bytes": size_bytes,
+                },
+            )
+            _touch(staging_dir / ENTRY_DOCUMENT_NAME)
+            os.replace(staging_dir, entry_dir)
+        finally:
+            shutil.rmtree(staging_dir, ignore_errors=True)
+        _evict(cache)
+    return True
+
+
+@traced("restore_stage", "cache")
+def restore_stage(
+    cache: StageCache,
+    signature: str,
+    definition: StageDefinition,
+    destination_dir: Path,
+) -> dict[str, Any] | None:
+    """Lie l'arbre d'une entrée dans `destination_dir` et retourne sa provenance.
+
+    Retourne `None` si la signature est absente du cache. L'appelant reste
+    responsable de la validation complète des documents et artefacts liés.
+    """
+    entry_dir = _entry_dir(cache, signature)
+    with _exclusive_lock(cache):
+        document_path = entry_dir / ENTRY_DOCUMENT_NAME
+        if not document_path.is_file():
+            return None
+        entry = read_json(document_path)
+        if (
+            entry["signature"] != signature
+            or entry["stage_id"] != definition.stage_id
+            or entry["stage_name"] != definition.stage_name
+        ):
+            raise PipelineError(f"Entrée de cache incohérente : {entry_dir}")
+        _link_tree(entry_dir / "stage", destination_dir)
+        # La date de modification du descripteur sert d'horodatage LRU.
+        _touch(document_path)
+    return entry
+
+
+def discard_stage(cache: StageCache, signature: str) -> None:
+    """Supprime une entrée refusée à la validation."""
+    entry_dir = _entry_dir(cache, signature)
+    with _exclusive_lock(cache):
+        shutil.rmtree(entry_dir, ignore_errors=True)
@@ -0,0 +1,131 @@
+"""Empreintes SHA-256 mémorisées par run selon les métadonnées des fichiers.
+
+La politique `full` recalcule chaque empreinte, comme avant l'introduction du
+cache. La politique `fast` réutilise l'empreinte d'un fichier dont le
+périphérique, l'inode, la taille, `mtime_ns` et `ctime_ns` sont inchangés.
+`ctime_ns` ne peut pas être rétabli par un processus utilisateur : une
+écriture suivie d'une restauration de `mtime` reste détectée. Une fraction
+aléatoire des fichiers inchangés est tout de même relue pour contrôler le
+cache lui-même.
+"""
+
+from __future__ import annotations
+
+import random
+import threading
+from collections.abc import Callable
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from effet_fondateur.audit import atomic_write_json, read_json, sha256_file
+from effet_fondateur.orchestrator.errors import PipelineError
+
+
+VERIFY_MODES = ("full", "fast")
+DIGEST_CACHE_NAME = "digest_cache.json"
+
+FileHasher = Callable[[Path], str]
+
+
+@dataclass(frozen=True)
+class VerificationPolicy:
+    """Politique de contrôle des empreintes lors d'un run ou d'une reprise."""
+
+    mode: str = "full"
+    sample_rate: float = 0.0
+
+
+def validate_verification_policy(policy: VerificationPolicy) -> None:
+    """Refuse une politique inconnue avant de créer ou modifier un run."""
+    if policy.mode not in VERIFY_MODES:
+        raise PipelineError(
+            f"Politique de vérification inconnue : {policy.mode} "
+            f"(attendu : {', '.join(VERIFY_MODES)})"
+        )
+    if (
+        isinstance(policy.sample_rate, bool)
+        or not isinstance(policy.sample_rate, (int, float))
+        or not 0.0 <= policy.sample_rate <= 1.0
+    ):
+        raise PipelineError(
+            f"Le taux de revérification doit être compris entre 0 et 1 : {policy.sample_rate}"
+        )
+
+
+def _stat_key(path: Path) -> dict[str, int]:
+    status = path.stat()
+    return {
+        "device": status.st_dev,
+        "inode": status.st_ino,
+        "size": status.st_size,
+        "mtime_ns": status.st_mtime_ns,
+        "ctime_ns": status.st_ctime_ns,
+    }
+
+
+class RunDigestCache:
+    """Cache d'empreintes d'un run, partagé par les étapes d'une même invocation.
+
+    Les étapes parallèles s'exécutent dans des threads du même processus : un
+    verrou protège le dictionnaire, et `flush()` le publie atomiquement.
+    """
+
+    def __init__(
+        self,
+        run_dir: Path,
+        policy: VerificationPolicy,
+        generator: random.Random | None = None,
+    ) -> None:
+        validate_verification_policy(policy)
+        self._path = run_dir / DIGEST_CACHE_NAME
+        self._policy = policy
+        self._generator = generator or random.Random()
+        self._lock = threading.Lock()
+        self._entries: dict[str, dict[str, Any]] = {}
+        self._dirty = False
+        if self._path.is_file():
+            try:
+                document = read_json(self._path)
+                self._entries = dict(document["entries"])
+            except (KeyError, TypeError, ValueError, OSError):
+                # Un cache illisible est seulement une accélération perdue.
+                self._entries = {}
+
+    def sha256(self, path: Path) -> str:
+        """Retourne l'empreinte du fichier, recalculée si la politique l'exige."""
+        cache_key = str(path.resolve())
+        stat_key = _stat_key(path)
+        with self._lock:
+            entry = self._entries.get(cache_key)
+            reuse = (
+                self._policy.mode == "fast"
+                and entry is not None
+                and entry["stat"] == stat_key
+                and self._generator.random() >= self._policy.sample_rate
+            )
+        if reuse:
+            return entry["sha256"]
+        digest = sha256_file(path)
+        # La clé est relevée avant la lecture : une écriture concurrente
+        # modifiera `ctime_ns` et invalidera l'entrée à la prochaine lecture.
+        with self._lock:
+            self._entries[cache_key] = {"stat": stat_key, "sha256": digest}
+            self._dirty = True
+        return digest
+
+    def flush(self) -> None:
+        """Publie les empreintes nouvellement calculées."""
+        with self._lock:
+            if not self._dirty:
+                return
+            atomic_write_json(
+                self._path, {"schema_version": "1.0.0", "entries": self._entries}
+            )
+            self._dirty = False
+
+
+def file_hasher(digest_cache: RunDigestCache | None) -> FileHasher:
+    """Retourne la fonction d'empreinte à utiliser pour un run."""
+    return sha256_file if digest_cache is None else digest_cache.sha256
+
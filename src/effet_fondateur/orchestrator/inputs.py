@@ -5,7 +5,8 @@ from __future__ import annotations
 from pathlib import Path
 from typing import Any
 
-from effet_fondateur.audit import read_json, sha256_file
+from effet_fondateur.audit import hash_files, read_json, sha256_file
+from effet_fondateur.orchestrator.digests import FileHasher
 from effet_fondateur.orchestrator.errors import StageExecutionError
 from effet_fondateur.orchestrator.models import StageDefinition
 
@@ -22,6 +23,7 @@ def _source_artifact(
     index: int,
     config_sha256: str,
     assembly: str,
+    sha256: str,
 ) -> dict[str, str | None]:
     relative_path = source_path.relative_to(root_path)
     configured_source_path = Path(configured_root) / relative_path
@@ -32,7 +34,7 @@ def _source_artifact(
         "media_type": "text/tab-separated-values",
         "schema_name": None,
         "schema_version": None,
-        "sha256": sha256_file(source_path),
+        "sha256": sha256,
         "producer_stage": "external_source",
         "producer_signature": config_sha256,
         "assembly": assembly,
@@ -47,6 +49,7 @@ def _config_file_artifact(
     input_key: str,
     config_sha256: str,
     assembly: str,
+    hasher: FileHasher,
 ) -> dict[str, str | None]:
     physical_path = _resolve_configured_path(configured_path)
     if physical_path.is_symlink() or not physical_path.is_file():
@@ -61,7 +64,7 @@ def _config_file_artifact(
         "media_type": "text/tab-separated-values",
         "schema_name": None,
         "schema_version": None,
-        "sha256": sha256_file(physical_path),
+        "sha256": hasher(physical_path),
         "producer_stage": "external_source",
         "producer_signature": config_sha256,
         "assembly": assembly,
@@ -74,6 +77,7 @@ def _config_file_artifact(
 def _dependency_artifacts(
     run_dir: Path,
     definition: StageDefinition,
+    hasher: FileHasher,
 ) -> list[dict[str, Any]]:
     required_ids = set(definition.required_artifact_ids)
     if not required_ids:
@@ -92,11 +96,7 @@ def _dependency_artifacts(
                         f"Artefact dépendant ambigu : {artifact_id}",
                         2,
                     )
-                physical_path = run_dir / artifact["path"]
-                if (
-                    not physical_path.is_file()
-                    or sha256_file(physical_path) != artifact["sha256"]
-                ):
+                if not (run_dir / artifact["path"]).is_file():
                     raise StageExecutionError(
                         f"Artefact dépendant absent ou modifié : {artifact_id}",
                         5,
@@ -108,6 +108,15 @@ def _dependency_artifacts(
             f"Artefacts dépendants absents : {', '.join(sorted(missing_ids))}",
             2,
         )
+    digests = hash_files(
+        [run_dir / artifact["path"] for artifact in matching_artifacts.values()], hasher
+    )
+    for (artifact_id, artifact), digest in zip(matching_artifacts.items(), digests):
+        if digest != artifact["sha256"]:
+            raise StageExecutionError(
+                f"Artefact dépendant absent ou modifié : {artifact_id}",
+                5,
+            )
     return [
         matching_artifacts[artifact_id]
         for artifact_id in definition.required_artifact_ids
@@ -119,6 +128,7 @@ def resolve_stage_input_artifacts(
     definition: StageDefinition,
     config_sha256: str,
     run_dir: Path,
+    hasher: FileHasher = sha256_file,
 ) -> list[dict[str, str | None]]:
     """Inventorie et empreinte les fichiers des répertoires requis par l'étape."""
     artifacts: list[dict[str, str | None]] = []
@@ -148,7 +158,7 @@ def resolve_stage_input_artifacts(
                 f"Répertoire source vide pour inputs.{input_key}.",
                 2,
             )
-        for source_path in source_paths:
+        for source_path, sha256 in zip(source_paths, hash_files(source_paths, hasher)):
             artifacts.append(
                 _source_artifact(
                     source_path=source_path,
@@ -157,6 +167,7 @@ def resolve_stage_input_artifacts(
                     index=artifact_index,
                     config_sha256=config_sha256,
                     assembly=config["project"]["assembly"],
+                    sha256=sha256,
                 )
             )
             artifact_index += 1
@@ -173,7 +184,8 @@ def resolve_stage_input_artifacts(
                 input_key=input_key,
                 config_sha256=config_sha256,
                 assembly=config["project"]["assembly"],
+                hasher=hasher,
             )
         )
-    artifacts.extend(_dependency_artifacts(run_dir, definition))
+    artifacts.extend(_dependency_artifacts(run_dir, definition, hasher))
     return artifacts
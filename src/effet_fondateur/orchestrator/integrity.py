@@ -5,8 +5,10 @@ from __future__ import annotations
 from pathlib import Path, PurePosixPath
 from typing import Any
 
-from effet_fondateur.audit import read_json, sha256_file
+from effet_fondateur.audit import hash_files, read_json, sha256_file, traced
 from effet_fondateur.contracts import validate_json_document
+from effet_fondateur.contracts.sidecars import table_sidecar_path
+from effet_fondateur.orchestrator.digests import FileHasher
 from effet_fondateur.orchestrator.errors import IntegrityError
 from effet_fondateur.orchestrator.models import StageDefinition
 from effet_fondateur.orchestrator.state import load_manifest
@@ -32,6 +34,19 @@ def resolve_declared_artifact_path(
     return physical_stage_dir.joinpath(*relative_path.parts)
 
 
+def _declared_digests(
+    artifact: dict[str, Any], artifact_path: Path
+) -> list[tuple[Path, str, str]]:
+    """Fichiers couverts par un artefact : le fichier déclaré et son compagnon."""
+    digests = [(artifact_path, artifact["sha256"], artifact["path"])]
+    sidecar_sha256 = artifact.get("columnar_sidecar_sha256")
+    if sidecar_sha256 is not None:
+        sidecar_path = table_sidecar_path(artifact_path)
+        published_path = PurePosixPath(artifact["path"]).with_name(sidecar_path.name)
+        digests.append((sidecar_path, sidecar_sha256, str(published_path)))
+    return digests
+
+
 def _expected_identity(
     definition: StageDefinition,
     run_id: str,
@@ -58,11 +73,13 @@ def _validate_identity(
             )
 
 
+@traced("validate_attempt_outputs", "integrity")
 def validate_attempt_outputs(
     attempt_dir: Path,
     definition: StageDefinition,
     run_id: str,
     signature: str,
+    hasher: FileHasher = sha256_file,
 ) -> None:
     """Valide les documents et artefacts temporaires avant publication atomique."""
     stage_outputs = read_json(attempt_dir / "stage_outputs.json")
@@ -72,6 +89,7 @@ def validate_attempt_outputs(
 
     published_stage_dir = PurePosixPath("stages") / definition.directory_name
     artifact_ids: set[str] = set()
+    declared = []
     for artifact in stage_outputs["artifacts"]:
         if artifact["artifact_id"] in artifact_ids:
             raise IntegrityError(
@@ -81,30 +99,44 @@ def validate_attempt_outputs(
         artifact_path = resolve_declared_artifact_path(
             artifact["path"], published_stage_dir, attempt_dir
         )
-        if not artifact_path.is_file():
-            raise IntegrityError(f"Artefact annoncé mais absent : {artifact['path']}")
-        if sha256_file(artifact_path) != artifact["sha256"]:
-            raise IntegrityError(f"Empreinte invalide : {artifact['path']}")
+        declared.extend(_declared_digests(artifact, artifact_path))
+    for path, _, declared_path in declared:
+        if not path.is_file():
+            raise IntegrityError(f"Artefact annoncé mais absent : {declared_path}")
+    for (_, expected, declared_path), digest in zip(
+        declared, hash_files([path for path, _, _ in declared], hasher)
+    ):
+        if digest != expected:
+            raise IntegrityError(f"Empreinte invalide : {declared_path}")
 
     audit = read_json(attempt_dir / "audit.json")
     validate_json_document(audit, "stage_audit.schema.json")
     _validate_identity(audit, expected_values, "Audit", definition.stage_name)
 
 
+@traced("validate_published_stage", "integrity")
 def validate_published_stage(
     run_dir: Path,
     definition: StageDefinition,
     stage_record: dict[str, Any],
+    hasher: FileHasher = sha256_file,
 ) -> None:
-    """Recalcule toutes les empreintes avant de réutiliser une étape publiée."""
+    """Contrôle toutes les empreintes avant de réutiliser une étape publiée.
+
+    `hasher` peut réutiliser les empreintes de fichiers inchangés depuis leur
+    dernier calcul dans le run ; voir `digests.py`.
+    """
     stage_dir = run_dir / "stages" / definition.directory_name
     stage_outputs_path = stage_dir / "stage_outputs.json"
     audit_path = stage_dir / "audit.json"
     # Le manifest protège aussi les documents de provenance. Sans ces deux
     # empreintes, un artefact intact pourrait être accompagné d'un audit altéré.
-    if sha256_file(stage_outputs_path) != stage_record["stage_outputs_sha256"]:
+    stage_outputs_digest, audit_digest = hash_files(
+        [stage_outputs_path, audit_path], hasher
+    )
+    if stage_outputs_digest != stage_record["stage_outputs_sha256"]:
         raise IntegrityError(f"Descripteur de sorties modifié : {stage_outputs_path}")
-    if sha256_file(audit_path) != stage_record["audit_sha256"]:
+    if audit_digest != stage_record["audit_sha256"]:
         raise IntegrityError(f"Audit d'étape modifié : {audit_path}")
 
     run_id = load_manifest(run_dir)["run_id"]
@@ -123,14 +155,20 @@ def validate_published_stage(
     )
 
     published_stage_dir = PurePosixPath("stages") / definition.directory_name
+    declared = []
     for artifact in stage_outputs["artifacts"]:
         artifact_path = resolve_declared_artifact_path(
             artifact["path"], published_stage_dir, stage_dir
         )
-        if not artifact_path.is_file():
-            raise IntegrityError(f"Artefact publié absent : {artifact['path']}")
-        if sha256_file(artifact_path) != artifact["sha256"]:
-            raise IntegrityError(f"Artefact publié modifié : {artifact['path']}")
+        declared.extend(_declared_digests(artifact, artifact_path))
+    for path, _, declared_path in declared:
+        if not path.is_file():
+            raise IntegrityError(f"Artefact publié absent : {declared_path}")
+    for (_, expected, declared_path), digest in zip(
+        declared, hash_files([path for path, _, _ in declared], hasher)
+    ):
+        if digest != expected:
+            raise IntegrityError(f"Artefact publié modifié : {declared_path}")
 
     audit = read_json(audit_path)
     validate_json_document(audit, "stage_audit.schema.json")
@@ -20,6 +20,9 @@ class StageDefinition:
     manual_decision_id: str | None = None
     blocking_manual_decision_ids: tuple[str, ...] = ()
     resolves_manual_decision_ids: tuple[str, ...] = ()
+    # Des sorties qui citent le run (figures, rapports) ne peuvent pas être
+    # rattachées à un autre run : l'étape n'utilise pas le cache d'étapes.
+    embeds_run_identity: bool = False
 
     @property
     def directory_name(self) -> str:
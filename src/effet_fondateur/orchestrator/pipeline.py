@@ -2,16 +2,32 @@
 
 from __future__ import annotations
 
+from contextlib import nullcontext
+from functools import partial
 from pathlib import Path
 from typing import Iterable
 
 from effet_fondateur.audit import sha256_file
+from effet_fondateur.audit.tracing import run_tracing
 from effet_fondateur.contracts import load_pipeline_config
+from effet_fondateur.orchestrator.cache import StageCache, validate_stage_cache
 from effet_fondateur.orchestrator.catalog import build_stage_catalog
-from effet_fondateur.orchestrator.errors import IntegrityError, PipelineError
+from effet_fondateur.orchestrator.digests import (
+    RunDigestCache,
+    VerificationPolicy,
+    validate_verification_policy,
+)
+from effet_fondateur.orchestrator.errors import IntegrityError
 from effet_fondateur.orchestrator.models import StageDefinition
+from effet_fondateur.orchestrator.profiling import ProfilingPolicy, validate_profiling_policy
 from effet_fondateur.orchestrator.runner import run_stage_with_failure_audit
-from effet_fondateur.orchestrator.state import load_manifest, save_manifest
+from effet_fondateur.orchestrator.scheduler import (
+    build_stage_graph,
+    run_stage_graph,
+    validate_job_count,
+)
+from effet_fondateur.orchestrator.state import load_manifest, manifest_journal, save_manifest
+from effet_fondateur.orchestrator.workers import ExecutionMode, validate_execution_mode
 from effet_fondateur.stages.initialize_run import initialize_run
 
 
@@ -334,6 +350,7 @@ BUILD_VISUALIZATIONS_STAGE = StageDefinition(
     stage_name="build_visualizations",
     module="effet_fondateur.stages.build_visualizations",
     critical=True,
+    embeds_run_identity=True,
     dependencies=(
         "analyze_population_structure", "infer_founder_haplotype", "estimate_variant_age", "analyze_local_ld",
         "analyze_roh", "run_sensitivity_analyses",
@@ -351,6 +368,7 @@ BUILD_REPORT_STAGE = StageDefinition(
     stage_name="build_report",
     module="effet_fondateur.stages.build_report",
     critical=True,
+    embeds_run_identity=True,
     dependencies=("infer_kinship", "build_visualizations"),
     required_artifact_ids=(
         "kinship_pairs", "kinship_degree_summary", "kinship_report",
@@ -390,6 +408,11 @@ DEFAULT_STAGE_DEFINITIONS = (
 def _run_enabled_stages(
     run_dir: Path,
     definitions: Iterable[StageDefinition],
+    jobs: int = 1,
+    stage_cache: StageCache | None = None,
+    verification: VerificationPolicy = VerificationPolicy(),
+    execution_mode: ExecutionMode = "subprocess",
+    profiling: ProfilingPolicy | None = None,
 ) -> None:
     """Exécute les étapes activées après contrôle du catalogue et du run."""
     resolved_config_path = run_dir / "config.resolved.yaml"
@@ -404,18 +427,21 @@ def _run_enabled_stages(
         )
     config = load_pipeline_config(resolved_config_path)
     definitions_by_name = build_stage_catalog(definitions)
-    for stage_name, stage_config in config["stages"].items():
-        if stage_name == "initialize_run" or not stage_config["enabled"]:
-            continue
-        definition = definitions_by_name.get(stage_name)
-        if definition is None:
-            raise PipelineError(f"Étape activée mais non implémentée : {stage_name}")
-        run_stage_with_failure_audit(
-            run_dir,
-            definition,
-            stage_config["parameters"],
-        )
-
+    scheduled_stages = build_stage_graph(config["stages"], definitions_by_name)
+    run_stage_graph(
+        run_dir,
+        scheduled_stages,
+        jobs,
+        partial(
+            run_stage_with_failure_audit,
+            stage_cache=stage_cache,
+            digest_cache=RunDigestCache(run_dir, verification),
+            execution_mode=execution_mode,
+            profiling=profiling,
+        ),
+    )
+
+    # Toutes les tentatives sont terminées : le manifest n'a plus qu'un écrivain.
     manifest = load_manifest(run_dir)
     terminal_states = {"SUCCEEDED", "CACHED", "SKIPPED"}
     if (
@@ -430,18 +456,65 @@ def run_pipeline(
     config_path: Path,
     runs_dir: Path,
     definitions: Iterable[StageDefinition] = DEFAULT_STAGE_DEFINITIONS,
+    jobs: int = 1,
+    stage_cache: StageCache | None = None,
+    verification: VerificationPolicy = VerificationPolicy(),
+    execution_mode: ExecutionMode = "subprocess",
+    profiling: ProfilingPolicy | None = None,
+    trace: bool = False,
 ) -> Path:
-    """Crée un run puis exécute les étapes actuellement implémentées et activées."""
+    """Crée un run puis exécute les étapes actuellement implémentées et activées.
+
+    `jobs` borne le nombre d'étapes indépendantes exécutées simultanément.
+    `stage_cache` partage entre runs les étapes de signature identique.
+    `execution_mode="warm"` lance les étapes depuis un serveur préchauffé.
+    `profiling` profile les étapes désignées ; voir `profiling.py`.
+    `trace` écrit la chronologie du run dans `trace.json` ; voir `audit/tracing.py`.
+    """
+    definitions = tuple(definitions)
+    validate_job_count(jobs)
+    validate_verification_policy(verification)
+    validate_execution_mode(execution_mode)
+    if profiling is not None:
+        validate_profiling_policy(profiling, {item.stage_name for item in definitions})
+    if stage_cache is not None:
+        validate_stage_cache(stage_cache)
     run_dir = initialize_run(config_path, runs_dir)
-    _run_enabled_stages(run_dir, definitions)
+    with run_tracing(run_dir) if trace else nullcontext(), manifest_journal(run_dir):
+        _run_enabled_stages(
+            run_dir, definitions, jobs, stage_cache, verification, execution_mode, profiling
+        )
     return run_dir
 
 
 def resume_pipeline(
     run_dir: Path,
     definitions: Iterable[StageDefinition] = DEFAULT_STAGE_DEFINITIONS,
+    jobs: int = 1,
+    stage_cache: StageCache | None = None,
+    verification: VerificationPolicy = VerificationPolicy(),
+    execution_mode: ExecutionMode = "subprocess",
+    profiling: ProfilingPolicy | None = None,
+    trace: bool = False,
 ) -> Path:
-    """Reprend un run en validant les sorties déjà publiées avant réutilisation."""
+    """Reprend un run en validant les sorties déjà publiées avant réutilisation.
+
+    Avec `verification.mode == "fast"`, les fichiers dont les métadonnées sont
+    inchangées depuis leur dernier calcul dans ce run ne sont pas relus.
+    Avec `trace`, la chronologie de la reprise s'ajoute à celle du run.
+    Un journal du manifest laissé par un arrêt brutal est rejoué avant tout.
+    """
+    definitions = tuple(definitions)
+    validate_job_count(jobs)
+    validate_verification_policy(verification)
+    validate_execution_mode(execution_mode)
+    if profiling is not None:
+        validate_profiling_policy(profiling, {item.stage_name for item in definitions})
+    if stage_cache is not None:
+        validate_stage_cache(stage_cache)
     load_manifest(run_dir)
-    _run_enabled_stages(run_dir, definitions)
+    with run_tracing(run_dir) if trace else nullcontext(), manifest_journal(run_dir):
+        _run_enabled_stages(
+            run_dir, definitions, jobs, stage_cache, verification, execution_mode, profiling
+        )
     return run_dir
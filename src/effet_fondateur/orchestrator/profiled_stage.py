@@ -0,0 +1,32 @@
+"""Lancement profilé d'un script d'étape en mode `subprocess`.
+
+`python -m effet_fondateur.orchestrator.profiled_stage --mode M --output P
+MODULE ARGUMENTS...` exécute `MODULE` comme `python -m MODULE ARGUMENTS...`,
+sous le profileur `M` de `profiling.py`. Ce module n'est importé par aucun
+autre : il ne doit exister que sous le nom `__main__`.
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+from collections.abc import Sequence
+from pathlib import Path
+
+from effet_fondateur.orchestrator.profiling import PROFILING_MODES, run_stage_script
+
+
+def main(arguments: Sequence[str] | None = None) -> None:
+    """Lit le profileur et le module, puis exécute ce dernier profilé."""
+    parser = argparse.ArgumentParser(prog="python -m effet_fondateur.orchestrator.profiled_stage")
+    parser.add_argument("--mode", choices=PROFILING_MODES, required=True)
+    parser.add_argument("--output", type=Path, required=True)
+    parser.add_argument("module")
+    parser.add_argument("arguments", nargs=argparse.REMAINDER)
+    parsed_arguments = parser.parse_args(arguments)
+    sys.argv = [parsed_arguments.module, *parsed_arguments.arguments]
+    run_stage_script(parsed_arguments.module, parsed_arguments.mode, parsed_arguments.output)
+
+
+if __name__ == "__main__":
+    main()
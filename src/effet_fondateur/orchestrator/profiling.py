@@ -0,0 +1,177 @@
+"""Profilage optionnel des scripts d'étape pendant un run réel.
+
+Le profileur entoure l'exécution du module d'étape, donc son `execute`, dans
+le processus de la tentative. Son fichier est un diagnostic écrit dans le
+dossier de tentative, même en cas d'échec : ce n'est pas un artefact déclaré,
+il n'est pas vérifié et la politique de profilage n'entre pas dans la
+signature. Une étape réutilisée ou restaurée depuis le cache n'est pas
+exécutée, donc pas profilée.
+
+- `cprofile` écrit `profile.pstats`, lisible avec `pstats` ou snakeviz ;
+- `tracemalloc` écrit `profile.tracemalloc`, un `tracemalloc.Snapshot` des
+  allocations Python pris près de leur pic, lisible avec `Snapshot.load` ;
+- `sampling` écrit `profile.collapsed`, des piles échantillonnées sur le temps
+  CPU au format « piles repliées » des flame graphs.
+
+En mode `subprocess`, la tentative est lancée par `profiled_stage.py`.
+"""
+
+from __future__ import annotations
+
+import cProfile
+import runpy
+import signal
+import threading
+import tracemalloc
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+from types import FrameType
+
+from effet_fondateur.orchestrator.errors import PipelineError
+
+
+PROFILING_MODES: tuple[str, ...] = ("cprofile", "tracemalloc", "sampling")
+PROFILE_FILE_NAMES = {
+    "cprofile": "profile.pstats",
+    "tracemalloc": "profile.tracemalloc",
+    "sampling": "profile.collapsed",
+}
+TRACEMALLOC_FRAMES = 25
+TRACEMALLOC_POLL_SECONDS = 0.2
+# Un nouvel instantané n'est pris que si la mémoire tracée dépasse de 10 % celle
+# du précédent : le coût reste borné même pour une étape longue.
+TRACEMALLOC_GROWTH = 1.1
+SAMPLING_INTERVAL_SECONDS = 0.005
+
+
+@dataclass(frozen=True)
+class ProfilingPolicy:
+    """Profileur à appliquer ; `stages` vide désigne toutes les étapes exécutées."""
+
+    mode: str
+    stages: tuple[str, ...] = ()
+
+    def applies_to(self, stage_name: str) -> bool:
+        """Indique si une tentative de cette étape doit être profilée."""
+        return not self.stages or stage_name in self.stages
+
+
+def validate_profiling_policy(policy: ProfilingPolicy, known_stage_names: set[str]) -> None:
+    """Refuse un profileur ou une étape inconnus avant de créer ou modifier un run."""
+    if policy.mode not in PROFILING_MODES:
+        raise PipelineError(
+            f"Profileur inconnu : {policy.mode} (attendu : {', '.join(PROFILING_MODES)})"
+        )
+    unknown_stages = sorted(set(policy.stages) - known_stage_names)
+    if unknown_stages:
+        raise PipelineError(f"Étapes à profiler inconnues : {', '.join(unknown_stages)}")
+
+
+class _StackSampler:
+    """Compte les piles Python du fil principal à intervalle de temps CPU."""
+
+    def __init__(self, interval: float = SAMPLING_INTERVAL_SECONDS) -> None:
+        self._interval = interval
+        self._stacks: Counter[str] = Counter()
+        self._previous_handler: signal.Handlers | None = None
+
+    def _sample(self, signal_number: int, frame: FrameType | None) -> None:
+        names = []
+        while frame is not None:
+            code = frame.f_code
+            names.append(f"{Path(code.co_filename).stem}:{code.co_qualname}")
+            frame = frame.f_back
+        self._stacks[";".join(reversed(names))] += 1
+
+    def start(self) -> None:
+        # ITIMER_PROF compte le temps CPU du processus ; les outils externes
+        # n'héritent pas du minuteur et ne sont pas échantillonnés.
+        self._previous_handler = signal.signal(signal.SIGPROF, self._sample)
+        signal.setitimer(signal.ITIMER_PROF, self._interval, self._interval)
+
+    def stop(self) -> None:
+        signal.setitimer(signal.ITIMER_PROF, 0)
+        signal.signal(signal.SIGPROF, self._previous_handler or signal.SIG_DFL)
+
+    def dump(self, path: Path) -> None:
+        path.write_text(
+            "".join(f"{stack} {count}\n" for stack, count in sorted(self._stacks.items())),
+            encoding="utf-8",
+        )
+
+
+class _FunctionProfiler:
+    def __init__(self) -> None:
+        self._profile = cProfile.Profile()
+
+    def start(self) -> None:
+        self._profile.enable()
+
+    def stop(self) -> None:
+        self._profile.disable()
+
+    def dump(self, path: Path) -> None:
+        self._profile.dump_stats(path)
+
+
+class _AllocationProfiler:
+    """Conserve l'instantané des allocations pris au plus haut de la mémoire tracée.
+
+    À la fin de l'étape, ses données sont déjà libérées : un instantané final ne
+    montrerait pas ce qui dimensionne le nœud.
+    """
+
+    def __init__(self) -> None:
+        self._snapshot: tracemalloc.Snapshot | None = None
+        self._snapshot_size = 0
+        self._stopped = threading.Event()
+        self._poller = threading.Thread(target=self._poll, daemon=True)
+
+    def _take_snapshot_if_higher(self) -> None:
+        current_size, _ = tracemalloc.get_traced_memory()
+        if self._snapshot is None or current_size > self._snapshot_size * TRACEMALLOC_GROWTH:
+            self._snapshot = tracemalloc.take_snapshot()
+            self._snapshot_size = current_size
+
+    def _poll(self) -> None:
+        while not self._stopped.wait(TRACEMALLOC_POLL_SECONDS):
+            self._take_snapshot_if_higher()
+
+    def start(self) -> None:
+        tracemalloc.start(TRACEMALLOC_FRAMES)
+        self._poller.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self._poller.join()
+        self._take_snapshot_if_higher()
+        tracemalloc.stop()
+
+    def dump(self, path: Path) -> None:
+        if self._snapshot is not None:
+            self._snapshot.dump(str(path))
+
+
+_PROFILERS = {
+    "cprofile": _FunctionProfiler,
+    "tracemalloc": _AllocationProfiler,
+    "sampling": _StackSampler,
+}
+
+
+def run_stage_script(
+    module: str, mode: str | None = None, profile_path: Path | None = None
+) -> None:
+    """Exécute `module` comme `python -m`, sous le profileur demandé."""
+    if mode is None or profile_path is None:
+        runpy.run_module(module, run_name="__main__", alter_sys=True)
+        return
+    profiler = _PROFILERS[mode]()
+    profiler.start()
+    try:
+        runpy.run_module(module, run_name="__main__", alter_sys=True)
+    finally:
+        profiler.stop()
+        profiler.dump(profile_path)
+
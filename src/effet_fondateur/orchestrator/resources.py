@@ -0,0 +1,230 @@
+"""Ressources consommées par les tentatives d'étape et leur tabulation.
+
+Une tentative est mesurée comme un arbre de processus : le script d'étape et
+les outils externes qu'il a attendus (PLINK, KING, bcftools, SHAPEIT5). La
+mémoire est le pic du processus le plus gourmand de l'arbre, pas une somme.
+Le runner écrit `resources.json` dans chaque dossier de tentative, publiée ou
+échouée, et recopie la mesure dans `audit.json` avant validation.
+"""
+
+from __future__ import annotations
+
+import resource
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from effet_fondateur.audit import read_json
+from effet_fondateur.contracts import DocumentValidationError, validate_json_document
+from effet_fondateur.orchestrator.errors import PipelineError
+from effet_fondateur.orchestrator.state import load_manifest
+
+
+RESOURCES_FILE_NAME = "resources.json"
+RESOURCES_SCHEMA_NAME = "stage_resources.schema.json"
+USAGE_FIELDS = (
+    "user_cpu_seconds",
+    "system_cpu_seconds",
+    "max_rss_bytes",
+    "block_input_operations",
+    "block_output_operations",
+    "voluntary_context_switches",
+    "involuntary_context_switches",
+)
+_MEBIBYTE = 1024 * 1024
+
+
+def resource_usage(usage: resource.struct_rusage) -> dict[str, float | int]:
+    """Convertit un `struct_rusage` en mesure publiée."""
+    # Linux exprime `ru_maxrss` en Kio, macOS en octets.
+    rss_unit = 1 if sys.platform == "darwin" else 1024
+    return {
+        "user_cpu_seconds": usage.ru_utime,
+        "system_cpu_seconds": usage.ru_stime,
+        "max_rss_bytes": usage.ru_maxrss * rss_unit,
+        "block_input_operations": usage.ru_inblock,
+        "block_output_operations": usage.ru_oublock,
+        "voluntary_context_switches": usage.ru_nvcsw,
+        "involuntary_context_switches": usage.ru_nivcsw,
+    }
+
+
+def combine_resource_usage(
+    first: dict[str, float | int], second: dict[str, float | int]
+) -> dict[str, float | int]:
+    """Additionne deux mesures ; le pic mémoire reste le maximum des deux."""
+    combined = {field: first[field] + second[field] for field in USAGE_FIELDS}
+    combined["max_rss_bytes"] = max(first["max_rss_bytes"], second["max_rss_bytes"])
+    return combined
+
+
+@dataclass(frozen=True)
+class AttemptResources:
+    """Mesure d'une tentative lue depuis son `resources.json`."""
+
+    run_id: str
+    stage_id: str
+    stage_name: str
+    attempt_number: int
+    published: bool
+    execution_mode: str
+    return_code: int
+    wall_seconds: float
+    process_tree: dict[str, float | int] | None
+    child_processes: dict[str, float | int] | None
+
+
+def _attempt_resources(document: dict[str, Any], published: bool) -> AttemptResources:
+    return AttemptResources(
+        run_id=document["run_id"],
+        stage_id=document["stage_id"],
+        stage_name=document["stage_name"],
+        attempt_number=document["attempt_number"],
+        published=published,
+        execution_mode=document["execution_mode"],
+        return_code=document["return_code"],
+        wall_seconds=document["wall_seconds"],
+        process_tree=document["process_tree"],
+        child_processes=document["child_processes"],
+    )
+
+
+def collect_run_resources(run_dir: Path) -> list[AttemptResources]:
+    """Retourne les mesures des tentatives exécutées dans ce run.
+
+    Une étape restaurée depuis le cache conserve le `resources.json` du run
+    qui l'a calculée ; elle n'a rien consommé ici et n'est pas retenue.
+    """
+    run_id = load_manifest(run_dir)["run_id"]
+    stages_dir = run_dir / "stages"
+    candidates = [
+        (path, True) for path in sorted(stages_dir.glob(f"*/{RESOURCES_FILE_NAME}"))
+        if path.parent.name != "attempts"
+    ]
+    candidates.extend(
+        (path, False)
+        for path in sorted(stages_dir.glob(f"attempts/*.failed/{RESOURCES_FILE_NAME}"))
+    )
+    records = []
+    for path, published in candidates:
+        document = read_json(path)
+        try:
+            validate_json_document(document, RESOURCES_SCHEMA_NAME)
+        except DocumentValidationError as error:
+            raise PipelineError(f"Mesure de ressources invalide : {path} ({error})") from error
+        if document["run_id"] == run_id:
+            records.append(_attempt_resources(document, published))
+    return sorted(records, key=lambda record: (record.stage_id, record.attempt_number))
+
+
+def _mebibytes(value: float | int) -> str:
+    return f"{value / _MEBIBYTE:.1f}"
+
+
+def _seconds(value: float | int) -> str:
+    return f"{value:.2f}"
+
+
+def _cpu_seconds(usage: dict[str, float | int]) -> float:
+    return usage["user_cpu_seconds"] + usage["system_cpu_seconds"]
+
+
+_ATTEMPT_COLUMNS = (
+    "run_id",
+    "stage_name",
+    "attempt",
+    "status",
+    "mode",
+    "wall_s",
+    "user_s",
+    "system_s",
+    "max_rss_mib",
+    "tools_cpu_s",
+    "tools_max_rss_mib",
+    "blocks_in",
+    "blocks_out",
+    "voluntary_switches",
+    "involuntary_switches",
+)
+
+
+def _usage_cells(
+    tree: dict[str, float | int] | None, tools: dict[str, float | int] | None
+) -> list[str]:
+    cells = ["NA"] * 3 if tree is None else [
+        _seconds(tree["user_cpu_seconds"]),
+        _seconds(tree["system_cpu_seconds"]),
+        _mebibytes(tree["max_rss_bytes"]),
+    ]
+    cells.extend(["NA"] * 2 if tools is None else [
+        _seconds(_cpu_seconds(tools)),
+        _mebibytes(tools["max_rss_bytes"]),
+    ])
+    cells.extend(["NA"] * 4 if tree is None else [
+        str(tree["block_input_operations"]),
+        str(tree["block_output_operations"]),
+        str(tree["voluntary_context_switches"]),
+        str(tree["involuntary_context_switches"]),
+    ])
+    return cells
+
+
+def format_attempt_table(records: list[AttemptResources]) -> str:
+    """Une ligne TSV par tentative ; `NA` marque une mesure indisponible."""
+    lines = ["\t".join(_ATTEMPT_COLUMNS)]
+    for record in records:
+        lines.append("\t".join([
+            record.run_id,
+            record.stage_name,
+            str(record.attempt_number),
+            "published" if record.published else f"failed:{record.return_code}",
+            record.execution_mode,
+            _seconds(record.wall_seconds),
+            *_usage_cells(record.process_tree, record.child_processes),
+        ]))
+    return "\n".join(lines) + "\n"
+
+
+_STAGE_COLUMNS = (
+    "stage_name",
+    "attempts",
+    "runs",
+    "max_wall_s",
+    "max_cpu_s",
+    "max_rss_mib",
+    "max_cpu_per_wall",
+)
+
+
+def format_stage_table(records: list[AttemptResources]) -> str:
+    """Une ligne TSV par étape : pics observés sur toutes les tentatives.
+
+    `max_cpu_per_wall` approche le nombre de cœurs réellement occupés ; avec
+    `max_rss_mib`, il guide le choix de `--jobs` et des limites mémoire.
+    """
+    by_stage: dict[tuple[str, str], list[AttemptResources]] = {}
+    for record in records:
+        by_stage.setdefault((record.stage_id, record.stage_name), []).append(record)
+    lines = ["\t".join(_STAGE_COLUMNS)]
+    for (_, stage_name), stage_records in sorted(by_stage.items()):
+        measured = [record for record in stage_records if record.process_tree is not None]
+        cpu_per_wall = [
+            _cpu_seconds(record.process_tree) / record.wall_seconds
+            for record in measured
+            if record.wall_seconds > 0
+        ]
+        lines.append("\t".join([
+            stage_name,
+            str(len(stage_records)),
+            str(len({record.run_id for record in stage_records})),
+            _seconds(max(record.wall_seconds for record in stage_records)),
+            "NA" if not measured else _seconds(
+                max(_cpu_seconds(record.process_tree) for record in measured)
+            ),
+            "NA" if not measured else _mebibytes(
+                max(record.process_tree["max_rss_bytes"] for record in measured)
+            ),
+            "NA" if not cpu_per_wall else f"{max(cpu_per_wall):.2f}",
+        ]))
+    return "\n".join(lines) + "\n"
@@ -3,7 +3,7 @@
 from __future__ import annotations
 
 import os
-import subprocess
+import shutil
 import sys
 from dataclasses import dataclass
 from pathlib import Path
@@ -11,27 +11,54 @@ from time import monotonic
 from typing import Any
 from uuid import uuid4
 
-from effet_fondateur.audit import atomic_write_json, read_json, sha256_file
+from effet_fondateur.audit import atomic_write_json, hash_files, read_json
+from effet_fondateur.audit.tracing import trace_span, tracing_environment
 from effet_fondateur.contracts import (
     DocumentValidationError,
     load_pipeline_config,
     validate_json_document,
 )
-from effet_fondateur.orchestrator.errors import IntegrityError, StageExecutionError
+from effet_fondateur.orchestrator.cache import (
+    StageCache,
+    discard_stage,
+    restore_stage,
+    store_stage,
+)
+from effet_fondateur.orchestrator.digests import (
+    FileHasher,
+    RunDigestCache,
+    file_hasher,
+)
+from effet_fondateur.orchestrator.errors import (
+    IntegrityError,
+    PipelineError,
+    StageExecutionError,
+)
 from effet_fondateur.orchestrator.integrity import (
     validate_attempt_outputs,
     validate_published_stage,
 )
 from effet_fondateur.orchestrator.inputs import resolve_stage_input_artifacts
 from effet_fondateur.orchestrator.models import StageDefinition
+from effet_fondateur.orchestrator.profiling import PROFILE_FILE_NAMES, ProfilingPolicy
+from effet_fondateur.orchestrator.resources import (
+    RESOURCES_FILE_NAME,
+    RESOURCES_SCHEMA_NAME,
+)
 from effet_fondateur.orchestrator.signatures import build_stage_signature
 from effet_fondateur.orchestrator.state import (
+    compact_manifest,
     find_stage_record,
     load_manifest,
     record_event,
-    save_manifest,
+    update_manifest,
     utc_now,
 )
+from effet_fondateur.orchestrator.workers import (
+    ExecutionMode,
+    StageProcessResult,
+    run_stage_module,
+)
 
 
 @dataclass(frozen=True)
@@ -39,6 +66,7 @@ class _StageAttempt:
     """Chemins et signature immuables d'une tentative d'étape."""
 
     signature: str
+    attempt_number: int
     attempt_dir: Path
     failed_attempt_dir: Path
     final_stage_dir: Path
@@ -93,66 +121,87 @@ def _validate_dependencies(
         )
 
 
+def _unfinished_run_status(manifest: dict[str, Any]) -> str:
+    """Dérive le statut global d'un run non terminé depuis ses étapes."""
+    # En exécution parallèle, une étape peut démarrer ou échouer après l'échec
+    # critique d'une autre : le blocage doit survivre à ces transitions.
+    if any(
+        stage_record["critical"] and stage_record["state"] == "FAILED"
+        for stage_record in manifest["stages"]
+    ):
+        return "BLOCKED"
+    return "INCOMPLETE"
+
+
 def _record_failure(
     run_dir: Path,
-    manifest: dict[str, Any],
-    stage_record: dict[str, Any],
     definition: StageDefinition,
     return_code: int,
     started_clock: float,
 ) -> None:
     """Place une étape en échec sans recopier de sortie sensible au manifest."""
-    stage_record["state"] = "FAILED"
-    stage_record["completed_at"] = utc_now()
-    stage_record["duration_seconds"] = monotonic() - started_clock
-    stage_record["last_error_code"] = return_code
-    manifest["global_status"] = "BLOCKED" if definition.critical else "INCOMPLETE"
-    save_manifest(run_dir, manifest)
-    record_event(
-        run_dir,
-        definition.directory_name,
-        "stage_failed",
-        severity="ERROR",
-        details={"return_code": return_code},
-    )
+
+    def mark_failed(manifest: dict[str, Any]) -> bool:
+        stage_record = find_stage_record(manifest, definition.stage_name)
+        if stage_record is None or stage_record["state"] not in {"PENDING", "RUNNING"}:
+            return False
+        stage_record["state"] = "FAILED"
+        stage_record["completed_at"] = utc_now()
+        stage_record["duration_seconds"] = monotonic() - started_clock
+        stage_record["last_error_code"] = return_code
+        manifest["global_status"] = _unfinished_run_status(manifest)
+        return True
+
+    if update_manifest(run_dir, mark_failed):
+        record_event(
+            run_dir,
+            definition.directory_name,
+            "stage_failed",
+            severity="ERROR",
+            details={"return_code": return_code},
+        )
+
+
+def _block_on_integrity_failure(
+    run_dir: Path,
+    definition: StageDefinition,
+    event: str,
+) -> None:
+    """Bloque le run lorsqu'une étape publiée ne peut plus être réutilisée."""
+
+    def mark_blocked(manifest: dict[str, Any]) -> None:
+        stage_record = find_stage_record(manifest, definition.stage_name)
+        if stage_record is not None:
+            stage_record["state"] = "FAILED"
+            stage_record["last_error_code"] = 5
+        manifest["global_status"] = "BLOCKED"
+
+    update_manifest(run_dir, mark_blocked)
+    record_event(run_dir, definition.directory_name, event, severity="ERROR")
 
 
 def _reuse_published_stage(
     run_dir: Path,
-    manifest: dict[str, Any],
     stage_record: dict[str, Any],
     definition: StageDefinition,
     current_signature: str,
+    hasher: FileHasher,
 ) -> bool:
     """Réutilise une étape terminale uniquement si son intégrité est intacte."""
     if stage_record["state"] not in {"SUCCEEDED", "CACHED"}:
         return False
     if stage_record["signature"] != current_signature:
-        stage_record["state"] = "FAILED"
-        stage_record["last_error_code"] = 5
-        manifest["global_status"] = "BLOCKED"
-        save_manifest(run_dir, manifest)
-        record_event(
-            run_dir,
-            definition.directory_name,
-            "stage_input_integrity_failed",
-            severity="ERROR",
+        _block_on_integrity_failure(
+            run_dir, definition, "stage_input_integrity_failed"
         )
         raise IntegrityError(
             f"Entrées modifiées depuis la publication de {definition.stage_name}."
         )
     try:
-        validate_published_stage(run_dir, definition, stage_record)
+        validate_published_stage(run_dir, definition, stage_record, hasher)
     except IntegrityError:
-        stage_record["state"] = "FAILED"
-        stage_record["last_error_code"] = 5
-        manifest["global_status"] = "BLOCKED"
-        save_manifest(run_dir, manifest)
-        record_event(
-            run_dir,
-            definition.directory_name,
-            "published_artifact_integrity_failed",
-            severity="ERROR",
+        _block_on_integrity_failure(
+            run_dir, definition, "published_artifact_integrity_failed"
         )
         raise
     record_event(run_dir, definition.directory_name, "stage_reused")
@@ -195,25 +244,32 @@ def _prepare_attempt(
     atomic_write_json(attempt_dir / "stage_inputs.json", stage_inputs)
 
     started_clock = monotonic()
-    stage_record.update(
-        {
-            "state": "RUNNING",
-            "signature": signature,
-            "started_at": utc_now(),
-            "completed_at": None,
-            "duration_seconds": None,
-            "audit_path": None,
-            "audit_sha256": None,
-            "stage_outputs_sha256": None,
-            "attempt_count": attempt_number,
-            "last_error_code": None,
-        }
-    )
-    manifest["global_status"] = "INCOMPLETE"
-    save_manifest(run_dir, manifest)
+
+    def mark_running(current_manifest: dict[str, Any]) -> None:
+        current_record = find_stage_record(current_manifest, definition.stage_name)
+        if current_record is None:
+            raise IntegrityError(f"Étape absente du manifest : {definition.stage_name}")
+        current_record.update(
+            {
+                "state": "RUNNING",
+                "signature": signature,
+                "started_at": utc_now(),
+                "completed_at": None,
+                "duration_seconds": None,
+                "audit_path": None,
+                "audit_sha256": None,
+                "stage_outputs_sha256": None,
+                "attempt_count": attempt_number,
+                "last_error_code": None,
+            }
+        )
+        current_manifest["global_status"] = _unfinished_run_status(current_manifest)
+
+    update_manifest(run_dir, mark_running)
     record_event(run_dir, definition.directory_name, "stage_started")
     return _StageAttempt(
         signature=signature,
+        attempt_number=attempt_number,
         attempt_dir=attempt_dir,
         failed_attempt_dir=failed_attempt_dir,
         final_stage_dir=final_stage_dir,
@@ -221,16 +277,57 @@ def _prepare_attempt(
     )
 
 
+def _record_attempt_resources(
+    attempt: _StageAttempt,
+    definition: StageDefinition,
+    run_id: str,
+    execution_mode: ExecutionMode,
+    process_result: StageProcessResult,
+) -> None:
+    """Écrit la mesure de la tentative et la recopie dans l'audit produit."""
+    resources = {
+        "execution_mode": execution_mode,
+        "wall_seconds": process_result.wall_seconds,
+        "process_tree": process_result.process_tree,
+        "child_processes": process_result.child_processes,
+    }
+    resources_document = {
+        "schema_version": "1.0.0",
+        "run_id": run_id,
+        "stage_id": definition.stage_id,
+        "stage_name": definition.stage_name,
+        "attempt_number": attempt.attempt_number,
+        "return_code": process_result.return_code,
+        **resources,
+    }
+    validate_json_document(resources_document, RESOURCES_SCHEMA_NAME)
+    atomic_write_json(attempt.attempt_dir / RESOURCES_FILE_NAME, resources_document)
+    # L'audit est complété avant sa validation ; son empreinte, calculée à la
+    # publication, couvre donc aussi la mesure. Un audit absent ou illisible
+    # reste signalé par la validation des sorties.
+    audit_path = attempt.attempt_dir / "audit.json"
+    if process_result.return_code == 0 and audit_path.is_file():
+        audit = read_json(audit_path)
+        if isinstance(audit, dict):
+            audit["resources"] = resources
+            atomic_write_json(audit_path, audit)
+
+
 def _execute_attempt(
     attempt: _StageAttempt,
     definition: StageDefinition,
     run_id: str,
+    hasher: FileHasher,
+    execution_mode: ExecutionMode = "subprocess",
+    profiling: ProfilingPolicy | None = None,
 ) -> None:
-    """Lance le sous-processus, valide ses sorties et publie son dossier."""
-    command = [
-        sys.executable,
-        "-m",
-        definition.module,
+    """Lance le processus d'étape, valide ses sorties et publie son dossier."""
+    profiling_mode = (
+        profiling.mode
+        if profiling is not None and profiling.applies_to(definition.stage_name)
+        else None
+    )
+    arguments = [
         "--stage-inputs",
         str(attempt.attempt_dir / "stage_inputs.json"),
         "--output-dir",
@@ -244,36 +341,39 @@ def _execute_attempt(
             "module": definition.module,
             "arguments": ["--stage-inputs", "stage_inputs.json", "--output-dir", "."],
             "shell": False,
+            "execution_mode": execution_mode,
+            "profiling": profiling_mode,
         },
     )
     # Le descripteur publié masque les chemins absolus de la machine, tandis que
     # la commande réelle conserve des arguments séparés et n'utilise jamais un shell.
     try:
-        completed_process = subprocess.run(
-            command,
-            capture_output=True,
-            check=False,
-            text=True,
-        )
-        (attempt.attempt_dir / "stdout.log").write_text(
-            completed_process.stdout,
-            encoding="utf-8",
-        )
-        (attempt.attempt_dir / "stderr.log").write_text(
-            completed_process.stderr,
-            encoding="utf-8",
-        )
-        if completed_process.returncode != 0:
+        with trace_span("stage_process", "orchestrator", stage=definition.directory_name):
+            process_result = run_stage_module(
+                definition.module,
+                arguments,
+                attempt.attempt_dir / "stdout.log",
+                attempt.attempt_dir / "stderr.log",
+                execution_mode,
+                profiling_mode,
+                None if profiling_mode is None else (
+                    attempt.attempt_dir / PROFILE_FILE_NAMES[profiling_mode]
+                ),
+                tracing_environment(definition.directory_name),
+            )
+        _record_attempt_resources(attempt, definition, run_id, execution_mode, process_result)
+        return_code = process_result.return_code
+        if return_code != 0:
             raise StageExecutionError(
-                f"Échec de l'étape {definition.stage_name} "
-                f"(code {completed_process.returncode}).",
-                completed_process.returncode,
+                f"Échec de l'étape {definition.stage_name} (code {return_code}).",
+                return_code,
             )
         validate_attempt_outputs(
             attempt.attempt_dir,
             definition,
             run_id,
             attempt.signature,
+            hasher,
         )
         os.replace(attempt.attempt_dir, attempt.final_stage_dir)
     except (DocumentValidationError, IntegrityError, OSError, ValueError) as error:
@@ -289,28 +389,12 @@ def _execute_attempt(
             os.replace(attempt.attempt_dir, attempt.failed_attempt_dir)
 
 
-def _record_success(
-    run_dir: Path,
+def _update_manual_decisions(
     manifest: dict[str, Any],
-    stage_record: dict[str, Any],
     definition: StageDefinition,
-    attempt: _StageAttempt,
+    audit: dict[str, Any],
 ) -> None:
-    """Enregistre les empreintes de provenance après publication atomique."""
-    audit = read_json(attempt.final_stage_dir / "audit.json")
-    stage_record.update(
-        {
-            "state": "SUCCEEDED",
-            "completed_at": utc_now(),
-            "duration_seconds": monotonic() - attempt.started_clock,
-            "audit_path": f"stages/{definition.directory_name}/audit.json",
-            "audit_sha256": sha256_file(attempt.final_stage_dir / "audit.json"),
-            "stage_outputs_sha256": sha256_file(
-                attempt.final_stage_dir / "stage_outputs.json"
-            ),
-            "last_error_code": None,
-        }
-    )
+    """Répercute la demande de validation manuelle d'un audit publié."""
     if definition.manual_decision_id is not None:
         decisions = manifest["manual_decisions_required"]
         if audit["manual_validation_required"]:
@@ -321,22 +405,219 @@ def _record_success(
     for resolved_decision_id in definition.resolves_manual_decision_ids:
         if resolved_decision_id in manifest["manual_decisions_required"]:
             manifest["manual_decisions_required"].remove(resolved_decision_id)
-    save_manifest(run_dir, manifest)
+
+
+def _published_values(
+    definition: StageDefinition,
+    final_stage_dir: Path,
+    state: str,
+    started_clock: float,
+) -> dict[str, Any]:
+    audit_sha256, stage_outputs_sha256 = hash_files(
+        [final_stage_dir / "audit.json", final_stage_dir / "stage_outputs.json"]
+    )
+    return {
+        "state": state,
+        "completed_at": utc_now(),
+        "duration_seconds": monotonic() - started_clock,
+        "audit_path": f"stages/{definition.directory_name}/audit.json",
+        "audit_sha256": audit_sha256,
+        "stage_outputs_sha256": stage_outputs_sha256,
+        "last_error_code": None,
+    }
+
+
+def _record_success(
+    run_dir: Path,
+    definition: StageDefinition,
+    attempt: _StageAttempt,
+) -> None:
+    """Enregistre les empreintes de provenance après publication atomique."""
+    audit = read_json(attempt.final_stage_dir / "audit.json")
+    completed_values = _published_values(
+        definition, attempt.final_stage_dir, "SUCCEEDED", attempt.started_clock
+    )
+
+    def mark_succeeded(manifest: dict[str, Any]) -> None:
+        stage_record = find_stage_record(manifest, definition.stage_name)
+        if stage_record is None:
+            raise IntegrityError(f"Étape absente du manifest : {definition.stage_name}")
+        stage_record.update(completed_values)
+        _update_manual_decisions(manifest, definition, audit)
+
+    update_manifest(run_dir, mark_succeeded)
     record_event(run_dir, definition.directory_name, "stage_succeeded")
 
 
-def run_stage(
+def _rebind_run_identity(stage_dir: Path, run_id: str) -> None:
+    """Rattache les documents de provenance d'une entrée de cache au run courant.
+
+    Les artefacts publiés ne sont pas réécrits : une étape dont les sorties
+    citent le run (`embeds_run_identity`) n'entre jamais dans le cache.
+    """
+    # `atomic_write_json` remplace l'inode : le fichier lié dans le cache n'est
+    # jamais modifié, seuls les documents du nouveau run portent son identifiant.
+    for document_name in ("stage_inputs.json", "stage_outputs.json", "audit.json"):
+        document_path = stage_dir / document_name
+        if not document_path.is_file():
+            continue
+        document = read_json(document_path)
+        document["run_id"] = run_id
+        atomic_write_json(document_path, document)
+
+
+def _restore_cached_stage(
     run_dir: Path,
     definition: StageDefinition,
-    parameters: dict[str, Any],
+    signature: str,
+    run_id: str,
+    stage_cache: StageCache,
+    hasher: FileHasher,
+) -> bool:
+    """Publie une étape depuis le cache partagé après revalidation complète."""
+    started_clock = monotonic()
+    restore_dir = (
+        run_dir / "stages" / f".{definition.directory_name}.{uuid4().hex}.cached.tmp"
+    )
+    final_stage_dir = run_dir / "stages" / definition.directory_name
+    try:
+        entry = restore_stage(stage_cache, signature, definition, restore_dir)
+        if entry is None:
+            return False
+        _rebind_run_identity(restore_dir, run_id)
+        validate_attempt_outputs(restore_dir, definition, run_id, signature, hasher)
+        os.replace(restore_dir, final_stage_dir)
+    except (DocumentValidationError, PipelineError, OSError, KeyError, ValueError) as error:
+        # Une entrée corrompue ne doit jamais bloquer le run : elle est retirée
+        # et l'étape est exécutée normalement.
+        discard_stage(stage_cache, signature)
+        record_event(
+            run_dir,
+            definition.directory_name,
+            "stage_cache_entry_rejected",
+            severity="WARNING",
+            details={"signature": signature, "error_type": type(error).__name__},
+        )
+        return False
+    finally:
+        shutil.rmtree(restore_dir, ignore_errors=True)
+
+    audit = read_json(final_stage_dir / "audit.json")
+    cached_values = _published_values(
+        definition, final_stage_dir, "CACHED", started_clock
+    )
+
+    def mark_cached(manifest: dict[str, Any]) -> None:
+        stage_record = find_stage_record(manifest, definition.stage_name)
+        if stage_record is None:
+            raise IntegrityError(f"Étape absente du manifest : {definition.stage_name}")
+        stage_record.update(
+            {"signature": signature, "started_at": cached_values["completed_at"]}
+        )
+        stage_record.update(cached_values)
+        _update_manual_decisions(manifest, definition, audit)
+        manifest["global_status"] = _unfinished_run_status(manifest)
+
+    update_manifest(run_dir, mark_cached)
+    record_event(
+        run_dir,
+        definition.directory_name,
+        "stage_cached",
+        details={"source_run_id": entry["source_run_id"], "signature": signature},
+    )
+    return True
+
+
+def _store_cached_stage(
+    run_dir: Path,
+    definition: StageDefinition,
+    signature: str,
+    run_id: str,
+    stage_cache: StageCache,
 ) -> None:
-    """Orchestre une tentative sans exécuter de logique scientifique en interne."""
+    """Ajoute une étape publiée au cache sans jamais faire échouer le run."""
+    try:
+        store_stage(
+            stage_cache,
+            run_dir / "stages" / definition.directory_name,
+            definition,
+            signature,
+            run_id,
+        )
+    except (PipelineError, OSError, KeyError, ValueError) as error:
+        record_event(
+            run_dir,
+            definition.directory_name,
+            "stage_cache_store_failed",
+            severity="WARNING",
+            details={"error_type": type(error).__name__},
+        )
+
+
+def _load_stage_record(
+    run_dir: Path,
+    definition: StageDefinition,
+) -> tuple[dict[str, Any], dict[str, Any]]:
+    """Retourne le manifest courant et l'enregistrement de l'étape, créé si absent."""
     manifest = load_manifest(run_dir)
     stage_record = find_stage_record(manifest, definition.stage_name)
-    if stage_record is None:
-        stage_record = _new_stage_record(definition)
-        manifest["stages"].append(stage_record)
-        save_manifest(run_dir, manifest)
+    if stage_record is not None:
+        return manifest, stage_record
+
+    def add_stage_record(
+        current_manifest: dict[str, Any],
+    ) -> tuple[dict[str, Any], dict[str, Any]]:
+        current_record = find_stage_record(current_manifest, definition.stage_name)
+        if current_record is None:
+            current_record = _new_stage_record(definition)
+            current_manifest["stages"].append(current_record)
+        return current_manifest, current_record
+
+    return update_manifest(run_dir, add_stage_record)
+
+
+def run_stage(
+    run_dir: Path,
+    definition: StageDefinition,
+    parameters: dict[str, Any],
+    stage_cache: StageCache | None = None,
+    digest_cache: RunDigestCache | None = None,
+    execution_mode: ExecutionMode = "subprocess",
+    profiling: ProfilingPolicy | None = None,
+) -> None:
+    """Orchestre une tentative sans exécuter de logique scientifique en interne.
+
+    Avec `stage_cache`, une étape de même signature publiée par un autre run est
+    liée depuis le cache partagé au lieu d'être recalculée. `digest_cache`
+    applique la politique de vérification des empreintes du run.
+    `execution_mode` choisit le lancement du script d'étape ; voir `workers.py`.
+    `profiling` profile les étapes désignées sans changer leur signature.
+    """
+    try:
+        _run_stage(
+            run_dir,
+            definition,
+            parameters,
+            stage_cache,
+            file_hasher(digest_cache),
+            execution_mode,
+            profiling,
+        )
+    finally:
+        if digest_cache is not None:
+            digest_cache.flush()
+
+
+def _run_stage(
+    run_dir: Path,
+    definition: StageDefinition,
+    parameters: dict[str, Any],
+    stage_cache: StageCache | None,
+    hasher: FileHasher,
+    execution_mode: ExecutionMode,
+    profiling: ProfilingPolicy | None,
+) -> None:
+    manifest, stage_record = _load_stage_record(run_dir, definition)
     _validate_dependencies(manifest, definition)
     config = load_pipeline_config(run_dir / "config.resolved.yaml")
     input_artifacts = resolve_stage_input_artifacts(
@@ -344,6 +625,7 @@ def run_stage(
         definition,
         manifest["config_sha256"],
         run_dir,
+        hasher,
     )
     signature = build_stage_signature(
         definition,
@@ -353,15 +635,28 @@ def run_stage(
     )
     if _reuse_published_stage(
         run_dir,
-        manifest,
         stage_record,
         definition,
         signature,
+        hasher,
     ):
         return
     final_stage_dir = run_dir / "stages" / definition.directory_name
     if final_stage_dir.exists():
         raise IntegrityError(f"Dossier publié inattendu : {final_stage_dir}")
+    if definition.embeds_run_identity:
+        # Seuls les documents de provenance sont rattachés au run qui restaure
+        # une entrée ; un artefact qui cite le run garderait celui d'origine.
+        stage_cache = None
+    if stage_cache is not None and _restore_cached_stage(
+        run_dir,
+        definition,
+        signature,
+        manifest["run_id"],
+        stage_cache,
+        hasher,
+    ):
+        return
 
     attempt = _prepare_attempt(
         run_dir,
@@ -372,29 +667,45 @@ def run_stage(
         signature,
         input_artifacts,
     )
-    _execute_attempt(attempt, definition, manifest["run_id"])
-    _record_success(run_dir, manifest, stage_record, definition, attempt)
+    _execute_attempt(
+        attempt, definition, manifest["run_id"], hasher, execution_mode, profiling
+    )
+    _record_success(run_dir, definition, attempt)
+    if stage_cache is not None:
+        _store_cached_stage(
+            run_dir, definition, signature, manifest["run_id"], stage_cache
+        )
 
 
 def run_stage_with_failure_audit(
     run_dir: Path,
     definition: StageDefinition,
     parameters: dict[str, Any],
+    stage_cache: StageCache | None = None,
+    digest_cache: RunDigestCache | None = None,
+    execution_mode: ExecutionMode = "subprocess",
+    profiling: ProfilingPolicy | None = None,
 ) -> None:
-    """Exécute une étape et garantit la mise à jour du manifest en cas d'échec."""
+    """Exécute une étape et garantit la mise à jour du manifest en cas d'échec.
+
+    Les transitions journalisées pendant l'étape sont compactées à sa sortie.
+    """
     started_clock = monotonic()
     try:
-        run_stage(run_dir, definition, parameters)
-    except StageExecutionError as error:
-        manifest = load_manifest(run_dir)
-        stage_record = find_stage_record(manifest, definition.stage_name)
-        if stage_record is not None and stage_record["state"] in {"PENDING", "RUNNING"}:
-            _record_failure(
+        with trace_span(definition.directory_name, "stage"):
+            run_stage(
                 run_dir,
-                manifest,
-                stage_record,
                 definition,
-                error.return_code,
-                started_clock,
+                parameters,
+                stage_cache,
+                digest_cache,
+                execution_mode,
+                profiling,
             )
+    except StageExecutionError as error:
+        _record_failure(run_dir, definition, error.return_code, started_clock)
         raise
+    finally:
+        # Frontière d'étape : les étapes dépendantes lancées ensuite lisent un
+        # `manifest.json` à jour.
+        compact_manifest(run_dir)
@@ -0,0 +1,132 @@
+"""Ordonnancement parallèle borné des étapes selon leur graphe de dépendances."""
+
+from __future__ import annotations
+
+from collections.abc import Callable, Mapping
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from effet_fondateur.orchestrator.catalog import BOOTSTRAP_STAGE_NAMES
+from effet_fondateur.orchestrator.errors import PipelineError
+from effet_fondateur.orchestrator.models import StageDefinition
+
+
+StageRunner = Callable[[Path, StageDefinition, dict[str, Any]], None]
+
+
+@dataclass(frozen=True)
+class ScheduledStage:
+    """Étape activée, ses paramètres et ses dépendances activées dans le run."""
+
+    definition: StageDefinition
+    parameters: dict[str, Any]
+    dependencies: tuple[str, ...]
+
+
+def validate_job_count(jobs: int) -> None:
+    """Refuse un nombre de processus d'étape simultanés inutilisable."""
+    if isinstance(jobs, bool) or not isinstance(jobs, int) or jobs < 1:
+        raise PipelineError(
+            f"Le nombre d'étapes simultanées doit être un entier positif : {jobs}"
+        )
+
+
+def build_stage_graph(
+    stages_config: Mapping[str, dict[str, Any]],
+    definitions_by_name: Mapping[str, StageDefinition],
+) -> tuple[ScheduledStage, ...]:
+    """Construit le graphe des étapes activées dans l'ordre de la configuration.
+
+    Une dépendance désactivée n'est pas une arête : le runner refusera l'étape
+    si cette dépendance n'a pas déjà été publiée, exactement comme en série.
+    """
+    enabled_names = [
+        stage_name
+        for stage_name, stage_config in stages_config.items()
+        if stage_name not in BOOTSTRAP_STAGE_NAMES and stage_config["enabled"]
+    ]
+    scheduled_stages: list[ScheduledStage] = []
+    for stage_name in enabled_names:
+        definition = definitions_by_name.get(stage_name)
+        if definition is None:
+            raise PipelineError(f"Étape activée mais non implémentée : {stage_name}")
+        scheduled_stages.append(
+            ScheduledStage(
+                definition=definition,
+                parameters=stages_config[stage_name]["parameters"],
+                dependencies=tuple(
+                    dependency
+                    for dependency in definition.dependencies
+                    if dependency in enabled_names
+                ),
+            )
+        )
+
+    # Un cycle bloquerait l'ordonnanceur sans erreur : il est refusé avant tout
+    # lancement de sous-processus.
+    resolved: set[str] = set()
+    remaining = list(scheduled_stages)
+    while remaining:
+        ready = [
+            stage
+            for stage in remaining
+            if all(dependency in resolved for dependency in stage.dependencies)
+        ]
+        if not ready:
+            cycle_names = ", ".join(stage.definition.stage_name for stage in remaining)
+            raise PipelineError(f"Cycle de dépendances entre les étapes : {cycle_names}")
+        resolved.update(stage.definition.stage_name for stage in ready)
+        remaining = [stage for stage in remaining if stage not in ready]
+    return tuple(scheduled_stages)
+
+
+def run_stage_graph(
+    run_dir: Path,
+    scheduled_stages: tuple[ScheduledStage, ...],
+    jobs: int,
+    stage_runner: StageRunner,
+) -> None:
+    """Lance chaque étape prête dans un pool borné, puis propage le premier échec.
+
+    Les étapes prêtes sont choisies dans l'ordre de la configuration ; avec
+    `jobs=1`, l'exécution reste donc strictement séquentielle et identique à la
+    boucle historique. Après un échec, aucune nouvelle étape n'est lancée et les
+    étapes déjà démarrées terminent leur tentative avant la propagation.
+    """
+    validate_job_count(jobs)
+    pending = list(scheduled_stages)
+    completed: set[str] = set()
+    running: dict[Future[None], ScheduledStage] = {}
+    first_error: BaseException | None = None
+    with ThreadPoolExecutor(max_workers=jobs, thread_name_prefix="stage") as executor:
+        while pending or running:
+            if first_error is None:
+                for stage in list(pending):
+                    if len(running) >= jobs:
+                        break
+                    if all(dependency in completed for dependency in stage.dependencies):
+                        pending.remove(stage)
+                        future = executor.submit(
+                            stage_runner,
+                            run_dir,
+                            stage.definition,
+                            stage.parameters,
+                        )
+                        running[future] = stage
+            if not running:
+                break
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in sorted(
+                finished,
+                key=lambda item: scheduled_stages.index(running[item]),
+            ):
+                stage = running.pop(future)
+                error = future.exception()
+                if error is None:
+                    completed.add(stage.definition.stage_name)
+                elif first_error is None:
+                    first_error = error
+    if first_error is not None:
+        raise first_error
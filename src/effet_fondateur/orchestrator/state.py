@@ -1,32 +1,305 @@
-"""Gestion atomique du manifest et du journal d'un run."""
+"""Gestion durable du manifest et du journal d'un run.
+
+Hors d'un journal ouvert, chaque transition relit, valide et remplace
+`manifest.json`, et chaque événement est forcé sur disque.
+
+Pendant `manifest_journal(run_dir)`, l'orchestrateur garde le manifest en
+mémoire. Chaque transition ajoute à `manifest.journal.jsonl` une ligne validée
+qui ne contient que les champs modifiés et les enregistrements d'étape
+remplacés. `compact_manifest` réécrit `manifest.json` puis vide le journal ;
+l'orchestrateur compacte à la fin de chaque étape et à la fermeture.
+
+Les lignes du journal et de `events.jsonl` sont forcées sur disque par
+« group commit » : un appel ne rend la main qu'une fois sa ligne durable, mais
+un seul fsync couvre toutes les lignes écrites par les fils en attente.
+`load_manifest` rejoue le journal : après un arrêt brutal, le manifest lu est
+celui de la dernière transition rendue, et l'ouverture suivante le compacte.
+"""
 
 from __future__ import annotations
 
+import copy
+import json
+import os
+import threading
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any
+from typing import Any, TextIO, TypeVar
 
-from effet_fondateur.audit import append_json_event, atomic_write_json, read_json
+from effet_fondateur.audit import append_json_event, atomic_write_json, read_json, traced
 from effet_fondateur.contracts import validate_json_document
 
 
+_T = TypeVar("_T")
+
+MANIFEST_FILE_NAME = "manifest.json"
+MANIFEST_JOURNAL_NAME = "manifest.journal.jsonl"
+EVENTS_FILE_NAME = "events.jsonl"
+MANIFEST_SCHEMA_NAME = "run_manifest.schema.json"
+JOURNAL_ENTRY_DEFINITION = "journal_entry"
+
+# Un seul écrivain à la fois : les étapes exécutées en parallèle partagent le
+# même manifest, et une lecture-modification-écriture concurrente perdrait des
+# transitions d'état sans aucune erreur visible.
+_MANIFEST_WRITER_LOCK = threading.RLock()
+
+
 def utc_now() -> str:
     """Retourne une date UTC ISO-8601 compatible avec les schémas d'audit."""
     return datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
 
 
+class _GroupCommitLog:
+    """Fichier en ajout seul dont un fsync couvre toutes les lignes déjà écrites."""
+
+    def __init__(self, path: Path) -> None:
+        self._output: TextIO = path.open("a", encoding="utf-8")
+        self._write_lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._written = 0
+        self._synced = 0
+
+    def append(self, document: dict[str, Any]) -> int:
+        """Écrit une ligne et retourne sa position, à passer à `sync`."""
+        line = json.dumps(document, ensure_ascii=False, sort_keys=True) + "\n"
+        with self._write_lock:
+            self._output.write(line)
+            self._output.flush()
+            self._written += 1
+            return self._written
+
+    def sync(self, position: int) -> None:
+        """Attend que la ligne `position` soit durable."""
+        with self._sync_lock:
+            # Le fil précédent a pu synchroniser cette ligne avec les siennes.
+            if self._synced >= position:
+                return
+            with self._write_lock:
+                written = self._written
+            os.fsync(self._output.fileno())
+            self._synced = written
+
+    def truncate(self) -> None:
+        with self._write_lock:
+            self._output.truncate(0)
+
+    def close(self) -> None:
+        with self._write_lock:
+            self._output.close()
+
+
+class _RunJournal:
+    """État en mémoire d'un run dont ce processus est l'unique écrivain."""
+
+    def __init__(self, run_dir: Path, manifest: dict[str, Any]) -> None:
+        self.run_dir = run_dir
+        self.manifest = manifest
+        self.sequence = 0
+        self.pending = 0
+        self.transitions = _GroupCommitLog(run_dir / MANIFEST_JOURNAL_NAME)
+        self.events = _GroupCommitLog(run_dir / EVENTS_FILE_NAME)
+
+    def close(self) -> None:
+        self.transitions.close()
+        self.events.close()
+
+
+_OPEN_JOURNALS: dict[Path, _RunJournal] = {}
+
+
+def _open_journal(run_dir: Path) -> _RunJournal | None:
+    return _OPEN_JOURNALS.get(run_dir.resolve())
+
+
+def _apply_journal_entry(manifest: dict[str, Any], entry: dict[str, Any]) -> None:
+    manifest.update(entry["set"])
+    positions = {
+        stage_record["stage_name"]: index
+        for index, stage_record in enumerate(manifest["stages"])
+    }
+    for stage_record in entry["stages"]:
+        index = positions.get(stage_record["stage_name"])
+        if index is None:
+            positions[stage_record["stage_name"]] = len(manifest["stages"])
+            manifest["stages"].append(stage_record)
+        else:
+            manifest["stages"][index] = stage_record
+
+
+def _replay_journal(run_dir: Path, manifest: dict[str, Any]) -> None:
+    """Applique au manifest compacté les transitions journalisées depuis."""
+    journal_path = run_dir / MANIFEST_JOURNAL_NAME
+    try:
+        lines = journal_path.read_text(encoding="utf-8").splitlines(keepends=True)
+    except FileNotFoundError:
+        return
+    for index, line in enumerate(lines):
+        try:
+            entry = json.loads(line)
+        except json.JSONDecodeError as error:
+            # Seule une dernière ligne inachevée est tolérée : sa transition n'a
+            # jamais été rendue à l'appelant.
+            if index == len(lines) - 1 and not line.endswith("\n"):
+                break
+            raise ValueError(f"Journal du manifest invalide : {journal_path}") from error
+        validate_json_document(
+            entry, MANIFEST_SCHEMA_NAME, definition=JOURNAL_ENTRY_DEFINITION
+        )
+        _apply_journal_entry(manifest, entry)
+
+
+def _journal_entry(
+    before: dict[str, Any], after: dict[str, Any]
+) -> dict[str, Any] | None:
+    """Retourne les changements d'une transition, ou `None` s'ils ne s'y prêtent pas.
+
+    Une transition qui retire ou réordonne des étapes, ou retire un champ, est
+    publiée par compaction complète.
+    """
+    before_names = [stage_record["stage_name"] for stage_record in before["stages"]]
+    after_names = [stage_record["stage_name"] for stage_record in after["stages"]]
+    if after_names[: len(before_names)] != before_names or set(before) - set(after):
+        return None
+    before_records = dict(zip(before_names, before["stages"]))
+    return {
+        "set": {
+            key: value
+            for key, value in after.items()
+            if key != "stages" and before.get(key) != value
+        },
+        "stages": [
+            stage_record
+            for stage_record in after["stages"]
+            if before_records.get(stage_record["stage_name"]) != stage_record
+        ],
+    }
+
+
+@traced("compact_manifest", "manifest")
+def _compact(journal: _RunJournal) -> None:
+    validate_json_document(journal.manifest, MANIFEST_SCHEMA_NAME)
+    atomic_write_json(journal.run_dir / MANIFEST_FILE_NAME, journal.manifest)
+    # Un arrêt avant cette ligne est sans effet : rejouer le journal sur le
+    # manifest compacté redonne le même état.
+    journal.transitions.truncate()
+    journal.pending = 0
+
+
 def load_manifest(run_dir: Path) -> dict[str, Any]:
-    """Charge et valide le manifest courant d'un run."""
-    manifest = read_json(run_dir / "manifest.json")
-    validate_json_document(manifest, "run_manifest.schema.json")
+    """Charge et valide le manifest courant d'un run, journal compris."""
+    journal = _open_journal(run_dir)
+    if journal is not None:
+        with _MANIFEST_WRITER_LOCK:
+            return copy.deepcopy(journal.manifest)
+    manifest = read_json(run_dir / MANIFEST_FILE_NAME)
+    _replay_journal(run_dir, manifest)
+    validate_json_document(manifest, MANIFEST_SCHEMA_NAME)
     return manifest
 
 
 def save_manifest(run_dir: Path, manifest: dict[str, Any]) -> None:
     """Valide puis remplace atomiquement le manifest courant."""
     manifest["updated_at"] = utc_now()
-    validate_json_document(manifest, "run_manifest.schema.json")
-    atomic_write_json(run_dir / "manifest.json", manifest)
+    validate_json_document(manifest, MANIFEST_SCHEMA_NAME)
+    with _MANIFEST_WRITER_LOCK:
+        journal = _open_journal(run_dir)
+        if journal is not None:
+            journal.manifest = copy.deepcopy(manifest)
+            _compact(journal)
+            return
+        atomic_write_json(run_dir / MANIFEST_FILE_NAME, manifest)
+        # Le manifest fourni fait foi : un journal resté d'un arrêt brutal ne
+        # doit pas être rejoué par-dessus.
+        (run_dir / MANIFEST_JOURNAL_NAME).unlink(missing_ok=True)
+
+
+def update_manifest(
+    run_dir: Path,
+    update: Callable[[dict[str, Any]], _T],
+) -> _T:
+    """Applique une transition au manifest courant sous le verrou d'écriture unique.
+
+    La transition porte toujours sur l'état publié le plus récent. Avec un
+    journal ouvert, elle y est ajoutée ; sinon le manifest est relu puis
+    remplacé atomiquement.
+    """
+    journal = _open_journal(run_dir)
+    if journal is None:
+        with _MANIFEST_WRITER_LOCK:
+            manifest = load_manifest(run_dir)
+            result = update(manifest)
+            save_manifest(run_dir, manifest)
+            return result
+
+    with _MANIFEST_WRITER_LOCK:
+        # La transition modifie une copie : refusée, elle ne laisse aucune trace.
+        manifest = copy.deepcopy(journal.manifest)
+        result = update(manifest)
+        manifest["updated_at"] = utc_now()
+        changes = _journal_entry(journal.manifest, manifest)
+        if changes is None:
+            validate_json_document(manifest, MANIFEST_SCHEMA_NAME)
+            journal.manifest = manifest
+            _compact(journal)
+            return result
+        entry = {"sequence": journal.sequence + 1, **changes}
+        validate_json_document(
+            entry, MANIFEST_SCHEMA_NAME, definition=JOURNAL_ENTRY_DEFINITION
+        )
+        position = journal.transitions.append(entry)
+        journal.sequence += 1
+        journal.pending += 1
+        journal.manifest = manifest
+    journal.transitions.sync(position)
+    return result
+
+
+def compact_manifest(run_dir: Path) -> None:
+    """Publie l'état courant dans `manifest.json` si des transitions sont journalisées."""
+    journal = _open_journal(run_dir)
+    if journal is None:
+        return
+    with _MANIFEST_WRITER_LOCK:
+        if journal.pending:
+            _compact(journal)
+
+
+@contextmanager
+def manifest_journal(run_dir: Path) -> Iterator[None]:
+    """Journalise les transitions du run dans ce processus jusqu'à la sortie.
+
+    Un journal laissé par un arrêt brutal est rejoué puis compacté à
+    l'ouverture. Un appel imbriqué réutilise le journal déjà ouvert.
+    """
+    key = run_dir.resolve()
+    with _MANIFEST_WRITER_LOCK:
+        if key in _OPEN_JOURNALS:
+            opened = False
+        else:
+            opened = True
+            recovered = (run_dir / MANIFEST_JOURNAL_NAME).is_file()
+            journal = _RunJournal(run_dir, load_manifest(run_dir))
+            if recovered:
+                _compact(journal)
+            _OPEN_JOURNALS[key] = journal
+    if not opened:
+        yield
+        return
+    try:
+        yield
+    finally:
+        with _MANIFEST_WRITER_LOCK:
+            try:
+                if journal.pending:
+                    _compact(journal)
+            finally:
+                del _OPEN_JOURNALS[key]
+                journal.close()
+            # Atteint seulement si la compaction a réussi : sinon le journal
+            # reste sur disque pour être rejoué.
+            (run_dir / MANIFEST_JOURNAL_NAME).unlink(missing_ok=True)
 
 
 def record_event(
@@ -37,16 +310,19 @@ def record_event(
     details: dict[str, Any] | None = None,
 ) -> None:
     """Ajoute un événement agrégé sans génotype ni identifiant individuel."""
-    append_json_event(
-        run_dir / "events.jsonl",
-        {
-            "timestamp": utc_now(),
-            "stage": stage,
-            "event": event,
-            "severity": severity,
-            "details": details or {},
-        },
-    )
+    document = {
+        "timestamp": utc_now(),
+        "stage": stage,
+        "event": event,
+        "severity": severity,
+        "details": details or {},
+    }
+    journal = _open_journal(run_dir)
+    if journal is None:
+        with _MANIFEST_WRITER_LOCK:
+            append_json_event(run_dir / EVENTS_FILE_NAME, document)
+        return
+    journal.events.sync(journal.events.append(document))
 
 
 def find_stage_record(
@@ -0,0 +1,29 @@
+"""Préchargement du serveur de processus des étapes en mode `warm`.
+
+Ce module n'est importé que par le serveur `forkserver` de `workers.py`, une
+seule fois. Son import charge les bibliothèques et les modules d'étape, puis
+compile les validateurs de schémas. Chaque tentative forkée hérite ainsi d'un
+interpréteur déjà prêt. Un module d'étape dont une dépendance optionnelle
+manque est ignoré ici : son import échouera dans la tentative, comme à froid.
+"""
+
+from __future__ import annotations
+
+import importlib
+
+from effet_fondateur.contracts.tables import preload_schema_validators
+from effet_fondateur.orchestrator.pipeline import DEFAULT_STAGE_DEFINITIONS
+
+
+PRELOADED_LIBRARIES = ("jsonschema", "numpy", "scipy.stats", "yaml")
+
+for _library in PRELOADED_LIBRARIES:
+    importlib.import_module(_library)
+
+for _definition in DEFAULT_STAGE_DEFINITIONS:
+    try:
+        importlib.import_module(_definition.module)
+    except ImportError:
+        continue
+
+preload_schema_validators()
@@ -0,0 +1,256 @@
+"""Lancement des scripts d'étape, à froid ou depuis un serveur préchauffé.
+
+Le mode `subprocess` démarre `python -m <module>` pour chaque tentative. Le mode
+`warm` confie le fork au serveur `forkserver` de multiprocessing : ce serveur a
+importé une seule fois NumPy, SciPy, jsonschema, PyYAML et les modules d'étape,
+et compilé les validateurs de schémas. Chaque tentative reste un processus
+distinct, lancé avec le répertoire courant et l'environnement du runner au
+moment de l'appel. Ses sorties standard sont redirigées au niveau des
+descripteurs, donc aussi pour les outils externes qu'elle lance, et son code
+de retour suit les règles de `python -m`.
+
+Dans les deux modes, la tentative retourne aussi sa consommation de ressources
+(voir `resources.py`). À froid, `os.wait4` la lit pour tout l'arbre de
+processus. En mode warm, le processus forké la mesure lui-même à sa sortie et
+distingue alors ses propres ressources de celles des outils qu'il a lancés.
+"""
+
+from __future__ import annotations
+
+import multiprocessing
+import os
+import resource
+import subprocess
+import sys
+import threading
+import traceback
+from collections.abc import Sequence
+from dataclasses import dataclass
+from multiprocessing.connection import Connection
+from multiprocessing.context import ForkServerContext
+from pathlib import Path
+from time import monotonic
+from typing import Literal
+
+from effet_fondateur.orchestrator.errors import PipelineError
+from effet_fondateur.orchestrator.profiling import run_stage_script
+from effet_fondateur.orchestrator.resources import combine_resource_usage, resource_usage
+
+
+ExecutionMode = Literal["subprocess", "warm"]
+EXECUTION_MODES: tuple[str, ...] = ("subprocess", "warm")
+WARM_PRELOAD_MODULES = ("effet_fondateur.orchestrator.warmup",)
+
+_warm_context: ForkServerContext | None = None
+_warm_context_lock = threading.Lock()
+
+
+@dataclass(frozen=True)
+class StageProcessResult:
+    """Code de retour et ressources d'un script d'étape terminé.
+
+    `child_processes` isole les outils externes attendus par le script ; il
+    vaut `None` lorsque seule la mesure de l'arbre complet est disponible.
+    `process_tree` vaut `None` si un processus warm a été tué par un signal.
+    """
+
+    return_code: int
+    wall_seconds: float
+    process_tree: dict[str, float | int] | None
+    child_processes: dict[str, float | int] | None
+
+
+def validate_execution_mode(mode: str) -> None:
+    """Refuse un mode inconnu ou indisponible avant de créer un run."""
+    if mode not in EXECUTION_MODES:
+        raise PipelineError(f"Mode d'exécution des étapes inconnu : {mode}")
+    if mode == "warm" and "forkserver" not in multiprocessing.get_all_start_methods():
+        raise PipelineError("Le mode d'exécution warm exige la méthode forkserver.")
+
+
+def _forkserver_context() -> ForkServerContext:
+    global _warm_context
+    # Le serveur est partagé par tout le processus : le préchargement doit être
+    # déclaré une seule fois, avant le premier lancement.
+    with _warm_context_lock:
+        if _warm_context is None:
+            context = multiprocessing.get_context("forkserver")
+            context.set_forkserver_preload(list(WARM_PRELOAD_MODULES))
+            _warm_context = context
+        return _warm_context
+
+
+def _run_module_as_main(
+    module: str,
+    arguments: list[str],
+    stdout_path: str,
+    stderr_path: str,
+    environment: dict[str, str],
+    working_directory: str,
+    usage_sender: Connection,
+    profiling_mode: str | None,
+    profile_path: str | None,
+) -> None:
+    """Reproduit `python -m module arguments` dans le processus forké."""
+    os.chdir(working_directory)
+    os.environ.clear()
+    os.environ.update(environment)
+    sys.stdout.flush()
+    sys.stderr.flush()
+    for path, descriptor in ((stdout_path, 1), (stderr_path, 2)):
+        output_descriptor = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        os.dup2(output_descriptor, descriptor)
+        os.close(output_descriptor)
+    sys.argv = [module, *arguments]
+    # Le serveur a pu importer le module sous son propre nom. Comme avec
+    # `python -m`, il ne doit exister que sous le nom `__main__`.
+    sys.modules.pop(module, None)
+    try:
+        run_stage_script(
+            module, profiling_mode, None if profile_path is None else Path(profile_path)
+        )
+    except SystemExit:
+        raise
+    except BaseException:
+        # Comme l'interpréteur : trace sur la sortie d'erreur et code 1.
+        traceback.print_exc()
+        raise SystemExit(1) from None
+    finally:
+        sys.stdout.flush()
+        sys.stderr.flush()
+        # Le fork remet les compteurs à zéro : ils couvrent la seule tentative.
+        usage_sender.send((
+            resource_usage(resource.getrusage(resource.RUSAGE_SELF)),
+            resource_usage(resource.getrusage(resource.RUSAGE_CHILDREN)),
+        ))
+        usage_sender.close()
+
+
+def _run_warm(
+    module: str,
+    arguments: Sequence[str],
+    stdout_path: Path,
+    stderr_path: Path,
+    profiling_mode: str | None,
+    profile_path: Path | None,
+    environment: dict[str, str],
+) -> StageProcessResult:
+    context = _forkserver_context()
+    usage_receiver, usage_sender = context.Pipe(duplex=False)
+    started_clock = monotonic()
+    process = context.Process(
+        target=_run_module_as_main,
+        args=(
+            module,
+            list(arguments),
+            str(stdout_path),
+            str(stderr_path),
+            {**os.environ, **environment},
+            os.getcwd(),
+            usage_sender,
+            profiling_mode,
+            None if profile_path is None else str(profile_path),
+        ),
+    )
+    process.start()
+    usage_sender.close()
+    process.join()
+    wall_seconds = monotonic() - started_clock
+    if process.exitcode is None:
+        raise PipelineError(f"Processus d'étape non terminé : {module}")
+    # Un processus tué par un signal n'a rien envoyé : seule la durée est connue.
+    try:
+        own_usage, child_usage = usage_receiver.recv() if usage_receiver.poll() else (None, None)
+    except EOFError:
+        own_usage, child_usage = None, None
+    finally:
+        usage_receiver.close()
+    return StageProcessResult(
+        return_code=process.exitcode,
+        wall_seconds=wall_seconds,
+        process_tree=(
+            None if own_usage is None else combine_resource_usage(own_usage, child_usage)
+        ),
+        child_processes=child_usage,
+    )
+
+
+def _run_subprocess(
+    module: str,
+    arguments: Sequence[str],
+    stdout_path: Path,
+    stderr_path: Path,
+    profiling_mode: str | None,
+    profile_path: Path | None,
+    environment: dict[str, str],
+) -> StageProcessResult:
+    command = [sys.executable, "-m", module, *arguments]
+    if profiling_mode is not None and profile_path is not None:
+        command = [
+            sys.executable,
+            "-m",
+            "effet_fondateur.orchestrator.profiled_stage",
+            "--mode",
+            profiling_mode,
+            "--output",
+            str(profile_path),
+            module,
+            *arguments,
+        ]
+    started_clock = monotonic()
+    with stdout_path.open("wb") as stdout_file, stderr_path.open("wb") as stderr_file:
+        process = subprocess.Popen(
+            command,
+            stdout=stdout_file,
+            stderr=stderr_file,
+            env={**os.environ, **environment} if environment else None,
+        )
+        # `wait4` récupère le processus et les ressources de tout son arbre :
+        # le noyau y ajoute celles des descendants qu'il a lui-même attendus.
+        _, status, usage = os.wait4(process.pid, 0)
+    wall_seconds = monotonic() - started_clock
+    process.returncode = os.waitstatus_to_exitcode(status)
+    return StageProcessResult(
+        return_code=process.returncode,
+        wall_seconds=wall_seconds,
+        process_tree=resource_usage(usage),
+        child_processes=None,
+    )
+
+
+def run_stage_module(
+    module: str,
+    arguments: Sequence[str],
+    stdout_path: Path,
+    stderr_path: Path,
+    mode: ExecutionMode = "subprocess",
+    profiling_mode: str | None = None,
+    profile_path: Path | None = None,
+    environment: dict[str, str] | None = None,
+) -> StageProcessResult:
+    """Exécute un script d'étape, écrit ses sorties standard et mesure l'arbre.
+
+    Avec `profiling_mode`, le script tourne sous ce profileur, qui écrit son
+    diagnostic dans `profile_path` ; voir `profiling.py`. `environment`
+    complète l'environnement du runner pour cette seule tentative.
+    """
+    extra_environment = environment or {}
+    if mode == "warm":
+        return _run_warm(
+            module,
+            arguments,
+            stdout_path,
+            stderr_path,
+            profiling_mode,
+            profile_path,
+            extra_environment,
+        )
+    return _run_subprocess(
+        module,
+        arguments,
+        stdout_path,
+        stderr_path,
+        profiling_mode,
+        profile_path,
+        extra_environment,
+    )
@@ -1,5 +1,6 @@
 """Adaptateurs de phasage supportés par le pipeline V2."""
 
+from effet_fondateur.phasing.chunking import PhaseChunk, plan_phase_chunks
 from effet_fondateur.phasing.inputs import (
     PreparedShapeit5Inputs,
     Shapeit5InputBlockError,
@@ -31,6 +32,7 @@ from effet_fondateur.phasing.shapeit5 import (
 )
 
 __all__ = [
+    "PhaseChunk",
     "PreparedShapeit5Inputs",
     "PublishedPhasingQc",
     "SHAPEIT5_CONTRACT",
@@ -49,6 +51,7 @@ __all__ = [
     "build_phase_rare_command",
     "build_shapeit5_inputs",
     "parse_shapeit5_adapter_config",
+    "plan_phase_chunks",
     "probe_shapeit5",
     "publish_phasing_qc",
     "run_shapeit5_phasing",
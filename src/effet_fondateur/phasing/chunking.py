@@ -0,0 +1,116 @@
+"""Découpage de la région de phasage en segments chevauchants.
+
+Une région plus large que `chunk_size_cm` est partagée en segments de même
+largeur génétique, lue sur la carte SHAPEIT5 préparée à l'étape 12.5. Deux
+segments voisins se chevauchent d'au moins `overlap_cm` : la ligature aligne la
+phase de chaque segment sur celle du précédent à partir des hétérozygotes de
+ce chevauchement. Une région plus étroite reste un segment unique, identique à
+la région demandée.
+"""
+
+from __future__ import annotations
+
+import gzip
+import math
+import re
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+from effet_fondateur.phasing.shapeit5 import Shapeit5ContractError
+
+
+REGION_PATTERN = re.compile(r"chr([1-9]|1[0-9]|2[0-2]):([1-9][0-9]*)-([1-9][0-9]*)")
+
+
+@dataclass(frozen=True)
+class PhaseChunk:
+    """Segment phasé par un appel `phase_common`, bornes incluses."""
+
+    chromosome: int
+    start_bp: int
+    end_bp: int
+
+    @property
+    def region(self) -> str:
+        return f"chr{self.chromosome}:{self.start_bp}-{self.end_bp}"
+
+
+def _positive_number(value: float, name: str) -> float:
+    if (
+        isinstance(value, bool)
+        or not isinstance(value, (int, float))
+        or not math.isfinite(value)
+        or value <= 0
+    ):
+        raise Shapeit5ContractError(f"invalid_shapeit5_parameter:{name}")
+    return float(value)
+
+
+def _read_genetic_map(path: Path, chromosome: int) -> tuple[np.ndarray, np.ndarray]:
+    """Positions et centimorgans de la carte `pos chr cM`, strictement croissants."""
+    try:
+        with gzip.open(path, "rt", encoding="utf-8") as handle:
+            rows = [line.split("\t") for line in handle.read().splitlines()[1:]]
+        positions_bp = np.array([int(row[0]) for row in rows], dtype=np.int64)
+        positions_cm = np.array([float(row[2]) for row in rows], dtype=np.float64)
+        chromosomes = {int(row[1]) for row in rows}
+    except (OSError, EOFError, ValueError, IndexError) as error:
+        raise Shapeit5ContractError("shapeit5_chunk_map_unreadable") from error
+    if (
+        len(rows) < 2
+        or chromosomes != {chromosome}
+        or not (np.diff(positions_bp) > 0).all()
+        or not (np.diff(positions_cm) >= 0).all()
+    ):
+        raise Shapeit5ContractError("shapeit5_chunk_map_invalid")
+    return positions_bp, positions_cm
+
+
+def plan_phase_chunks(
+    genetic_map_path: Path,
+    region: str,
+    *,
+    chunk_size_cm: float,
+    overlap_cm: float,
+) -> tuple[PhaseChunk, ...]:
+    """Découpe `region` en segments d'au plus `chunk_size_cm` qui se chevauchent."""
+    chunk_size_cm = _positive_number(chunk_size_cm, "chunk_size_cm")
+    overlap_cm = _positive_number(overlap_cm, "chunk_overlap_cm")
+    if overlap_cm >= chunk_size_cm:
+        raise Shapeit5ContractError("invalid_shapeit5_parameter:chunk_overlap_cm")
+    match = REGION_PATTERN.fullmatch(region)
+    if match is None or int(match.group(2)) > int(match.group(3)):
+        raise Shapeit5ContractError("invalid_shapeit5_region")
+    chromosome, start_bp, end_bp = (int(group) for group in match.groups())
+    positions_bp, positions_cm = _read_genetic_map(genetic_map_path, chromosome)
+    start_cm, end_cm = np.interp([start_bp, end_bp], positions_bp, positions_cm)
+    span_cm = float(end_cm - start_cm)
+    if span_cm <= chunk_size_cm:
+        return (PhaseChunk(chromosome, start_bp, end_bp),)
+
+    count = math.ceil((span_cm - overlap_cm) / (chunk_size_cm - overlap_cm))
+    step_cm = (span_cm - overlap_cm) / count
+    chunk_starts_cm = start_cm + step_cm * np.arange(count)
+    # Sur un plateau de la carte, la position retenue est la première : le
+    # chevauchement génétique n'est jamais réduit.
+    rising = np.concatenate(([True], np.diff(positions_cm) > 0))
+    map_cm, map_bp = positions_cm[rising], positions_bp[rising]
+    starts = np.floor(np.interp(chunk_starts_cm, map_cm, map_bp)).astype(np.int64)
+    ends = np.ceil(
+        np.interp(chunk_starts_cm + step_cm + overlap_cm, map_cm, map_bp)
+    ).astype(np.int64)
+    starts = np.clip(starts, start_bp, end_bp)
+    ends = np.clip(ends, start_bp, end_bp)
+    starts[0], ends[-1] = start_bp, end_bp
+    if not (
+        (starts < ends).all()
+        and (np.diff(starts) > 0).all()
+        and (starts[1:] < ends[:-1]).all()
+    ):
+        raise Shapeit5ContractError("shapeit5_chunk_plan_degenerate")
+    return tuple(
+        PhaseChunk(chromosome, int(start), int(end))
+        for start, end in zip(starts.tolist(), ends.tolist())
+    )
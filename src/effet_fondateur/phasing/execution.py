@@ -1,23 +1,48 @@
-"""Exécution contrôlée de SHAPEIT5 et attribution du chromosome porteur."""
+"""Exécution contrôlée de SHAPEIT5 et attribution du chromosome porteur.
+
+Une région génétiquement plus large que `chunk_size_cm` est phasée par
+`phase_common` en segments chevauchants (voir `chunking.py`), lancés en
+parallèle dans le budget de threads, puis ligaturés par `bcftools concat
+--ligate`. Avant la ligature, chaque chevauchement doit contenir des variants
+communs et une discordance de phase bornée entre les deux segments.
+
+Les GT lus par `bcftools query` sont décodés en tableaux int8 variants ×
+individus × 2 haplotypes. Les contrôles mendéliens, la conservation des
+génotypes, les transmissions et l'attribution des porteurs sont calculés sur
+ces tableaux, pour toutes les familles et tous les variants à la fois.
+"""
 
 from __future__ import annotations
 
 import csv
+import math
 import os
 import shutil
 import subprocess
 import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Any, Callable, Sequence
 
-from effet_fondateur.audit import atomic_write_json, read_json, sha256_file
+import numpy as np
+
+from effet_fondateur.audit import atomic_write_json, read_json, sha256_file, trace_span
 from effet_fondateur.contracts import validate_json_document, validate_tsv_table
+from effet_fondateur.io import (
+    CommandStreamError,
+    CommandStreamer,
+    buffered_command_lines,
+    stream_command_lines,
+    stream_query_rows,
+)
 from effet_fondateur.orchestrator.state import utc_now
+from effet_fondateur.phasing.chunking import PhaseChunk, plan_phase_chunks
 from effet_fondateur.phasing.shapeit5 import (
     SHAPEIT5_CONTRACT,
     Shapeit5AdapterConfig,
     Shapeit5ContractError,
+    Shapeit5Probe,
     build_phase_common_command,
     build_phase_rare_command,
     probe_shapeit5,
@@ -39,6 +64,25 @@ UNRELIABLE_COLUMNS = (
     "CHROMOSOME", "START_BP", "END_BP", "VARIANT_ID", "REASON",
     "AFFECTED_SAMPLE_COUNT",
 )
+GENOTYPE_HAPLOTYPES = {
+    f"{first}{separator}{second}": (first, second)
+    for separator in "|/"
+    for first in (0, 1)
+    for second in (0, 1)
+}
+UNSUPPORTED_ALLELE = -1
+TRANSMISSION_HAPLOTYPES = {
+    "DUO_COMPATIBLE": (None, None),
+    "DIRECT": ("H1", "H2"),
+    "SWAPPED": ("H2", "H1"),
+    "AMBIGUOUS": ("UNRESOLVED", "UNRESOLVED"),
+}
+CONFIDENCE_RELIABILITY = {
+    "NOT_APPLICABLE_HOMOZYGOUS": ("PASS", None),
+    "NOT_AVAILABLE": ("UNRELIABLE", "target_phase_confidence_not_available"),
+    "SCORED_LOW": ("UNRELIABLE", "target_phase_confidence_below_threshold"),
+    "SCORED_PASS": ("PASS", None),
+}
 
 
 class Shapeit5ExecutionError(ValueError):
@@ -54,14 +98,44 @@ class Shapeit5ExecutionBlockError(RuntimeError):
 
 
 @dataclass(frozen=True)
-class PhasedVariant:
-    chromosome: str
-    position_bp: int
-    variant_id: str
-    ref: str
-    alt: str
-    genotypes: tuple[str, ...]
-    confidences: tuple[float | None, ...]
+class PhasedGenotypes:
+    """Variants d'un BCF, génotypes en tableaux variants × individus.
+
+    `haplotypes` porte les deux allèles de chaque GT en int8, et
+    `UNSUPPORTED_ALLELE` pour un GT autre que diploïde `0`/`1`. `phased` suit
+    le séparateur `|` ; `confidences` vaut NaN sans score PP.
+    """
+
+    keys: list[tuple[str, int, str, str, str]]
+    haplotypes: np.ndarray
+    phased: np.ndarray
+    confidences: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def genotype_texts(self, variant_index: int) -> list[str]:
+        """GT d'un variant sous sa forme VCF, pour des allèles valides."""
+        return [
+            f"{first}{'|' if phased else '/'}{second}"
+            for (first, second), phased in zip(
+                self.haplotypes[variant_index].tolist(), self.phased[variant_index].tolist()
+            )
+        ]
+
+
+def _genotype_columns(keys: list[tuple[str, int, str, str, str]], genotype_rows: list[list[str]], confidence_rows: list[list[float | None]] | None) -> PhasedGenotypes:
+    # Peu de GT distincts : chacun est décodé une fois, puis diffusé.
+    distinct, inverse = np.unique(np.array(genotype_rows, dtype=str), return_inverse=True)
+    distinct_texts = distinct.tolist()
+    decoded = [GENOTYPE_HAPLOTYPES.get(genotype, (UNSUPPORTED_ALLELE, UNSUPPORTED_ALLELE)) for genotype in distinct_texts]
+    inverse = inverse.reshape(len(keys), -1)
+    return PhasedGenotypes(
+        keys,
+        np.array(decoded, dtype=np.int8)[inverse],
+        np.array(["|" in genotype for genotype in distinct_texts], dtype=bool)[inverse],
+        np.full(inverse.shape, np.nan) if confidence_rows is None else np.array(confidence_rows, dtype=np.float64),
+    )
 
 
 @dataclass(frozen=True)
@@ -103,60 +177,103 @@ def _samples(executable: str, path: Path, runner: CommandRunner, timeout: float)
     return samples
 
 
-def _variants(executable: str, path: Path, sample_count: int, with_confidence: bool, runner: CommandRunner, timeout: float) -> list[PhasedVariant]:
+def _variants(executable: str, path: Path, sample_count: int, with_confidence: bool, streamer: CommandStreamer, timeout: float) -> PhasedGenotypes:
     sample_format = "[\\t%GT\\t%PP]" if with_confidence else "[\\t%GT]"
-    result = _run(
-        runner,
+    rows = stream_query_rows(
         [executable, "query", "--format", f"%CHROM\\t%POS\\t%ID\\t%REF\\t%ALT{sample_format}\\n", str(path)],
         timeout,
-        "bcftools_query_phasing_variants",
+        streamer,
     )
-    variants: list[PhasedVariant] = []
+    keys: list[tuple[str, int, str, str, str]] = []
+    genotype_rows: list[list[str]] = []
+    confidence_rows: list[list[float | None]] = []
     width = 5 + sample_count * (2 if with_confidence else 1)
-    for line in result.stdout.splitlines():
-        fields = line.split("\t")
-        if len(fields) != width:
-            raise Shapeit5ExecutionBlockError("phasing_variant_record_malformed")
-        if with_confidence:
-            genotypes = tuple(fields[5::2])
-            try:
-                confidences = tuple(None if value in {"", "."} else float(value) for value in fields[6::2])
-            except ValueError as error:
-                raise Shapeit5ExecutionBlockError("phasing_confidence_invalid") from error
-            if any(value is not None and not 0.5 <= value <= 1 for value in confidences):
-                raise Shapeit5ExecutionBlockError("phasing_confidence_invalid")
-        else:
-            genotypes = tuple(fields[5:])
-            confidences = tuple(None for _ in genotypes)
-        variants.append(PhasedVariant(fields[0], int(fields[1]), fields[2], fields[3], fields[4], genotypes, confidences))
-    if not variants:
+    try:
+        for fields in rows:
+            if len(fields) != width:
+                raise Shapeit5ExecutionBlockError("phasing_variant_record_malformed")
+            if with_confidence:
+                genotype_rows.append(fields[5::2])
+                try:
+                    confidences = [None if value in {"", "."} else float(value) for value in fields[6::2]]
+                except ValueError as error:
+                    raise Shapeit5ExecutionBlockError("phasing_confidence_invalid") from error
+                if any(value is not None and not 0.5 <= value <= 1 for value in confidences):
+                    raise Shapeit5ExecutionBlockError("phasing_confidence_invalid")
+                confidence_rows.append(confidences)
+            else:
+                genotype_rows.append(fields[5:])
+            keys.append((fields[0], int(fields[1]), fields[2], fields[3], fields[4]))
+    except CommandStreamError as error:
+        suffix = "" if error.return_code is None else f":{error.return_code}"
+        raise Shapeit5ExecutionExternalError(f"bcftools_query_phasing_variants_failed{suffix}") from error
+    if not keys:
         raise Shapeit5ExecutionBlockError("phasing_output_has_no_variants")
-    return variants
+    return _genotype_columns(keys, genotype_rows, confidence_rows if with_confidence else None)
+
+
+def _unsupported(haplotypes: np.ndarray) -> np.ndarray:
+    return (haplotypes < 0).any(axis=-1)
+
 
+def _carries(haplotypes: np.ndarray, alleles: np.ndarray) -> np.ndarray:
+    """Indique, case par case, si `alleles` figure parmi les deux allèles de `haplotypes`."""
+    return (haplotypes == alleles[..., None]).any(axis=-1)
 
-def _alleles(genotype: str) -> tuple[str, str]:
-    separator = "|" if "|" in genotype else "/"
-    values = genotype.split(separator)
-    if len(values) != 2 or any(value not in {"0", "1"} for value in values):
+
+def _family_haplotypes(haplotypes: np.ndarray, samples: list[str], pedigree: list[tuple[str, str | None, str | None]]) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Allèles des enfants et parents de chaque ligne du pedigree, sur le dernier axe des individus.
+
+    Un parent absent est représenté par l'enfant lui-même, masqué par
+    `has_father` ou `has_mother`. Un GT non supporté d'un membre présent est
+    bloquant.
+    """
+    index = {sample: position for position, sample in enumerate(samples)}
+    child = np.array([index[row[0]] for row in pedigree], dtype=np.intp)
+    father = np.array([index[row[1]] if row[1] else index[row[0]] for row in pedigree], dtype=np.intp)
+    mother = np.array([index[row[2]] if row[2] else index[row[0]] for row in pedigree], dtype=np.intp)
+    has_father = np.array([row[1] is not None for row in pedigree], dtype=bool)
+    has_mother = np.array([row[2] is not None for row in pedigree], dtype=bool)
+    child_haplotypes = haplotypes[..., child, :]
+    father_haplotypes = haplotypes[..., father, :]
+    mother_haplotypes = haplotypes[..., mother, :]
+    if (
+        _unsupported(child_haplotypes).any()
+        or (_unsupported(father_haplotypes) & has_father).any()
+        or (_unsupported(mother_haplotypes) & has_mother).any()
+    ):
         raise Shapeit5ExecutionBlockError("unsupported_phasing_genotype")
-    return values[0], values[1]
-
-
-def _mendel_errors(variants: list[PhasedVariant], samples: list[str], pedigree: list[tuple[str, str | None, str | None]]) -> int:
-    sample_index = {sample: index for index, sample in enumerate(samples)}
-    errors = 0
-    for child, father, mother in pedigree:
-        for variant in variants:
-            child_alleles = _alleles(variant.genotypes[sample_index[child]])
-            father_alleles = set(_alleles(variant.genotypes[sample_index[father]])) if father else None
-            mother_alleles = set(_alleles(variant.genotypes[sample_index[mother]])) if mother else None
-            if father_alleles is not None and mother_alleles is not None:
-                compatible = any(first in father_alleles and second in mother_alleles for first, second in (child_alleles, child_alleles[::-1]))
-            else:
-                known = father_alleles or mother_alleles
-                compatible = known is not None and any(allele in known for allele in child_alleles)
-            errors += not compatible
-    return errors
+    return child_haplotypes, father_haplotypes, mother_haplotypes, has_father, has_mother
+
+
+def _mendel_errors(genotypes: PhasedGenotypes, samples: list[str], pedigree: list[tuple[str, str | None, str | None]]) -> int:
+    """Compte les couples (ligne du pedigree, variant) incompatibles, tous variants à la fois."""
+    if not pedigree:
+        return 0
+    child, father, mother, has_father, has_mother = _family_haplotypes(genotypes.haplotypes, samples, pedigree)
+    first, second = child[..., 0], child[..., 1]
+    trio = (_carries(father, first) & _carries(mother, second)) | (_carries(father, second) & _carries(mother, first))
+    # Un duo n'exige qu'un allèle de l'enfant chez le parent connu.
+    known = np.where(has_father[:, None], father, mother)
+    duo = _carries(known, first) | _carries(known, second)
+    compatible = np.where(has_father & has_mother, trio, duo & (has_father | has_mother))
+    return int((~compatible).sum())
+
+
+def _check_genotype_preservation(before: PhasedGenotypes, after: PhasedGenotypes) -> None:
+    """Exige, variant par variant, les mêmes génotypes non ordonnés, tous phasés après."""
+    unsupported = _unsupported(before.haplotypes) | _unsupported(after.haplotypes)
+    problems = unsupported | (before.haplotypes.sum(axis=-1) != after.haplotypes.sum(axis=-1))
+    failing = problems.any(axis=1) | ~after.phased.all(axis=1)
+    if not failing.any():
+        return
+    # Le premier variant, puis le premier individu en défaut, décident du code.
+    variant = int(failing.argmax())
+    if not problems[variant].any():
+        raise Shapeit5ExecutionBlockError("shapeit5_unphased_output_genotype")
+    if unsupported[variant, int(problems[variant].argmax())]:
+        raise Shapeit5ExecutionBlockError("unsupported_phasing_genotype")
+    raise Shapeit5ExecutionBlockError("shapeit5_genotype_not_preserved")
 
 
 def _read_pedigree(path: Path, samples: set[str]) -> list[tuple[str, str | None, str | None]]:
@@ -185,58 +302,147 @@ def _file(path: Path) -> dict[str, Any]:
     return {"filename": path.name, "sha256": sha256_file(path), "size_bytes": path.stat().st_size}
 
 
-def _carrier_rows(target: PhasedVariant, samples: list[str], genotype_rows: list[dict[str, Any]], threshold: float) -> list[dict[str, Any]]:
+def _explicit_alt_copies(genotype: str, ref: str, alt: str) -> int:
+    """Copies ALT d'un génotype moléculaire `A/B`, ou -1 s'il ne s'écrit pas avec REF/ALT."""
+    alleles = genotype.split("/")
+    if len(alleles) != 2 or any(allele not in (ref, alt) for allele in alleles):
+        return -1
+    return alleles.count(alt)
+
+
+def _carrier_rows(genotypes: PhasedGenotypes, target_index: int, samples: list[str], genotype_rows: list[dict[str, Any]], threshold: float) -> list[dict[str, Any]]:
     explicit = {row["SAMPLE_ID"]: row["GENOTYPE"] for row in genotype_rows}
     if set(explicit) != set(samples):
         raise Shapeit5ExecutionBlockError("explicit_target_genotype_sample_mismatch")
+    _, _, variant_id, ref, alt = genotypes.keys[target_index]
+    haplotypes = genotypes.haplotypes[target_index]
+    confidences = genotypes.confidences[target_index]
+    copies = haplotypes.sum(axis=1)
+    unsupported = _unsupported(haplotypes)
+    explicit_copies = np.array([_explicit_alt_copies(explicit[sample], ref, alt) for sample in samples])
+    problems = unsupported | (explicit_copies != copies)
+    if problems.any():
+        # Le premier individu en défaut décide du code, comme en lecture séquentielle.
+        first = int(problems.argmax())
+        raise Shapeit5ExecutionBlockError("unsupported_phasing_genotype" if unsupported[first] else "phased_target_genotype_discordant")
+    haplotype = np.select([copies == 0, copies == 2, haplotypes[:, 0] == 1], ["NONE", "BOTH", "H1"], "H2")
+    confidence_status = np.select(
+        [copies != 1, np.isnan(confidences), confidences < threshold],
+        ["NOT_APPLICABLE_HOMOZYGOUS", "NOT_AVAILABLE", "SCORED_LOW"],
+        "SCORED_PASS",
+    )
     rows: list[dict[str, Any]] = []
-    for order, (sample, gt, confidence) in enumerate(zip(samples, target.genotypes, target.confidences), start=1):
-        first, second = _alleles(gt)
-        observed = sorted(target.ref if allele == "0" else target.alt for allele in (first, second))
-        if observed != sorted(explicit[sample].split("/")):
-            raise Shapeit5ExecutionBlockError("phased_target_genotype_discordant")
-        copies = int(first == "1") + int(second == "1")
-        haplotype = "NONE" if copies == 0 else "BOTH" if copies == 2 else "H1" if first == "1" else "H2"
-        if copies != 1:
-            confidence_status, reliability, reason = "NOT_APPLICABLE_HOMOZYGOUS", "PASS", None
-        elif confidence is None:
-            confidence_status, reliability, reason = "NOT_AVAILABLE", "UNRELIABLE", "target_phase_confidence_not_available"
-        elif confidence < threshold:
-            confidence_status, reliability, reason = "SCORED_LOW", "UNRELIABLE", "target_phase_confidence_below_threshold"
-        else:
-            confidence_status, reliability, reason = "SCORED_PASS", "PASS", None
+    for order, (sample, gt, confidence, count, carried, status) in enumerate(zip(samples, genotypes.genotype_texts(target_index), confidences.tolist(), copies.tolist(), haplotype.tolist(), confidence_status.tolist()), start=1):
+        reliability, reason = CONFIDENCE_RELIABILITY[status]
         rows.append({
-            "SAMPLE_ORDER": order, "SAMPLE_ID": sample, "TARGET_VARIANT_ID": target.variant_id,
-            "EXPLICIT_GENOTYPE": explicit[sample], "PHASED_GT": gt, "ALT_COPY_COUNT": copies,
-            "CARRIER_HAPLOTYPE": haplotype, "PHASE_CONFIDENCE": confidence,
-            "CONFIDENCE_STATUS": confidence_status, "RELIABILITY_STATUS": reliability,
+            "SAMPLE_ORDER": order, "SAMPLE_ID": sample, "TARGET_VARIANT_ID": variant_id,
+            "EXPLICIT_GENOTYPE": explicit[sample], "PHASED_GT": gt, "ALT_COPY_COUNT": count,
+            "CARRIER_HAPLOTYPE": carried, "PHASE_CONFIDENCE": None if math.isnan(confidence) else confidence,
+            "CONFIDENCE_STATUS": status, "RELIABILITY_STATUS": reliability,
             "UNRELIABLE_REASON": reason,
         })
     return rows
 
 
-def _transmissions(target: PhasedVariant, samples: list[str], pedigree: list[tuple[str, str | None, str | None]]) -> list[dict[str, Any]]:
+def _transmissions(genotypes: PhasedGenotypes, target_index: int, samples: list[str], pedigree: list[tuple[str, str | None, str | None]]) -> list[dict[str, Any]]:
+    if not pedigree:
+        return []
+    child, father, mother, has_father, has_mother = _family_haplotypes(genotypes.haplotypes[target_index], samples, pedigree)
+    first, second = child[:, 0], child[:, 1]
+    trio = has_father & has_mother
+    direct = trio & _carries(father, first) & _carries(mother, second)
+    swapped = trio & _carries(father, second) & _carries(mother, first)
+    statuses = np.select([~trio, direct & ~swapped, swapped & ~direct], ["DUO_COMPATIBLE", "DIRECT", "SWAPPED"], "AMBIGUOUS")
+    texts = genotypes.genotype_texts(target_index)
     index = {sample: position for position, sample in enumerate(samples)}
     rows: list[dict[str, Any]] = []
-    for child, father, mother in pedigree:
-        child_gt = target.genotypes[index[child]]
-        child_alleles = _alleles(child_gt)
-        father_set = set(_alleles(target.genotypes[index[father]])) if father else None
-        mother_set = set(_alleles(target.genotypes[index[mother]])) if mother else None
-        direct = father_set is not None and mother_set is not None and child_alleles[0] in father_set and child_alleles[1] in mother_set
-        swapped = father_set is not None and mother_set is not None and child_alleles[1] in father_set and child_alleles[0] in mother_set
-        if father_set is None or mother_set is None:
-            status, paternal, maternal = "DUO_COMPATIBLE", None, None
-        elif direct and not swapped:
-            status, paternal, maternal = "DIRECT", "H1", "H2"
-        elif swapped and not direct:
-            status, paternal, maternal = "SWAPPED", "H2", "H1"
-        else:
-            status, paternal, maternal = "AMBIGUOUS", "UNRESOLVED", "UNRESOLVED"
-        rows.append({"CHILD_SAMPLE_ID": child, "FATHER_SAMPLE_ID": father, "MOTHER_SAMPLE_ID": mother, "CHILD_PHASED_GT": child_gt, "TRANSMISSION_STATUS": status, "PATERNAL_CHILD_HAPLOTYPE": paternal, "MATERNAL_CHILD_HAPLOTYPE": maternal})
+    for (child_id, father_id, mother_id), status in zip(pedigree, statuses.tolist()):
+        paternal, maternal = TRANSMISSION_HAPLOTYPES[status]
+        rows.append({"CHILD_SAMPLE_ID": child_id, "FATHER_SAMPLE_ID": father_id, "MOTHER_SAMPLE_ID": mother_id, "CHILD_PHASED_GT": texts[index[child_id]], "TRANSMISSION_STATUS": status, "PATERNAL_CHILD_HAPLOTYPE": paternal, "MATERNAL_CHILD_HAPLOTYPE": maternal})
     return rows
 
 
+def _phased_heterozygotes(genotypes: PhasedGenotypes, rows: np.ndarray) -> np.ndarray:
+    haplotypes = genotypes.haplotypes[rows]
+    return genotypes.phased[rows] & (haplotypes[..., 0] != haplotypes[..., 1])
+
+
+def _chunk_boundaries(chunks: Sequence[PhaseChunk], chunk_genotypes: list[PhasedGenotypes], maximum_switch_rate: float) -> list[dict[str, Any]]:
+    """Compare la phase de deux segments voisins sur leur chevauchement.
+
+    Pour chaque individu, un hétérozygote phasé des deux côtés est concordant ou
+    inversé. La ligature retient l'orientation majoritaire ; la part
+    minoritaire, rapportée à tous les hétérozygotes, mesure les bascules qu'elle
+    ne peut pas réconcilier.
+    """
+    boundaries: list[dict[str, Any]] = []
+    for left, right, left_genotypes, right_genotypes in zip(chunks, chunks[1:], chunk_genotypes, chunk_genotypes[1:]):
+        right_rows = {key: row for row, key in enumerate(right_genotypes.keys) if key[1] <= left.end_bp}
+        shared = [(row, right_rows[key]) for row, key in enumerate(left_genotypes.keys) if key[1] >= right.start_bp and key in right_rows]
+        if not shared:
+            raise Shapeit5ExecutionBlockError("shapeit5_chunk_overlap_without_variants")
+        left_index, right_index = (np.array(side, dtype=np.intp) for side in zip(*shared))
+        heterozygous = _phased_heterozygotes(left_genotypes, left_index) & _phased_heterozygotes(right_genotypes, right_index)
+        same_first = left_genotypes.haplotypes[left_index, :, 0] == right_genotypes.haplotypes[right_index, :, 0]
+        concordant = (heterozygous & same_first).sum(axis=0)
+        inverted = heterozygous.sum(axis=0) - concordant
+        heterozygous_count = int(heterozygous.sum())
+        discordant = int(np.minimum(concordant, inverted).sum())
+        switch_rate = discordant / heterozygous_count if heterozygous_count else 0.0
+        if switch_rate > maximum_switch_rate:
+            raise Shapeit5ExecutionBlockError("shapeit5_chunk_ligation_inconsistent")
+        boundaries.append({"start_bp": right.start_bp, "end_bp": left.end_bp, "shared_variant_count": len(shared), "heterozygous_count": heterozygous_count, "discordant_count": discordant, "switch_rate": switch_rate})
+    return boundaries
+
+
+def _phase_common(
+    probe: Shapeit5Probe, bcftools: str, command_runner: CommandRunner, query_streamer: CommandStreamer, *,
+    chunks: Sequence[PhaseChunk], study_vcf_path: Path, reference_vcf_path: Path, genetic_map_path: Path,
+    pedigree_path: Path | None, common_bcf: Path, common_log: Path, sample_count: int, threads: int,
+    seed: int, maximum_switch_rate: float, timeout_seconds: float,
+) -> dict[str, Any]:
+    """Phase le scaffold commun d'un seul tenant ou par segments ligaturés.
+
+    Les segments se partagent le budget `threads` : au plus `threads` appels
+    simultanés, chacun avec une part entière du budget.
+    """
+    def phase(chunk: PhaseChunk, output_path: Path, log_path: Path, job_threads: int) -> None:
+        command = build_phase_common_command(probe, input_path=study_vcf_path, reference_path=reference_vcf_path, genetic_map_path=genetic_map_path, region=chunk.region, output_path=output_path, log_path=log_path, pedigree_path=pedigree_path, threads=job_threads, seed=seed)
+        with trace_span("phase_common", "tool", region=chunk.region):
+            result = _run(command_runner, command, timeout_seconds, "shapeit5_phase_common")
+        if not log_path.exists():
+            log_path.write_text(result.stdout + result.stderr, encoding="utf-8")
+
+    if len(chunks) == 1:
+        phase(chunks[0], common_bcf, common_log, threads)
+        return {"parallel_jobs": 1, "threads_per_job": threads, "boundaries": []}
+    parallel_jobs = min(len(chunks), threads)
+    threads_per_job = threads // parallel_jobs
+    chunk_dir = common_bcf.parent / "common_chunks"
+    chunk_dir.mkdir()
+    outputs = [chunk_dir / f"common.chunk{index:03d}.bcf" for index in range(len(chunks))]
+    logs = [path.with_suffix(".log") for path in outputs]
+    with ThreadPoolExecutor(parallel_jobs, thread_name_prefix="phase_common") as pool:
+        futures = [pool.submit(phase, chunk, output, log, threads_per_job) for chunk, output, log in zip(chunks, outputs, logs)]
+        try:
+            for future in futures:
+                future.result()
+        finally:
+            for future in futures:
+                future.cancel()
+    common_log.write_text("".join(f"## {chunk.region}\n{log.read_text(encoding='utf-8')}" for chunk, log in zip(chunks, logs)), encoding="utf-8")
+    for output in outputs:
+        if not output.is_file():
+            raise Shapeit5ExecutionExternalError("shapeit5_output_missing")
+        if not Path(f"{output}.csi").is_file():
+            _run(command_runner, [bcftools, "index", "--csi", str(output)], timeout_seconds, "bcftools_index_shapeit5_output")
+    chunk_genotypes = [_variants(bcftools, output, sample_count, False, query_streamer, timeout_seconds) for output in outputs]
+    boundaries = _chunk_boundaries(chunks, chunk_genotypes, maximum_switch_rate)
+    _run(command_runner, [bcftools, "concat", "--ligate", "--output-type", "b", "--output", str(common_bcf), *(str(output) for output in outputs)], timeout_seconds, "bcftools_ligate_shapeit5_chunks")
+    shutil.rmtree(chunk_dir)
+    return {"parallel_jobs": parallel_jobs, "threads_per_job": threads_per_job, "boundaries": boundaries}
+
+
 def run_shapeit5_phasing(
     *, input_manifest_path: Path, study_vcf_path: Path, reference_vcf_path: Path,
     genetic_map_path: Path, pedigree_path: Path, target_genotype_audit_path: Path,
@@ -244,10 +450,12 @@ def run_shapeit5_phasing(
     threads: int = 1, seed: int = SHAPEIT5_CONTRACT.default_seed,
     effective_size: int = SHAPEIT5_CONTRACT.default_effective_size,
     minimum_phase_confidence: float = 0.9, timeout_seconds: float = 7200,
+    chunk_size_cm: float = 20.0, chunk_overlap_cm: float = 2.0,
+    maximum_chunk_switch_rate: float = 0.1,
     command_runner: CommandRunner = _default_runner,
 ) -> Shapeit5PhasingResult:
     """Exécute les deux passes et attribue H1/H2 depuis le GT cible phasé."""
-    if output_dir.exists() or not 0.5 <= minimum_phase_confidence <= 1:
+    if output_dir.exists() or not 0.5 <= minimum_phase_confidence <= 1 or not 0 <= maximum_chunk_switch_rate <= 1:
         raise Shapeit5ExecutionError("invalid_shapeit5_execution_parameters")
     manifest = read_json(input_manifest_path)
     validate_json_document(manifest, "shapeit5_inputs_manifest.schema.json")
@@ -261,6 +469,7 @@ def run_shapeit5_phasing(
     if any(not path.is_file() or path.is_symlink() or sha256_file(path) != expected for path, expected in expected_hashes):
         raise Shapeit5ExecutionError("shapeit5_execution_input_modified")
     genotype_table = validate_tsv_table(target_genotype_audit_path, "target_genotype_audit.schema.json")
+    chunks = plan_phase_chunks(genetic_map_path, manifest["scaffold_region"], chunk_size_cm=chunk_size_cm, overlap_cm=chunk_overlap_cm)
     bcftools = shutil.which(bcftools_command)
     if bcftools is None:
         raise Shapeit5ExecutionExternalError("bcftools_not_found")
@@ -268,8 +477,11 @@ def run_shapeit5_phasing(
         probe = probe_shapeit5(adapter_config)
     except Shapeit5ContractError as error:
         raise Shapeit5ExecutionExternalError("shapeit5_probe_failed") from error
+    # Les requêtes de variants sont lues en flux ; un exécuteur injecté garde sa
+    # sortie capturée.
+    query_streamer = stream_command_lines if command_runner is _default_runner else buffered_command_lines(command_runner)
     samples = _samples(bcftools, study_vcf_path, command_runner, timeout_seconds)
-    input_variants = _variants(bcftools, study_vcf_path, len(samples), False, command_runner, timeout_seconds)
+    input_variants = _variants(bcftools, study_vcf_path, len(samples), False, query_streamer, timeout_seconds)
     pedigree = _read_pedigree(pedigree_path, set(samples))
     if _mendel_errors(input_variants, samples, pedigree):
         raise Shapeit5ExecutionBlockError("mendel_errors_before_phasing")
@@ -280,9 +492,7 @@ def run_shapeit5_phasing(
         common_bcf, final_bcf = staging / "common.phased.bcf", staging / "target.phased.bcf"
         common_log, rare_log = staging / "common.phase.log", staging / "rare.phase.log"
         pedigree_argument = pedigree_path if pedigree else None
-        common_result = _run(command_runner, build_phase_common_command(probe, input_path=study_vcf_path, reference_path=reference_vcf_path, genetic_map_path=genetic_map_path, region=manifest["scaffold_region"], output_path=common_bcf, log_path=common_log, pedigree_path=pedigree_argument, threads=threads, seed=seed), timeout_seconds, "shapeit5_phase_common")
-        if not common_log.exists():
-            common_log.write_text(common_result.stdout + common_result.stderr, encoding="utf-8")
+        chunking = _phase_common(probe, bcftools, command_runner, query_streamer, chunks=chunks, study_vcf_path=study_vcf_path, reference_vcf_path=reference_vcf_path, genetic_map_path=genetic_map_path, pedigree_path=pedigree_argument, common_bcf=common_bcf, common_log=common_log, sample_count=len(samples), threads=threads, seed=seed, maximum_switch_rate=maximum_chunk_switch_rate, timeout_seconds=timeout_seconds)
         rare_result = _run(command_runner, build_phase_rare_command(probe, input_path=study_vcf_path, scaffold_path=common_bcf, genetic_map_path=genetic_map_path, input_region=manifest["input_region"], scaffold_region=manifest["scaffold_region"], output_path=final_bcf, pedigree_path=pedigree_argument, threads=threads, seed=seed, effective_size=effective_size, score_singletons=True), timeout_seconds, "shapeit5_phase_rare")
         rare_log.write_text(rare_result.stdout + rare_result.stderr, encoding="utf-8")
         for bcf_path in (common_bcf, final_bcf):
@@ -295,35 +505,32 @@ def run_shapeit5_phasing(
         final_samples = _samples(bcftools, final_bcf, command_runner, timeout_seconds)
         if common_samples != samples or final_samples != samples:
             raise Shapeit5ExecutionBlockError("shapeit5_output_sample_order_mismatch")
-        common_variants = _variants(bcftools, common_bcf, len(samples), False, command_runner, timeout_seconds)
-        final_variants = _variants(bcftools, final_bcf, len(samples), True, command_runner, timeout_seconds)
-        input_keys = [(v.chromosome, v.position_bp, v.variant_id, v.ref, v.alt) for v in input_variants]
-        final_keys = [(v.chromosome, v.position_bp, v.variant_id, v.ref, v.alt) for v in final_variants]
+        common_variants = _variants(bcftools, common_bcf, len(samples), False, query_streamer, timeout_seconds)
+        final_variants = _variants(bcftools, final_bcf, len(samples), True, query_streamer, timeout_seconds)
+        input_keys, final_keys = input_variants.keys, final_variants.keys
         if input_keys != final_keys or len(common_variants) != manifest["common_variant_count"]:
             raise Shapeit5ExecutionBlockError("shapeit5_output_variant_mismatch")
-        common_keys = [(v.chromosome, v.position_bp, v.variant_id, v.ref, v.alt) for v in common_variants]
-        if len(common_keys) != len(set(common_keys)) or any(key not in input_keys for key in common_keys):
+        common_keys = common_variants.keys
+        input_key_set = set(input_keys)
+        if len(common_keys) != len(set(common_keys)) or any(key not in input_key_set for key in common_keys):
             raise Shapeit5ExecutionBlockError("shapeit5_common_scaffold_variant_mismatch")
-        if any("|" not in genotype for variant in common_variants for genotype in variant.genotypes):
+        if not common_variants.phased.all():
             raise Shapeit5ExecutionBlockError("shapeit5_common_scaffold_unphased")
-        for before, after in zip(input_variants, final_variants):
-            if any(sorted(_alleles(left)) != sorted(_alleles(right)) for left, right in zip(before.genotypes, after.genotypes)):
-                raise Shapeit5ExecutionBlockError("shapeit5_genotype_not_preserved")
-            if any("|" not in genotype for genotype in after.genotypes):
-                raise Shapeit5ExecutionBlockError("shapeit5_unphased_output_genotype")
+        _check_genotype_preservation(input_variants, final_variants)
         if _mendel_errors(final_variants, samples, pedigree):
             raise Shapeit5ExecutionBlockError("mendel_errors_after_phasing")
-        targets = [variant for variant in final_variants if variant.variant_id == manifest["target_variant_id"]]
+        targets = [index for index, key in enumerate(final_keys) if key[2] == manifest["target_variant_id"]]
         if len(targets) != 1:
             raise Shapeit5ExecutionBlockError("phased_target_missing_or_ambiguous")
-        target = targets[0]
-        carrier_rows = _carrier_rows(target, samples, genotype_table.rows, minimum_phase_confidence)
-        transmission_rows = _transmissions(target, samples, pedigree)
+        target_index = targets[0]
+        _, target_position_bp, target_variant_id, _, _ = final_keys[target_index]
+        carrier_rows = _carrier_rows(final_variants, target_index, samples, genotype_table.rows, minimum_phase_confidence)
+        transmission_rows = _transmissions(final_variants, target_index, samples, pedigree)
         unreliable_counts: dict[str, int] = {}
         for row in carrier_rows:
             if row["UNRELIABLE_REASON"]:
                 unreliable_counts[row["UNRELIABLE_REASON"]] = unreliable_counts.get(row["UNRELIABLE_REASON"], 0) + 1
-        unreliable_rows = [{"CHROMOSOME": manifest["chromosome"], "START_BP": target.position_bp, "END_BP": target.position_bp, "VARIANT_ID": target.variant_id, "REASON": reason, "AFFECTED_SAMPLE_COUNT": count} for reason, count in sorted(unreliable_counts.items())]
+        unreliable_rows = [{"CHROMOSOME": manifest["chromosome"], "START_BP": target_position_bp, "END_BP": target_position_bp, "VARIANT_ID": target_variant_id, "REASON": reason, "AFFECTED_SAMPLE_COUNT": count} for reason, count in sorted(unreliable_counts.items())]
         carrier_path, transmission_path, unreliable_path = staging / "carrier_haplotypes.tsv", staging / "phasing_transmissions.tsv", staging / "phasing_unreliable_regions.tsv"
         _write_tsv(carrier_path, CARRIER_COLUMNS, carrier_rows)
         _write_tsv(transmission_path, TRANSMISSION_COLUMNS, transmission_rows)
@@ -334,7 +541,7 @@ def run_shapeit5_phasing(
         files = {path.stem.replace(".", "_"): _file(path) for path in (common_bcf, Path(f"{common_bcf}.csi"), final_bcf, Path(f"{final_bcf}.csi"), common_log, rare_log, carrier_path, transmission_path, unreliable_path)}
         carrier_count = sum(row["ALT_COPY_COUNT"] > 0 for row in carrier_rows)
         reliable_count = sum(row["ALT_COPY_COUNT"] > 0 and row["RELIABILITY_STATUS"] == "PASS" for row in carrier_rows)
-        result_manifest = {"schema_version": "1.0.0", "created_at": utc_now(), "method_id": "shapeit5_common_rare_carrier_assignment_v1", "adapter_id": manifest["adapter_id"], "software_version": probe.phase_common_version, "assembly": manifest["assembly"], "chromosome": manifest["chromosome"], "input_region": manifest["input_region"], "scaffold_region": manifest["scaffold_region"], "seed": seed, "threads": threads, "effective_size": effective_size, "minimum_phase_confidence": minimum_phase_confidence, "sample_count": len(samples), "variant_count": len(final_variants), "common_variant_count": len(common_variants), "carrier_count": carrier_count, "reliable_carrier_count": reliable_count, "pedigree_record_count": len(pedigree), "target_variant_id": target.variant_id, "target_variant_role": manifest["target_variant_role"], "files": files, "checks": {"input_integrity": "PASS", "common_phase": "PASS", "rare_phase": "PASS", "sample_order": "PASS", "genotype_preservation": "PASS", "target_preservation": "PASS", "explicit_target_genotypes": "PASS", "mendel_before": "PASS", "mendel_after": "PASS", "carrier_assignment": "PASS"}}
+        result_manifest = {"schema_version": "1.0.0", "created_at": utc_now(), "method_id": "shapeit5_common_rare_carrier_assignment_v1", "adapter_id": manifest["adapter_id"], "software_version": probe.phase_common_version, "assembly": manifest["assembly"], "chromosome": manifest["chromosome"], "input_region": manifest["input_region"], "scaffold_region": manifest["scaffold_region"], "seed": seed, "threads": threads, "effective_size": effective_size, "minimum_phase_confidence": minimum_phase_confidence, "sample_count": len(samples), "variant_count": len(final_variants), "common_variant_count": len(common_variants), "carrier_count": carrier_count, "reliable_carrier_count": reliable_count, "pedigree_record_count": len(pedigree), "target_variant_id": target_variant_id, "target_variant_role": manifest["target_variant_role"], "chunking": {"chunk_size_cm": chunk_size_cm, "overlap_cm": chunk_overlap_cm, "maximum_switch_rate": maximum_chunk_switch_rate, "chunks": [{"region": chunk.region, "start_bp": chunk.start_bp, "end_bp": chunk.end_bp} for chunk in chunks], **chunking}, "files": files, "checks": {"input_integrity": "PASS", "common_phase": "PASS", "chunk_ligation": "PASS", "rare_phase": "PASS", "sample_order": "PASS", "genotype_preservation": "PASS", "target_preservation": "PASS", "explicit_target_genotypes": "PASS", "mendel_before": "PASS", "mendel_after": "PASS", "carrier_assignment": "PASS"}}
         manifest_path = staging / "shapeit5_phasing_manifest.json"
         validate_json_document(result_manifest, "shapeit5_phasing_manifest.schema.json")
         atomic_write_json(manifest_path, result_manifest)
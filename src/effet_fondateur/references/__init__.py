@@ -14,12 +14,14 @@ from effet_fondateur.references.cache import (
     ReferenceCacheIntegrityError,
     ReferenceCacheOfflineMiss,
     cache_reference_panel,
+    exclusive_lock,
 )
 from effet_fondateur.references.window import (
     ExtractedReferenceWindow,
     ReferenceWindowError,
     ReferenceWindowIntegrityError,
     extract_reference_window,
+    reference_window_store_dir,
 )
 from effet_fondateur.references.harmonization import (
     HarmonizedReferenceWindow,
@@ -45,7 +47,9 @@ __all__ = [
     "ReferenceWindowIntegrityError",
     "load_reference_catalog",
     "cache_reference_panel",
+    "exclusive_lock",
     "extract_reference_window",
     "harmonize_reference_window",
+    "reference_window_store_dir",
     "resolve_reference_panel",
 ]
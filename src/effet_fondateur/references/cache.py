@@ -3,30 +3,45 @@
 from __future__ import annotations
 
 import fcntl
+import functools
 import hashlib
 import json
 import math
 import os
 import re
 import shutil
-import tempfile
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import contextmanager
 from dataclasses import dataclass
+from http.client import HTTPException
 from pathlib import Path
 from typing import Any, Callable, Iterator, Literal
+from urllib.error import HTTPError
 from urllib.parse import urlparse
 from urllib.request import Request, urlopen
 
-from effet_fondateur.audit import atomic_write_json, md5_file, read_json, sha256_file
+from effet_fondateur.audit import atomic_write_json, file_digests, hash_files, read_json
 from effet_fondateur.contracts import DocumentValidationError, validate_json_document
 from effet_fondateur.orchestrator.state import utc_now
 from effet_fondateur.references.catalog import ResolvedReferencePanel
 
 
-Downloader = Callable[[str, Path, int, int], None]
+# Un téléchargeur peut retourner les empreintes SHA-256 et MD5 calculées pendant
+# le transfert ; s'il retourne `None`, le fichier est relu après coup.
+Downloader = Callable[[str, Path, int, int], dict[str, str] | None]
 CacheStatus = Literal["HIT", "POPULATED"]
 SAFE_COMPONENT_PATTERN = re.compile(r"^[A-Za-z0-9][A-Za-z0-9._-]*$")
+CONTENT_RANGE_PATTERN = re.compile(r"^bytes (\d+)-(\d+)/(\d+|\*)$")
+DOWNLOAD_SCHEME = "https"
+MAX_DOWNLOAD_SEGMENTS = 16
+DOWNLOAD_RETRIES = 3
+DOWNLOAD_RETRY_DELAY_SECONDS = 1.0
+PARTIAL_STATE_INTERVAL_CHUNKS = 64
+PARTIAL_SUFFIX = ".part"
+PARTIAL_STATE_SUFFIX = ".part.json"
+STAGING_SUFFIX = ".partial"
 
 
 class ReferenceCacheError(RuntimeError):
@@ -190,7 +205,11 @@ def _entry_parent(cache_root: Path, resolved: ResolvedReferencePanel) -> Path:
 
 
 @contextmanager
-def _exclusive_lock(lock_path: Path, timeout_seconds: float) -> Iterator[None]:
+def exclusive_lock(lock_path: Path, timeout_seconds: float) -> Iterator[None]:
+    """Verrou `flock` exclusif sur `lock_path`, attendu au plus `timeout_seconds`.
+
+    Partagé par le cache des panels et le magasin des fenêtres de référence.
+    """
     deadline = time.monotonic() + timeout_seconds
     with lock_path.open("a+b") as lock_file:
         while True:
@@ -207,44 +226,419 @@ def _exclusive_lock(lock_path: Path, timeout_seconds: float) -> Iterator[None]:
             fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
 
 
+class _RestartDownload(Exception):
+    """Le fichier partiel ne peut pas être prolongé : le serveur renvoie tout."""
+
+
+@dataclass
+class _Segment:
+    start: int
+    end: int | None
+    next_offset: int
+
+    @property
+    def complete(self) -> bool:
+        return self.end is not None and self.next_offset >= self.end
+
+
+@dataclass
+class _PartialDownload:
+    """Progression persistée d'un téléchargement interrompu.
+
+    `validator` est l'ETag fort ou la date `Last-Modified` de la première
+    réponse : envoyé en `If-Range`, il garantit qu'une reprise prolonge le
+    même fichier ; sinon le serveur renvoie le fichier entier et le
+    téléchargement repart de zéro.
+    """
+
+    source_url: str
+    size: int | None
+    validator: str | None
+    segments: list[_Segment]
+
+    def document(self) -> dict[str, Any]:
+        return {
+            "source_url": self.source_url,
+            "size": self.size,
+            "validator": self.validator,
+            "segments": [
+                [segment.start, segment.end, segment.next_offset]
+                for segment in self.segments
+            ],
+        }
+
+    def contiguous_end(self) -> int:
+        """Fin du préfixe déjà écrit sans trou depuis l'octet 0."""
+        position = 0
+        for segment in self.segments:
+            if segment.start != position:
+                break
+            position = segment.next_offset
+            if not segment.complete:
+                break
+        return position
+
+
+def _load_partial(state_path: Path, source_url: str) -> _PartialDownload | None:
+    try:
+        document = read_json(state_path)
+        partial = _PartialDownload(
+            source_url=document["source_url"],
+            size=document["size"],
+            validator=document["validator"],
+            segments=[_Segment(*segment) for segment in document["segments"]],
+        )
+    except (KeyError, TypeError, ValueError):
+        # Un état illisible n'est qu'une reprise perdue.
+        return None
+    return partial if partial.source_url == source_url else None
+
+
+class _PrefixDigests:
+    """Empreintes du fichier partiel, tenues à jour au fil des octets reçus.
+
+    Les octets qui prolongent le préfixe déjà haché le sont directement depuis
+    la mémoire. Ceux d'un segment plus lointain sont relus une fois sur disque,
+    quand les segments précédents l'ont rejoint. Le hachage a son propre verrou,
+    distinct de celui de la progression : un fil qui reçoit des octets
+    n'attend jamais une relecture sur disque.
+    """
+
+    def __init__(self, path: Path, chunk_size: int) -> None:
+        self._path = path
+        self._chunk_size = chunk_size
+        self._digests = {
+            "sha256": hashlib.sha256(),
+            "md5": hashlib.md5(usedforsecurity=False),
+        }
+        self._lock = threading.Lock()
+        self.position = 0
+
+    def advance(
+        self,
+        end: int,
+        chunk_start: int | None = None,
+        chunk: bytes = b"",
+        *,
+        blocking: bool = True,
+    ) -> None:
+        """Hache le préfixe jusqu'à `end`, octets déjà écrits sur disque.
+
+        Sans `blocking`, l'appel renonce si un autre fil hache déjà : l'appel
+        bloquant final rattrape les octets laissés de côté.
+        """
+        if not self._lock.acquire(blocking=blocking):
+            return
+        try:
+            if chunk and chunk_start == self.position and chunk_start + len(chunk) <= end:
+                for digest in self._digests.values():
+                    digest.update(chunk)
+                self.position += len(chunk)
+            if end <= self.position:
+                return
+            with self._path.open("rb") as input_file:
+                input_file.seek(self.position)
+                while self.position < end:
+                    block = input_file.read(min(self._chunk_size, end - self.position))
+                    if not block:
+                        raise ReferenceCacheError(
+                            f"reference_download_failed:{self._path.name}"
+                        )
+                    for digest in self._digests.values():
+                        digest.update(block)
+                    self.position += len(block)
+        finally:
+            self._lock.release()
+
+    def hexdigests(self) -> dict[str, str]:
+        return {
+            algorithm: digest.hexdigest() for algorithm, digest in self._digests.items()
+        }
+
+
+def _check_download_urls(source_url: str, final_url: str) -> None:
+    source = urlparse(source_url)
+    final = urlparse(final_url)
+    if source.scheme != DOWNLOAD_SCHEME or final.scheme != DOWNLOAD_SCHEME:
+        raise ReferenceCacheError("reference_download_requires_https")
+    if source.hostname != final.hostname:
+        raise ReferenceCacheError("reference_download_cross_host_redirect")
+
+
+def _open_range(
+    source_url: str,
+    start: int,
+    end: int | None,
+    validator: str | None,
+    timeout_seconds: int,
+) -> Any:
+    headers = {"User-Agent": "effet-fondateur/0.1"}
+    if start or end is not None:
+        headers["Range"] = f"bytes={start}-{'' if end is None else end - 1}"
+        if validator is not None:
+            headers["If-Range"] = validator
+    response = urlopen(Request(source_url, headers=headers), timeout=timeout_seconds)
+    try:
+        _check_download_urls(source_url, response.geturl())
+    except ReferenceCacheError:
+        response.close()
+        raise
+    return response
+
+
+def _range_start_and_size(response: Any) -> tuple[int, int | None]:
+    match = CONTENT_RANGE_PATTERN.match(response.headers.get("Content-Range", ""))
+    if match is None:
+        raise _RestartDownload
+    size = None if match.group(3) == "*" else int(match.group(3))
+    return int(match.group(1)), size
+
+
+def _response_validator(response: Any) -> str | None:
+    etag = response.headers.get("ETag")
+    # If-Range n'accepte qu'un ETag fort.
+    if etag and not etag.startswith("W/"):
+        return etag
+    return response.headers.get("Last-Modified")
+
+
+def _new_partial(
+    source_url: str,
+    part_path: Path,
+    timeout_seconds: int,
+    chunk_size: int,
+    segments: int,
+) -> _PartialDownload:
+    """Découpe le fichier en segments si le serveur annonce sa taille et les plages."""
+    partial = _PartialDownload(source_url, None, None, [_Segment(0, None, 0)])
+    if segments > 1:
+        with _open_range(source_url, 0, 1, None, timeout_seconds) as response:
+            if response.status == 206:
+                _, size = _range_start_and_size(response)
+                if size is not None and size >= segments * chunk_size:
+                    partial.size = size
+                    partial.validator = _response_validator(response)
+                    bounds = [size * index // segments for index in range(segments + 1)]
+                    partial.segments = [
+                        _Segment(start, end, start)
+                        for start, end in zip(bounds, bounds[1:])
+                    ]
+    with part_path.open("wb") as output_file:
+        if partial.size is not None:
+            output_file.truncate(partial.size)
+    return partial
+
+
+def _fetch_segment(
+    partial: _PartialDownload,
+    segment: _Segment,
+    part_path: Path,
+    state_path: Path,
+    digests: _PrefixDigests,
+    progress_lock: threading.Lock,
+    timeout_seconds: int,
+    chunk_size: int,
+) -> None:
+    """Prolonge un segment depuis sa progression persistée."""
+    if segment.complete:
+        return
+    with _open_range(
+        partial.source_url,
+        segment.next_offset,
+        segment.end,
+        partial.validator,
+        timeout_seconds,
+    ) as response:
+        if response.status == 206:
+            start, size = _range_start_and_size(response)
+            if start != segment.next_offset or (
+                partial.size is not None and size != partial.size
+            ):
+                raise _RestartDownload
+        elif segment.next_offset or len(partial.segments) > 1:
+            raise _RestartDownload
+        if segment.next_offset == 0 and len(partial.segments) == 1:
+            # Première réponse d'un flux unique : elle fixe taille et validateur.
+            with progress_lock:
+                partial.validator = _response_validator(response)
+                length = response.headers.get("Content-Length")
+                if response.status == 200 and length is not None:
+                    partial.size = int(length)
+                    segment.end = partial.size
+                _save_partial(state_path, partial)
+        with part_path.open("r+b") as output_file:
+            output_file.seek(segment.next_offset)
+            written_chunks = 0
+            try:
+                while not segment.complete:
+                    read_size = chunk_size if segment.end is None else min(
+                        chunk_size, segment.end - segment.next_offset
+                    )
+                    chunk = response.read(read_size)
+                    if not chunk:
+                        break
+                    output_file.write(chunk)
+                    # Visible sur disque pour le fil qui hache le préfixe.
+                    output_file.flush()
+                    with progress_lock:
+                        chunk_start = segment.next_offset
+                        segment.next_offset += len(chunk)
+                        prefix_end = partial.contiguous_end()
+                    digests.advance(prefix_end, chunk_start, chunk, blocking=False)
+                    written_chunks += 1
+                    if written_chunks % PARTIAL_STATE_INTERVAL_CHUNKS == 0:
+                        _persist_progress(
+                            output_file, state_path, partial, progress_lock
+                        )
+            finally:
+                _persist_progress(output_file, state_path, partial, progress_lock)
+    if segment.end is None:
+        # Taille inconnue : la fin du flux termine le segment.
+        segment.end = segment.next_offset
+    elif not segment.complete:
+        # Flux coupé avant la fin annoncée : la tentative suivante reprend.
+        raise ConnectionError("reference_download_truncated")
+
+
+def _save_partial(state_path: Path, partial: _PartialDownload) -> None:
+    atomic_write_json(state_path, partial.document())
+
+
+def _persist_progress(
+    output_file: Any,
+    state_path: Path,
+    partial: _PartialDownload,
+    progress_lock: threading.Lock,
+) -> None:
+    # Les octets sont durables avant la progression qui les annonce.
+    output_file.flush()
+    os.fsync(output_file.fileno())
+    with progress_lock:
+        _save_partial(state_path, partial)
+
+
 def _download_to_path(
     source_url: str,
     destination: Path,
     timeout_seconds: int,
     chunk_size: int,
-) -> None:
-    request = Request(source_url, headers={"User-Agent": "effet-fondateur/0.1"})
+    segments: int = 1,
+) -> dict[str, str]:
+    """Télécharge un fichier par plages HTTP reprenables et retourne ses empreintes.
+
+    Le fichier est écrit dans `<nom>.part` avec sa progression dans
+    `<nom>.part.json` : une tentative interrompue, dans cet appel ou un appel
+    ultérieur, reprend là où les octets durables s'arrêtent. Avec `segments`,
+    un fichier assez grand est récupéré par autant de requêtes `Range`
+    parallèles. SHA-256 et MD5 sont calculés pendant le transfert ; le fichier
+    n'est renommé vers `destination` qu'une fois complet.
+    """
+    if destination.is_file():
+        # Fichier complet d'une tentative précédente, revérifié par l'appelant.
+        return file_digests(destination, ("sha256", "md5"))
+    part_path = destination.with_name(f"{destination.name}{PARTIAL_SUFFIX}")
+    state_path = destination.with_name(f"{destination.name}{PARTIAL_STATE_SUFFIX}")
+    partial = _load_partial(state_path, source_url) if part_path.is_file() else None
+    failures = 0
+    restarts = 0
+    while True:
+        try:
+            if partial is None:
+                partial = _new_partial(
+                    source_url, part_path, timeout_seconds, chunk_size, segments
+                )
+                _save_partial(state_path, partial)
+            digests = _PrefixDigests(part_path, chunk_size)
+            digests.advance(partial.contiguous_end())
+            progress_lock = threading.Lock()
+            pending = [segment for segment in partial.segments if not segment.complete]
+            with ThreadPoolExecutor(max(1, len(pending))) as executor:
+                futures = [
+                    executor.submit(
+                        _fetch_segment,
+                        partial,
+                        segment,
+                        part_path,
+                        state_path,
+                        digests,
+                        progress_lock,
+                        timeout_seconds,
+                        chunk_size,
+                    )
+                    for segment in pending
+                ]
+                for future in futures:
+                    future.result()
+            size = partial.contiguous_end()
+            if partial.size is not None and size != partial.size:
+                raise ReferenceCacheError(
+                    f"reference_download_failed:{destination.name}"
+                )
+            digests.advance(size)
+            break
+        except ReferenceCacheError:
+            raise
+        except _RestartDownload:
+            partial = None
+            restarts += 1
+        except HTTPError as error:
+            if error.code == 416:
+                partial = None
+                restarts += 1
+            elif 400 <= error.code < 500 and error.code not in {408, 429}:
+                raise ReferenceCacheError(
+                    f"reference_download_failed:{destination.name}"
+                ) from error
+            else:
+                failures += 1
+                if failures > DOWNLOAD_RETRIES:
+                    raise ReferenceCacheError(
+                        f"reference_download_failed:{destination.name}"
+                    ) from error
+        except (OSError, ValueError, HTTPException) as error:
+            failures += 1
+            if failures > DOWNLOAD_RETRIES:
+                raise ReferenceCacheError(
+                    f"reference_download_failed:{destination.name}"
+                ) from error
+        # Un serveur qui refuse toute reprise ne doit pas boucler indéfiniment.
+        if restarts > DOWNLOAD_RETRIES + 1:
+            raise ReferenceCacheError(f"reference_download_failed:{destination.name}")
+        if failures:
+            time.sleep(DOWNLOAD_RETRY_DELAY_SECONDS * 2 ** (failures - 1))
     try:
-        with urlopen(request, timeout=timeout_seconds) as response:
-            final_url = response.geturl()
-            source = urlparse(source_url)
-            final = urlparse(final_url)
-            if source.scheme != "https" or final.scheme != "https":
-                raise ReferenceCacheError("reference_download_requires_https")
-            if source.hostname != final.hostname:
-                raise ReferenceCacheError("reference_download_cross_host_redirect")
-            with destination.open("xb") as output_file:
-                while chunk := response.read(chunk_size):
-                    output_file.write(chunk)
-                output_file.flush()
-                os.fsync(output_file.fileno())
-    except ReferenceCacheError:
-        raise
-    except (OSError, ValueError) as error:
+        with part_path.open("r+b") as output_file:
+            output_file.truncate(size)
+            os.fsync(output_file.fileno())
+        os.replace(part_path, destination)
+        state_path.unlink(missing_ok=True)
+    except OSError as error:
         raise ReferenceCacheError(
             f"reference_download_failed:{destination.name}"
         ) from error
+    return digests.hexdigests()
+
 
+def _local_digests(path: Path, expected: _ExpectedFile) -> dict[str, str]:
+    """SHA-256 local et, si le fournisseur en publie un, MD5 en une seule lecture."""
+    algorithms = ("sha256",) if expected.official_md5 is None else ("sha256", "md5")
+    return file_digests(path, algorithms)
 
-def _file_record(path: Path, expected: _ExpectedFile) -> dict[str, Any]:
+
+def _file_record(
+    path: Path,
+    expected: _ExpectedFile,
+    digests: dict[str, str] | None = None,
+) -> dict[str, Any]:
     if path.is_symlink() or not path.is_file():
         raise ReferenceCacheIntegrityError(
             f"reference_download_not_regular_file:{expected.role}"
         )
-    local_sha256 = sha256_file(path)
+    if digests is None:
+        digests = _local_digests(path, expected)
+    local_sha256 = digests["sha256"]
     if expected.official_md5 is not None:
-        local_md5 = md5_file(path)
-        if local_md5 != expected.official_md5:
+        if digests["md5"] != expected.official_md5:
             raise ReferenceCacheIntegrityError(
                 f"reference_official_md5_mismatch:{expected.role}"
             )
@@ -367,6 +761,7 @@ def _validate_cached_entry(
         raise ReferenceCacheIntegrityError("reference_cache_file_roles_mismatch")
     for role, expected in expected_files.items():
         record = manifest["files"][role]
+        path = entry_dir / expected.filename
         if record["filename"] != expected.filename:
             raise ReferenceCacheIntegrityError(
                 f"reference_cache_filename_mismatch:{role}"
@@ -375,7 +770,6 @@ def _validate_cached_entry(
             raise ReferenceCacheIntegrityError(
                 f"reference_cache_source_url_mismatch:{role}"
             )
-        path = entry_dir / expected.filename
         if path.is_symlink() or not path.is_file():
             raise ReferenceCacheIntegrityError(f"reference_cache_file_missing:{role}")
         if path.stat().st_mode & 0o222:
@@ -384,14 +778,25 @@ def _validate_cached_entry(
             )
         if path.stat().st_size != record["size_bytes"]:
             raise ReferenceCacheIntegrityError(f"reference_cache_size_mismatch:{role}")
-        if sha256_file(path) != record["local_sha256"]:
+    # Les contrôles bon marché précèdent la relecture des fichiers, faite en
+    # parallèle : le VCF et son index ne s'attendent pas l'un l'autre.
+    expected_by_path = {
+        entry_dir / expected.filename: expected for expected in expected_files.values()
+    }
+    local_digests = hash_files(
+        expected_by_path, lambda path: _local_digests(path, expected_by_path[path])
+    )
+    for expected, digests in zip(expected_by_path.values(), local_digests):
+        role = expected.role
+        record = manifest["files"][role]
+        if digests["sha256"] != record["local_sha256"]:
             raise ReferenceCacheIntegrityError(
                 f"reference_cache_sha256_mismatch:{role}"
             )
         if expected.official_md5 is not None:
             if (
                 record["official_md5"] != expected.official_md5
-                or md5_file(path) != expected.official_md5
+                or digests["md5"] != expected.official_md5
             ):
                 raise ReferenceCacheIntegrityError(
                     f"reference_cache_md5_mismatch:{role}"
@@ -418,7 +823,9 @@ def _cleanup_stale_staging(
     parent: Path,
     cache_entry_key: str,
     lock_path: Path,
+    staging_dir: Path,
 ) -> None:
+    """Retire les anciens dossiers de préparation, sauf celui des reprises."""
     for candidate in parent.glob(f".{cache_entry_key}.*"):
         if candidate == lock_path:
             continue
@@ -426,7 +833,8 @@ def _cleanup_stale_staging(
             raise ReferenceCacheIntegrityError(
                 "reference_cache_unexpected_staging_entry"
             )
-        shutil.rmtree(candidate)
+        if candidate != staging_dir:
+            shutil.rmtree(candidate)
 
 
 def cache_reference_panel(
@@ -437,9 +845,16 @@ def cache_reference_panel(
     lock_timeout_seconds: float = 60,
     download_timeout_seconds: int = 300,
     chunk_size: int = 1024 * 1024,
-    downloader: Downloader = _download_to_path,
+    download_segments: int = 1,
+    downloader: Downloader | None = None,
 ) -> CachedReferencePanel:
-    """Télécharge ou réutilise une entrée immuable après contrôle intégral."""
+    """Télécharge ou réutilise une entrée immuable après contrôle intégral.
+
+    Les fichiers sont préparés dans `.<clé>.partial`, conservé après un échec
+    de téléchargement : l'appel suivant reprend les octets déjà reçus. Avec
+    `download_segments` supérieur à 1, chaque fichier assez grand est récupéré
+    par autant de plages HTTP parallèles.
+    """
     if not isinstance(offline, bool):
         raise ReferenceCacheError("invalid_reference_cache_parameter:offline")
     lock_timeout = _positive_number(lock_timeout_seconds, "lock_timeout_seconds")
@@ -447,13 +862,19 @@ def cache_reference_panel(
         download_timeout_seconds, "download_timeout_seconds"
     )
     resolved_chunk_size = _positive_integer(chunk_size, "chunk_size")
+    segments = _positive_integer(download_segments, "download_segments")
+    if segments > MAX_DOWNLOAD_SEGMENTS:
+        raise ReferenceCacheError("invalid_reference_cache_parameter:download_segments")
+    if downloader is None:
+        downloader = functools.partial(_download_to_path, segments=segments)
     expected_files = _expected_files(resolved)
     cache_entry_key = _cache_entry_key(resolved, expected_files)
     parent = _entry_parent(cache_root, resolved)
     entry_dir = parent / cache_entry_key
     lock_path = parent / f".{cache_entry_key}.lock"
-    with _exclusive_lock(lock_path, lock_timeout):
-        _cleanup_stale_staging(parent, cache_entry_key, lock_path)
+    staging_dir = parent / f".{cache_entry_key}{STAGING_SUFFIX}"
+    with exclusive_lock(lock_path, lock_timeout):
+        _cleanup_stale_staging(parent, cache_entry_key, lock_path, staging_dir)
         if entry_dir.exists() or entry_dir.is_symlink():
             return _validate_cached_entry(
                 entry_dir,
@@ -464,21 +885,24 @@ def cache_reference_panel(
             )
         if offline:
             raise ReferenceCacheOfflineMiss("reference_cache_offline_miss")
-        staging_dir = Path(
-            tempfile.mkdtemp(prefix=f".{cache_entry_key}.", dir=parent)
-        )
+        staging_dir.mkdir(mode=0o700, exist_ok=True)
         published = False
         try:
             file_records: dict[str, dict[str, Any]] = {}
             for role, expected in expected_files.items():
                 destination = staging_dir / expected.filename
-                downloader(
+                digests = downloader(
                     expected.source_url,
                     destination,
                     download_timeout,
                     resolved_chunk_size,
                 )
-                file_records[role] = _file_record(destination, expected)
+                try:
+                    file_records[role] = _file_record(destination, expected, digests)
+                except ReferenceCacheIntegrityError:
+                    # Un fichier complet mais refusé ne doit pas être repris.
+                    destination.unlink(missing_ok=True)
+                    raise
             manifest = _manifest_document(
                 resolved, cache_entry_key, file_records
             )
@@ -487,7 +911,14 @@ def cache_reference_panel(
             )
             manifest_path = staging_dir / "reference_cache_manifest.json"
             atomic_write_json(manifest_path, manifest)
+            published_names = {manifest_path.name} | {
+                expected.filename for expected in expected_files.values()
+            }
             for path in staging_dir.iterdir():
+                if path.name not in published_names:
+                    # Reste d'une reprise abandonnée par un autre téléchargeur.
+                    path.unlink()
+                    continue
                 path.chmod(0o444)
             _fsync_directory(staging_dir)
             os.replace(staging_dir, entry_dir)
@@ -498,7 +929,9 @@ def cache_reference_panel(
             raise ReferenceCacheError("reference_cache_publication_failed") from error
         finally:
             if not published:
-                shutil.rmtree(staging_dir, ignore_errors=True)
+                # Les fichiers reçus restent pour la reprise ; un manifest
+                # préparé sera réécrit.
+                (staging_dir / "reference_cache_manifest.json").unlink(missing_ok=True)
         return _validate_cached_entry(
             entry_dir,
             resolved,
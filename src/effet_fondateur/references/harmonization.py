@@ -1,4 +1,11 @@
-"""Normalisation biallélique et harmonisation de la référence avec l'étude."""
+"""Normalisation biallélique et harmonisation de la référence avec l'étude.
+
+La jointure est colonnaire : les variants normalisés de la référence sont
+rangés en tableaux NumPy triés par position, leurs allèles remplacés par des
+codes entiers partagés avec l'étude. Une fusion triée relie chaque variant de
+l'étude à sa plage de candidats, puis l'appariement, l'inversion, le brin
+complémentaire et les doublons sont classés en une passe sur les tableaux.
+"""
 
 from __future__ import annotations
 
@@ -12,17 +19,25 @@ import subprocess
 import tempfile
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Callable, Sequence
+from typing import Any, Callable, Iterator, Sequence
 
+import numpy as np
 import yaml
 
-from effet_fondateur.audit import atomic_write_json, read_json, sha256_file
+from effet_fondateur.audit import atomic_write_json, read_json, sha256_file, traced
 from effet_fondateur.contracts import (
     DocumentValidationError,
     TableValidationError,
     validate_json_document,
     validate_tsv_table,
 )
+from effet_fondateur.io import (
+    CommandStreamError,
+    CommandStreamer,
+    buffered_command_lines,
+    stream_command_lines,
+    stream_query_rows,
+)
 from effet_fondateur.orchestrator.state import utc_now
 from effet_fondateur.references.window import ExtractedReferenceWindow
 
@@ -46,6 +61,26 @@ HARMONIZATION_COLUMNS = (
     "DETAIL_CODE",
 )
 COMPLEMENT = str.maketrans("ACGT", "TGCA")
+MISSING_ALLELE = -1
+HARMONIZATION_STATUSES = (
+    "MATCHED_DIRECT",
+    "MATCHED_SWAPPED",
+    "MATCHED_REFERENCE_COMPLETED",
+    "AMBIGUOUS_REFERENCE_MATCH",
+    "STUDY_ONLY",
+    "ALLELE_MISMATCH",
+    "DUPLICATE_STUDY_MATCH",
+)
+DETAIL_CODES = (
+    None,
+    "MISSING_PLINK_ALLELE_COMPLETED_FROM_UNIQUE_REFERENCE",
+    "MULTIPLE_REFERENCE_RECORDS_FOR_CANONICAL_KEY",
+    "INCOMPLETE_STUDY_ALLELES_WITHOUT_REFERENCE",
+    "NO_REFERENCE_VARIANT_AT_POSITION",
+    "STRAND_COMPLEMENT_NOT_APPLIED",
+    "REFERENCE_POSITION_WITH_DIFFERENT_ALLELES",
+    "MULTIPLE_STUDY_VARIANTS_FOR_CANONICAL_KEY",
+)
 
 
 class ReferenceHarmonizationError(RuntimeError):
@@ -80,19 +115,48 @@ class _StudyVariant:
     allele_2: str | None
 
 
+class _AlleleCodes:
+    """Vocabulaire des allèles partagé par l'étude et la référence.
+
+    Chaque séquence reçoit un code entier ; `MISSING_ALLELE` code un allèle
+    PLINK manquant.
+    """
+
+    def __init__(self) -> None:
+        self._codes: dict[str, int] = {}
+
+    def code(self, allele: str | None) -> int:
+        if allele is None:
+            return MISSING_ALLELE
+        return self._codes.setdefault(allele, len(self._codes))
+
+    def alleles(self) -> list[str]:
+        return list(self._codes)
+
+    def complements(self, codes: np.ndarray) -> np.ndarray:
+        """Code du brin complémentaire ; jamais égal à un allèle absent du vocabulaire."""
+        table = np.array(
+            [self._codes.get(allele.translate(COMPLEMENT), -2) for allele in self._codes]
+            + [-3],
+            dtype=np.int64,
+        )
+        return table[codes]
+
+
 @dataclass(frozen=True)
-class _ReferenceVariant:
-    chromosome: int
-    position_bp: int
-    reference_id: str | None
-    ref: str
-    alt: str
+class _ReferenceColumns:
+    """Variants normalisés de la référence, triés par position."""
+
+    position_bp: np.ndarray
+    ref: np.ndarray
+    alt: np.ndarray
+    reference_ids: list[str | None]
 
-    @property
-    def canonical_key(self) -> tuple[int, int, str, str]:
-        return (self.chromosome, self.position_bp, self.ref, self.alt)
+    def __len__(self) -> int:
+        return len(self.reference_ids)
 
 
+@traced("bcftools", "tool")
 def _default_runner(
     command: Sequence[str], timeout_seconds: float
 ) -> subprocess.CompletedProcess[str]:
@@ -281,11 +345,11 @@ def _reference_variants(
     executable: str,
     vcf_path: Path,
     chromosome: int,
-    runner: CommandRunner,
+    codes: _AlleleCodes,
+    streamer: CommandStreamer,
     timeout_seconds: float,
-) -> list[_ReferenceVariant]:
-    completed = _run_checked(
-        runner,
+) -> _ReferenceColumns:
+    rows = stream_query_rows(
         [
             executable,
             "query",
@@ -294,11 +358,25 @@ def _reference_variants(
             str(vcf_path),
         ],
         timeout_seconds,
-        "query_normalized_variants",
+        streamer,
     )
-    variants: list[_ReferenceVariant] = []
-    for line in completed.stdout.splitlines():
-        fields = line.split("\t")
+    try:
+        return _parse_reference_variants(rows, chromosome, codes)
+    except CommandStreamError as error:
+        suffix = "" if error.return_code is None else f":{error.return_code}"
+        raise ReferenceHarmonizationError(
+            f"bcftools_query_normalized_variants_failed{suffix}"
+        ) from error
+
+
+def _parse_reference_variants(
+    rows: Iterator[list[str]], chromosome: int, codes: _AlleleCodes
+) -> _ReferenceColumns:
+    positions: list[int] = []
+    refs: list[int] = []
+    alts: list[int] = []
+    reference_ids: list[str | None] = []
+    for fields in rows:
         if len(fields) != 5:
             raise ReferenceHarmonizationIntegrityError(
                 "normalized_reference_variant_malformed"
@@ -311,36 +389,48 @@ def _reference_variants(
             raise ReferenceHarmonizationIntegrityError(
                 "normalized_reference_coordinate_invalid"
             ) from error
-        ref = ref.upper()
-        alt = alt.upper()
-        if (
-            observed_chromosome != chromosome
-            or position_bp <= 0
-            or DNA_ALLELE.fullmatch(ref) is None
-            or DNA_ALLELE.fullmatch(alt) is None
-            or ref == alt
-            or "," in alt
-            or (
-                len(ref) > 1
-                and len(alt) > 1
-                and (ref[0] == alt[0] or ref[-1] == alt[-1])
-            )
-        ):
+        if observed_chromosome != chromosome or position_bp <= 0:
             raise ReferenceHarmonizationIntegrityError(
                 "normalized_reference_variant_invalid"
             )
-        variants.append(
-            _ReferenceVariant(
-                observed_chromosome,
-                position_bp,
-                None if reference_id == "." else reference_id,
-                ref,
-                alt,
-            )
-        )
-    if not variants:
+        positions.append(position_bp)
+        refs.append(codes.code(ref.upper()))
+        alts.append(codes.code(alt.upper()))
+        reference_ids.append(None if reference_id == "." else reference_id)
+    if not positions:
         raise ReferenceHarmonizationIntegrityError("normalized_reference_empty")
-    return variants
+    ref_codes = np.array(refs, dtype=np.int64)
+    alt_codes = np.array(alts, dtype=np.int64)
+    # Les séquences sont contrôlées une fois par allèle distinct, puis les
+    # paires REF/ALT en colonnes.
+    alleles = codes.alleles()
+    valid = np.array([DNA_ALLELE.fullmatch(allele) is not None for allele in alleles])
+    length = np.array([len(allele) for allele in alleles])
+    first_base = np.array([allele[:1] for allele in alleles])
+    last_base = np.array([allele[-1:] for allele in alleles])
+    # Un indel non minimal garde une base commune à gauche ou à droite.
+    unnormalized = (
+        (length[ref_codes] > 1)
+        & (length[alt_codes] > 1)
+        & (
+            (first_base[ref_codes] == first_base[alt_codes])
+            | (last_base[ref_codes] == last_base[alt_codes])
+        )
+    )
+    if not (
+        valid[ref_codes].all()
+        and valid[alt_codes].all()
+        and (ref_codes != alt_codes).all()
+        and not unnormalized.any()
+    ):
+        raise ReferenceHarmonizationIntegrityError("normalized_reference_variant_invalid")
+    order = np.argsort(np.array(positions, dtype=np.int64), kind="stable")
+    return _ReferenceColumns(
+        position_bp=np.array(positions, dtype=np.int64)[order],
+        ref=ref_codes[order],
+        alt=alt_codes[order],
+        reference_ids=[reference_ids[index] for index in order.tolist()],
+    )
 
 
 def _indexed_variant_count(
@@ -392,103 +482,152 @@ def _validate_phased_genotypes(
         )
 
 
-def _complement_pair(allele_1: str, allele_2: str) -> frozenset[str]:
-    return frozenset((allele_1.translate(COMPLEMENT), allele_2.translate(COMPLEMENT)))
-
-
-def _row_for_variant(
-    study: _StudyVariant,
-    candidates: list[_ReferenceVariant],
+def _harmonization_rows(
+    study_variants: Sequence[_StudyVariant],
+    reference: _ReferenceColumns,
+    codes: _AlleleCodes,
     assembly: str,
     target_variant_id: str,
-) -> dict[str, Any]:
-    called_alleles = frozenset(
-        allele for allele in (study.allele_1, study.allele_2) if allele is not None
+) -> list[dict[str, Any]]:
+    """Joint étude et référence par fusion triée puis classe toutes les paires.
+
+    Les candidats d'une position forment une plage contiguë de la référence
+    triée : chaque variant de l'étude est développé en ses paires (étude,
+    candidat), classées en une passe, puis les décomptes sont ramenés au
+    variant.
+    """
+    study_count = len(study_variants)
+    position_bp = np.array([study.position_bp for study in study_variants], dtype=np.int64)
+    allele_1 = np.array([codes.code(study.allele_1) for study in study_variants])
+    allele_2 = np.array([codes.code(study.allele_2) for study in study_variants])
+    complete = (allele_1 != MISSING_ALLELE) & (allele_2 != MISSING_ALLELE)
+
+    first = np.searchsorted(reference.position_bp, position_bp, side="left")
+    candidate_count = np.searchsorted(reference.position_bp, position_bp, side="right") - first
+    pair_study = np.repeat(np.arange(study_count), candidate_count)
+    pair_offset = np.arange(len(pair_study)) - np.repeat(
+        np.cumsum(candidate_count) - candidate_count, candidate_count
     )
-    complete_study_definition = len(called_alleles) == 2
-    exact = [
-        candidate
-        for candidate in candidates
-        if (
-            frozenset((candidate.ref, candidate.alt)) == called_alleles
-            if complete_study_definition
-            else called_alleles.issubset((candidate.ref, candidate.alt))
-        )
-    ]
-    detail_code: str | None = None
-    matched: _ReferenceVariant | None = None
-    if len(exact) == 1:
-        matched = exact[0]
-        if not complete_study_definition:
-            status = "MATCHED_REFERENCE_COMPLETED"
-            detail_code = "MISSING_PLINK_ALLELE_COMPLETED_FROM_UNIQUE_REFERENCE"
-        else:
-            status = (
-                "MATCHED_DIRECT"
-                if (study.allele_1, study.allele_2) == (matched.ref, matched.alt)
-                else "MATCHED_SWAPPED"
-            )
-        eligible = True
-    elif len(exact) > 1:
-        status = "AMBIGUOUS_REFERENCE_MATCH"
-        eligible = False
-        detail_code = "MULTIPLE_REFERENCE_RECORDS_FOR_CANONICAL_KEY"
-    elif not candidates:
-        status = "STUDY_ONLY"
-        eligible = False
-        detail_code = (
-            "INCOMPLETE_STUDY_ALLELES_WITHOUT_REFERENCE"
-            if not complete_study_definition
-            else "NO_REFERENCE_VARIANT_AT_POSITION"
+    pair_reference = np.repeat(first, candidate_count) + pair_offset
+    ref = reference.ref[pair_reference]
+    alt = reference.alt[pair_reference]
+
+    def same_pair(first_allele: np.ndarray, second_allele: np.ndarray) -> np.ndarray:
+        return ((ref == first_allele) & (alt == second_allele)) | (
+            (ref == second_allele) & (alt == first_allele)
         )
-    else:
-        status = "ALLELE_MISMATCH"
-        eligible = False
-        reference_pairs = [frozenset((candidate.ref, candidate.alt)) for candidate in candidates]
-        if (
-            complete_study_definition
-            and study.allele_1 is not None
-            and study.allele_2 is not None
-            and _complement_pair(study.allele_1, study.allele_2) in reference_pairs
-        ):
-            detail_code = "STRAND_COMPLEMENT_NOT_APPLIED"
-        else:
-            detail_code = "REFERENCE_POSITION_WITH_DIFFERENT_ALLELES"
-    return {
-        "STUDY_VARIANT_ORDER": str(study.order),
-        "STUDY_VARIANT_ID": study.variant_id,
-        "ASSEMBLY": assembly,
-        "CHROMOSOME": str(study.chromosome),
-        "POSITION_BP": str(study.position_bp),
-        "STUDY_A1": study.allele_1,
-        "STUDY_A2": study.allele_2,
-        "REFERENCE_ID": matched.reference_id if matched is not None else None,
-        "REFERENCE_REF": matched.ref if matched is not None else None,
-        "REFERENCE_ALT": matched.alt if matched is not None else None,
-        "HARMONIZATION_STATUS": status,
-        "COMMON_PHASE_ELIGIBLE": eligible,
-        "IS_TARGET_VARIANT": study.variant_id == target_variant_id,
-        "DETAIL_CODE": detail_code,
-    }
 
+    pair_1 = allele_1[pair_study]
+    pair_2 = allele_2[pair_study]
+    pair_complete = complete[pair_study]
+    # Un seul allèle PLINK appelé doit figurer parmi REF et ALT.
+    called = np.where(pair_1 != MISSING_ALLELE, pair_1, pair_2)
+    exact = np.where(
+        pair_complete, same_pair(pair_1, pair_2), (ref == called) | (alt == called)
+    )
+    complement = pair_complete & same_pair(
+        codes.complements(pair_1), codes.complements(pair_2)
+    )
+    exact_count = np.bincount(pair_study[exact], minlength=study_count)
+    complement_found = np.bincount(pair_study[complement], minlength=study_count) > 0
+
+    unique = exact_count == 1
+    matched = np.zeros(study_count, dtype=np.int64)
+    matched[pair_study[exact]] = pair_reference[exact]
+    direct = (allele_1 == reference.ref[matched]) & (allele_2 == reference.alt[matched])
+    status = np.select(
+        [
+            unique & ~complete,
+            unique & direct,
+            unique,
+            exact_count > 1,
+            candidate_count == 0,
+        ],
+        [
+            HARMONIZATION_STATUSES.index("MATCHED_REFERENCE_COMPLETED"),
+            HARMONIZATION_STATUSES.index("MATCHED_DIRECT"),
+            HARMONIZATION_STATUSES.index("MATCHED_SWAPPED"),
+            HARMONIZATION_STATUSES.index("AMBIGUOUS_REFERENCE_MATCH"),
+            HARMONIZATION_STATUSES.index("STUDY_ONLY"),
+        ],
+        HARMONIZATION_STATUSES.index("ALLELE_MISMATCH"),
+    )
+    detail = np.select(
+        [
+            unique & ~complete,
+            unique,
+            exact_count > 1,
+            (candidate_count == 0) & ~complete,
+            candidate_count == 0,
+            complement_found,
+        ],
+        [
+            DETAIL_CODES.index("MISSING_PLINK_ALLELE_COMPLETED_FROM_UNIQUE_REFERENCE"),
+            DETAIL_CODES.index(None),
+            DETAIL_CODES.index("MULTIPLE_REFERENCE_RECORDS_FOR_CANONICAL_KEY"),
+            DETAIL_CODES.index("INCOMPLETE_STUDY_ALLELES_WITHOUT_REFERENCE"),
+            DETAIL_CODES.index("NO_REFERENCE_VARIANT_AT_POSITION"),
+            DETAIL_CODES.index("STRAND_COMPLEMENT_NOT_APPLIED"),
+        ],
+        DETAIL_CODES.index("REFERENCE_POSITION_WITH_DIFFERENT_ALLELES"),
+    )
+    eligible = unique.copy()
 
-def _mark_duplicate_study_matches(rows: list[dict[str, Any]]) -> None:
-    rows_by_key: dict[tuple[str, str, str, str], list[dict[str, Any]]] = {}
-    for row in rows:
-        if row["COMMON_PHASE_ELIGIBLE"]:
-            key = (
-                row["CHROMOSOME"],
-                row["POSITION_BP"],
-                row["REFERENCE_REF"],
-                row["REFERENCE_ALT"],
-            )
-            rows_by_key.setdefault(key, []).append(row)
-    for duplicates in rows_by_key.values():
-        if len(duplicates) > 1:
-            for row in duplicates:
-                row["HARMONIZATION_STATUS"] = "DUPLICATE_STUDY_MATCH"
-                row["COMMON_PHASE_ELIGIBLE"] = False
-                row["DETAIL_CODE"] = "MULTIPLE_STUDY_VARIANTS_FOR_CANONICAL_KEY"
+    # Plusieurs variants de l'étude appariés au même variant canonique de la
+    # référence sont tous écartés.
+    eligible_rows = np.flatnonzero(eligible)
+    if len(eligible_rows):
+        keys = np.stack(
+            [
+                reference.position_bp[matched[eligible_rows]],
+                reference.ref[matched[eligible_rows]],
+                reference.alt[matched[eligible_rows]],
+            ],
+            axis=1,
+        )
+        _, group, group_size = np.unique(
+            keys, axis=0, return_inverse=True, return_counts=True
+        )
+        duplicated = eligible_rows[group_size[group.reshape(-1)] > 1]
+        status[duplicated] = HARMONIZATION_STATUSES.index("DUPLICATE_STUDY_MATCH")
+        detail[duplicated] = DETAIL_CODES.index("MULTIPLE_STUDY_VARIANTS_FOR_CANONICAL_KEY")
+        eligible[duplicated] = False
+
+    alleles = codes.alleles()
+    rows = []
+    for study, is_unique, reference_index, status_code, detail_code, is_eligible in zip(
+        study_variants,
+        unique.tolist(),
+        matched.tolist(),
+        status.tolist(),
+        detail.tolist(),
+        eligible.tolist(),
+    ):
+        rows.append(
+            {
+                "STUDY_VARIANT_ORDER": str(study.order),
+                "STUDY_VARIANT_ID": study.variant_id,
+                "ASSEMBLY": assembly,
+                "CHROMOSOME": str(study.chromosome),
+                "POSITION_BP": str(study.position_bp),
+                "STUDY_A1": study.allele_1,
+                "STUDY_A2": study.allele_2,
+                "REFERENCE_ID": (
+                    reference.reference_ids[reference_index] if is_unique else None
+                ),
+                "REFERENCE_REF": (
+                    alleles[reference.ref[reference_index]] if is_unique else None
+                ),
+                "REFERENCE_ALT": (
+                    alleles[reference.alt[reference_index]] if is_unique else None
+                ),
+                "HARMONIZATION_STATUS": HARMONIZATION_STATUSES[status_code],
+                "COMMON_PHASE_ELIGIBLE": is_eligible,
+                "IS_TARGET_VARIANT": study.variant_id == target_variant_id,
+                "DETAIL_CODE": DETAIL_CODES[detail_code],
+            }
+        )
+    return rows
 
 
 def _write_harmonization(path: Path, rows: list[dict[str, Any]]) -> None:
@@ -698,11 +837,17 @@ def harmonize_reference_window(
             raise ReferenceHarmonizationIntegrityError(
                 "harmonized_reference_sample_set_or_order_mismatch"
             )
+        # La fenêtre normalisée est lue en flux ; un exécuteur injecté garde sa
+        # sortie capturée.
+        allele_codes = _AlleleCodes()
         reference_variants = _reference_variants(
             executable,
             vcf_path,
             reference.chromosome,
-            command_runner,
+            allele_codes,
+            stream_command_lines
+            if command_runner is _default_runner
+            else buffered_command_lines(command_runner),
             timeout,
         )
         indexed_variant_count = _indexed_variant_count(
@@ -715,19 +860,13 @@ def harmonize_reference_window(
         _validate_phased_genotypes(
             executable, vcf_path, command_runner, timeout
         )
-        variants_by_position: dict[int, list[_ReferenceVariant]] = {}
-        for variant in reference_variants:
-            variants_by_position.setdefault(variant.position_bp, []).append(variant)
-        rows = [
-            _row_for_variant(
-                study,
-                variants_by_position.get(study.position_bp, []),
-                reference_manifest["assembly"],
-                phasing_manifest["target_variant_id"],
-            )
-            for study in study_variants
-        ]
-        _mark_duplicate_study_matches(rows)
+        rows = _harmonization_rows(
+            study_variants,
+            reference_variants,
+            allele_codes,
+            reference_manifest["assembly"],
+            phasing_manifest["target_variant_id"],
+        )
         target_row = next(row for row in rows if row["IS_TARGET_VARIANT"])
         if target_row["HARMONIZATION_STATUS"] not in {
             "MATCHED_DIRECT",
@@ -1,4 +1,12 @@
-"""Extraction vérifiée d'une fenêtre depuis un panel phasé mis en cache."""
+"""Extraction vérifiée d'une fenêtre depuis un panel phasé mis en cache.
+
+Avec un magasin de fenêtres, chaque entrée de cache `12.2` garde les fenêtres
+déjà extraites, indexées par intervalle du chromosome. Une demande contenue
+dans une fenêtre conservée en est sous-extraite ; une demande qui chevauche ou
+prolonge des fenêtres conservées les fusionne en ne lisant dans le panel que
+les trous. Les fenêtres les moins récemment utilisées sont retirées dès que le
+magasin dépasse une fraction de la taille du VCF du panel.
+"""
 
 from __future__ import annotations
 
@@ -9,14 +17,21 @@ import re
 import shutil
 import subprocess
 import tempfile
-from dataclasses import dataclass
+from contextlib import contextmanager
+from dataclasses import dataclass, replace
 from pathlib import Path
-from typing import Any, Callable, Sequence
-
-from effet_fondateur.audit import atomic_write_json, read_json, sha256_file
+from typing import Any, Callable, Iterator, Sequence
+
+from effet_fondateur.audit import (
+    atomic_write_json,
+    hash_files,
+    read_json,
+    sha256_file,
+    traced,
+)
 from effet_fondateur.contracts import DocumentValidationError, validate_json_document
 from effet_fondateur.orchestrator.state import utc_now
-from effet_fondateur.references.cache import CachedReferencePanel
+from effet_fondateur.references.cache import CachedReferencePanel, exclusive_lock
 from effet_fondateur.references.catalog import ResolvedReferencePanel
 
 
@@ -46,6 +61,10 @@ GRCH38_AUTOSOME_LENGTHS = {
     22: 50_818_468,
 }
 CONTIG_PATTERN = re.compile(r"^##contig=<ID=([^,>]+),length=([0-9]+)(?:,.*)?>$")
+WINDOW_STORE_INDEX_NAME = "window_store.json"
+WINDOW_STORE_LOCK_NAME = ".lock"
+WINDOW_STORE_SCHEMA_NAME = "reference_window_store.schema.json"
+DEFAULT_WINDOW_STORE_FRACTION = 0.25
 
 
 class ReferenceWindowError(RuntimeError):
@@ -90,6 +109,7 @@ def _positive_number(value: float, name: str) -> float:
     return float(value)
 
 
+@traced("bcftools", "tool")
 def _default_runner(
     command: Sequence[str], timeout_seconds: float
 ) -> subprocess.CompletedProcess[str]:
@@ -271,6 +291,421 @@ def _validate_phased_genotypes(
         raise ReferenceWindowIntegrityError("reference_unphased_genotype_detected")
 
 
+@dataclass(frozen=True)
+class StoredReferenceWindow:
+    """Fenêtre conservée dans le magasin partagé d'une entrée de cache."""
+
+    start_bp: int
+    end_bp: int
+    dirname: str
+    vcf_filename: str
+    index_filename: str
+    vcf_sha256: str
+    index_sha256: str
+    size_bytes: int
+    last_used: int
+
+    def covers(self, start: int, end: int) -> bool:
+        return self.start_bp <= start and end <= self.end_bp
+
+    def touches(self, start: int, end: int) -> bool:
+        """Chevauche l'intervalle ou lui est adjacente."""
+        return self.start_bp <= end + 1 and start <= self.end_bp + 1
+
+
+@dataclass(frozen=True)
+class _WindowPiece:
+    """Morceau d'une fenêtre à assembler, lu dans le panel ou une fenêtre conservée.
+
+    `overlap` vaut `record` pour le premier morceau, qui reprend aussi les
+    variants commencés avant lui, et `pos` pour les suivants, qui ne gardent que
+    les variants dont la position y tombe : les morceaux restent disjoints.
+    """
+
+    start_bp: int
+    end_bp: int
+    window: StoredReferenceWindow | None
+    overlap: str
+
+
+def reference_window_store_dir(cached: CachedReferencePanel) -> Path:
+    """Dossier du magasin de fenêtres associé à une entrée de cache `12.2`."""
+    return cached.entry_dir.parent / f"{cached.cache_entry_key}.windows"
+
+
+def _plan_window(
+    windows: Sequence[StoredReferenceWindow], start: int, end: int
+) -> tuple[list[_WindowPiece], list[StoredReferenceWindow]]:
+    """Assemble l'union de la demande et des fenêtres qui la touchent.
+
+    Seuls les trous entre fenêtres conservées sont lus dans le panel.
+    Retourne les morceaux dans l'ordre des positions et les fenêtres absorbées.
+    """
+    absorbed = sorted(
+        (window for window in windows if window.touches(start, end)),
+        key=lambda window: (window.start_bp, -window.end_bp),
+    )
+    low = min([start, *(window.start_bp for window in absorbed)])
+    high = max([end, *(window.end_bp for window in absorbed)])
+    spans: list[tuple[int, int, StoredReferenceWindow | None]] = []
+    cursor = low
+    for window in absorbed:
+        if window.end_bp < cursor:
+            continue
+        if window.start_bp > cursor:
+            spans.append((cursor, window.start_bp - 1, None))
+        spans.append((max(cursor, window.start_bp), window.end_bp, window))
+        cursor = window.end_bp + 1
+    if cursor <= high:
+        spans.append((cursor, high, None))
+    pieces = [
+        _WindowPiece(piece_start, piece_end, window, "record" if index == 0 else "pos")
+        for index, (piece_start, piece_end, window) in enumerate(spans)
+    ]
+    return pieces, absorbed
+
+
+class _ReferenceWindowStore:
+    """Index et fichiers du magasin, manipulés sous son verrou exclusif."""
+
+    def __init__(self, root: Path, cached: CachedReferencePanel, budget_bytes: int) -> None:
+        self.root = root
+        self.cached = cached
+        self.budget_bytes = budget_bytes
+        index_path = root / WINDOW_STORE_INDEX_NAME
+        if index_path.is_file():
+            try:
+                document = read_json(index_path)
+                validate_json_document(document, WINDOW_STORE_SCHEMA_NAME)
+            except (ValueError, DocumentValidationError) as error:
+                raise ReferenceWindowIntegrityError(
+                    "reference_window_store_index_invalid"
+                ) from error
+            if document["cache_entry_key"] != cached.cache_entry_key:
+                raise ReferenceWindowIntegrityError(
+                    "reference_window_store_identity_mismatch"
+                )
+            self.sequence = document["sequence"]
+            self.windows = [
+                StoredReferenceWindow(**record) for record in document["windows"]
+            ]
+        else:
+            self.sequence = 0
+            self.windows = []
+        self._remove_unindexed()
+
+    def _remove_unindexed(self) -> None:
+        # Dossiers de préparation ou fenêtres retirées de l'index avant un arrêt.
+        indexed = {window.dirname for window in self.windows}
+        for candidate in self.root.iterdir():
+            if candidate.name in indexed or candidate.name in {
+                WINDOW_STORE_INDEX_NAME,
+                WINDOW_STORE_LOCK_NAME,
+            }:
+                continue
+            if candidate.is_symlink() or not candidate.is_dir():
+                raise ReferenceWindowIntegrityError(
+                    "reference_window_store_unexpected_entry"
+                )
+            _remove_window_dir(candidate)
+
+    def _save(self) -> None:
+        document = {
+            "schema_version": "1.0.0",
+            "cache_entry_key": self.cached.cache_entry_key,
+            "sequence": self.sequence,
+            "windows": [
+                dict(window.__dict__)
+                for window in sorted(self.windows, key=lambda window: window.start_bp)
+            ],
+        }
+        validate_json_document(document, WINDOW_STORE_SCHEMA_NAME)
+        atomic_write_json(self.root / WINDOW_STORE_INDEX_NAME, document)
+
+    def paths(self, window: StoredReferenceWindow) -> tuple[Path, Path]:
+        window_dir = self.root / window.dirname
+        return window_dir / window.vcf_filename, window_dir / window.index_filename
+
+    def verified_paths(self, window: StoredReferenceWindow) -> tuple[Path, Path]:
+        """Chemins d'une fenêtre conservée dont les empreintes sont revérifiées."""
+        vcf_path, index_path = self.paths(window)
+        if any(path.is_symlink() or not path.is_file() for path in (vcf_path, index_path)):
+            raise ReferenceWindowIntegrityError("reference_window_store_file_missing")
+        if hash_files([vcf_path, index_path]) != [window.vcf_sha256, window.index_sha256]:
+            raise ReferenceWindowIntegrityError("reference_window_store_sha256_mismatch")
+        return vcf_path, index_path
+
+    def covering(self, start: int, end: int) -> StoredReferenceWindow | None:
+        """Plus petite fenêtre conservée qui contient l'intervalle demandé."""
+        candidates = [window for window in self.windows if window.covers(start, end)]
+        return min(
+            candidates,
+            key=lambda window: window.end_bp - window.start_bp,
+            default=None,
+        )
+
+    def staging_dir(self) -> Path:
+        return Path(tempfile.mkdtemp(prefix=".staging.", dir=self.root))
+
+    def publish(
+        self,
+        staging_dir: Path,
+        start: int,
+        end: int,
+        vcf_path: Path,
+        index_path: Path,
+        absorbed: Sequence[StoredReferenceWindow],
+    ) -> StoredReferenceWindow:
+        """Publie une fenêtre préparée et retire celles qu'elle contient désormais."""
+        vcf_sha256, index_sha256 = hash_files([vcf_path, index_path])
+        size_bytes = vcf_path.stat().st_size + index_path.stat().st_size
+        for path in (vcf_path, index_path):
+            path.chmod(0o444)
+        dirname = f"{start}-{end}"
+        os.replace(staging_dir, self.root / dirname)
+        (self.root / dirname).chmod(0o555)
+        self.sequence += 1
+        stored = StoredReferenceWindow(
+            start_bp=start,
+            end_bp=end,
+            dirname=dirname,
+            vcf_filename=vcf_path.name,
+            index_filename=index_path.name,
+            vcf_sha256=vcf_sha256,
+            index_sha256=index_sha256,
+            size_bytes=size_bytes,
+            last_used=self.sequence,
+        )
+        self.windows.append(stored)
+        self._forget(absorbed)
+        return stored
+
+    def touch(self, window: StoredReferenceWindow) -> None:
+        self.sequence += 1
+        self.windows = [
+            replace(candidate, last_used=self.sequence)
+            if candidate.dirname == window.dirname
+            else candidate
+            for candidate in self.windows
+        ]
+        self._save()
+
+    def evict(self) -> None:
+        """Retire les fenêtres les moins récemment utilisées au-delà du budget.
+
+        Le budget est une fraction de la taille du VCF du panel : une fenêtre
+        aussi coûteuse à garder qu'à réextraire n'a pas sa place dans le magasin.
+        """
+        by_age = sorted(self.windows, key=lambda window: window.last_used)
+        total = sum(window.size_bytes for window in by_age)
+        evicted = []
+        for window in by_age:
+            if total <= self.budget_bytes:
+                break
+            evicted.append(window)
+            total -= window.size_bytes
+        self._forget(evicted)
+
+    def _forget(self, windows: Sequence[StoredReferenceWindow]) -> None:
+        if not windows:
+            return
+        names = {window.dirname for window in windows}
+        self.windows = [window for window in self.windows if window.dirname not in names]
+        # L'index est réécrit avant la suppression : un arrêt entre les deux ne
+        # laisse qu'un dossier orphelin, retiré à l'ouverture suivante.
+        self._save()
+        for name in names:
+            _remove_window_dir(self.root / name)
+
+
+def _remove_window_dir(path: Path) -> None:
+    path.chmod(0o755)
+    shutil.rmtree(path)
+
+
+@contextmanager
+def _open_window_store(
+    cached: CachedReferencePanel,
+    store_dir: Path,
+    budget_fraction: float,
+    lock_timeout_seconds: float,
+) -> Iterator[_ReferenceWindowStore]:
+    if store_dir.is_symlink() or (store_dir.exists() and not store_dir.is_dir()):
+        raise ReferenceWindowIntegrityError("reference_window_store_invalid")
+    store_dir.mkdir(parents=True, exist_ok=True)
+    budget_bytes = int(cached.vcf_path.stat().st_size * budget_fraction)
+    with exclusive_lock(store_dir / WINDOW_STORE_LOCK_NAME, lock_timeout_seconds):
+        yield _ReferenceWindowStore(store_dir, cached, budget_bytes)
+
+
+def _extract_region(
+    executable: str,
+    runner: CommandRunner,
+    source_path: Path,
+    output_path: Path,
+    chromosome: int,
+    start: int,
+    end: int,
+    threads: int,
+    timeout_seconds: float,
+    operation: str,
+    overlap: str = "record",
+) -> None:
+    command = [
+        executable,
+        "view",
+        "--no-update",
+        "--regions",
+        f"chr{chromosome}:{start}-{end}",
+    ]
+    if overlap != "record":
+        command += ["--regions-overlap", overlap]
+    command += [
+        "--output-type",
+        "z",
+        "--threads",
+        str(threads),
+        "--output",
+        str(output_path),
+        str(source_path),
+    ]
+    _run_checked(runner, command, timeout_seconds, operation)
+    if output_path.is_symlink() or not output_path.is_file():
+        raise ReferenceWindowIntegrityError("reference_window_vcf_missing")
+
+
+def _build_stored_window(
+    store: _ReferenceWindowStore,
+    pieces: Sequence[_WindowPiece],
+    absorbed: Sequence[StoredReferenceWindow],
+    executable: str,
+    runner: CommandRunner,
+    chromosome: int,
+    source_samples: list[str],
+    threads: int,
+    timeout_seconds: float,
+) -> StoredReferenceWindow:
+    """Prépare puis publie dans le magasin la fenêtre couvrant tous les morceaux."""
+    start, end = pieces[0].start_bp, pieces[-1].end_bp
+    staging_dir = store.staging_dir()
+    try:
+        vcf_path = staging_dir / f"reference.chr{chromosome}.{start}-{end}.vcf.gz"
+        piece_paths = []
+        for position, piece in enumerate(pieces):
+            source_path = (
+                store.cached.vcf_path
+                if piece.window is None
+                else store.verified_paths(piece.window)[0]
+            )
+            piece_path = (
+                vcf_path if len(pieces) == 1 else staging_dir / f"piece.{position}.vcf.gz"
+            )
+            _extract_region(
+                executable,
+                runner,
+                source_path,
+                piece_path,
+                chromosome,
+                piece.start_bp,
+                piece.end_bp,
+                threads,
+                timeout_seconds,
+                "extract_window",
+                piece.overlap,
+            )
+            piece_paths.append(piece_path)
+        if len(pieces) > 1:
+            _run_checked(
+                runner,
+                [
+                    executable,
+                    "concat",
+                    "--output-type",
+                    "z",
+                    "--threads",
+                    str(threads),
+                    "--output",
+                    str(vcf_path),
+                    *map(str, piece_paths),
+                ],
+                timeout_seconds,
+                "merge_window",
+            )
+            for piece_path in piece_paths:
+                piece_path.unlink()
+        _run_checked(
+            runner,
+            [executable, "index", "--tbi", "--threads", str(threads), str(vcf_path)],
+            timeout_seconds,
+            "index_window",
+        )
+        index_path = staging_dir / f"{vcf_path.name}.tbi"
+        if index_path.is_symlink() or not index_path.is_file():
+            raise ReferenceWindowIntegrityError("reference_window_index_missing")
+        stored_samples = _sample_ids(
+            executable, vcf_path, runner, timeout_seconds, "read_window_samples"
+        )
+        if stored_samples != source_samples:
+            raise ReferenceWindowIntegrityError(
+                "reference_window_sample_set_or_order_mismatch"
+            )
+        return store.publish(staging_dir, start, end, vcf_path, index_path, absorbed)
+    finally:
+        shutil.rmtree(staging_dir, ignore_errors=True)
+
+
+def _extract_through_store(
+    store: _ReferenceWindowStore,
+    executable: str,
+    runner: CommandRunner,
+    chromosome: int,
+    start: int,
+    end: int,
+    output_path: Path,
+    source_samples: list[str],
+    threads: int,
+    timeout_seconds: float,
+) -> dict[str, Any]:
+    """Écrit la fenêtre demandée depuis le magasin, en le complétant au besoin."""
+    window = store.covering(start, end)
+    if window is not None:
+        status = "HIT"
+        window_vcf_path, _ = store.verified_paths(window)
+    else:
+        pieces, absorbed = _plan_window(store.windows, start, end)
+        status = "EXTENDED" if absorbed else "EXTRACTED"
+        window = _build_stored_window(
+            store,
+            pieces,
+            absorbed,
+            executable,
+            runner,
+            chromosome,
+            source_samples,
+            threads,
+            timeout_seconds,
+        )
+        window_vcf_path, _ = store.paths(window)
+    if (window.start_bp, window.end_bp) == (start, end):
+        shutil.copyfile(window_vcf_path, output_path)
+    else:
+        _extract_region(
+            executable,
+            runner,
+            window_vcf_path,
+            output_path,
+            chromosome,
+            start,
+            end,
+            threads,
+            timeout_seconds,
+            "extract_window",
+        )
+    store.touch(window)
+    store.evict()
+    return {"status": status, "start_bp": window.start_bp, "end_bp": window.end_bp}
+
+
 def _result_from_manifest(output_dir: Path, manifest: dict[str, Any]) -> ExtractedReferenceWindow:
     return ExtractedReferenceWindow(
         output_dir=output_dir,
@@ -298,12 +733,28 @@ def extract_reference_window(
     threads: int = 1,
     timeout_seconds: float = 7_200,
     command_runner: CommandRunner = _default_runner,
+    store_dir: Path | None = None,
+    store_budget_fraction: float = DEFAULT_WINDOW_STORE_FRACTION,
+    store_lock_timeout_seconds: float = 60,
 ) -> ExtractedReferenceWindow:
-    """Extrait et valide une fenêtre en conservant tous les échantillons du panel."""
+    """Extrait et valide une fenêtre en conservant tous les échantillons du panel.
+
+    Avec `store_dir` (voir `reference_window_store_dir`), la fenêtre est servie
+    par le magasin partagé, qui garde au plus `store_budget_fraction` de la
+    taille du VCF du panel.
+    """
     start = _positive_integer(start_bp, "start_bp")
     end = _positive_integer(end_bp, "end_bp")
     resolved_threads = _positive_integer(threads, "threads")
     timeout = _positive_number(timeout_seconds, "timeout_seconds")
+    budget_fraction = _positive_number(store_budget_fraction, "store_budget_fraction")
+    if budget_fraction > 1:
+        raise ReferenceWindowError(
+            "invalid_reference_window_parameter:store_budget_fraction"
+        )
+    lock_timeout = _positive_number(
+        store_lock_timeout_seconds, "store_lock_timeout_seconds"
+    )
     if resolved.assembly != "GRCh38":
         raise ReferenceWindowError("unsupported_reference_assembly")
     if resolved.chromosome not in GRCH38_AUTOSOME_LENGTHS:
@@ -339,28 +790,36 @@ def extract_reference_window(
         vcf_name = f"reference.chr{resolved.chromosome}.{start}-{end}.vcf.gz"
         vcf_path = staging_dir / vcf_name
         index_path = staging_dir / f"{vcf_name}.tbi"
-        region = f"chr{resolved.chromosome}:{start}-{end}"
-        _run_checked(
-            command_runner,
-            [
+        store_record = None
+        if store_dir is None:
+            _extract_region(
                 executable,
-                "view",
-                "--no-update",
-                "--regions",
-                region,
-                "--output-type",
-                "z",
-                "--threads",
-                str(resolved_threads),
-                "--output",
-                str(vcf_path),
-                str(cached.vcf_path),
-            ],
-            timeout,
-            "extract_window",
-        )
-        if vcf_path.is_symlink() or not vcf_path.is_file():
-            raise ReferenceWindowIntegrityError("reference_window_vcf_missing")
+                command_runner,
+                cached.vcf_path,
+                vcf_path,
+                resolved.chromosome,
+                start,
+                end,
+                resolved_threads,
+                timeout,
+                "extract_window",
+            )
+        else:
+            with _open_window_store(
+                cached, store_dir, budget_fraction, lock_timeout
+            ) as store:
+                store_record = _extract_through_store(
+                    store,
+                    executable,
+                    command_runner,
+                    resolved.chromosome,
+                    start,
+                    end,
+                    vcf_path,
+                    source_samples,
+                    resolved_threads,
+                    timeout,
+                )
         _run_checked(
             command_runner,
             [executable, "index", "--tbi", "--threads", str(resolved_threads), str(vcf_path)],
@@ -424,6 +883,8 @@ def extract_reference_window(
                 "tabix_index": "PASS",
             },
         }
+        if store_record is not None:
+            manifest["window_store"] = store_record
         validate_json_document(manifest, "reference_window_manifest.schema.json")
         atomic_write_json(staging_dir / "reference_window_manifest.json", manifest)
         os.replace(staging_dir, output_dir)
@@ -19,6 +19,7 @@ from effet_fondateur.contracts import (
     TableValidationError,
     build_file_artifact,
     load_pipeline_config,
+    stream_tsv_table,
     validate_cohorts_frozen,
     validate_json_document,
     validate_tsv_table,
@@ -178,10 +179,14 @@ def _validate_region_dataset(
 def _variant_universe(paths: dict[str, Path], bim_rows: list[list[str]]) -> list[dict[str, Any]]:
     genetic_map = validate_tsv_table(paths["target_genetic_map"], "target_genetic_map.schema.json")
     map_by_id = {row["VARIANT_ID"]: row for row in genetic_map.rows}
-    qc_rows = validate_tsv_table(paths["variant_qc_final"], "variant_qc_final.schema.json").rows
     retained_qc = {
-        row["VARIANT_ID"] for row in qc_rows
-        if row["DATASET_ID"] == "target_chromosome_all_qc" and row["PRESENT_AFTER_QC"]
+        row["VARIANT_ID"] for row in stream_tsv_table(
+            paths["variant_qc_final"], "variant_qc_final.schema.json",
+            columns=("VARIANT_ID",),
+            where=lambda row: (
+                row["DATASET_ID"] == "target_chromosome_all_qc" and bool(row["PRESENT_AFTER_QC"])
+            ),
+        )
     }
     bim_ids = [row[1] for row in bim_rows]
     if set(bim_ids) != set(map_by_id) or not set(bim_ids) <= retained_qc:
@@ -7,30 +7,30 @@ import csv
 import hashlib
 import json
 import math
-import shutil
-import subprocess
 import sys
-import tempfile
 from pathlib import Path, PurePosixPath
 from time import monotonic
-from typing import Any, Sequence
+from typing import Any, Callable, Iterator, Sequence
 
 import numpy as np
 from scipy.stats import chi2
 
-from effet_fondateur.audit import atomic_write_json, read_json, sha256_file
+from effet_fondateur.audit import atomic_write_json, read_json, sha256_file, trace_span
 from effet_fondateur.contracts import (
     DocumentValidationError,
     TableValidationError,
     build_file_artifact,
-    load_pipeline_config,
     validate_json_document,
     validate_tsv_table,
 )
+from effet_fondateur.io import MISSING_DOSAGE, PlinkBed, PlinkBedError, open_plink_bed
 from effet_fondateur.orchestrator.state import utc_now
 
 
 MAX_COMPONENTS = 10
+DOSAGE_BLOCK_VARIANTS = 4096
+PCA_METHODS = ("exact", "randomized")
+DosageBlockReader = Callable[[int, int], np.ndarray]
 PC_COLUMNS = tuple(f"PC{index}" for index in range(1, MAX_COMPONENTS + 1))
 SCORE_COLUMNS = (
     "SAMPLE_ID",
@@ -87,10 +87,6 @@ class PopulationStructureInputError(ValueError):
     """Signale une entrée ou une configuration PCA invalide."""
 
 
-class ExternalToolError(RuntimeError):
-    """Signale un échec de PLINK ou une sortie de dosage invalide."""
-
-
 class PopulationStructureBlockError(RuntimeError):
     """Signale une base de référence insuffisante pour ajuster une PCA."""
 
@@ -109,6 +105,13 @@ def _positive_integer(parameters: dict[str, Any], name: str, default: int) -> in
     return value
 
 
+def _non_negative_integer(parameters: dict[str, Any], name: str, default: int) -> int:
+    value = parameters.get(name, default)
+    if isinstance(value, bool) or not isinstance(value, int) or value < 0:
+        raise PopulationStructureInputError(f"invalid_parameter:{name}")
+    return value
+
+
 def _probability(parameters: dict[str, Any], name: str, default: float) -> float:
     value = parameters.get(name, default)
     if isinstance(value, bool) or not isinstance(value, (int, float)):
@@ -124,6 +127,9 @@ def _parameters(parameters: dict[str, Any]) -> dict[str, Any]:
     outlier_components = _positive_integer(parameters, "outlier_components", 5)
     if requested_components > MAX_COMPONENTS or outlier_components > requested_components:
         raise PopulationStructureInputError("invalid_component_configuration")
+    pca_method = parameters.get("pca_method", "exact")
+    if pca_method not in PCA_METHODS:
+        raise PopulationStructureInputError("invalid_parameter:pca_method")
     return {
         "requested_components": requested_components,
         "outlier_components": outlier_components,
@@ -137,9 +143,17 @@ def _parameters(parameters: dict[str, Any]) -> dict[str, Any]:
             parameters, "min_reference_call_rate", 0.95
         ),
         "outlier_alpha": _probability(parameters, "outlier_alpha", 0.001),
-        "plink_timeout_seconds": _positive_integer(
-            parameters, "plink_timeout_seconds", 300
+        "pca_method": pca_method,
+        "pca_block_variants": _positive_integer(
+            parameters, "pca_block_variants", DOSAGE_BLOCK_VARIANTS
+        ),
+        "randomized_oversampling": _positive_integer(
+            parameters, "randomized_oversampling", 10
+        ),
+        "randomized_power_iterations": _non_negative_integer(
+            parameters, "randomized_power_iterations", 2
         ),
+        "randomized_seed": _non_negative_integer(parameters, "randomized_seed", 1),
     }
 
 
@@ -241,105 +255,49 @@ def _sample_context(
     return ordered_sample_ids, samples, plink_to_sample, reference_ids
 
 
-def _resolve_executable(command: str | None) -> str:
-    if command is None:
-        raise ExternalToolError("plink_not_configured")
-    executable = shutil.which(command)
-    if executable is None:
-        raise ExternalToolError("plink_not_available")
-    return executable
+def _open_panel(
+    bed_path: Path,
+    bim_rows: list[list[str]],
+    fam_rows: list[list[str]],
+) -> PlinkBed:
+    try:
+        return open_plink_bed(bed_path, len(fam_rows), len(bim_rows))
+    except PlinkBedError as error:
+        raise PopulationStructureInputError(str(error)) from error
 
 
-def _plink_version(executable: str) -> str | None:
-    try:
-        completed = subprocess.run(
-            [executable, "--version"], capture_output=True, check=False, text=True, timeout=10
-        )
-    except (OSError, subprocess.TimeoutExpired):
-        return None
-    output = (completed.stdout or completed.stderr).strip().splitlines()
-    return output[0][:200] if output else None
-
-
-def _export_dosages(
-    executable: str,
-    panel_prefix: Path,
-    output_prefix: Path,
-    timeout_seconds: int,
-) -> Path:
-    command = [
-        executable,
-        "--bfile",
-        str(panel_prefix),
-        "--recode",
-        "A",
-        "--out",
-        str(output_prefix),
-    ]
-    try:
-        completed = subprocess.run(
-            command, capture_output=True, check=False, text=True, timeout=timeout_seconds
-        )
-    except (OSError, subprocess.TimeoutExpired) as error:
-        raise ExternalToolError("plink_dosage_export_failed") from error
-    if completed.returncode != 0:
-        raise ExternalToolError(f"plink_dosage_export_failed:{completed.returncode}")
-    raw_path = output_prefix.with_suffix(".raw")
-    if not raw_path.is_file():
-        raise ExternalToolError("plink_dosage_output_missing")
-    return raw_path
+def _float_dosages(block: np.ndarray) -> np.ndarray:
+    dosages = block.astype(np.float64)
+    dosages[block == MISSING_DOSAGE] = np.nan
+    return dosages
 
 
 def _read_dosages(
-    raw_path: Path,
+    bed_path: Path,
     bim_rows: list[list[str]],
     fam_rows: list[list[str]],
+    block_variant_count: int = DOSAGE_BLOCK_VARIANTS,
 ) -> np.ndarray:
-    with raw_path.open(encoding="utf-8", newline="") as input_file:
-        reader = csv.reader(input_file, delimiter=" ", skipinitialspace=True)
-        try:
-            header = next(reader)
-        except StopIteration as error:
-            raise ExternalToolError("empty_plink_raw") from error
-        data_rows = [row for row in reader if row]
-    expected_columns = [f"{row[1]}_{row[4]}" for row in bim_rows]
-    if header[:6] != ["FID", "IID", "PAT", "MAT", "SEX", "PHENOTYPE"]:
-        raise ExternalToolError("malformed_plink_raw_header")
-    if header[6:] != expected_columns:
-        raise ExternalToolError("plink_raw_variant_order_or_allele_mismatch")
-    if len(data_rows) != len(fam_rows) or any(len(row) != len(header) for row in data_rows):
-        raise ExternalToolError("malformed_plink_raw_rows")
-    if [(row[0], row[1]) for row in data_rows] != [(row[0], row[1]) for row in fam_rows]:
-        raise ExternalToolError("plink_raw_sample_order_mismatch")
-    dosages = np.empty((len(data_rows), len(bim_rows)), dtype=np.float64)
-    for sample_index, row in enumerate(data_rows):
-        for variant_index, value in enumerate(row[6:]):
-            if value == "NA":
-                dosages[sample_index, variant_index] = np.nan
-                continue
-            try:
-                dosage = float(value)
-            except ValueError as error:
-                raise ExternalToolError("invalid_plink_dosage") from error
-            if not math.isfinite(dosage) or not 0 <= dosage <= 2:
-                raise ExternalToolError("invalid_plink_dosage")
-            dosages[sample_index, variant_index] = dosage
+    bed = _open_panel(bed_path, bim_rows, fam_rows)
+    dosages = np.empty((len(fam_rows), len(bim_rows)), dtype=np.float64)
+    # Décodage par blocs de variants : seule la matrice float64 finale occupe
+    # la mémoire, jamais un export texte intermédiaire.
+    for start, block in bed.iter_dosage_blocks(block_variant_count):
+        dosages[:, start : start + block.shape[1]] = _float_dosages(block)
     return dosages
 
 
-def _fit_and_project(
-    dosages: np.ndarray,
-    reference_indices: np.ndarray,
+def _variant_statistics(
+    nonmissing_counts: np.ndarray,
+    dosage_sums: np.ndarray,
+    reference_count: int,
     parameters: dict[str, Any],
 ) -> dict[str, Any]:
-    reference_dosages = dosages[reference_indices]
-    nonmissing_counts = np.sum(~np.isnan(reference_dosages), axis=0)
-    call_rates = nonmissing_counts / reference_dosages.shape[0]
-    dosage_sums = np.nansum(reference_dosages, axis=0)
+    call_rates = nonmissing_counts / reference_count
     means = np.divide(
         dosage_sums,
         nonmissing_counts,
-        out=np.full(reference_dosages.shape[1], np.nan, dtype=np.float64),
+        out=np.full(nonmissing_counts.shape[0], np.nan, dtype=np.float64),
         where=nonmissing_counts > 0,
     )
     frequencies = means / 2.0
@@ -350,30 +308,47 @@ def _fit_and_project(
     informative_count = int(np.sum(informative))
     if informative_count < parameters["min_informative_variants"]:
         raise PopulationStructureBlockError("insufficient_informative_variants")
-    imputed = np.where(np.isnan(dosages[:, informative]), means[informative], dosages[:, informative])
-    standardized = (imputed - means[informative]) / standard_deviations[informative]
-    normalized = standardized / math.sqrt(informative_count)
-    reference_matrix = normalized[reference_indices]
-    left_vectors, singular_values_all, right_vectors_all = np.linalg.svd(
-        reference_matrix, full_matrices=False
-    )
-    del left_vectors
+    return {
+        "means": means,
+        "frequencies": frequencies,
+        "standard_deviations": standard_deviations,
+        "call_rates": call_rates,
+        "call_rate_eligible": call_rate_eligible,
+        "informative": informative,
+        "informative_count": informative_count,
+    }
+
+
+def _component_count(reference_count: int, informative_count: int, parameters: dict[str, Any]) -> int:
     component_count = min(
         parameters["requested_components"],
-        reference_matrix.shape[0] - 1,
+        reference_count - 1,
         informative_count,
     )
     if component_count < 1:
         raise PopulationStructureBlockError("insufficient_pca_rank")
-    singular_values = singular_values_all[:component_count]
-    right_vectors = right_vectors_all[:component_count].copy()
-    for component_index in range(component_count):
-        anchor_index = int(np.argmax(np.abs(right_vectors[component_index])))
-        if right_vectors[component_index, anchor_index] < 0:
-            right_vectors[component_index] *= -1
-    scores = normalized @ right_vectors.T
-    eigenvalues = singular_values**2 / (reference_matrix.shape[0] - 1)
-    total_variance = float(np.sum(reference_matrix**2) / (reference_matrix.shape[0] - 1))
+    return component_count
+
+
+def _orient_components(right_vectors: np.ndarray) -> np.ndarray:
+    """Signe de chaque axe imposant un loading positif au poids absolu maximal."""
+    anchor_indices = np.argmax(np.abs(right_vectors), axis=1)
+    anchors = right_vectors[np.arange(right_vectors.shape[0]), anchor_indices]
+    return np.where(anchors < 0, -1.0, 1.0)
+
+
+def _model(
+    statistics: dict[str, Any],
+    scores: np.ndarray,
+    singular_values: np.ndarray,
+    right_vectors: np.ndarray,
+    reference_count: int,
+    total_sum_squares: float,
+    parameters: dict[str, Any],
+) -> dict[str, Any]:
+    component_count = singular_values.shape[0]
+    eigenvalues = singular_values**2 / (reference_count - 1)
+    total_variance = total_sum_squares / (reference_count - 1)
     explained_ratios = eigenvalues / total_variance
     outlier_component_count = min(parameters["outlier_components"], component_count)
     positive_eigenvalues = eigenvalues[:outlier_component_count] > np.finfo(float).eps
@@ -386,12 +361,7 @@ def _fit_and_project(
     distances_squared = np.sum(standardized_scores**2, axis=1)
     p_values = chi2.sf(distances_squared, df=outlier_component_count)
     return {
-        "means": means,
-        "frequencies": frequencies,
-        "standard_deviations": standard_deviations,
-        "call_rates": call_rates,
-        "call_rate_eligible": call_rate_eligible,
-        "informative": informative,
+        **statistics,
         "scores": scores,
         "singular_values": singular_values,
         "eigenvalues": eigenvalues,
@@ -401,10 +371,151 @@ def _fit_and_project(
         "p_values": p_values,
         "component_count": component_count,
         "outlier_component_count": outlier_component_count,
-        "informative_count": informative_count,
     }
 
 
+def _fit_and_project(
+    dosages: np.ndarray,
+    reference_indices: np.ndarray,
+    parameters: dict[str, Any],
+) -> dict[str, Any]:
+    reference_dosages = dosages[reference_indices]
+    statistics = _variant_statistics(
+        np.sum(~np.isnan(reference_dosages), axis=0),
+        np.nansum(reference_dosages, axis=0),
+        reference_dosages.shape[0],
+        parameters,
+    )
+    informative = statistics["informative"]
+    means = statistics["means"]
+    imputed = np.where(np.isnan(dosages[:, informative]), means[informative], dosages[:, informative])
+    standardized = (imputed - means[informative]) / statistics["standard_deviations"][informative]
+    normalized = standardized / math.sqrt(statistics["informative_count"])
+    reference_matrix = normalized[reference_indices]
+    with trace_span("svd", "numeric", shape=list(reference_matrix.shape)):
+        left_vectors, singular_values_all, right_vectors_all = np.linalg.svd(
+            reference_matrix, full_matrices=False
+        )
+    del left_vectors
+    component_count = _component_count(
+        reference_matrix.shape[0], statistics["informative_count"], parameters
+    )
+    right_vectors = right_vectors_all[:component_count].copy()
+    right_vectors *= _orient_components(right_vectors)[:, None]
+    scores = normalized @ right_vectors.T
+    return _model(
+        statistics,
+        scores,
+        singular_values_all[:component_count],
+        right_vectors,
+        reference_matrix.shape[0],
+        float(np.sum(reference_matrix**2)),
+        parameters,
+    )
+
+
+def _fit_and_project_randomized(
+    read_block: DosageBlockReader,
+    sample_count: int,
+    variant_count: int,
+    reference_indices: np.ndarray,
+    parameters: dict[str, Any],
+) -> dict[str, Any]:
+    """Ajuste les premiers axes par recherche d'image aléatoire par blocs.
+
+    `read_block(début, fin)` retourne les dosages float64 de tous les individus
+    pour un intervalle de variants, `nan` si manquant. L'imputation et la
+    standardisation sont appliquées bloc par bloc : aucune matrice individus ×
+    variants complète n'est construite. Les fréquences, le filtre des variants
+    informatifs, la normalisation, l'orientation des axes et les statistiques
+    d'outliers sont ceux du mode exact ; lorsque la largeur d'esquisse atteint
+    le rang de la référence, le résultat coïncide avec la SVD exacte.
+    """
+    block_size = parameters["pca_block_variants"]
+    block_bounds = [
+        (start, min(start + block_size, variant_count))
+        for start in range(0, variant_count, block_size)
+    ]
+    reference_count = reference_indices.shape[0]
+    nonmissing_counts = np.zeros(variant_count, dtype=np.int64)
+    dosage_sums = np.zeros(variant_count, dtype=np.float64)
+    for start, stop in block_bounds:
+        reference_block = read_block(start, stop)[reference_indices]
+        nonmissing_counts[start:stop] = np.sum(~np.isnan(reference_block), axis=0)
+        dosage_sums[start:stop] = np.nansum(reference_block, axis=0)
+    statistics = _variant_statistics(nonmissing_counts, dosage_sums, reference_count, parameters)
+    informative = statistics["informative"]
+    informative_count = statistics["informative_count"]
+    component_count = _component_count(reference_count, informative_count, parameters)
+    sketch_width = min(
+        component_count + parameters["randomized_oversampling"],
+        reference_count,
+        informative_count,
+    )
+    scale = math.sqrt(informative_count)
+
+    def normalized_blocks(reference_only: bool) -> Iterator[tuple[int, np.ndarray]]:
+        position = 0
+        for start, stop in block_bounds:
+            selected = informative[start:stop]
+            if not selected.any():
+                continue
+            block = read_block(start, stop)
+            if reference_only:
+                block = block[reference_indices]
+            block = block[:, selected]
+            means = statistics["means"][start:stop][selected]
+            deviations = statistics["standard_deviations"][start:stop][selected]
+            normalized = np.where(np.isnan(block), 0.0, (block - means) / deviations) / scale
+            yield position, normalized
+            position += normalized.shape[1]
+
+    # Esquisse Y = A·Ω, Ω gaussienne générée bloc par bloc depuis la graine.
+    generator = np.random.default_rng(parameters["randomized_seed"])
+    sketch = np.zeros((reference_count, sketch_width), dtype=np.float64)
+    for _, block in normalized_blocks(True):
+        sketch += block @ generator.standard_normal((block.shape[1], sketch_width))
+    basis, _ = np.linalg.qr(sketch)
+    # Itérations de puissance Y = A·Aᵀ·Q, sans stocker Aᵀ·Q en entier.
+    for _ in range(parameters["randomized_power_iterations"]):
+        sketch = np.zeros_like(basis)
+        for _, block in normalized_blocks(True):
+            sketch += block @ (block.T @ basis)
+        basis, _ = np.linalg.qr(sketch)
+    gram = np.zeros((sketch_width, sketch_width), dtype=np.float64)
+    total_sum_squares = 0.0
+    for _, block in normalized_blocks(True):
+        projected = basis.T @ block
+        gram += projected @ projected.T
+        total_sum_squares += float(np.sum(block**2))
+    with trace_span("eigh", "numeric", shape=list(gram.shape)):
+        gram_values, gram_vectors = np.linalg.eigh(gram)
+    order = np.argsort(gram_values)[::-1][:component_count]
+    singular_values = np.sqrt(np.clip(gram_values[order], 0.0, None))
+    left_vectors = basis @ gram_vectors[:, order]
+    right_vectors = np.empty((component_count, informative_count), dtype=np.float64)
+    scores = np.zeros((sample_count, component_count), dtype=np.float64)
+    for position, block in normalized_blocks(False):
+        block_vectors = np.divide(
+            left_vectors.T @ block[reference_indices],
+            singular_values[:, None],
+            out=np.zeros((component_count, block.shape[1]), dtype=np.float64),
+            where=singular_values[:, None] > 0,
+        )
+        right_vectors[:, position : position + block.shape[1]] = block_vectors
+        scores += block @ block_vectors.T
+    signs = _orient_components(right_vectors)
+    return _model(
+        statistics,
+        scores * signs,
+        singular_values,
+        right_vectors * signs[:, None],
+        reference_count,
+        total_sum_squares,
+        parameters,
+    )
+
+
 def _decimal(value: float) -> str:
     if abs(value) < 5e-16:
         value = 0.0
@@ -575,7 +686,6 @@ def execute(stage_inputs_path: Path, output_dir: Path) -> int:
     stage_inputs = read_json(stage_inputs_path)
     validate_json_document(stage_inputs, "stage_inputs.schema.json")
     run_dir = output_dir.parent.parent
-    config = load_pipeline_config(run_dir / "config.resolved.yaml")
     parameters = _parameters(stage_inputs["parameters"])
     artifact_ids = (
         "samples_master",
@@ -599,17 +709,20 @@ def execute(stage_inputs_path: Path, output_dir: Path) -> int:
         dtype=np.int64,
     )
     output_dir.mkdir(parents=True, exist_ok=True)
-    plink_executable = _resolve_executable(config["tools"]["plink"])
-    plink_version = _plink_version(plink_executable)
-    with tempfile.TemporaryDirectory(prefix="population_structure_", dir=output_dir) as work_dir:
-        raw_path = _export_dosages(
-            plink_executable,
-            paths["kinship_panel_bed"].with_suffix(""),
-            Path(work_dir) / "dosages",
-            parameters["plink_timeout_seconds"],
+    if parameters["pca_method"] == "randomized":
+        panel = _open_panel(paths["kinship_panel_bed"], bim_rows, fam_rows)
+        model = _fit_and_project_randomized(
+            lambda start, stop: _float_dosages(panel.read_dosages(np.arange(start, stop))),
+            len(fam_rows),
+            len(bim_rows),
+            reference_indices,
+            parameters,
         )
-        dosages = _read_dosages(raw_path, bim_rows, fam_rows)
-    model = _fit_and_project(dosages, reference_indices, parameters)
+    else:
+        dosages = _read_dosages(
+            paths["kinship_panel_bed"], bim_rows, fam_rows, parameters["pca_block_variants"]
+        )
+        model = _fit_and_project(dosages, reference_indices, parameters)
     reference_set_id = _reference_set_id(reference_ids)
     population_sample_set_id = descriptor["sample_set_id"]
     score_rows, outlier_rows = _result_rows(
@@ -641,6 +754,7 @@ def execute(stage_inputs_path: Path, output_dir: Path) -> int:
     report = {
         "schema_version": "1.0.0",
         "method_id": "independent_reference_pca_projection_v1",
+        "pca_method": parameters["pca_method"],
         "reference_sample_set_id": reference_set_id,
         "population_sample_set_id": population_sample_set_id,
         "panel_sample_count": len(ordered_sample_ids),
@@ -689,7 +803,6 @@ def execute(stage_inputs_path: Path, output_dir: Path) -> int:
         "outputs": output_artifacts,
         "parameters": parameters,
         "tools": [
-            {"tool": "plink", "configured": config["tools"]["plink"], "version": plink_version},
             {"tool": "numpy", "version": np.__version__},
         ],
         "counts": {
@@ -749,9 +862,6 @@ def main(arguments: Sequence[str] | None = None) -> int:
     parsed_arguments = parser.parse_args(arguments)
     try:
         return execute(parsed_arguments.stage_inputs, parsed_arguments.output_dir)
-    except ExternalToolError as error:
-        sys.stderr.write(f"{error}\n")
-        return 3
     except PopulationStructureBlockError as error:
         sys.stderr.write(f"{error}\n")
         return 4
@@ -19,7 +19,7 @@ from effet_fondateur.audit import atomic_write_json, read_json, sha256_file
 from effet_fondateur.contracts import (
     DocumentValidationError, TableValidationError, build_file_artifact,
     load_pipeline_config, validate_cohorts_frozen, validate_json_document,
-    validate_tsv_table,
+    stream_tsv_table, validate_tsv_table,
 )
 from effet_fondateur.orchestrator.state import utc_now
 from effet_fondateur.roh import RohAnalysisError, publish_roh
@@ -176,16 +176,21 @@ def _load_target_metadata(path: Path) -> dict[str, Any]:
 def _sample_context(
     paths: dict[str, Path], all_pairs: set[tuple[str, str]],
 ) -> tuple[dict[tuple[str, str], str], dict[str, str], dict[str, set[str]]]:
-    samples = validate_tsv_table(paths["samples_master"], "samples_master.schema.json")
-    sample_by_pair = {(row["FID"], row["IID"]): row["SAMPLE_ID"] for row in samples.rows}
+    samples = stream_tsv_table(
+        paths["samples_master"], "samples_master.schema.json", columns=("SAMPLE_ID", "FID", "IID")
+    )
+    sample_by_pair = {(row["FID"], row["IID"]): row["SAMPLE_ID"] for row in samples}
     if not all_pairs <= set(sample_by_pair):
         raise AnalyzeRohInputError("dataset_sample_absent_from_registry")
-    genotypes = validate_tsv_table(paths["target_genotype_audit"], "target_genotype_audit.schema.json")
-    genotype_by_sample = {row["SAMPLE_ID"]: row["GENOTYPE"] for row in genotypes.rows}
+    genotypes = stream_tsv_table(
+        paths["target_genotype_audit"], "target_genotype_audit.schema.json",
+        columns=("SAMPLE_ID", "GENOTYPE"),
+    )
+    genotype_by_sample = {row["SAMPLE_ID"]: row["GENOTYPE"] for row in genotypes}
     target_sample_ids = {sample_by_pair[pair] for pair in all_pairs}
     if not target_sample_ids <= set(genotype_by_sample):
         raise AnalyzeRohInputError("target_genotype_coverage_mismatch")
-    cohorts = validate_cohorts_frozen(paths["cohorts_frozen"], {row["SAMPLE_ID"] for row in samples.rows})
+    cohorts = validate_cohorts_frozen(paths["cohorts_frozen"], set(sample_by_pair.values()))
     roles: dict[str, set[str]] = defaultdict(set)
     for row in cohorts.rows:
         if row["INCLUDED"] and row["COHORT_ID"] in {
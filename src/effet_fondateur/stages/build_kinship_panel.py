@@ -16,12 +16,13 @@ from pathlib import Path, PurePosixPath
 from time import monotonic
 from typing import Any, Sequence
 
-from effet_fondateur.audit import atomic_write_json, read_json, sha256_file
+from effet_fondateur.audit import atomic_write_json, read_json, sha256_file, traced
 from effet_fondateur.contracts import (
     DocumentValidationError,
     TableValidationError,
     build_file_artifact,
     load_pipeline_config,
+    load_table_columns,
     validate_json_document,
     validate_tsv_table,
 )
@@ -289,6 +290,7 @@ def _plink_version(executable: str) -> str | None:
     return output.splitlines()[0][:500] if output else None
 
 
+@traced("plink", "tool")
 def _run_plink(executable: str, arguments: list[str], timeout_seconds: int) -> None:
     try:
         completed = subprocess.run(
@@ -337,19 +339,29 @@ def _validate_input_dataset(
 
 
 def _preliminary_alerts_by_variant(
-    metrics_path: Path, bim_rows: list[list[str]]
+    metrics_artifact: dict[str, Any], metrics_path: Path, bim_rows: list[list[str]]
 ) -> dict[str, str]:
-    table = validate_tsv_table(metrics_path, "qc_variant_metrics.schema.json")
-    rows_by_id = {row["VARIANT_ID"]: row for row in table.rows}
+    # L'empreinte du TSV vient d'être vérifiée : le compagnon colonnaire publié
+    # par l'étape 04 est lu sans reparser la table lorsqu'il correspond à
+    # l'empreinte que le même artefact déclare pour lui.
+    table = load_table_columns(
+        metrics_path, "qc_variant_metrics.schema.json",
+        expected_sha256=metrics_artifact["sha256"],
+        expected_sidecar_sha256=metrics_artifact.get("columnar_sidecar_sha256"),
+    )
+    # Une cellule ALERT_CODES nulle vaut déjà "" dans la colonne texte.
+    index_by_id = {
+        variant_id: index
+        for index, variant_id in enumerate(table.text["VARIANT_ID"].tolist())
+    }
     input_ids = {row[1] for row in bim_rows}
-    if not input_ids.issubset(rows_by_id):
+    if not input_ids.issubset(index_by_id):
         raise KinshipPanelInputError("preliminary_qc_variant_set_incomplete")
-    if any(rows_by_id[variant_id]["QC_STATUS"] == "EXCLUDED" for variant_id in input_ids):
+    statuses = table.text["QC_STATUS"]
+    alert_codes = table.text["ALERT_CODES"]
+    if any(statuses[index_by_id[variant_id]] == "EXCLUDED" for variant_id in input_ids):
         raise KinshipPanelInputError("excluded_variant_present_in_pre_qc_dataset")
-    return {
-        variant_id: rows_by_id[variant_id]["ALERT_CODES"] or ""
-        for variant_id in input_ids
-    }
+    return {variant_id: str(alert_codes[index_by_id[variant_id]]) for variant_id in input_ids}
 
 
 def _frequency_by_variant(
@@ -697,7 +709,7 @@ def execute(stage_inputs_path: Path, output_dir: Path) -> int:
         input_descriptor, paths, input_artifacts
     )
     preliminary_alerts = _preliminary_alerts_by_variant(
-        paths["qc_variant_metrics"], input_bim_rows
+        input_artifacts["qc_variant_metrics"], paths["qc_variant_metrics"], input_bim_rows
     )
 
     output_dir.mkdir(parents=True, exist_ok=True)
@@ -9,13 +9,17 @@ import json
 import shutil
 import subprocess
 import sys
+from array import array
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass, field
 from itertools import chain
 from pathlib import Path, PurePosixPath
 from time import monotonic
-from typing import Any, Sequence
+from typing import Any, Iterator, Sequence
 
-from effet_fondateur.audit import atomic_write_json, read_json, sha256_file
+import numpy as np
+
+from effet_fondateur.audit import atomic_write_json, read_json, sha256_file, traced
 from effet_fondateur.contracts import (
     DocumentValidationError,
     TableValidationError,
@@ -24,6 +28,7 @@ from effet_fondateur.contracts import (
     validate_json_document,
     validate_tsv_table,
 )
+from effet_fondateur.io import MISSING_DOSAGE, write_plink_bed
 from effet_fondateur.orchestrator.state import utc_now
 
 
@@ -37,6 +42,24 @@ REQUIRED_ACPA_COLUMNS = frozenset(
     }
 )
 VALID_BASES = frozenset("ACGT")
+BED_WRITERS = ("plink", "native")
+NATIVE_BED_BLOCK_VARIANTS = 16384
+# Un appel occupe un octet dans les fichiers temporaires : 0 pour un génotype
+# manquant, sinon 1 + 4 × base(allèle 1) + base(allèle 2) dans l'ordre ACGT.
+MISSING_CALL = 0
+_BASES = "ACGT"
+_CALL_CODES = {
+    (allele_1, allele_2): 1 + 4 * index_1 + index_2
+    for index_1, allele_1 in enumerate(_BASES)
+    for index_2, allele_2 in enumerate(_BASES)
+}
+_CALL_TEXT = np.array(
+    ["0\t0"] + [f"{allele_1}\t{allele_2}" for allele_1, allele_2 in _CALL_CODES],
+    dtype=object,
+)
+# Code d'appel -> indice de base de chaque allèle, -1 si manquant.
+_CALL_FIRST_BASE = np.array([-1] + [index // 4 for index in range(16)], dtype=np.int8)
+_CALL_SECOND_BASE = np.array([-1] + [index % 4 for index in range(16)], dtype=np.int8)
 AUTOSOMES = frozenset(str(chromosome) for chromosome in range(1, 23))
 ALIGNMENT_COLUMNS = (
     "ROW_INDEX",
@@ -86,6 +109,9 @@ class MarkerAggregate:
     observed_alleles: set[str] = field(default_factory=set)
     rsids: set[str] = field(default_factory=set)
     coordinate_conflict: bool = False
+    # Rang de première observation dans le registre : indice de la sonde dans
+    # les fichiers temporaires d'appels.
+    ordinal: int = 0
 
 
 @dataclass(frozen=True)
@@ -135,7 +161,11 @@ def _read_source_to_spool(
     expected_assembly: str,
     markers: dict[str, MarkerAggregate],
 ) -> tuple[int, int, dict[str, int], dict[str, int]]:
-    """Lit une source une fois, écrit ses appels et agrège les sondes autosomiques."""
+    """Lit une source une fois, écrit ses appels et agrège les sondes autosomiques.
+
+    Les appels sont écrits dans l'ordre d'insertion des sondes dans `markers`,
+    un octet par sonde ; `_index_spool` les replace ensuite au rang global.
+    """
     invalid_genotype_count = 0
     skipped_row_count = 0
     metadata: dict[str, str] = {}
@@ -165,63 +195,63 @@ def _read_source_to_spool(
         reader.fieldnames = fieldnames
         if REQUIRED_ACPA_COLUMNS - set(fieldnames):
             raise AcpaConversionError("missing_acpa_columns")
-        with spool_path.open("w", encoding="utf-8", newline="") as spool_file:
-            writer = csv.writer(spool_file, delimiter="\t", lineterminator="\n")
-            for row in reader:
-                if None in row or any(value is None for value in row.values()):
-                    raise AcpaConversionError("malformed_acpa_row")
-                probe_id = str(row["Probe Set ID"]).strip()
-                if not probe_id:
-                    skipped_row_count += 1
-                    continue
-                if any(character.isspace() for character in probe_id):
-                    raise AcpaConversionError("probe_id_contains_whitespace")
-                if probe_id in seen_probes:
-                    raise AcpaConversionError("duplicate_probe_in_source")
-                seen_probes.add(probe_id)
-                chromosome = _normalize_chromosome(str(row["Chromosome"]))
-                if chromosome not in AUTOSOMES:
-                    continue
-                try:
-                    position_bp = int(float(str(row["Chromosomal Position"]).strip()))
-                except ValueError:
-                    skipped_row_count += 1
-                    continue
-                if position_bp <= 0:
-                    skipped_row_count += 1
-                    continue
-                allele_1, allele_2 = _parse_genotype(
-                    str(row["Forward Strand Base Calls"])
-                )
-                if allele_1 == "0":
-                    invalid_genotype_count += 1
-                chromosome_marker_counts[chromosome] = (
-                    chromosome_marker_counts.get(chromosome, 0) + 1
-                )
-                if allele_1 != "0":
-                    chromosome_called_counts[chromosome] = (
-                        chromosome_called_counts.get(chromosome, 0) + 1
-                    )
-                rsid = str(row["dbSNP RS ID"]).strip()
-                if rsid.casefold() in {"", ".", "na", "nan", "none"}:
-                    rsid = ""
-                writer.writerow((probe_id, allele_1, allele_2))
-
-                marker = markers.get(probe_id)
-                if marker is None:
-                    marker = MarkerAggregate(probe_id, chromosome, position_bp)
-                    markers[probe_id] = marker
-                elif (
-                    marker.chromosome != chromosome
-                    or marker.position_bp != position_bp
-                ):
-                    marker.coordinate_conflict = True
-                marker.presence_count += 1
-                marker.observed_alleles.update(
-                    allele for allele in (allele_1, allele_2) if allele != "0"
+        calls = array("B")
+        for row in reader:
+            if None in row or any(value is None for value in row.values()):
+                raise AcpaConversionError("malformed_acpa_row")
+            probe_id = str(row["Probe Set ID"]).strip()
+            if not probe_id:
+                skipped_row_count += 1
+                continue
+            if any(character.isspace() for character in probe_id):
+                raise AcpaConversionError("probe_id_contains_whitespace")
+            if probe_id in seen_probes:
+                raise AcpaConversionError("duplicate_probe_in_source")
+            seen_probes.add(probe_id)
+            chromosome = _normalize_chromosome(str(row["Chromosome"]))
+            if chromosome not in AUTOSOMES:
+                continue
+            try:
+                position_bp = int(float(str(row["Chromosomal Position"]).strip()))
+            except ValueError:
+                skipped_row_count += 1
+                continue
+            if position_bp <= 0:
+                skipped_row_count += 1
+                continue
+            allele_1, allele_2 = _parse_genotype(
+                str(row["Forward Strand Base Calls"])
+            )
+            if allele_1 == "0":
+                invalid_genotype_count += 1
+            chromosome_marker_counts[chromosome] = (
+                chromosome_marker_counts.get(chromosome, 0) + 1
+            )
+            if allele_1 != "0":
+                chromosome_called_counts[chromosome] = (
+                    chromosome_called_counts.get(chromosome, 0) + 1
                 )
-                if rsid:
-                    marker.rsids.add(rsid)
+            rsid = str(row["dbSNP RS ID"]).strip()
+            if rsid.casefold() in {"", ".", "na", "nan", "none"}:
+                rsid = ""
+            calls.append(_CALL_CODES.get((allele_1, allele_2), MISSING_CALL))
+
+            marker = markers.get(probe_id)
+            if marker is None:
+                marker = MarkerAggregate(probe_id, chromosome, position_bp)
+                markers[probe_id] = marker
+            elif (
+                marker.chromosome != chromosome
+                or marker.position_bp != position_bp
+            ):
+                marker.coordinate_conflict = True
+            marker.presence_count += 1
+            marker.observed_alleles.update(
+                allele for allele in (allele_1, allele_2) if allele != "0"
+            )
+            if rsid:
+                marker.rsids.add(rsid)
+    spool_path.write_bytes(calls.tobytes())
     return (
         invalid_genotype_count,
         skipped_row_count,
@@ -230,6 +260,102 @@ def _read_source_to_spool(
     )
 
 
+def _read_source_partial(
+    source_path: Path,
+    spool_path: Path,
+    expected_assembly: str,
+) -> tuple[dict[str, MarkerAggregate], tuple[int, int, dict[str, int], dict[str, int]]]:
+    """Lit une source isolément et retourne son agrégat partiel de sondes."""
+    markers: dict[str, MarkerAggregate] = {}
+    metrics = _read_source_to_spool(source_path, spool_path, expected_assembly, markers)
+    return markers, metrics
+
+
+def _merge_marker_aggregates(
+    markers: dict[str, MarkerAggregate],
+    partial_markers: dict[str, MarkerAggregate],
+) -> np.ndarray:
+    """Fusionne l'agrégat d'une source et retourne le rang global de ses sondes.
+
+    Les sources sont fusionnées dans l'ordre du registre : les coordonnées de
+    référence restent celles de la première source qui contient la sonde, et
+    une nouvelle sonde reçoit le rang suivant.
+    """
+    ordinals = np.empty(len(partial_markers), dtype=np.int64)
+    for index, (probe_id, partial) in enumerate(partial_markers.items()):
+        marker = markers.get(probe_id)
+        if marker is None:
+            partial.ordinal = len(markers)
+            markers[probe_id] = partial
+            ordinals[index] = partial.ordinal
+            continue
+        if (
+            partial.coordinate_conflict
+            or marker.chromosome != partial.chromosome
+            or marker.position_bp != partial.position_bp
+        ):
+            marker.coordinate_conflict = True
+        marker.presence_count += partial.presence_count
+        marker.observed_alleles.update(partial.observed_alleles)
+        marker.rsids.update(partial.rsids)
+        ordinals[index] = marker.ordinal
+    return ordinals
+
+
+def _index_spool(spool_path: Path, ordinals: np.ndarray) -> None:
+    """Réécrit les appels d'une source au rang global de chaque sonde.
+
+    Les sondes découvertes dans des sources ultérieures ont un rang supérieur
+    à la longueur du fichier et sont lues comme manquantes.
+    """
+    local_calls = np.fromfile(spool_path, dtype=np.uint8)
+    global_calls = np.full(
+        int(ordinals.max()) + 1 if ordinals.size else 0, MISSING_CALL, dtype=np.uint8
+    )
+    global_calls[ordinals] = local_calls
+    global_calls.tofile(spool_path)
+
+
+def _read_sources(
+    sources: list[tuple[Path, Path]],
+    expected_assembly: str,
+    workers: int,
+) -> tuple[dict[str, MarkerAggregate], list[tuple[int, int, dict[str, int], dict[str, int]]]]:
+    """Lit toutes les sources, en série ou par un processus par source.
+
+    Chaque source produit un agrégat partiel fusionné dans l'ordre du registre :
+    les deux modes produisent des sorties identiques octet pour octet, seul le
+    nombre de cœurs occupés change.
+    """
+    markers: dict[str, MarkerAggregate] = {}
+    metrics = []
+    source_paths = [source_path for source_path, _ in sources]
+    spool_paths = [spool_path for _, spool_path in sources]
+    expected_assemblies = [expected_assembly] * len(sources)
+    if workers == 1 or len(sources) <= 1:
+        partial_results: Iterator[
+            tuple[dict[str, MarkerAggregate], tuple[int, int, dict[str, int], dict[str, int]]]
+        ] = map(_read_source_partial, source_paths, spool_paths, expected_assemblies)
+        executor = None
+    else:
+        executor = ProcessPoolExecutor(max_workers=min(workers, len(sources)))
+        # `map` restitue les résultats dans l'ordre des sources, quelle que soit
+        # la source terminée en premier.
+        partial_results = executor.map(
+            _read_source_partial, source_paths, spool_paths, expected_assemblies
+        )
+    try:
+        for spool_path, (partial_markers, source_metrics) in zip(
+            spool_paths, partial_results
+        ):
+            _index_spool(spool_path, _merge_marker_aggregates(markers, partial_markers))
+            metrics.append(source_metrics)
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+    return markers, metrics
+
+
 def _resolve_input_path(artifact: dict[str, Any], run_dir: Path) -> Path:
     artifact_path = Path(artifact["path"])
     if artifact_path.is_absolute():
@@ -323,11 +449,11 @@ def _select_markers(
     return genomewide, target, audit_rows
 
 
-def _load_spooled_calls(spool_path: Path) -> dict[str, tuple[str, str]]:
-    calls: dict[str, tuple[str, str]] = {}
-    with spool_path.open("r", encoding="utf-8", newline="") as spool_file:
-        for probe_id, allele_1, allele_2 in csv.reader(spool_file, delimiter="\t"):
-            calls[probe_id] = (allele_1, allele_2)
+def _load_spooled_calls(spool_path: Path, marker_count: int) -> np.ndarray:
+    """Retourne les codes d'appel d'un individu pour toutes les sondes connues."""
+    calls = np.zeros(marker_count, dtype=np.uint8)
+    spooled_calls = np.fromfile(spool_path, dtype=np.uint8)
+    calls[: spooled_calls.size] = spooled_calls
     return calls
 
 
@@ -355,27 +481,125 @@ def _write_ped_datasets(
     samples: list[SampleSpool],
     genomewide_markers: list[MarkerAggregate],
     target_markers: list[MarkerAggregate],
+    marker_count: int,
 ) -> None:
+    genomewide_ordinals = np.array(
+        [marker.ordinal for marker in genomewide_markers], dtype=np.int64
+    )
+    target_ordinals = np.array([marker.ordinal for marker in target_markers], dtype=np.int64)
     with genomewide_path.open("w", encoding="utf-8", newline="") as genome_file, (
         target_path.open("w", encoding="utf-8", newline="")
     ) as target_file:
         for sample in samples:
-            calls = _load_spooled_calls(sample.spool_path)
+            calls = _load_spooled_calls(sample.spool_path, marker_count)
             pedigree = _pedigree_columns(sample.row)
-            genome_genotypes = [
-                allele
-                for marker in genomewide_markers
-                for allele in calls.get(marker.probe_id, ("0", "0"))
-            ]
-            target_genotypes = [
-                allele
-                for marker in target_markers
-                for allele in calls.get(marker.probe_id, ("0", "0"))
-            ]
+            genome_genotypes = _CALL_TEXT[calls[genomewide_ordinals]].tolist()
+            target_genotypes = _CALL_TEXT[calls[target_ordinals]].tolist()
             genome_file.write("\t".join(pedigree + genome_genotypes) + "\n")
             target_file.write("\t".join(pedigree + target_genotypes) + "\n")
 
 
+def _native_alleles(
+    samples: list[SampleSpool],
+    marker_count: int,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Choisit A1/A2 comme PLINK : A1 mineur, A2 majeur, `-1` si absent.
+
+    À effectif égal, A1 est la première base dans l'ordre ACGT. Une sonde
+    monomorphe reçoit seulement un allèle A2.
+    """
+    base_counts = np.zeros(marker_count * 4, dtype=np.int64)
+    marker_indexes = np.arange(marker_count, dtype=np.int64)
+    for sample in samples:
+        calls = _load_spooled_calls(sample.spool_path, marker_count)
+        called = calls != MISSING_CALL
+        for bases in (_CALL_FIRST_BASE[calls], _CALL_SECOND_BASE[calls]):
+            base_counts += np.bincount(
+                marker_indexes[called] * 4 + bases[called], minlength=marker_count * 4
+            )
+    base_counts = base_counts.reshape(marker_count, 4)
+    # Les sondes retenues ont au plus deux allèles observés : le tri stable par
+    # effectif décroissant place l'allèle majeur en tête, ACGT départageant.
+    ranked_bases = np.argsort(-base_counts, axis=1, kind="stable")
+    major = ranked_bases[:, 0].astype(np.int8)
+    minor = ranked_bases[:, 1].astype(np.int8)
+    major_count = base_counts[marker_indexes, major]
+    minor_count = base_counts[marker_indexes, minor]
+    tie = minor_count == major_count
+    allele_1 = np.where(tie, np.minimum(major, minor), minor).astype(np.int8)
+    allele_2 = np.where(tie, np.maximum(major, minor), major).astype(np.int8)
+    allele_1[minor_count == 0] = -1
+    allele_2[major_count == 0] = -1
+    return allele_1, allele_2
+
+
+def _spooled_calls_at(spool_path: Path, ordinals: np.ndarray) -> np.ndarray:
+    """Lit les appels de quelques sondes par projection mémoire du fichier."""
+    calls = np.full(ordinals.size, MISSING_CALL, dtype=np.uint8)
+    spooled_size = spool_path.stat().st_size
+    if spooled_size:
+        spooled_calls = np.memmap(spool_path, dtype=np.uint8, mode="r")
+        inside = ordinals < spooled_size
+        calls[inside] = spooled_calls[ordinals[inside]]
+    return calls
+
+
+def _native_dosage_blocks(
+    samples: list[SampleSpool],
+    ordinals: np.ndarray,
+    allele_1: np.ndarray,
+) -> Iterator[np.ndarray]:
+    """Produit les dosages A1 individus × variants par blocs de sondes."""
+    for start in range(0, ordinals.size, NATIVE_BED_BLOCK_VARIANTS):
+        block_ordinals = ordinals[start : start + NATIVE_BED_BLOCK_VARIANTS]
+        block_allele_1 = allele_1[block_ordinals]
+        dosages = np.empty((len(samples), block_ordinals.size), dtype=np.int8)
+        for sample_index, sample in enumerate(samples):
+            calls = _spooled_calls_at(sample.spool_path, block_ordinals)
+            dosages[sample_index] = (
+                (_CALL_FIRST_BASE[calls] == block_allele_1).astype(np.int8)
+                + (_CALL_SECOND_BASE[calls] == block_allele_1)
+            )
+            dosages[sample_index, calls == MISSING_CALL] = MISSING_DOSAGE
+        yield dosages
+
+
+def _write_native_dataset(
+    prefix: Path,
+    samples: list[SampleSpool],
+    markers: list[MarkerAggregate],
+    allele_1: np.ndarray,
+    allele_2: np.ndarray,
+) -> None:
+    """Écrit `.bed/.bim/.fam` depuis les fichiers temporaires, sans PED/MAP."""
+    ordinals = np.array([marker.ordinal for marker in markers], dtype=np.int64)
+    with prefix.with_suffix(".fam").open("w", encoding="utf-8", newline="") as fam_file:
+        for sample in samples:
+            fam_file.write(" ".join(_pedigree_columns(sample.row)) + "\n")
+    with prefix.with_suffix(".bim").open("w", encoding="utf-8", newline="") as bim_file:
+        writer = csv.writer(bim_file, delimiter="\t", lineterminator="\n")
+        for marker in markers:
+            writer.writerow(
+                (
+                    marker.chromosome,
+                    marker.probe_id,
+                    "0",
+                    marker.position_bp,
+                    _allele_text(allele_1[marker.ordinal]),
+                    _allele_text(allele_2[marker.ordinal]),
+                )
+            )
+    write_plink_bed(
+        prefix.with_suffix(".bed"),
+        len(samples),
+        _native_dosage_blocks(samples, ordinals, allele_1),
+    )
+
+
+def _allele_text(base_index: int) -> str:
+    return "0" if base_index < 0 else _BASES[base_index]
+
+
 def _resolve_executable(command: str | None) -> str:
     if command is None:
         raise ExternalToolError("plink_not_configured")
@@ -400,6 +624,7 @@ def _plink_version(executable: str) -> str | None:
     return output.splitlines()[0][:500] if output else None
 
 
+@traced("plink", "tool")
 def _run_plink(executable: str, prefix: Path, timeout_seconds: int) -> None:
     try:
         completed = subprocess.run(
@@ -588,6 +813,12 @@ def execute(stage_inputs_path: Path, output_dir: Path) -> int:
     timeout_seconds = int(parameters.get("plink_timeout_seconds", 300))
     if timeout_seconds <= 0:
         raise AcpaConversionError("invalid_plink_timeout")
+    workers = parameters.get("workers", 1)
+    if isinstance(workers, bool) or not isinstance(workers, int) or workers <= 0:
+        raise AcpaConversionError("invalid_workers")
+    bed_writer = str(parameters.get("bed_writer", "plink"))
+    if bed_writer not in BED_WRITERS:
+        raise AcpaConversionError("invalid_bed_writer")
 
     samples_artifacts = [
         artifact
@@ -608,26 +839,30 @@ def execute(stage_inputs_path: Path, output_dir: Path) -> int:
     output_dir.mkdir(parents=True, exist_ok=True)
     spool_dir = output_dir / ".spool"
     spool_dir.mkdir()
-    markers: dict[str, MarkerAggregate] = {}
-    sample_spools: list[SampleSpool] = []
-    selected_input_artifacts = [samples_artifact]
+    sample_sources: list[tuple[dict[str, Any], dict[str, Any], Path, Path]] = []
     for row_index, row in enumerate(samples_table.rows, start=1):
         source_entry = source_artifacts.get(row["SOURCE_FILE"])
         if source_entry is None:
             raise AcpaConversionError("sample_source_not_declared")
         source_artifact, source_path = source_entry
-        spool_path = spool_dir / f"sample_{row_index:06d}.tsv"
+        spool_path = spool_dir / f"sample_{row_index:06d}.calls"
+        sample_sources.append((row, source_artifact, source_path, spool_path))
+    markers, source_metrics = _read_sources(
+        [(source_path, spool_path) for _, _, source_path, spool_path in sample_sources],
+        config["project"]["assembly"],
+        workers,
+    )
+    sample_spools: list[SampleSpool] = []
+    selected_input_artifacts = [samples_artifact]
+    for (row, source_artifact, _, spool_path), metrics in zip(
+        sample_sources, source_metrics
+    ):
         (
             invalid_count,
             skipped_count,
             chromosome_marker_counts,
             chromosome_called_counts,
-        ) = _read_source_to_spool(
-            source_path,
-            spool_path,
-            config["project"]["assembly"],
-            markers,
-        )
+        ) = metrics
         sample_spools.append(
             SampleSpool(
                 row=row,
@@ -654,20 +889,39 @@ def execute(stage_inputs_path: Path, output_dir: Path) -> int:
 
     genomewide_prefix = output_dir / "genomewide_base"
     target_prefix = output_dir / "target_chromosome_base"
-    _write_map(genomewide_prefix.with_suffix(".map"), genomewide_markers)
-    _write_map(target_prefix.with_suffix(".map"), target_markers)
-    _write_ped_datasets(
-        genomewide_prefix.with_suffix(".ped"),
-        target_prefix.with_suffix(".ped"),
-        sample_spools,
-        genomewide_markers,
-        target_markers,
-    )
-
-    plink_executable = _resolve_executable(config["tools"]["plink"])
-    plink_version = _plink_version(plink_executable)
-    _run_plink(plink_executable, genomewide_prefix, timeout_seconds)
-    _run_plink(plink_executable, target_prefix, timeout_seconds)
+    if bed_writer == "native":
+        allele_1, allele_2 = _native_alleles(sample_spools, len(markers))
+        for prefix, dataset_markers in (
+            (genomewide_prefix, genomewide_markers),
+            (target_prefix, target_markers),
+        ):
+            _write_native_dataset(
+                prefix, sample_spools, dataset_markers, allele_1, allele_2
+            )
+        tools: list[dict[str, Any]] = [
+            {"tool": "native_bed_writer", "configured": None, "version": None}
+        ]
+    else:
+        _write_map(genomewide_prefix.with_suffix(".map"), genomewide_markers)
+        _write_map(target_prefix.with_suffix(".map"), target_markers)
+        _write_ped_datasets(
+            genomewide_prefix.with_suffix(".ped"),
+            target_prefix.with_suffix(".ped"),
+            sample_spools,
+            genomewide_markers,
+            target_markers,
+            len(markers),
+        )
+        plink_executable = _resolve_executable(config["tools"]["plink"])
+        _run_plink(plink_executable, genomewide_prefix, timeout_seconds)
+        _run_plink(plink_executable, target_prefix, timeout_seconds)
+        tools = [
+            {
+                "tool": "plink",
+                "configured": config["tools"]["plink"],
+                "version": _plink_version(plink_executable),
+            }
+        ]
     _validate_plink_files(
         genomewide_prefix,
         samples_table.row_count,
@@ -891,13 +1145,7 @@ def execute(stage_inputs_path: Path, output_dir: Path) -> int:
         "inputs": selected_input_artifacts,
         "outputs": artifacts,
         "parameters": parameters,
-        "tools": [
-            {
-                "tool": "plink",
-                "configured": config["tools"]["plink"],
-                "version": plink_version,
-            }
-        ],
+        "tools": tools,
         "counts": {
             "samples": samples_table.row_count,
             "genomewide_variants": len(genomewide_markers),
@@ -14,7 +14,9 @@ from pathlib import Path, PurePosixPath
 from time import monotonic
 from typing import Any, Sequence
 
-from effet_fondateur.audit import atomic_write_json, read_json, sha256_file
+import numpy as np
+
+from effet_fondateur.audit import atomic_write_json, read_json, sha256_file, traced
 from effet_fondateur.contracts import (
     DocumentValidationError,
     TableValidationError,
@@ -23,6 +25,8 @@ from effet_fondateur.contracts import (
     validate_json_document,
     validate_tsv_table,
 )
+from effet_fondateur.io import open_plink_bed
+from effet_fondateur.kinship import king_robust_pairs
 from effet_fondateur.orchestrator.state import utc_now
 
 
@@ -86,6 +90,14 @@ DEGREE_ORDER = (
     "FOURTH",
     "UNRELATED",
 )
+KINSHIP_BACKENDS = ("king", "native")
+# Seuil de publication entre familles pour chaque valeur de `king_degree`.
+REPORTING_THRESHOLDS = {
+    1: "first_degree_min",
+    2: "second_degree_min",
+    3: "third_degree_min",
+    4: "fourth_degree_min",
+}
 RELATED_DEGREE_RANK = {
     "DUPLICATE_OR_MZ": 0,
     "FIRST": 1,
@@ -207,6 +219,9 @@ def _parameters(parameters: dict[str, Any]) -> dict[str, Any]:
     ]
     if any(left <= right for left, right in zip(ordered, ordered[1:])):
         raise KinshipInputError("kinship_thresholds_not_strictly_descending")
+    backend = parameters.get("kinship_backend", "king")
+    if backend not in KINSHIP_BACKENDS:
+        raise KinshipInputError("invalid_parameter:kinship_backend")
     return {
         "king_degree": king_degree,
         **thresholds,
@@ -218,6 +233,7 @@ def _parameters(parameters: dict[str, Any]) -> dict[str, Any]:
         "king_timeout_seconds": _positive_integer(
             parameters, "king_timeout_seconds", 300
         ),
+        "kinship_backend": backend,
     }
 
 
@@ -245,6 +261,7 @@ def _king_version(executable: str) -> str | None:
     return output.splitlines()[0][:500] if output else None
 
 
+@traced("king", "tool")
 def _run_king(
     executable: str,
     bed_path: Path,
@@ -293,6 +310,41 @@ def _read_king_table(path: Path, *, required: bool) -> list[dict[str, str]]:
     return [dict(zip(header, row, strict=True)) for row in lines[1:]]
 
 
+@traced("king_robust_native", "kinship")
+def _native_king_pairs(
+    bed_path: Path,
+    fam_rows: list[list[str]],
+    bim_rows: list[list[str]],
+    plink_to_sample: dict[tuple[str, str], str],
+    parameters: dict[str, Any],
+) -> list[dict[str, Any]]:
+    """Paires KING-robust calculées en processus, au format de `_parse_king_pairs`."""
+    bed = open_plink_bed(bed_path, len(fam_rows), len(bim_rows))
+    sample_ids = [plink_to_sample[(row[0], row[1])] for row in fam_rows]
+    pairs = []
+    for pair in king_robust_pairs(
+        bed,
+        [row[0] for row in fam_rows],
+        minimum_kinship=parameters[REPORTING_THRESHOLDS[parameters["king_degree"]]],
+        threads=parameters["threads"],
+    ):
+        pair_key = _normalized_pair(
+            sample_ids[pair.sample_index_1], sample_ids[pair.sample_index_2]
+        )
+        pairs.append(
+            {
+                "sample_id_1": pair_key[0],
+                "sample_id_2": pair_key[1],
+                "n_snp": pair.n_snp,
+                "hethet": pair.hethet,
+                "ibs0": pair.ibs0,
+                "kinship": pair.kinship,
+                "origin": "WITHIN_FAMILY" if pair.within_family else "BETWEEN_FAMILY",
+            }
+        )
+    return sorted(pairs, key=lambda pair: (pair["sample_id_1"], pair["sample_id_2"]))
+
+
 def _validate_panel_dataset(
     descriptor: dict[str, Any],
     paths: dict[str, Path],
@@ -808,7 +860,7 @@ def execute(stage_inputs_path: Path, output_dir: Path) -> int:
         for artifact_id, artifact in input_artifacts.items()
     }
     descriptor = read_json(paths["kinship_panel_dataset"])
-    fam_rows, _ = _validate_panel_dataset(descriptor, paths, input_artifacts)
+    fam_rows, bim_rows = _validate_panel_dataset(descriptor, paths, input_artifacts)
     ordered_sample_ids, samples, plink_to_sample, qc_by_sample = _sample_context(
         paths["samples_master"], paths["qc_individual_metrics"], fam_rows
     )
@@ -817,20 +869,32 @@ def execute(stage_inputs_path: Path, output_dir: Path) -> int:
     )
 
     output_dir.mkdir(parents=True, exist_ok=True)
-    king_executable = _resolve_executable(config["tools"]["king"])
-    king_version = _king_version(king_executable)
     king_prefix = output_dir / "king_kinship"
-    _run_king(
-        king_executable,
-        paths["kinship_panel_bed"],
-        king_prefix,
-        parameters["king_degree"],
-        parameters["threads"],
-        parameters["king_timeout_seconds"],
-    )
-    within_rows = _read_king_table(king_prefix.with_suffix(".kin"), required=False)
-    between_rows = _read_king_table(king_prefix.with_suffix(".kin0"), required=True)
-    king_pairs = _parse_king_pairs(within_rows, between_rows, plink_to_sample)
+    if parameters["kinship_backend"] == "native":
+        king_pairs = _native_king_pairs(
+            paths["kinship_panel_bed"], fam_rows, bim_rows, plink_to_sample, parameters
+        )
+        tools = [{"tool": "numpy", "version": np.__version__}]
+    else:
+        king_executable = _resolve_executable(config["tools"]["king"])
+        tools = [
+            {
+                "tool": "king",
+                "configured": config["tools"]["king"],
+                "version": _king_version(king_executable),
+            }
+        ]
+        _run_king(
+            king_executable,
+            paths["kinship_panel_bed"],
+            king_prefix,
+            parameters["king_degree"],
+            parameters["threads"],
+            parameters["king_timeout_seconds"],
+        )
+        within_rows = _read_king_table(king_prefix.with_suffix(".kin"), required=False)
+        between_rows = _read_king_table(king_prefix.with_suffix(".kin0"), required=True)
+        king_pairs = _parse_king_pairs(within_rows, between_rows, plink_to_sample)
     pair_rows = _pair_rows(king_pairs, samples, declared_parent_pairs, parameters)
     pedigree_rows = _pedigree_rows(declared_relations, pair_rows)
     degree_summary_rows = _degree_summary_rows(pair_rows)
@@ -955,13 +1019,7 @@ def execute(stage_inputs_path: Path, output_dir: Path) -> int:
         "inputs": list(input_artifacts.values()),
         "outputs": output_artifacts,
         "parameters": parameters,
-        "tools": [
-            {
-                "tool": "king",
-                "configured": config["tools"]["king"],
-                "version": king_version,
-            }
-        ],
+        "tools": tools,
         "counts": {
             "samples": len(ordered_sample_ids),
             "reported_pairs": len(pair_rows),
@@ -50,6 +50,7 @@ from effet_fondateur.references import (
     cache_reference_panel,
     extract_reference_window,
     harmonize_reference_window,
+    reference_window_store_dir,
     resolve_reference_panel,
 )
 
@@ -131,12 +132,19 @@ def _parameters(parameters: dict[str, Any]) -> dict[str, Any]:
         "reference_download_chunk_size": _positive_integer(
             parameters, "reference_download_chunk_size", 1_048_576
         ),
+        "reference_download_segments": _positive_integer(
+            parameters, "reference_download_segments", 1
+        ),
         "reference_extract_timeout_seconds": _positive_number(
             parameters, "reference_extract_timeout_seconds", 7_200
         ),
         "reference_extract_threads": _positive_integer(
             parameters, "reference_extract_threads", 1
         ),
+        "reference_window_store": _boolean(parameters, "reference_window_store", True),
+        "reference_window_store_fraction": _bounded_number(
+            parameters, "reference_window_store_fraction", 0.25, 0.0, 1.0
+        ),
         "minimum_common_variants": _positive_integer(
             parameters, "minimum_common_variants", 1
         ),
@@ -151,6 +159,15 @@ def _parameters(parameters: dict[str, Any]) -> dict[str, Any]:
         "shapeit5_effective_size": _positive_integer(
             parameters, "shapeit5_effective_size", 15_000
         ),
+        "shapeit5_chunk_size_cm": _positive_number(
+            parameters, "shapeit5_chunk_size_cm", 20.0
+        ),
+        "shapeit5_chunk_overlap_cm": _positive_number(
+            parameters, "shapeit5_chunk_overlap_cm", 2.0
+        ),
+        "shapeit5_maximum_chunk_switch_rate": _bounded_number(
+            parameters, "shapeit5_maximum_chunk_switch_rate", 0.1, 0.0, 1.0
+        ),
         "minimum_phase_confidence": _bounded_number(
             parameters, "minimum_phase_confidence", 0.9, 0.5, 1.0
         ),
@@ -530,6 +547,7 @@ def execute(stage_inputs_path: Path, output_dir: Path) -> int:
         lock_timeout_seconds=parameters["reference_lock_timeout_seconds"],
         download_timeout_seconds=parameters["reference_download_timeout_seconds"],
         chunk_size=parameters["reference_download_chunk_size"],
+        download_segments=parameters["reference_download_segments"],
     )
     bcftools_command = config["tools"]["bcftools"]
     if not isinstance(bcftools_command, str) or not bcftools_command:
@@ -543,6 +561,13 @@ def execute(stage_inputs_path: Path, output_dir: Path) -> int:
         bcftools_command=bcftools_command,
         threads=parameters["reference_extract_threads"],
         timeout_seconds=parameters["reference_extract_timeout_seconds"],
+        store_dir=(
+            reference_window_store_dir(cached)
+            if parameters["reference_window_store"]
+            else None
+        ),
+        store_budget_fraction=parameters["reference_window_store_fraction"],
+        store_lock_timeout_seconds=parameters["reference_lock_timeout_seconds"],
     )
     harmonized = harmonize_reference_window(
         reference_window,
@@ -608,6 +633,9 @@ def execute(stage_inputs_path: Path, output_dir: Path) -> int:
         effective_size=parameters["shapeit5_effective_size"],
         minimum_phase_confidence=parameters["minimum_phase_confidence"],
         timeout_seconds=parameters["shapeit5_execution_timeout_seconds"],
+        chunk_size_cm=parameters["shapeit5_chunk_size_cm"],
+        chunk_overlap_cm=parameters["shapeit5_chunk_overlap_cm"],
+        maximum_chunk_switch_rate=parameters["shapeit5_maximum_chunk_switch_rate"],
     )
     published_phasing_qc = publish_phasing_qc(
         inputs_manifest_path=prepared_shapeit5.manifest_path,
@@ -722,6 +750,9 @@ def execute(stage_inputs_path: Path, output_dir: Path) -> int:
             ],
             "shapeit5_target_role": shapeit5_manifest["target_variant_role"],
             "shapeit5_input_region": shapeit5_manifest["input_region"],
+            "shapeit5_common_chunks": len(
+                shapeit5_phasing_manifest["chunking"]["chunks"]
+            ),
             "minimum_phase_confidence": parameters["minimum_phase_confidence"],
         },
         "exclusions": [
@@ -18,7 +18,7 @@ from typing import Any, Sequence
 
 import yaml
 
-from effet_fondateur.audit import atomic_write_json, read_json, sha256_file
+from effet_fondateur.audit import atomic_write_json, read_json, sha256_file, traced
 from effet_fondateur.contracts import (
     DocumentValidationError,
     TableValidationError,
@@ -287,6 +287,7 @@ def _plink_version(executable: str) -> str | None:
     return output[0][:200] if output else None
 
 
+@traced("plink", "tool")
 def _run_plink(executable: str, arguments: list[str], timeout_seconds: int) -> None:
     try:
         completed = subprocess.run(
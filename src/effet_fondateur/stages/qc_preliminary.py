@@ -16,7 +16,7 @@ from pathlib import Path, PurePosixPath
 from time import monotonic
 from typing import Any, Sequence
 
-from effet_fondateur.audit import atomic_write_json, read_json, sha256_file
+from effet_fondateur.audit import atomic_write_json, read_json, sha256_file, traced
 from effet_fondateur.contracts import (
     DocumentValidationError,
     TableValidationError,
@@ -281,6 +281,7 @@ def _plink_version(executable: str) -> str | None:
     return output.splitlines()[0][:500] if output else None
 
 
+@traced("plink", "tool")
 def _run_plink(executable: str, arguments: list[str], timeout_seconds: int) -> None:
     try:
         completed = subprocess.run(
@@ -985,7 +986,7 @@ def execute(stage_inputs_path: Path, output_dir: Path) -> int:
     _write_tsv(batch_summary_path, BATCH_COLUMNS, batch_rows)
     _write_tsv(alerts_path, ALERT_COLUMNS, alerts)
     validate_tsv_table(individual_path, "qc_individual_metrics.schema.json")
-    validate_tsv_table(variant_path, "qc_variant_metrics.schema.json")
+    variant_table = validate_tsv_table(variant_path, "qc_variant_metrics.schema.json")
     validate_tsv_table(batch_summary_path, "qc_batch_summary.schema.json")
     validate_tsv_table(alerts_path, "qc_alerts.schema.json")
 
@@ -1113,6 +1114,9 @@ def execute(stage_inputs_path: Path, output_dir: Path) -> int:
                 sample_set_id=base_descriptor["sample_set_id"],
                 variant_set_id=base_descriptor["variant_set_id"],
                 sensitivity="sensitive_genetic",
+                columnar_table=(
+                    variant_table if artifact_id == "qc_variant_metrics" else None
+                ),
             )
         )
     stage_outputs = {
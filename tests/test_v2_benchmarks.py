@@ -0,0 +1,52 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from benchmarks import cohorts
+from benchmarks.cohorts import BenchmarkError, CohortSize, validate_cohort_size
+from benchmarks.runner import main
+from effet_fondateur.contracts import validate_tsv_table
+
+
+TINY = CohortSize(samples=12, markers=60, carriers=4)
+
+
+def test_synthetic_cohorts_are_deterministic_and_satisfy_contracts(tmp_path: Path) -> None:
+    first = cohorts.write_founder_inputs(TINY, tmp_path / "first")
+    second = cohorts.write_founder_inputs(TINY, tmp_path / "second")
+
+    for name in ("map", "carriers", "cohorts", "samples"):
+        assert first[name].read_bytes() == second[name].read_bytes()
+    assert (tmp_path / "first" / "query.txt").read_bytes() == (
+        tmp_path / "second" / "query.txt"
+    ).read_bytes()
+    assert validate_tsv_table(first["map"], "target_genetic_map.schema.json").row_count == 60
+    assert validate_tsv_table(first["cohorts"], "cohorts_frozen.schema.json").row_count == 12
+    metrics_path = cohorts.write_variant_metrics(TINY, tmp_path / "metrics.tsv")
+    assert validate_tsv_table(metrics_path, "qc_variant_metrics.schema.json").row_count == 60
+    with pytest.raises(BenchmarkError, match="benchmark_too_few_samples"):
+        validate_cohort_size(CohortSize(samples=5, markers=60, carriers=4))
+
+
+def test_runner_appends_wall_time_and_peak_rss_to_history(
+    tmp_path: Path, capsys: pytest.CaptureFixture[str],
+) -> None:
+    history_path = tmp_path / "history.json"
+    arguments = [
+        "--samples", "12", "--markers", "60", "--carriers", "4", "--repeat", "1",
+        "--case", "founder_ibs", "--case", "gamma_correlated",
+        "--history", str(history_path), "--work-dir", str(tmp_path / "work"),
+    ]
+
+    assert main(arguments) == 0
+    assert main([*arguments, "--label", "second"]) == 0
+
+    history = json.loads(history_path.read_text(encoding="utf-8"))
+    assert [run["label"] for run in history["runs"]] == [None, "second"]
+    results = history["runs"][1]["results"]
+    assert [result["case"] for result in results] == ["founder_ibs", "gamma_correlated"]
+    assert all(result["wall_seconds"][0] > 0 for result in results)
+    assert all(result["peak_rss_bytes"] >= result["baseline_rss_bytes"] > 0 for result in results)
+    assert results[0]["size"] == TINY.as_dict()
+    assert "vs précédent" in capsys.readouterr().out
@@ -6,6 +6,7 @@ from pathlib import Path
 import pytest
 import yaml
 
+from effet_fondateur.io import MISSING_DOSAGE, open_plink_bed
 from effet_fondateur.orchestrator import StageExecutionError
 from effet_fondateur.orchestrator.pipeline import run_pipeline
 
@@ -100,6 +101,8 @@ def write_config(
     *,
     marker_mode: str = "intersection",
     approved: bool = True,
+    workers: int = 1,
+    bed_writer: str = "plink",
 ) -> None:
     config = yaml.safe_load(
         (REPOSITORY_ROOT / "config" / "pipeline.example.yaml").read_text(
@@ -125,7 +128,11 @@ def write_config(
     }
     config["stages"]["convert_acpa"] = {
         "enabled": True,
-        "parameters": {"marker_mode": marker_mode},
+        "parameters": {
+            "marker_mode": marker_mode,
+            "workers": workers,
+            "bed_writer": bed_writer,
+        },
     }
     path.write_text(
         yaml.safe_dump(config, allow_unicode=True, sort_keys=False),
@@ -141,6 +148,8 @@ def prepare_inputs(
     marker_mode: str = "intersection",
     approved: bool = True,
     plink_fails: bool = False,
+    workers: int = 1,
+    bed_writer: str = "plink",
 ) -> tuple[Path, Path]:
     source_dir = tmp_path / "sources"
     write_acpa_source(source_dir / "sample_1.txt", sample_1_rows or acpa_rows())
@@ -157,6 +166,8 @@ def prepare_inputs(
         plink_path,
         marker_mode=marker_mode,
         approved=approved,
+        workers=workers,
+        bed_writer=bed_writer,
     )
     return config_path, tmp_path / "runs"
 
@@ -238,6 +249,67 @@ def test_coordinate_conflict_is_excluded_from_both_datasets(tmp_path: Path) -> N
     assert extra_marker["EXCLUSION_CODE"] == "coordinate_conflict"
 
 
+def test_worker_processes_match_sequential_conversion_byte_for_byte(
+    tmp_path: Path,
+) -> None:
+    published = {}
+    for workers in (1, 2):
+        config_path, runs_dir = prepare_inputs(
+            tmp_path / f"workers_{workers}",
+            sample_1_rows=acpa_rows(invalid_chromosome_1_genotype=True),
+            sample_2_rows=acpa_rows(extra_position=1960),
+            marker_mode="union",
+            workers=workers,
+        )
+        stage_dir = run_pipeline(config_path, runs_dir) / "stages" / "03_convert_acpa"
+        published[workers] = {
+            name: (stage_dir / name).read_bytes()
+            for name in (
+                "genomewide_base.bed",
+                "genomewide_base.bim",
+                "target_chromosome_base.bim",
+                "acpa_variant_audit.tsv",
+                "sample_alignment.tsv",
+                "acpa_sample_chromosome_qc.tsv",
+            )
+        }
+
+    assert published[2] == published[1]
+    assert b"coordinate_conflict" in published[2]["acpa_variant_audit.tsv"]
+
+
+def test_native_bed_writer_encodes_minor_allele_dosages(tmp_path: Path) -> None:
+    config_path, runs_dir = prepare_inputs(
+        tmp_path,
+        sample_1_rows=acpa_rows(invalid_chromosome_1_genotype=True),
+        marker_mode="union",
+        plink_fails=True,
+        bed_writer="native",
+    )
+
+    run_dir = run_pipeline(config_path, runs_dir)
+
+    stage_dir = run_dir / "stages" / "03_convert_acpa"
+    bim_rows = [
+        line.split("\t")
+        for line in (stage_dir / "genomewide_base.bim").read_text().splitlines()
+    ]
+    # Sondes monomorphes : A1 absent ; sonde AG équilibrée : A1 = A par ordre ACGT.
+    assert bim_rows[0] == ["1", "probe_1", "0", "100", "0", "A"]
+    extra_index = next(
+        index for index, row in enumerate(bim_rows) if row[1] == "probe_target_extra"
+    )
+    assert bim_rows[extra_index][4:] == ["A", "G"]
+    assert (stage_dir / "genomewide_base.fam").read_text().splitlines()[0] == (
+        "FAM1 I1 0 0 1 2"
+    )
+    dosages = open_plink_bed(stage_dir / "genomewide_base.bed", 2, len(bim_rows)).read_dosages()
+    assert dosages[:, 0].tolist() == [MISSING_DOSAGE, 0]
+    assert dosages[:, extra_index].tolist() == [1, 1]
+    assert not list(stage_dir.glob("*.ped"))
+    assert read_manifest(run_dir)["global_status"] == "TECHNICALLY_VALID"
+
+
 def test_invalid_genotype_is_converted_to_missing_and_audited(tmp_path: Path) -> None:
     config_path, runs_dir = prepare_inputs(
         tmp_path,
@@ -5,6 +5,11 @@ from pathlib import Path
 
 from effet_fondateur.contracts import validate_tsv_table
 from effet_fondateur.founder import infer_target_centered_ibs
+from effet_fondateur.founder.haplotypes import (
+    BOTH_HAPLOTYPES,
+    HaplotypeMatrix,
+    decode_phased_genotypes,
+)
 
 
 def _write_tsv(path: Path, columns: list[str], rows: list[list[str]]) -> None:
@@ -161,3 +166,31 @@ def test_exact_ibs_refuses_founder_conclusion_when_carriers_are_insufficient(
         result.consensus_path, "founder_consensus.schema.json"
     ).rows[0]
     assert consensus["INTERPRETATION"] == "NO_FOUNDER_CONCLUSION"
+
+
+def test_bit_planes_extend_segments_across_byte_boundaries() -> None:
+    # Vingt marqueurs, cible en position 10 : les segments franchissent les
+    # octets compactés dans les deux directions.
+    genotype_rows = []
+    for marker in range(20):
+        first = "1|0" if marker not in {2, 17} else "0|0"
+        second = "1|1" if marker != 15 else "1|."
+        control = "0|1" if marker != 5 else "./."
+        genotype_rows.append([first, second, control])
+    decoded = [decode_phased_genotypes(row) for row in genotype_rows]
+    matrix = HaplotypeMatrix.from_marker_rows(
+        [alleles for alleles, _ in decoded],
+        [called for _, called in decoded],
+        list(range(20)),
+    )
+    carriers = matrix.select(((0, 0), (1, BOTH_HAPLOTYPES)))
+
+    left, right = matrix.segment_bounds(carriers.consensus_mismatches()[None, :], 10)
+    pair_left, pair_right = matrix.segment_bounds(carriers.pairwise_mismatches(slice(0, 2)), 10)
+
+    assert (int(left[0]), int(right[0])) == (3, 14)
+    assert pair_left.tolist() == [[0, 3], [3, 0]]
+    assert pair_right.tolist() == [[19, 14], [14, 14]]
+    background = matrix.select(((2, 0), (2, 1)))
+    assert matrix.signature_matches(carriers, background, [8, 9, 11]) == (2, 1)
+    assert matrix.signature_matches(carriers, background, [4, 5, 6]) == (0, 0)
@@ -3,9 +3,12 @@ import json
 import sys
 from pathlib import Path
 
+import numpy as np
 import pytest
 import yaml
 
+from effet_fondateur.io import open_plink_bed, write_plink_bed
+from effet_fondateur.kinship import king_robust_pairs
 from effet_fondateur.orchestrator import StageExecutionError
 from effet_fondateur.orchestrator.pipeline import run_pipeline
 from effet_fondateur.stages.infer_kinship import _classify_relationship
@@ -253,3 +256,86 @@ def test_king_degree_boundaries_are_inclusive() -> None:
     assert _classify_relationship(0.0442, 0.1, parameters)[0] == "THIRD"
     assert _classify_relationship(0.0221, 0.1, parameters)[0] == "FOURTH"
     assert _classify_relationship(0.02, 0.1, parameters)[0] == "UNRELATED"
+
+
+def _king_oracle(
+    first: np.ndarray, second: np.ndarray, within: bool
+) -> tuple[int, float, float, float] | None:
+    observed = (first >= 0) & (second >= 0)
+    first, second = first[observed], second[observed]
+    hethet = int(np.sum((first == 1) & (second == 1)))
+    opposite = int(np.sum(np.abs(first.astype(int) - second) == 2))
+    het_1, het_2 = int(np.sum(first == 1)), int(np.sum(second == 1))
+    if within:
+        if het_1 + het_2 == 0:
+            return None
+        kinship = (hethet - 2 * opposite) / (het_1 + het_2)
+    else:
+        if min(het_1, het_2) == 0:
+            return None
+        kinship = 0.5 - (het_1 + het_2 - 2 * hethet + 4 * opposite) / (4 * min(het_1, het_2))
+    return observed.sum(), hethet / observed.sum(), opposite / observed.sum(), kinship
+
+
+def test_native_king_tiles_match_per_pair_estimators(tmp_path: Path) -> None:
+    generator = np.random.default_rng(7)
+    dosages = generator.binomial(2, 0.3, size=(11, 60)).astype(np.int8)
+    dosages[3] = dosages[0]
+    dosages[5, :30] = dosages[4, :30]
+    dosages[generator.random(dosages.shape) < 0.05] = -1
+    dosages[9] = 0
+    families = ["F1", "F1", "F2", "F3", "F4", "F4", "F5", "F6", "F7", "F8", "F8"]
+    write_plink_bed(tmp_path / "panel.bed", 11, [dosages[:, :25], dosages[:, 25:]])
+    bed = open_plink_bed(tmp_path / "panel.bed", 11, 60)
+
+    pairs = king_robust_pairs(
+        bed,
+        families,
+        minimum_kinship=0.0221,
+        threads=3,
+        tile_sample_count=4,
+        block_variant_count=7,
+    )
+
+    expected = []
+    for first in range(11):
+        for second in range(first + 1, 11):
+            within = families[first] == families[second]
+            statistics = _king_oracle(dosages[first], dosages[second], within)
+            if statistics is not None and (within or statistics[3] >= 0.0221):
+                expected.append((first, second, *statistics, within))
+    assert [
+        (pair.sample_index_1, pair.sample_index_2, pair.n_snp) for pair in pairs
+    ] == [row[:3] for row in expected]
+    assert np.allclose(
+        [(pair.hethet, pair.ibs0, pair.kinship) for pair in pairs],
+        [row[3:6] for row in expected],
+    )
+    assert [pair.within_family for pair in pairs] == [row[6] for row in expected]
+    by_indexes = {(pair.sample_index_1, pair.sample_index_2): pair for pair in pairs}
+    assert by_indexes[(0, 3)].kinship == pytest.approx(0.5)
+    assert not any(9 in indexes for indexes in by_indexes if not by_indexes[indexes].within_family)
+
+
+def test_native_backend_runs_without_king_binary(tmp_path: Path) -> None:
+    config_path, runs_dir = prepare_kinship_inputs(tmp_path, declared_parent=True)
+    config = yaml.safe_load(config_path.read_text(encoding="utf-8"))
+    config["tools"]["king"] = None
+    config["stages"]["infer_kinship"]["parameters"]["kinship_backend"] = "native"
+    config_path.write_text(
+        yaml.safe_dump(config, allow_unicode=True, sort_keys=False),
+        encoding="utf-8",
+    )
+
+    run_dir = run_pipeline(config_path, runs_dir)
+
+    stage_dir = run_dir / "stages" / "07_infer_kinship"
+    pairs = read_tsv(stage_dir / "kinship_pairs.tsv")
+    assert any(row["PAIR_ORIGIN"] == "WITHIN_FAMILY" for row in pairs)
+    assert all(0 < int(row["N_SNP"]) <= 22 for row in pairs)
+    pedigree = read_tsv(stage_dir / "pedigree_concordance.tsv")
+    assert pedigree[0]["CONCORDANCE_STATUS"] != "NOT_EVALUATED_KING_PAIR_MISSING"
+    audit = json.loads((stage_dir / "audit.json").read_text(encoding="utf-8"))
+    assert [tool["tool"] for tool in audit["tools"]] == ["numpy"]
+    assert audit["parameters"]["kinship_backend"] == "native"
+    assert not list(stage_dir.glob("king_kinship.*"))
@@ -0,0 +1,69 @@
+import subprocess
+import sys
+import time
+
+import pytest
+
+from effet_fondateur.io import (
+    CommandStreamError,
+    buffered_command_lines,
+    stream_command_lines,
+    stream_query_rows,
+)
+
+
+def _python(code: str) -> list[str]:
+    return [sys.executable, "-c", code]
+
+
+def test_query_rows_are_streamed_as_tab_separated_fields() -> None:
+    command = _python("import sys\nfor index in range(3): print(f'chr19\\t{index}\\tA')")
+
+    assert list(stream_query_rows(command, 30)) == [
+        ["chr19", "0", "A"],
+        ["chr19", "1", "A"],
+        ["chr19", "2", "A"],
+    ]
+
+
+def test_stream_failure_is_raised_after_the_last_line() -> None:
+    lines = stream_command_lines(_python("print('partial')\nraise SystemExit(3)"), 30)
+
+    assert next(lines) == "partial"
+    with pytest.raises(CommandStreamError) as error:
+        next(lines)
+    assert error.value.return_code == 3
+
+
+def test_stream_timeout_and_missing_executable_have_no_return_code(tmp_path) -> None:
+    started = time.monotonic()
+    with pytest.raises(CommandStreamError) as timeout_error:
+        list(stream_command_lines(_python("import time\ntime.sleep(30)"), 0.5))
+    assert timeout_error.value.return_code is None
+    assert time.monotonic() - started < 10
+
+    with pytest.raises(CommandStreamError) as missing_error:
+        list(stream_command_lines([str(tmp_path / "absent")], 30))
+    assert missing_error.value.return_code is None
+
+
+def test_abandoned_stream_stops_the_producer() -> None:
+    lines = stream_command_lines(_python("while True: print('x' * 1000)"), 30)
+
+    assert next(lines) == "x" * 1000
+    started = time.monotonic()
+    lines.close()
+    assert time.monotonic() - started < 10
+
+
+def test_buffered_runner_exposes_the_streaming_interface() -> None:
+    def runner(command, timeout_seconds):
+        code = 0 if command[0] == "ok" else 2
+        return subprocess.CompletedProcess(list(command), code, "a\tb\nc\td\n", "")
+
+    streamer = buffered_command_lines(runner)
+
+    assert list(stream_query_rows(["ok"], 1, streamer)) == [["a", "b"], ["c", "d"]]
+    with pytest.raises(CommandStreamError) as error:
+        list(streamer(["fail"], 1))
+    assert error.value.return_code == 2
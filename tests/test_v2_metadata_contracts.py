@@ -1,13 +1,25 @@
+import json
+import random
 from pathlib import Path
 
+import jsonschema
+import numpy as np
 import pytest
 
+from effet_fondateur.audit import sha256_file
 from effet_fondateur.cli import main
 from effet_fondateur.contracts import (
     TableValidationError,
+    build_file_artifact,
+    load_table_columns,
+    stream_tsv_table,
     validate_cohorts_frozen,
     validate_samples_master,
+    validate_tsv_table,
 )
+from effet_fondateur.contracts.documents import DEFAULT_SCHEMAS_DIR
+from effet_fondateur.contracts.row_checks import compile_schema_check
+from effet_fondateur.contracts.sidecars import table_sidecar_path
 
 
 SAMPLES_HEADER = (
@@ -197,3 +209,173 @@ def test_validate_samples_cli_reports_only_row_count(
 
     assert exit_code == 0
     assert capsys.readouterr().out == "Table maître valide : 2 lignes\n"
+
+
+def test_compiled_row_checks_agree_with_jsonschema_on_every_table_schema() -> None:
+    generator = random.Random(17)
+    for schema_path in sorted(DEFAULT_SCHEMAS_DIR.glob("*.schema.json")):
+        schema = json.loads(schema_path.read_text(encoding="utf-8"))
+        if "x-tsv" not in schema:
+            continue
+        row_schema = {"$schema": schema["$schema"], "$defs": schema["$defs"], **schema["$defs"]["row"]}
+        check = compile_schema_check(row_schema)
+        assert check is not None, schema_path.name
+        validator = jsonschema.Draft202012Validator(row_schema)
+        literals = {
+            value for value in json.dumps(schema).split('"') if value.isupper() or value.islower()
+        }
+        candidates = sorted(literals) + ["", "0", "1", "0.5", "1e-5", "A/G", "1|0", None, True, False]
+        columns = schema["x-tsv"]["columns"]
+        for _ in range(300):
+            row = {column: generator.choice(candidates) for column in columns}
+            assert check(row) == validator.is_valid(row), schema_path.name
+
+
+def test_table_schema_outside_compiled_subset_falls_back_to_jsonschema(tmp_path: Path) -> None:
+    schema = json.loads((DEFAULT_SCHEMAS_DIR / "qc_alerts.schema.json").read_text(encoding="utf-8"))
+    first_column = schema["x-tsv"]["columns"][0]
+    schema["$defs"]["row"]["properties"][first_column] = {"type": "string", "multipleOf": 2}
+    (tmp_path / "custom.schema.json").write_text(json.dumps(schema), encoding="utf-8")
+    row_schema = {"$schema": schema["$schema"], "$defs": schema["$defs"], **schema["$defs"]["row"]}
+    assert compile_schema_check(row_schema) is None
+
+    table_path = tmp_path / "alerts.tsv"
+    columns = schema["x-tsv"]["columns"]
+    table_path.write_text(
+        "\t".join(columns) + "\n\n" + "\t".join("" for _ in columns) + "\n", encoding="utf-8"
+    )
+
+    # La ligne vide est ignorée : la première ligne de données reste la ligne 2.
+    with pytest.raises(TableValidationError, match="^Ligne 2, colonne "):
+        validate_tsv_table(table_path, "custom.schema.json", tmp_path)
+
+
+def test_table_stream_projects_filters_and_still_validates_every_row(tmp_path: Path) -> None:
+    table_path = tmp_path / "samples.master.tsv"
+    write_valid_samples(table_path, tmp_path / "sources")
+
+    stream = stream_tsv_table(
+        table_path, "samples_master.schema.json",
+        columns=("SAMPLE_ID", "TARGET_GENOTYPE"),
+        where=lambda row: row["TARGET_GENOTYPE"] is not None,
+    )
+    with pytest.raises(TableValidationError, match="non entièrement validée"):
+        stream.sha256
+
+    assert list(stream) == [{"SAMPLE_ID": "sample_parent", "TARGET_GENOTYPE": "A/G"}]
+    assert stream.row_count == 2
+    assert stream.sha256 == sha256_file(table_path)
+    with pytest.raises(TableValidationError, match="déjà parcouru"):
+        list(stream)
+    with pytest.raises(TableValidationError, match="projection absentes"):
+        stream_tsv_table(table_path, "samples_master.schema.json", columns=("UNKNOWN",))
+
+    # Une ligne écartée par le filtre reste soumise au contrat complet.
+    table_path.write_text(
+        table_path.read_text(encoding="utf-8").replace("UNKNOWN\tAFFECTED", "X\tAFFECTED"),
+        encoding="utf-8",
+    )
+    filtered = stream_tsv_table(
+        table_path, "samples_master.schema.json", where=lambda row: row["SAMPLE_ID"] == "none"
+    )
+    with pytest.raises(TableValidationError, match="^Ligne 3, colonne SEX "):
+        filtered.consume()
+
+
+LD_PAIRS_HEADER = (
+    "COHORT_ID\tVARIANT_A\tVARIANT_B\tPOSITION_A_BP\tPOSITION_B_BP\tPOSITION_A_CM\t"
+    "POSITION_B_CM\tDISTANCE_BP\tDISTANCE_CM\tCALLED_SAMPLE_COUNT\tR2_GENOTYPE\t"
+    "R2_HAPLOTYPE_ML\tD_PRIME_ABS\tINVOLVES_TARGET\tPAIR_STATUS\n"
+)
+
+
+def test_columnar_sidecar_is_used_only_while_it_matches_the_tsv(tmp_path: Path) -> None:
+    table_path = tmp_path / "local_ld_pairs.tsv"
+    table_path.write_text(
+        LD_PAIRS_HEADER
+        + "controls\tv1\tv2\t100\t200\t0.1\t0.2\t100\t0.1\t40\t0.25\t0.3\t1\ttrue\tEVALUATED\n"
+        + "controls\tv1\tv3\t100\t300\t0.1\t0.3\t200\t0.2\t12\t\t\t\tfalse\tLOW_MAF\n",
+        encoding="utf-8",
+    )
+    table = validate_tsv_table(table_path, "local_ld_pairs.schema.json")
+    artifact = build_file_artifact(
+        table_path, "stages/ld/local_ld_pairs.tsv", "local_ld_pairs", "local_ld_pairs",
+        "text/tab-separated-values", "analyze_local_ld", "0" * 64,
+        schema_name="local_ld_pairs.schema.json", columnar_table=table,
+    )
+    assert artifact["sha256"] == sha256_file(table_path)
+    assert artifact["columnar_sidecar_sha256"] == sha256_file(table_sidecar_path(table_path))
+
+    columns = load_table_columns(
+        table_path, "local_ld_pairs.schema.json", expected_sha256=artifact["sha256"],
+        expected_sidecar_sha256=artifact["columnar_sidecar_sha256"],
+    )
+    assert columns.from_sidecar
+    assert columns.rows() == validate_tsv_table(table_path, "local_ld_pairs.schema.json").rows
+    assert columns.numbers["CALLED_SAMPLE_COUNT"].tolist() == [40.0, 12.0]
+    assert columns.nulls["R2_GENOTYPE"].tolist() == [False, True]
+    assert columns.flags["INVOLVES_TARGET"].tolist() == [True, False]
+    assert "PAIR_STATUS" not in columns.numbers
+
+    # Un TSV modifié rend le compagnon périmé : la table est revalidée depuis le texte.
+    table_path.write_text(
+        table_path.read_text(encoding="utf-8").replace("\t40\t", "\t41\t"), encoding="utf-8"
+    )
+    reloaded = load_table_columns(
+        table_path, "local_ld_pairs.schema.json",
+        expected_sidecar_sha256=artifact["columnar_sidecar_sha256"],
+    )
+    assert not reloaded.from_sidecar
+    assert reloaded.numbers["CALLED_SAMPLE_COUNT"].tolist() == [41.0, 12.0]
+    # La table validée avant la modification ne peut plus décrire le fichier.
+    with pytest.raises(TableValidationError, match="sans rapport"):
+        build_file_artifact(
+            table_path, "stages/ld/local_ld_pairs.tsv", "local_ld_pairs", "local_ld_pairs",
+            "text/tab-separated-values", "analyze_local_ld", "0" * 64,
+            schema_name="local_ld_pairs.schema.json", columnar_table=table,
+        )
+    table_sidecar_path(table_path).unlink()
+    with pytest.raises(TableValidationError, match="Empreinte TSV inattendue"):
+        load_table_columns(
+            table_path, "local_ld_pairs.schema.json", expected_sha256=artifact["sha256"]
+        )
+
+
+def test_tampered_sidecar_with_copied_metadata_falls_back_to_tsv(tmp_path: Path) -> None:
+    table_path = tmp_path / "local_ld_pairs.tsv"
+    table_path.write_text(
+        LD_PAIRS_HEADER
+        + "controls\tv1\tv2\t100\t200\t0.1\t0.2\t100\t0.1\t40\t0.25\t0.3\t1\ttrue\tEVALUATED\n",
+        encoding="utf-8",
+    )
+    table = validate_tsv_table(table_path, "local_ld_pairs.schema.json")
+    artifact = build_file_artifact(
+        table_path, "stages/ld/local_ld_pairs.tsv", "local_ld_pairs", "local_ld_pairs",
+        "text/tab-separated-values", "analyze_local_ld", "0" * 64,
+        schema_name="local_ld_pairs.schema.json", columnar_table=table,
+    )
+    rebuilt = build_file_artifact(
+        table_path, "stages/ld/local_ld_pairs.tsv", "local_ld_pairs", "local_ld_pairs",
+        "text/tab-separated-values", "analyze_local_ld", "0" * 64,
+        schema_name="local_ld_pairs.schema.json", columnar_table=table,
+    )
+    assert rebuilt["columnar_sidecar_sha256"] == artifact["columnar_sidecar_sha256"]
+    sidecar_path = table_sidecar_path(table_path)
+    with np.load(sidecar_path, allow_pickle=False) as archive:
+        payload = {name: archive[name] for name in archive.files}
+    status_index = LD_PAIRS_HEADER.rstrip("\n").split("\t").index("PAIR_STATUS")
+    payload[f"text_{status_index}"] = np.array(["LOW_MAF"])
+    np.savez(sidecar_path, **payload)
+
+    columns = load_table_columns(
+        table_path, "local_ld_pairs.schema.json", expected_sha256=artifact["sha256"],
+        expected_sidecar_sha256=artifact["columnar_sidecar_sha256"],
+    )
+    unverified = load_table_columns(
+        table_path, "local_ld_pairs.schema.json", expected_sha256=artifact["sha256"]
+    )
+
+    assert not columns.from_sidecar
+    assert columns.text["PAIR_STATUS"].tolist() == ["EVALUATED"]
+    assert not unverified.from_sidecar
+
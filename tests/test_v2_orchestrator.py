@@ -1,14 +1,42 @@
+import hashlib
 import json
+import pstats
+import shutil
+import tracemalloc
+from dataclasses import replace
+from functools import partial
 from pathlib import Path
 
 import pytest
 import yaml
 
-from effet_fondateur.orchestrator import IntegrityError, StageExecutionError
+from effet_fondateur.audit import file_digests, hash_files
+from effet_fondateur.cli import main
+from effet_fondateur.contracts import DocumentValidationError
+from effet_fondateur.orchestrator import (
+    IntegrityError,
+    ProfilingPolicy,
+    StageCache,
+    StageExecutionError,
+    VerificationPolicy,
+)
+from effet_fondateur.orchestrator import digests
+from effet_fondateur.orchestrator.cache import restore_stage, store_stage
 from effet_fondateur.orchestrator.catalog import build_stage_catalog
 from effet_fondateur.orchestrator.errors import PipelineError
 from effet_fondateur.orchestrator.models import StageDefinition
-from effet_fondateur.orchestrator.pipeline import resume_pipeline, run_pipeline
+from effet_fondateur.orchestrator.pipeline import (
+    SYNTHETIC_STAGE,
+    resume_pipeline,
+    run_pipeline,
+)
+from effet_fondateur.orchestrator.scheduler import build_stage_graph
+from effet_fondateur.orchestrator.state import (
+    load_manifest,
+    manifest_journal,
+    update_manifest,
+)
+from effet_fondateur.orchestrator.workers import run_stage_module
 
 
 REPOSITORY_ROOT = Path(__file__).resolve().parents[1]
@@ -179,3 +207,476 @@ def test_stage_catalog_rejects_unknown_dependency() -> None:
 
     with pytest.raises(PipelineError, match="Dépendance inconnue"):
         build_stage_catalog(definitions)
+
+
+PARALLEL_DEFINITIONS = (
+    StageDefinition(
+        "T01",
+        "synthetic_left",
+        "effet_fondateur.stages.synthetic_stage",
+        dependencies=("initialize_run",),
+    ),
+    StageDefinition(
+        "T02",
+        "synthetic_right",
+        "effet_fondateur.stages.synthetic_stage",
+        critical=False,
+        dependencies=("initialize_run",),
+    ),
+    StageDefinition(
+        "T03",
+        "synthetic_join",
+        "effet_fondateur.stages.synthetic_stage",
+        dependencies=("synthetic_left", "synthetic_right"),
+    ),
+)
+
+
+def write_parallel_config(
+    path: Path,
+    stage_parameters: dict[str, dict[str, object]],
+) -> None:
+    config = yaml.safe_load(
+        (REPOSITORY_ROOT / "config" / "pipeline.example.yaml").read_text(
+            encoding="utf-8"
+        )
+    )
+    for stage_name, parameters in stage_parameters.items():
+        config["stages"][stage_name] = {"enabled": True, "parameters": parameters}
+    path.write_text(
+        yaml.safe_dump(config, allow_unicode=True, sort_keys=False),
+        encoding="utf-8",
+    )
+
+
+def test_independent_stages_run_in_parallel_with_one_manifest_writer(
+    tmp_path: Path,
+) -> None:
+    config_path = tmp_path / "config.yaml"
+    write_parallel_config(
+        config_path,
+        {"synthetic_join": {}, "synthetic_left": {}, "synthetic_right": {}},
+    )
+
+    run_dir = run_pipeline(
+        config_path, tmp_path / "runs", PARALLEL_DEFINITIONS, jobs=2
+    )
+
+    manifest = read_manifest(run_dir)
+    assert manifest["global_status"] == "TECHNICALLY_VALID"
+    states = {stage["stage_name"]: stage["state"] for stage in manifest["stages"]}
+    assert states == {
+        "initialize_run": "SUCCEEDED",
+        "synthetic_left": "SUCCEEDED",
+        "synthetic_right": "SUCCEEDED",
+        "synthetic_join": "SUCCEEDED",
+    }
+    started = {stage["stage_name"]: stage["started_at"] for stage in manifest["stages"]}
+    completed = {
+        stage["stage_name"]: stage["completed_at"] for stage in manifest["stages"]
+    }
+    assert started["synthetic_join"] >= completed["synthetic_left"]
+    assert started["synthetic_join"] >= completed["synthetic_right"]
+    events = [
+        json.loads(line)
+        for line in (run_dir / "events.jsonl").read_text(encoding="utf-8").splitlines()
+    ]
+    assert sum(event["event"] == "stage_succeeded" for event in events) == 4
+
+    resume_pipeline(run_dir, PARALLEL_DEFINITIONS, jobs=3)
+
+    events_text = (run_dir / "events.jsonl").read_text(encoding="utf-8")
+    assert events_text.count("stage_reused") == 3
+
+
+def test_manifest_journal_is_replayed_after_crash_and_compacted_on_exit(
+    tmp_path: Path,
+) -> None:
+    config_path = tmp_path / "config.yaml"
+    write_test_config(config_path)
+    run_dir = run_pipeline(config_path, tmp_path / "runs")
+    assert not (run_dir / "manifest.journal.jsonl").exists()
+    crashed_dir = tmp_path / "crashed"
+
+    with manifest_journal(run_dir):
+        with pytest.raises(DocumentValidationError, match="journal_entry"):
+            update_manifest(run_dir, lambda manifest: manifest.update(run_id="autre"))
+        update_manifest(
+            run_dir, lambda manifest: manifest.update(global_status="BLOCKED")
+        )
+        assert load_manifest(run_dir)["run_id"] != "autre"
+        assert read_manifest(run_dir)["global_status"] != "BLOCKED"
+        shutil.copytree(run_dir, crashed_dir)
+
+    assert read_manifest(run_dir)["global_status"] == "BLOCKED"
+    assert not (run_dir / "manifest.journal.jsonl").exists()
+    # Arrêt brutal pendant l'écriture d'une transition jamais rendue.
+    with (crashed_dir / "manifest.journal.jsonl").open("a", encoding="utf-8") as journal:
+        journal.write('{"sequence": 2, "set": {')
+    assert load_manifest(crashed_dir)["global_status"] == "BLOCKED"
+    with manifest_journal(crashed_dir):
+        assert read_manifest(crashed_dir)["global_status"] == "BLOCKED"
+        assert (crashed_dir / "manifest.journal.jsonl").read_text(encoding="utf-8") == ""
+
+
+def test_parallel_failure_stops_scheduling_and_blocks_run(tmp_path: Path) -> None:
+    config_path = tmp_path / "config.yaml"
+    write_parallel_config(
+        config_path,
+        {
+            "synthetic_left": {"fail_attempts": 1},
+            "synthetic_right": {},
+            "synthetic_join": {},
+        },
+    )
+    runs_dir = tmp_path / "runs"
+
+    with pytest.raises(StageExecutionError) as error:
+        run_pipeline(config_path, runs_dir, PARALLEL_DEFINITIONS, jobs=2)
+
+    assert error.value.return_code == 4
+    run_dir = next(path for path in runs_dir.iterdir() if not path.name.startswith("."))
+    manifest = read_manifest(run_dir)
+    states = {stage["stage_name"]: stage["state"] for stage in manifest["stages"]}
+    assert manifest["global_status"] == "BLOCKED"
+    assert states["synthetic_left"] == "FAILED"
+    assert states["synthetic_right"] == "SUCCEEDED"
+    assert "synthetic_join" not in states
+
+    resume_pipeline(run_dir, PARALLEL_DEFINITIONS, jobs=2)
+
+    assert read_manifest(run_dir)["global_status"] == "TECHNICALLY_VALID"
+
+
+def test_stage_graph_rejects_dependency_cycle(tmp_path: Path) -> None:
+    definitions = (
+        StageDefinition("T01", "first", "module.one", dependencies=("second",)),
+        StageDefinition("T02", "second", "module.two", dependencies=("first",)),
+    )
+    stages_config = {
+        "first": {"enabled": True, "parameters": {}},
+        "second": {"enabled": True, "parameters": {}},
+    }
+
+    with pytest.raises(PipelineError, match="Cycle de dépendances"):
+        build_stage_graph(stages_config, build_stage_catalog(definitions))
+
+
+def test_run_rejects_invalid_job_count_before_creating_run(tmp_path: Path) -> None:
+    config_path = tmp_path / "config.yaml"
+    write_test_config(config_path)
+
+    with pytest.raises(PipelineError, match="entier positif"):
+        run_pipeline(config_path, tmp_path / "runs", jobs=0)
+
+    assert not (tmp_path / "runs").exists()
+
+
+def read_events(run_dir: Path) -> list[dict[str, object]]:
+    return [
+        json.loads(line)
+        for line in (run_dir / "events.jsonl").read_text(encoding="utf-8").splitlines()
+    ]
+
+
+def test_stage_cache_publishes_identical_stage_in_new_run(tmp_path: Path) -> None:
+    config_path = tmp_path / "config.yaml"
+    write_test_config(config_path, synthetic_parameters={"message": "cache"})
+    stage_cache = StageCache(tmp_path / "cache")
+    first_run_dir = run_pipeline(config_path, tmp_path / "runs", stage_cache=stage_cache)
+
+    second_run_dir = run_pipeline(config_path, tmp_path / "runs", stage_cache=stage_cache)
+
+    manifest = read_manifest(second_run_dir)
+    assert manifest["global_status"] == "TECHNICALLY_VALID"
+    assert manifest["stages"][-1]["state"] == "CACHED"
+    first_stage_dir = first_run_dir / "stages" / "T00_synthetic_stage"
+    second_stage_dir = second_run_dir / "stages" / "T00_synthetic_stage"
+    assert (second_stage_dir / "synthetic_result.json").stat().st_ino == (
+        first_stage_dir / "synthetic_result.json"
+    ).stat().st_ino
+    audit = json.loads((second_stage_dir / "audit.json").read_text(encoding="utf-8"))
+    assert audit["run_id"] == manifest["run_id"]
+    cached_events = [
+        event for event in read_events(second_run_dir) if event["event"] == "stage_cached"
+    ]
+    assert cached_events[-1]["details"]["source_run_id"] == read_manifest(first_run_dir)["run_id"]
+    # Le run restauré depuis le cache reste reprenable comme un run ordinaire.
+    resume_pipeline(second_run_dir)
+    assert read_manifest(second_run_dir)["stages"][-1]["state"] == "CACHED"
+
+
+def test_stage_embedding_run_identity_bypasses_stage_cache(tmp_path: Path) -> None:
+    config_path = tmp_path / "config.yaml"
+    write_test_config(config_path, synthetic_parameters={"message": "cache"})
+    stage_cache = StageCache(tmp_path / "cache")
+    definitions = (replace(SYNTHETIC_STAGE, embeds_run_identity=True),)
+    run_pipeline(config_path, tmp_path / "runs", definitions, stage_cache=stage_cache)
+
+    second_run_dir = run_pipeline(
+        config_path, tmp_path / "runs", definitions, stage_cache=stage_cache
+    )
+
+    assert read_manifest(second_run_dir)["stages"][-1]["state"] == "SUCCEEDED"
+    assert not list((tmp_path / "cache").glob("entries/*"))
+
+
+def test_corrupted_stage_cache_entry_falls_back_to_execution(tmp_path: Path) -> None:
+    config_path = tmp_path / "config.yaml"
+    write_test_config(config_path, synthetic_parameters={"message": "cache"})
+    stage_cache = StageCache(tmp_path / "cache")
+    first_run_dir = run_pipeline(config_path, tmp_path / "runs", stage_cache=stage_cache)
+    signature = read_manifest(first_run_dir)["stages"][-1]["signature"]
+    cached_result_path = (
+        tmp_path / "cache" / "entries" / signature / "stage" / "synthetic_result.json"
+    )
+    cached_result_path.unlink()
+    cached_result_path.write_text('{"message": "modified"}\n', encoding="utf-8")
+
+    second_run_dir = run_pipeline(config_path, tmp_path / "runs", stage_cache=stage_cache)
+
+    manifest = read_manifest(second_run_dir)
+    assert manifest["stages"][-1]["state"] == "SUCCEEDED"
+    events = [event["event"] for event in read_events(second_run_dir)]
+    assert "stage_cache_entry_rejected" in events
+    result_path = second_run_dir / "stages" / "T00_synthetic_stage" / "synthetic_result.json"
+    assert json.loads(result_path.read_text(encoding="utf-8"))["message"] == "cache"
+    # L'exécution de remplacement a republié une entrée saine.
+    assert json.loads(cached_result_path.read_text(encoding="utf-8"))["message"] == "cache"
+
+
+def test_stage_cache_evicts_least_recently_used_entries(tmp_path: Path) -> None:
+    definition = StageDefinition("T00", "synthetic_stage", "module.synthetic")
+    stage_cache = StageCache(tmp_path / "cache", max_bytes=250)
+    signatures = [character * 64 for character in "abc"]
+    for index, signature in enumerate(signatures):
+        stage_dir = tmp_path / f"stage_{index}"
+        stage_dir.mkdir()
+        (stage_dir / "result.bin").write_bytes(b"x" * 100)
+        assert store_stage(stage_cache, stage_dir, definition, signature, f"run_{index}")
+        if index == 1:
+            # Une restauration rafraîchit l'entrée la plus ancienne.
+            assert restore_stage(stage_cache, signatures[0], definition, tmp_path / "restored")
+
+    remaining = sorted(path.name for path in (tmp_path / "cache" / "entries").iterdir())
+    assert remaining == [signatures[0], signatures[2]]
+
+
+def test_fast_verification_reuses_digests_of_unchanged_files(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    data_path = tmp_path / "panel.bed"
+    data_path.write_bytes(b"original")
+    hashed_paths: list[Path] = []
+    original_sha256_file = digests.sha256_file
+
+    def counting_sha256_file(path: Path) -> str:
+        hashed_paths.append(path)
+        return original_sha256_file(path)
+
+    monkeypatch.setattr(digests, "sha256_file", counting_sha256_file)
+    first_cache = digests.RunDigestCache(tmp_path, VerificationPolicy("full"))
+    first_digest = first_cache.sha256(data_path)
+    first_cache.flush()
+
+    fast_cache = digests.RunDigestCache(tmp_path, VerificationPolicy("fast"))
+    assert fast_cache.sha256(data_path) == first_digest
+    assert len(hashed_paths) == 1
+
+    data_path.write_bytes(b"modified")
+    assert fast_cache.sha256(data_path) != first_digest
+    assert len(hashed_paths) == 2
+    # Un taux de 1 relit systématiquement les fichiers inchangés.
+    sampled_cache = digests.RunDigestCache(tmp_path, VerificationPolicy("fast", 1.0))
+    sampled_cache.sha256(data_path)
+    assert len(hashed_paths) == 3
+
+
+def test_fast_resume_still_blocks_modified_published_artifact(tmp_path: Path) -> None:
+    config_path = tmp_path / "config.yaml"
+    write_test_config(config_path, synthetic_parameters={"message": "original"})
+    fast = VerificationPolicy("fast")
+    run_dir = run_pipeline(config_path, tmp_path / "runs", verification=fast)
+    assert (run_dir / digests.DIGEST_CACHE_NAME).is_file()
+    resume_pipeline(run_dir, verification=fast)
+    result_path = run_dir / "stages" / "T00_synthetic_stage" / "synthetic_result.json"
+    result_path.write_text('{"message": "modified"}\n', encoding="utf-8")
+
+    with pytest.raises(IntegrityError, match="modifié"):
+        resume_pipeline(run_dir, verification=fast)
+
+    with pytest.raises(PipelineError, match="Politique de vérification"):
+        resume_pipeline(run_dir, verification=VerificationPolicy("partial"))
+
+
+def test_hash_files_computes_all_digests_in_one_pass_in_order(tmp_path: Path) -> None:
+    paths = []
+    for index, size in enumerate((0, 1, 4096, 10_000, 65_537)):
+        path = tmp_path / f"artifact_{index}.bin"
+        path.write_bytes(bytes(range(256)) * (size // 256) + bytes(size % 256))
+        paths.append(path)
+
+    digests = hash_files(
+        paths, partial(file_digests, algorithms=("sha256", "md5"), chunk_size=4096)
+    )
+
+    assert digests == [
+        {
+            "sha256": hashlib.sha256(path.read_bytes()).hexdigest(),
+            "md5": hashlib.md5(path.read_bytes()).hexdigest(),
+        }
+        for path in paths
+    ]
+    with pytest.raises(FileNotFoundError):
+        hash_files([paths[0], tmp_path / "absent.bin", paths[1]])
+
+
+def test_warm_workers_match_subprocess_return_codes_and_output(tmp_path: Path) -> None:
+    outputs = {}
+    for mode in ("subprocess", "warm"):
+        stdout_path = tmp_path / f"{mode}.stdout"
+        stderr_path = tmp_path / f"{mode}.stderr"
+        result = run_stage_module(
+            "effet_fondateur.stages.synthetic_stage", ["--unknown"], stdout_path, stderr_path, mode
+        )
+        outputs[mode] = (
+            result.return_code,
+            stdout_path.read_text(encoding="utf-8"),
+            stderr_path.read_text(encoding="utf-8"),
+        )
+
+    assert outputs["warm"] == outputs["subprocess"]
+    assert outputs["warm"][0] == 2
+    assert "--stage-inputs" in outputs["warm"][2]
+
+
+def test_warm_execution_mode_audits_failures_and_resumes(tmp_path: Path) -> None:
+    config_path = tmp_path / "config.yaml"
+    write_test_config(config_path, synthetic_parameters={"fail_attempts": 1})
+    runs_dir = tmp_path / "runs"
+
+    with pytest.raises(StageExecutionError) as error:
+        run_pipeline(config_path, runs_dir, execution_mode="warm")
+
+    assert error.value.return_code == 4
+    run_dir = next(path for path in runs_dir.iterdir() if not path.name.startswith("."))
+    resume_pipeline(run_dir, execution_mode="warm")
+
+    manifest = read_manifest(run_dir)
+    assert manifest["global_status"] == "TECHNICALLY_VALID"
+    assert manifest["stages"][-1]["attempt_count"] == 2
+    stage_dir = run_dir / "stages" / "T00_synthetic_stage"
+    command = json.loads((stage_dir / "command.json").read_text(encoding="utf-8"))
+    assert command["execution_mode"] == "warm"
+    assert (stage_dir / "stdout.log").is_file() and (stage_dir / "stderr.log").is_file()
+    with pytest.raises(PipelineError, match="Mode d'exécution"):
+        resume_pipeline(run_dir, execution_mode="threads")
+
+
+def test_stage_attempts_record_resources_for_stats(
+    tmp_path: Path, capsys: pytest.CaptureFixture[str]
+) -> None:
+    config_path = tmp_path / "config.yaml"
+    write_test_config(config_path, synthetic_parameters={"fail_attempts": 1})
+    runs_dir = tmp_path / "runs"
+    with pytest.raises(StageExecutionError):
+        run_pipeline(config_path, runs_dir)
+    run_dir = next(path for path in runs_dir.iterdir() if not path.name.startswith("."))
+    resume_pipeline(run_dir, execution_mode="warm")
+
+    failed_dir = next((run_dir / "stages" / "attempts").glob("T00_synthetic_stage.*.failed"))
+    failed = json.loads((failed_dir / "resources.json").read_text(encoding="utf-8"))
+    assert (failed["execution_mode"], failed["return_code"]) == ("subprocess", 4)
+    assert failed["process_tree"]["max_rss_bytes"] > 0
+    assert failed["child_processes"] is None
+    stage_dir = run_dir / "stages" / "T00_synthetic_stage"
+    audit = json.loads((stage_dir / "audit.json").read_text(encoding="utf-8"))
+    assert audit["resources"]["execution_mode"] == "warm"
+    assert audit["resources"]["child_processes"] is not None
+    # Une tentative forkée aussi brève peut consommer moins d'un tic d'horloge :
+    # son temps CPU est mesuré mais peut valoir 0, son pic mémoire jamais.
+    warm_tree = audit["resources"]["process_tree"]
+    assert warm_tree["user_cpu_seconds"] >= 0 and warm_tree["system_cpu_seconds"] >= 0
+    assert warm_tree["max_rss_bytes"] > 0
+
+    assert main(["stats", str(run_dir)]) == 0
+    rows = [line.split("\t") for line in capsys.readouterr().out.splitlines()]
+    synthetic_rows = [row for row in rows[1:] if row[1] == "synthetic_stage"]
+    assert [row[2:5] for row in synthetic_rows] == [
+        ["1", "failed:4", "subprocess"],
+        ["2", "published", "warm"],
+    ]
+    assert synthetic_rows[0][9] == "NA" and synthetic_rows[1][9] != "NA"
+    assert main(["stats", "--by-stage", str(run_dir)]) == 0
+    stage_rows = [line.split("\t") for line in capsys.readouterr().out.splitlines()]
+    assert ["synthetic_stage", "2", "1"] == next(
+        row[:3] for row in stage_rows if row[0] == "synthetic_stage"
+    )
+
+
+@pytest.mark.parametrize(
+    ("execution_mode", "profiler", "profile_name"),
+    [("subprocess", "cprofile", "profile.pstats"), ("warm", "tracemalloc", "profile.tracemalloc")],
+)
+def test_profiling_writes_diagnostics_without_changing_signatures(
+    tmp_path: Path, execution_mode: str, profiler: str, profile_name: str
+) -> None:
+    config_path = tmp_path / "config.yaml"
+    write_test_config(config_path, synthetic_parameters={})
+    plain_run = run_pipeline(config_path, tmp_path / "plain")
+    profiled_run = run_pipeline(
+        config_path,
+        tmp_path / "profiled",
+        execution_mode=execution_mode,
+        profiling=ProfilingPolicy(mode=profiler, stages=("synthetic_stage",)),
+    )
+
+    plain_stages = read_manifest(plain_run)["stages"]
+    profiled_stages = read_manifest(profiled_run)["stages"]
+    assert [stage["signature"] for stage in profiled_stages] == [
+        stage["signature"] for stage in plain_stages
+    ]
+    stage_dir = profiled_run / "stages" / "T00_synthetic_stage"
+    if profiler == "cprofile":
+        functions = {name for _, _, name in pstats.Stats(str(stage_dir / profile_name)).stats}
+        assert "execute" in functions
+    else:
+        assert tracemalloc.Snapshot.load(str(stage_dir / profile_name)).traces
+    command = json.loads((stage_dir / "command.json").read_text(encoding="utf-8"))
+    assert command["profiling"] == profiler
+    assert not list((profiled_run / "stages").glob(f"0*/{profile_name}"))
+    with pytest.raises(PipelineError, match="Étapes à profiler inconnues"):
+        resume_pipeline(profiled_run, profiling=ProfilingPolicy("sampling", ("missing",)))
+
+
+def test_trace_exports_chrome_timeline_across_processes(tmp_path: Path) -> None:
+    config_path = tmp_path / "config.yaml"
+    write_test_config(config_path, synthetic_parameters={"fail_attempts": 1})
+    with pytest.raises(StageExecutionError):
+        run_pipeline(config_path, tmp_path / "runs", trace=True)
+    run_dir = next(path for path in (tmp_path / "runs").iterdir() if not path.name.startswith("."))
+    resume_pipeline(run_dir, execution_mode="warm", trace=True)
+
+    events = json.loads((run_dir / "trace.json").read_text(encoding="utf-8"))["traceEvents"]
+    process_names = {
+        event["pid"]: event["args"]["name"] for event in events if event["name"] == "process_name"
+    }
+    spans = [event for event in events if event["ph"] == "X"]
+    assert all(event["pid"] in process_names and event["dur"] >= 0 for event in spans)
+    stage_spans = [event for event in spans if event["name"] == "T00_synthetic_stage"]
+    assert len(stage_spans) == 2
+    assert {process_names[event["pid"]] for event in stage_spans} == {"orchestrator"}
+    stage_processes = {
+        event["pid"] for event in spans if process_names[event["pid"]] == "T00_synthetic_stage"
+    }
+    # La tentative en échec s'arrête avant tout intervalle et n'écrit aucun fragment.
+    assert len(stage_processes) == 1
+    assert not stage_processes & {event["pid"] for event in stage_spans}
+    hashing = [event for event in spans if event["cat"] == "hashing"]
+    assert {event["pid"] for event in hashing} & stage_processes
+    assert [event["ts"] for event in spans] == sorted(event["ts"] for event in spans)
+
+    write_test_config(config_path, synthetic_parameters={})
+    untraced_run = run_pipeline(config_path, tmp_path / "untraced")
+    assert not (untraced_run / "trace").exists()
+    assert not (untraced_run / "trace.json").exists()
@@ -0,0 +1,85 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from effet_fondateur.io import (
+    MISSING_DOSAGE,
+    PlinkBedError,
+    open_plink_bed,
+    write_plink_bed,
+)
+
+
+def _write_bed(path: Path, codes: list[list[int]]) -> None:
+    content = bytearray(b"\x6c\x1b\x01")
+    for variant_codes in codes:
+        for start in range(0, len(variant_codes), 4):
+            content.append(
+                sum(code << (2 * offset) for offset, code in enumerate(variant_codes[start : start + 4]))
+            )
+    path.write_bytes(bytes(content))
+
+
+def test_bed_dosages_count_a1_with_missing_sentinel(tmp_path: Path) -> None:
+    bed_path = tmp_path / "panel.bed"
+    # Cinq individus : le second octet de chaque variant contient un seul génotype.
+    _write_bed(bed_path, [[0, 1, 2, 3, 2], [3, 3, 0, 1, 0]])
+
+    bed = open_plink_bed(bed_path, 5, 2)
+
+    expected = np.array(
+        [[2, 0], [MISSING_DOSAGE, 0], [1, 2], [0, MISSING_DOSAGE], [1, 2]],
+        dtype=np.int8,
+    )
+    assert bed.read_dosages().dtype == np.int8
+    np.testing.assert_array_equal(bed.read_dosages(), expected)
+    np.testing.assert_array_equal(
+        bed.read_dosages(variants=[1], samples=[4, 0, 3]), expected[[4, 0, 3]][:, [1]]
+    )
+    blocks = list(bed.iter_dosage_blocks(1, samples=[2, 4]))
+    assert [start for start, _ in blocks] == [0, 1]
+    np.testing.assert_array_equal(np.hstack([block for _, block in blocks]), expected[[2, 4]])
+
+
+def test_random_bed_subsets_match_full_decoding(tmp_path: Path) -> None:
+    generator = np.random.default_rng(7)
+    codes = generator.integers(0, 4, size=(13, 11)).tolist()
+    bed_path = tmp_path / "random.bed"
+    _write_bed(bed_path, codes)
+    bed = open_plink_bed(bed_path, 11, 13)
+
+    full = bed.read_dosages()
+    samples = generator.permutation(11)[:6]
+    variants = generator.permutation(13)[:5]
+
+    expected = np.array([[[2, MISSING_DOSAGE, 1, 0][code] for code in row] for row in codes]).T
+    np.testing.assert_array_equal(full, expected)
+    np.testing.assert_array_equal(
+        bed.read_dosages(variants=variants, samples=samples), expected[samples][:, variants]
+    )
+
+
+def test_bed_header_size_and_indexes_are_checked(tmp_path: Path) -> None:
+    bed_path = tmp_path / "panel.bed"
+    _write_bed(bed_path, [[0, 0, 0]])
+
+    with pytest.raises(PlinkBedError, match="plink_bed_size_mismatch"):
+        open_plink_bed(bed_path, 3, 2)
+    with pytest.raises(PlinkBedError, match="plink_bed_variant_index_out_of_range"):
+        open_plink_bed(bed_path, 3, 1).read_dosages(variants=[1])
+    bed_path.write_bytes(b"\x6c\x1b\x00\x00")
+    with pytest.raises(PlinkBedError, match="invalid_plink_bed_header"):
+        open_plink_bed(bed_path, 3, 1)
+
+
+def test_written_bed_blocks_round_trip_through_reader(tmp_path: Path) -> None:
+    generator = np.random.default_rng(11)
+    dosages = generator.integers(MISSING_DOSAGE, 3, size=(6, 9)).astype(np.int8)
+    bed_path = tmp_path / "written.bed"
+
+    assert write_plink_bed(bed_path, 6, [dosages[:, :4], dosages[:, 4:]]) == 9
+
+    np.testing.assert_array_equal(open_plink_bed(bed_path, 6, 9).read_dosages(), dosages)
+    with pytest.raises(PlinkBedError, match="plink_bed_sample_count_mismatch"):
+        write_plink_bed(bed_path, 5, [dosages])
@@ -9,46 +9,27 @@ import yaml
 
 from effet_fondateur.orchestrator import StageExecutionError
 from effet_fondateur.orchestrator.pipeline import run_pipeline
-from effet_fondateur.stages.analyze_population_structure import _fit_and_project
+from effet_fondateur.stages.analyze_population_structure import (
+    PopulationStructureInputError,
+    _fit_and_project,
+    _fit_and_project_randomized,
+    _parameters,
+)
 from test_v2_infer_kinship import prepare_kinship_inputs
 
 
-def write_population_plink(
-    path: Path,
-    delegated_plink: Path,
-    *,
-    fail_export: bool = False,
-    malformed_header: bool = False,
-) -> None:
+def write_population_plink(path: Path, delegated_plink: Path) -> None:
     script = f'''#!{sys.executable}
-import os
 import pathlib
+import subprocess
 import sys
 
-if "--recode" not in sys.argv:
-    os.execv({str(delegated_plink)!r}, [{str(delegated_plink)!r}, *sys.argv[1:]])
-if {fail_export!r}:
-    raise SystemExit(8)
-input_prefix = pathlib.Path(sys.argv[sys.argv.index("--bfile") + 1])
-output_prefix = pathlib.Path(sys.argv[sys.argv.index("--out") + 1])
-fam_rows = [line.split() for line in input_prefix.with_suffix(".fam").read_text().splitlines() if line]
-bim_rows = [line.split() for line in input_prefix.with_suffix(".bim").read_text().splitlines() if line]
-variant_columns = [f"{{row[1]}}_{{row[4]}}" for row in bim_rows]
-if {malformed_header!r}:
-    variant_columns[0] = "wrong_variant_A"
-lines = ["FID IID PAT MAT SEX PHENOTYPE " + " ".join(variant_columns) + "\\n"]
-for sample_index, fam_row in enumerate(fam_rows):
-    dosages = []
-    for variant_index, _ in enumerate(bim_rows):
-        if sample_index == 0:
-            dosage = 0
-        elif sample_index == 1:
-            dosage = 1 if variant_index % 2 else 0
-        else:
-            dosage = 2 if variant_index % 2 else 0
-        dosages.append(str(dosage))
-    lines.append(" ".join([*fam_row[:6], *dosages]) + "\\n")
-output_prefix.with_suffix(".raw").write_text("".join(lines))
+completed = subprocess.run([{str(delegated_plink)!r}, *sys.argv[1:]], check=False)
+if completed.returncode == 0 and "--make-bed" in sys.argv and "--extract" in sys.argv:
+    output_prefix = pathlib.Path(sys.argv[sys.argv.index("--out") + 1])
+    bed_path = output_prefix.with_suffix(".bed")
+    bed_path.write_bytes(bed_path.read_bytes()[:-1])
+raise SystemExit(completed.returncode)
 '''
     path.write_text(script, encoding="utf-8")
     path.chmod(0o755)
@@ -58,8 +39,7 @@ def prepare_population_inputs(
     tmp_path: Path,
     *,
     related_pair: bool = False,
-    fail_export: bool = False,
-    malformed_header: bool = False,
+    truncated_panel_bed: bool = False,
     parameter_overrides: dict[str, object] | None = None,
 ) -> tuple[Path, Path]:
     between_rows = ["F1 I1 F2 I2 22 0.25 0.10 0.25"] if related_pair else None
@@ -68,15 +48,10 @@ def prepare_population_inputs(
         between_rows=between_rows,
     )
     config = yaml.safe_load(config_path.read_text(encoding="utf-8"))
-    delegated_plink = Path(config["tools"]["plink"])
-    population_plink = tmp_path / "population_plink"
-    write_population_plink(
-        population_plink,
-        delegated_plink,
-        fail_export=fail_export,
-        malformed_header=malformed_header,
-    )
-    config["tools"]["plink"] = str(population_plink)
+    if truncated_panel_bed:
+        population_plink = tmp_path / "population_plink"
+        write_population_plink(population_plink, Path(config["tools"]["plink"]))
+        config["tools"]["plink"] = str(population_plink)
     parameters: dict[str, object] = {
         "requested_components": 3,
         "outlier_components": 2,
@@ -84,7 +59,6 @@ def prepare_population_inputs(
         "min_informative_variants": 10,
         "min_reference_call_rate": 0.95,
         "outlier_alpha": 1e-12,
-        "plink_timeout_seconds": 30,
     }
     parameters.update(parameter_overrides or {})
     config["stages"]["analyze_population_structure"] = {
@@ -192,22 +166,33 @@ def test_insufficient_reference_samples_is_scientific_block(tmp_path: Path) -> N
     assert error.value.return_code == 4
 
 
-def test_population_plink_failure_uses_external_tool_code(tmp_path: Path) -> None:
-    config_path, runs_dir = prepare_population_inputs(tmp_path, fail_export=True)
+def test_randomized_pca_mode_publishes_the_same_contracts(tmp_path: Path) -> None:
+    config_path, runs_dir = prepare_population_inputs(
+        tmp_path,
+        related_pair=True,
+        parameter_overrides={"pca_method": "randomized", "pca_block_variants": 3},
+    )
 
-    with pytest.raises(StageExecutionError) as error:
-        run_pipeline(config_path, runs_dir)
+    run_dir = run_pipeline(config_path, runs_dir)
 
-    assert error.value.return_code == 3
+    stage_dir = run_dir / "stages" / "08_analyze_population_structure"
+    report = json.loads(
+        (stage_dir / "population_structure_report.json").read_text(encoding="utf-8")
+    )
+    assert report["pca_method"] == "randomized"
+    assert report["informative_variant_count"] == 11
+    scores = read_tsv(stage_dir / "population_scores.tsv")
+    assert sum(row["PROJECTED"] == "true" for row in scores) == 1
+    assert all(row["PC1"] for row in scores)
 
 
-def test_malformed_dosage_header_uses_external_tool_code(tmp_path: Path) -> None:
-    config_path, runs_dir = prepare_population_inputs(tmp_path, malformed_header=True)
+def test_truncated_panel_bed_uses_input_code(tmp_path: Path) -> None:
+    config_path, runs_dir = prepare_population_inputs(tmp_path, truncated_panel_bed=True)
 
     with pytest.raises(StageExecutionError) as error:
         run_pipeline(config_path, runs_dir)
 
-    assert error.value.return_code == 3
+    assert error.value.return_code == 2
 
 
 def test_invalid_component_configuration_uses_input_code(tmp_path: Path) -> None:
@@ -241,3 +226,46 @@ def test_projected_dosages_do_not_change_reference_axes() -> None:
 
     np.testing.assert_allclose(first_model["right_vectors"], second_model["right_vectors"])
     np.testing.assert_allclose(first_model["scores"][:3], second_model["scores"][:3])
+
+
+def test_randomized_power_iterations_and_seed_accept_zero() -> None:
+    parameters = _parameters({"randomized_power_iterations": 0, "randomized_seed": 0})
+
+    assert parameters["randomized_power_iterations"] == 0
+    assert parameters["randomized_seed"] == 0
+    for name, value in (("randomized_seed", -1), ("randomized_power_iterations", True)):
+        with pytest.raises(PopulationStructureInputError, match=f"invalid_parameter:{name}"):
+            _parameters({name: value})
+
+
+@pytest.mark.parametrize(("power_iterations", "seed"), [(2, 5), (0, 0)])
+def test_randomized_pca_matches_exact_svd_when_sketch_covers_reference(
+    power_iterations: int, seed: int
+) -> None:
+    generator = np.random.default_rng(11)
+    dosages = generator.integers(0, 3, size=(14, 57)).astype(float)
+    dosages[generator.random(dosages.shape) < 0.02] = np.nan
+    reference_indices = np.arange(12)
+    parameters = {
+        "requested_components": 3,
+        "outlier_components": 2,
+        "min_informative_variants": 2,
+        "min_reference_call_rate": 0.8,
+        "pca_block_variants": 10,
+        "randomized_oversampling": 10,
+        "randomized_power_iterations": power_iterations,
+        "randomized_seed": seed,
+    }
+
+    exact = _fit_and_project(dosages, reference_indices, parameters)
+    randomized = _fit_and_project_randomized(
+        lambda start, stop: dosages[:, start:stop],
+        dosages.shape[0],
+        dosages.shape[1],
+        reference_indices,
+        parameters,
+    )
+
+    assert randomized["informative_count"] == exact["informative_count"]
+    for key in ("eigenvalues", "explained_ratios", "right_vectors", "scores", "p_values"):
+        np.testing.assert_allclose(randomized[key], exact[key], rtol=1e-7, atol=1e-10)
@@ -6,8 +6,9 @@ from pathlib import Path
 import pytest
 import yaml
 
-from effet_fondateur.orchestrator import StageExecutionError
-from effet_fondateur.orchestrator.pipeline import run_pipeline
+from effet_fondateur.audit import sha256_file
+from effet_fondateur.orchestrator import IntegrityError, StageExecutionError
+from effet_fondateur.orchestrator.pipeline import resume_pipeline, run_pipeline
 
 
 REPOSITORY_ROOT = Path(__file__).resolve().parents[1]
@@ -41,6 +42,27 @@ import pathlib
 import shutil
 import sys
 
+
+
+def write_bed(path, codes):
+    content = bytearray(b"\\x6c\\x1b\\x01")
+    for marker_codes in codes:
+        for start in range(0, len(marker_codes), 4):
+            content.append(sum(code << (2 * offset) for offset, code in enumerate(marker_codes[start:start + 4])))
+    path.write_bytes(bytes(content))
+
+
+def read_bed(path, sample_count, variant_count):
+    content = path.read_bytes()[3:]
+    width = (sample_count + 3) // 4
+    if len(content) != width * variant_count:
+        return None
+    return [
+        [(content[marker * width + sample // 4] >> (2 * (sample % 4))) & 3 for sample in range(sample_count)]
+        for marker in range(variant_count)
+    ]
+
+
 audit_path = pathlib.Path({str(command_audit_path)!r})
 with audit_path.open("a") as audit:
     audit.write(" ".join(sys.argv[1:]) + "\\n")
@@ -60,7 +82,16 @@ if "--file" in sys.argv:
         allele_2 = alleles[1] if len(alleles) > 1 else "0"
         bim_lines.append(f"{{map_row[0]}} {{map_row[1]}} {{map_row[2]}} {{map_row[3]}} {{allele_1}} {{allele_2}}\\n")
     output_prefix.with_suffix(".bim").write_text("".join(bim_lines))
-    output_prefix.with_suffix(".bed").write_bytes(b"\\x6c\\x1b\\x01")
+    codes = []
+    for marker_index, bim_line in enumerate(bim_lines):
+        allele_1 = bim_line.split()[4]
+        marker_codes = []
+        for row in ped_rows:
+            pair = (row[6 + marker_index * 2], row[7 + marker_index * 2])
+            count = sum(allele == allele_1 for allele in pair)
+            marker_codes.append(1 if "0" in pair else {{2: 0, 1: 2, 0: 3}}[count])
+        codes.append(marker_codes)
+    write_bed(output_prefix.with_suffix(".bed"), codes)
 elif "--genome" in sys.argv:
     content = "FID1 IID1 FID2 IID2 PI_HAT\\n"
     if {duplicate_pair!r}:
@@ -98,6 +129,8 @@ elif "--make-bed" in sys.argv and "--bfile" in sys.argv:
     base_prefix = pathlib.Path(sys.argv[sys.argv.index("--bfile") + 1])
     fam_rows = [line for line in base_prefix.with_suffix(".fam").read_text().splitlines() if line]
     bim_rows = [line for line in base_prefix.with_suffix(".bim").read_text().splitlines() if line]
+    base_codes = read_bed(base_prefix.with_suffix(".bed"), len(fam_rows), len(bim_rows))
+    source_fam_rows, source_bim_rows = list(fam_rows), list(bim_rows)
     if "--remove" in sys.argv:
         remove_path = pathlib.Path(sys.argv[sys.argv.index("--remove") + 1])
         removed = {{tuple(line.split()[:2]) for line in remove_path.read_text().splitlines() if line}}
@@ -112,7 +145,14 @@ elif "--make-bed" in sys.argv and "--bfile" in sys.argv:
         bim_rows = [line for line in bim_rows if line.split()[1] in retained]
     output_prefix.with_suffix(".fam").write_text("".join(line + "\\n" for line in fam_rows))
     output_prefix.with_suffix(".bim").write_text("".join(line + "\\n" for line in bim_rows))
-    output_prefix.with_suffix(".bed").write_bytes(b"\\x6c\\x1b\\x01")
+    if base_codes is None:
+        output_prefix.with_suffix(".bed").write_bytes(b"\\x6c\\x1b\\x01")
+    else:
+        sample_indexes = [source_fam_rows.index(line) for line in fam_rows]
+        write_bed(
+            output_prefix.with_suffix(".bed"),
+            [[base_codes[source_bim_rows.index(line)][index] for index in sample_indexes] for line in bim_rows],
+        )
 elif "--missing" in sys.argv and "--within" in sys.argv:
     if {fail_qc!r}:
         raise SystemExit(8)
@@ -331,6 +371,27 @@ def test_qc_preliminary_filters_only_missingness_failures(tmp_path: Path) -> Non
     )
 
 
+def test_modified_columnar_sidecar_blocks_resume(tmp_path: Path) -> None:
+    config_path, runs_dir, _ = prepare_inputs(tmp_path)
+    run_dir = run_pipeline(config_path, runs_dir)
+    stage_dir = run_dir / "stages" / "05_qc_preliminary"
+    stage_outputs = json.loads(
+        (stage_dir / "stage_outputs.json").read_text(encoding="utf-8")
+    )
+    metrics = next(
+        artifact
+        for artifact in stage_outputs["artifacts"]
+        if artifact["artifact_id"] == "qc_variant_metrics"
+    )
+    sidecar_path = stage_dir / "qc_variant_metrics.tsv.columns.npz"
+    assert metrics["columnar_sidecar_sha256"] == sha256_file(sidecar_path)
+
+    sidecar_path.write_bytes(sidecar_path.read_bytes() + b"\0")
+
+    with pytest.raises(IntegrityError, match="columns.npz"):
+        resume_pipeline(run_dir)
+
+
 def test_qc_preliminary_records_maf_batch_and_non_evaluable_checks(
     tmp_path: Path,
 ) -> None:
@@ -1,9 +1,11 @@
 import hashlib
 import json
+import re
 import stat
 import threading
 import time
 from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
 
 import pytest
@@ -17,6 +19,7 @@ from effet_fondateur.references import (
     ResolvedReferencePanel,
     cache_reference_panel,
 )
+from effet_fondateur.references import cache as reference_cache
 
 
 def md5_bytes(content: bytes) -> str:
@@ -27,11 +30,13 @@ def sha256_bytes(content: bytes) -> str:
     return hashlib.sha256(content).hexdigest()
 
 
-def reference_fixture() -> tuple[ResolvedReferencePanel, dict[str, bytes]]:
-    base_url = (
+def reference_fixture(
+    base_url: str = (
         "https://ftp.1000genomes.ebi.ac.uk/vol1/ftp/data_collections/"
         "synthetic_reference"
-    )
+    ),
+    vcf_content: bytes = b"synthetic phased vcf\n",
+) -> tuple[ResolvedReferencePanel, dict[str, bytes]]:
     filenames = {
         "vcf": "synthetic.chr19.phased.vcf.gz",
         "index": "synthetic.chr19.phased.vcf.gz.tbi",
@@ -39,7 +44,7 @@ def reference_fixture() -> tuple[ResolvedReferencePanel, dict[str, bytes]]:
         "source_manifest": "manifest.txt",
     }
     contents = {
-        f"{base_url}/{filenames['vcf']}": b"synthetic phased vcf\n",
+        f"{base_url}/{filenames['vcf']}": vcf_content,
         f"{base_url}/{filenames['index']}": b"synthetic tabix index\n",
         f"{base_url}/{filenames['readme']}": b"synthetic readme\n",
         f"{base_url}/{filenames['source_manifest']}": b"synthetic manifest\n",
@@ -285,3 +290,153 @@ def test_cache_rejects_nonfinite_lock_timeout(tmp_path: Path) -> None:
             lock_timeout_seconds=float("nan"),
             downloader=downloader_for(contents),
         )
+
+
+class RangeServer:
+    """Serveur HTTP local qui sert des plages et coupe certaines réponses."""
+
+    def __init__(self, contents: dict[str, bytes]) -> None:
+        self.contents = contents
+        self.requests: list[tuple[str, str | None]] = []
+        self.cut_after: dict[str, int] = {}
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *arguments) -> None:
+                pass
+
+            def do_GET(self) -> None:
+                content = server.contents.get(self.path)
+                range_header = self.headers.get("Range")
+                server.requests.append((self.path, range_header))
+                if content is None:
+                    self.send_error(404)
+                    return
+                start, end, status = 0, len(content), 200
+                match = re.fullmatch(r"bytes=(\d+)-(\d*)", range_header or "")
+                if match and self.headers.get("If-Range", '"v1"') == '"v1"':
+                    start = int(match.group(1))
+                    if match.group(2):
+                        end = min(end, int(match.group(2)) + 1)
+                    if start >= len(content):
+                        self.send_error(416)
+                        return
+                    status = 206
+                self.send_response(status)
+                self.send_header("ETag", '"v1"')
+                self.send_header("Content-Length", str(end - start))
+                if status == 206:
+                    self.send_header(
+                        "Content-Range", f"bytes {start}-{end - 1}/{len(content)}"
+                    )
+                self.end_headers()
+                cut = server.cut_after.pop(self.path, None)
+                if cut is not None:
+                    # Coupure en plein transfert : la réponse reste incomplète.
+                    self.wfile.write(content[start : start + cut])
+                    self.close_connection = True
+                    return
+                self.wfile.write(content[start:end])
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.base_url = f"http://127.0.0.1:{self.httpd.server_address[1]}/synthetic"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def ranges_for(self, url: str) -> list[str | None]:
+        path = url.removeprefix(self.base_url.removesuffix("/synthetic"))
+        return [
+            range_header
+            for request_path, range_header in self.requests
+            if request_path == path
+        ]
+
+
+def test_plain_http_is_refused_even_on_loopback() -> None:
+    for source_url, final_url in (
+        ("http://127.0.0.1/panel.vcf.gz", "http://127.0.0.1/panel.vcf.gz"),
+        ("https://example.org/panel.vcf.gz", "http://example.org/panel.vcf.gz"),
+    ):
+        with pytest.raises(ReferenceCacheError, match="reference_download_requires_https"):
+            reference_cache._check_download_urls(source_url, final_url)
+
+
+@pytest.fixture
+def range_server(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setenv("no_proxy", "127.0.0.1,localhost")
+    monkeypatch.setattr(reference_cache, "DOWNLOAD_RETRY_DELAY_SECONDS", 0)
+    # Le serveur de substitution parle HTTP clair : seul l'essai l'autorise.
+    monkeypatch.setattr(reference_cache, "DOWNLOAD_SCHEME", "http")
+    server = RangeServer({})
+    yield server
+    server.httpd.shutdown()
+    server.httpd.server_close()
+
+
+def serve_reference(
+    server: RangeServer, vcf_content: bytes
+) -> tuple[ResolvedReferencePanel, str]:
+    resolved, contents = reference_fixture(server.base_url, vcf_content)
+    prefix = server.base_url.removesuffix("/synthetic")
+    server.contents.update(
+        {url.removeprefix(prefix): content for url, content in contents.items()}
+    )
+    return resolved, resolved.vcf.url
+
+
+def test_interrupted_download_resumes_from_kept_partial_file(
+    tmp_path: Path, range_server: RangeServer, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    vcf_content = bytes(range(256)) * 1024
+    resolved, vcf_url = serve_reference(range_server, vcf_content)
+    vcf_path = vcf_url.removeprefix(range_server.base_url.removesuffix("/synthetic"))
+    range_server.cut_after[vcf_path] = 100_000
+    monkeypatch.setattr(reference_cache, "DOWNLOAD_RETRIES", 0)
+
+    with pytest.raises(ReferenceCacheError, match="reference_download_failed"):
+        cache_reference_panel(resolved, tmp_path / "cache", chunk_size=4096)
+
+    partial_files = list((tmp_path / "cache").rglob("*.vcf.gz.part"))
+    assert len(partial_files) == 1
+    kept_bytes = partial_files[0].stat().st_size
+    assert 0 < kept_bytes <= 100_000
+
+    populated = cache_reference_panel(resolved, tmp_path / "cache", chunk_size=4096)
+
+    assert populated.status == "POPULATED"
+    assert populated.vcf_path.read_bytes() == vcf_content
+    resumed_range = range_server.ranges_for(vcf_url)[-1]
+    assert resumed_range is not None
+    assert int(re.fullmatch(r"bytes=(\d+)-\d+", resumed_range).group(1)) > 0
+    assert not list(populated.entry_dir.parent.glob("*.partial"))
+    assert sorted(path.name for path in populated.entry_dir.iterdir()) == sorted(
+        [
+            "reference_cache_manifest.json",
+            populated.vcf_path.name,
+            populated.index_path.name,
+            populated.readme_path.name,
+            populated.source_manifest_path.name,
+        ]
+    )
+
+
+def test_segmented_download_fetches_ranges_in_parallel(
+    tmp_path: Path, range_server: RangeServer
+) -> None:
+    vcf_content = hashlib.sha256(b"seed").digest() * 2048
+    resolved, vcf_url = serve_reference(range_server, vcf_content)
+
+    populated = cache_reference_panel(
+        resolved, tmp_path / "cache", chunk_size=4096, download_segments=4
+    )
+
+    assert populated.vcf_sha256 == sha256_bytes(vcf_content)
+    quarter = len(vcf_content) // 4
+    assert sorted(range_server.ranges_for(vcf_url)) == sorted(
+        ["bytes=0-0"]
+        + [f"bytes={index * quarter}-{(index + 1) * quarter - 1}" for index in range(4)]
+    )
+    # Trop petit pour être découpé : un seul flux après la sonde.
+    assert range_server.ranges_for(resolved.readme_url) == ["bytes=0-0", None]
+
+    with pytest.raises(ReferenceCacheError, match="download_segments"):
+        cache_reference_panel(resolved, tmp_path / "other", download_segments=17)
@@ -1,5 +1,6 @@
 import csv
 import json
+import random
 import subprocess
 from pathlib import Path
 from typing import Sequence
@@ -13,6 +14,12 @@ from effet_fondateur.references import (
     ReferenceHarmonizationIntegrityError,
     harmonize_reference_window,
 )
+from effet_fondateur.references.harmonization import (
+    _AlleleCodes,
+    _harmonization_rows,
+    _parse_reference_variants,
+    _StudyVariant,
+)
 
 
 def _reference_window(tmp_path: Path) -> ExtractedReferenceWindow:
@@ -358,3 +365,139 @@ def test_detects_modified_reference_before_bcftools(tmp_path: Path) -> None:
         )
 
     assert runner.commands == []
+
+
+def _per_variant_row(
+    study: _StudyVariant,
+    candidates: list[tuple[str | None, str, str]],
+) -> tuple[str, bool, str | None, tuple[str | None, str, str] | None]:
+    """Règles d'appariement variant par variant, avant la jointure colonnaire."""
+    called = {allele for allele in (study.allele_1, study.allele_2) if allele}
+    complete = len(called) == 2
+    exact = [
+        candidate
+        for candidate in candidates
+        if (
+            {candidate[1], candidate[2]} == called
+            if complete
+            else called <= {candidate[1], candidate[2]}
+        )
+    ]
+    if len(exact) == 1:
+        if not complete:
+            return (
+                "MATCHED_REFERENCE_COMPLETED",
+                True,
+                "MISSING_PLINK_ALLELE_COMPLETED_FROM_UNIQUE_REFERENCE",
+                exact[0],
+            )
+        direct = (study.allele_1, study.allele_2) == exact[0][1:]
+        status = "MATCHED_DIRECT" if direct else "MATCHED_SWAPPED"
+        return status, True, None, exact[0]
+    if exact:
+        return (
+            "AMBIGUOUS_REFERENCE_MATCH",
+            False,
+            "MULTIPLE_REFERENCE_RECORDS_FOR_CANONICAL_KEY",
+            None,
+        )
+    if not candidates:
+        detail = (
+            "NO_REFERENCE_VARIANT_AT_POSITION"
+            if complete
+            else "INCOMPLETE_STUDY_ALLELES_WITHOUT_REFERENCE"
+        )
+        return "STUDY_ONLY", False, detail, None
+    complement = {allele.translate(str.maketrans("ACGT", "TGCA")) for allele in called}
+    strand = complete and any(
+        {candidate[1], candidate[2]} == complement for candidate in candidates
+    )
+    detail = (
+        "STRAND_COMPLEMENT_NOT_APPLIED"
+        if strand
+        else "REFERENCE_POSITION_WITH_DIFFERENT_ALLELES"
+    )
+    return "ALLELE_MISMATCH", False, detail, None
+
+
+def test_columnar_join_matches_per_variant_rules() -> None:
+    generator = random.Random(20260806)
+    alleles = ["A", "C", "G", "T", "AT", "CG"]
+    reference_rows = []
+    for index in range(400):
+        ref, alt = generator.sample(alleles, 2)
+        reference_id = "." if index % 7 == 0 else f"rs{index}"
+        position = generator.randint(1, 120)
+        reference_rows.append(["chr19", str(position), reference_id, ref, alt])
+    study_variants = []
+    for order in range(300):
+        allele_1, allele_2 = generator.sample(alleles, 2)
+        if order % 5 == 0:
+            allele_1 = None
+        elif order % 11 == 0:
+            allele_2 = None
+        study_variants.append(
+            _StudyVariant(
+                order + 1,
+                f"variant_{order}",
+                19,
+                generator.randint(1, 140),
+                allele_1,
+                allele_2,
+            )
+        )
+    codes = _AlleleCodes()
+
+    reference = _parse_reference_variants(iter(reference_rows), 19, codes)
+    rows = _harmonization_rows(
+        study_variants, reference, codes, "GRCh38", "variant_3"
+    )
+
+    candidates_by_position: dict[int, list[tuple[str | None, str, str]]] = {}
+    for _, position, reference_id, ref, alt in reference_rows:
+        candidates_by_position.setdefault(int(position), []).append(
+            (None if reference_id == "." else reference_id, ref, alt)
+        )
+    expected = []
+    for study in study_variants:
+        status, eligible, detail, matched = _per_variant_row(
+            study, candidates_by_position.get(study.position_bp, [])
+        )
+        expected.append({
+            "STUDY_VARIANT_ORDER": str(study.order),
+            "STUDY_VARIANT_ID": study.variant_id,
+            "ASSEMBLY": "GRCh38",
+            "CHROMOSOME": "19",
+            "POSITION_BP": str(study.position_bp),
+            "STUDY_A1": study.allele_1,
+            "STUDY_A2": study.allele_2,
+            "REFERENCE_ID": matched[0] if matched else None,
+            "REFERENCE_REF": matched[1] if matched else None,
+            "REFERENCE_ALT": matched[2] if matched else None,
+            "HARMONIZATION_STATUS": status,
+            "COMMON_PHASE_ELIGIBLE": eligible,
+            "IS_TARGET_VARIANT": study.variant_id == "variant_3",
+            "DETAIL_CODE": detail,
+        })
+    matched_keys: dict[tuple[str, str | None, str | None], int] = {}
+    for row in expected:
+        if row["COMMON_PHASE_ELIGIBLE"]:
+            key = (row["POSITION_BP"], row["REFERENCE_REF"], row["REFERENCE_ALT"])
+            matched_keys[key] = matched_keys.get(key, 0) + 1
+    for row in expected:
+        key = (row["POSITION_BP"], row["REFERENCE_REF"], row["REFERENCE_ALT"])
+        if row["COMMON_PHASE_ELIGIBLE"] and matched_keys[key] > 1:
+            row["HARMONIZATION_STATUS"] = "DUPLICATE_STUDY_MATCH"
+            row["COMMON_PHASE_ELIGIBLE"] = False
+            row["DETAIL_CODE"] = "MULTIPLE_STUDY_VARIANTS_FOR_CANONICAL_KEY"
+
+    assert rows == expected
+    assert {row["HARMONIZATION_STATUS"] for row in rows} == {
+        "MATCHED_DIRECT",
+        "MATCHED_SWAPPED",
+        "MATCHED_REFERENCE_COMPLETED",
+        "AMBIGUOUS_REFERENCE_MATCH",
+        "STUDY_ONLY",
+        "ALLELE_MISMATCH",
+        "DUPLICATE_STUDY_MATCH",
+    }
@@ -13,6 +13,7 @@ from effet_fondateur.references import (
     ResolvedReferencePanel,
     cache_reference_panel,
     extract_reference_window,
+    reference_window_store_dir,
 )
 
 
@@ -24,10 +25,10 @@ def _sha256(content: bytes) -> str:
     return hashlib.sha256(content).hexdigest()
 
 
-def _cached_reference(tmp_path: Path):
+def _cached_reference(tmp_path: Path, vcf_content: bytes = b"source vcf"):
     base_url = "https://ftp.1000genomes.ebi.ac.uk/synthetic"
     contents = {
-        f"{base_url}/panel.vcf.gz": b"source vcf",
+        f"{base_url}/panel.vcf.gz": vcf_content,
         f"{base_url}/panel.vcf.gz.tbi": b"source index",
         f"{base_url}/README": b"readme",
         f"{base_url}/manifest.txt": b"manifest",
@@ -110,7 +111,14 @@ class FakeBcftools:
             )
         if arguments[1] == "view" and "--output" in arguments:
             output_path = Path(arguments[arguments.index("--output") + 1])
-            output_path.write_bytes(b"bgzip reference window")
+            region = arguments[arguments.index("--regions") + 1]
+            output_path.write_bytes(f"bgzip reference window {region}\n".encode())
+            return subprocess.CompletedProcess(arguments, 0, "", "")
+        if arguments[1] == "concat":
+            output_path = Path(arguments[arguments.index("--output") + 1])
+            output_path.write_bytes(
+                b"".join(Path(piece).read_bytes() for piece in arguments[9:])
+            )
             return subprocess.CompletedProcess(arguments, 0, "", "")
         if arguments[1:3] == ["index", "--tbi"]:
             Path(f"{arguments[-1]}.tbi").write_bytes(b"tabix index")
@@ -242,3 +250,66 @@ def test_detects_modified_cached_vcf_before_extraction(tmp_path: Path) -> None:
         )
 
     assert runner.commands == []
+
+
+def test_window_store_serves_sub_windows_and_extends_overlapping_ones(
+    tmp_path: Path,
+) -> None:
+    # Le budget du magasin est une fraction de la taille du VCF du panel.
+    resolved, cached = _cached_reference(tmp_path, b"source vcf" * 1_000)
+    store_dir = reference_window_store_dir(cached)
+    runner = FakeBcftools()
+
+    def extract(name: str, start_bp: int, end_bp: int, fraction: float = 1.0):
+        runner.commands.clear()
+        extracted = extract_reference_window(
+            resolved,
+            cached,
+            tmp_path / name,
+            start_bp=start_bp,
+            end_bp=end_bp,
+            command_runner=runner,
+            store_dir=store_dir,
+            store_budget_fraction=fraction,
+        )
+        manifest = json.loads(extracted.manifest_path.read_text(encoding="utf-8"))
+        reads = [
+            (command[command.index("--regions") + 1], Path(command[-1]), command)
+            for command in runner.commands
+            if command[1] == "view" and "--regions" in command
+        ]
+        return manifest["window_store"], reads
+
+    store_record, reads = extract("first", 1_000, 2_000)
+    assert store_record == {"status": "EXTRACTED", "start_bp": 1_000, "end_bp": 2_000}
+    assert [(region, path) for region, path, _ in reads] == [
+        ("chr19:1000-2000", cached.vcf_path)
+    ]
+
+    # Une fenêtre plus étroite est sous-extraite sans relire le panel.
+    store_record, reads = extract("narrower", 1_200, 1_800)
+    assert store_record["status"] == "HIT"
+    assert [(region, path.parent.name) for region, path, _ in reads] == [
+        ("chr19:1200-1800", "1000-2000")
+    ]
+
+    # Un flanc élargi ne lit dans le panel que la partie manquante.
+    store_record, reads = extract("wider", 1_500, 2_600)
+    assert store_record == {"status": "EXTENDED", "start_bp": 1_000, "end_bp": 2_600}
+    panel_reads = [command for _, path, command in reads if path == cached.vcf_path]
+    assert len(panel_reads) == 1
+    assert panel_reads[0][panel_reads[0].index("--regions") + 1] == "chr19:2001-2600"
+    assert panel_reads[0][panel_reads[0].index("--regions-overlap") + 1] == "pos"
+    index = json.loads((store_dir / "window_store.json").read_text(encoding="utf-8"))
+    assert [window["dirname"] for window in index["windows"]] == ["1000-2600"]
+    assert sorted(path.name for path in store_dir.iterdir()) == [
+        ".lock",
+        "1000-2600",
+        "window_store.json",
+    ]
+
+    # Un magasin dont le budget ne peut contenir aucune fenêtre se vide.
+    store_record, _ = extract("far", 40_000, 41_000, fraction=1e-9)
+    assert store_record["status"] == "EXTRACTED"
+    index = json.loads((store_dir / "window_store.json").read_text(encoding="utf-8"))
+    assert index["windows"] == []
@@ -1,20 +1,32 @@
+import gzip
+import random
+import subprocess
+import threading
+import time
+from pathlib import Path
+from typing import Any, Sequence
+
+import pytest
+
+from effet_fondateur.io import buffered_command_lines
+from effet_fondateur.phasing import Shapeit5ExecutionBlockError, Shapeit5Probe
+from effet_fondateur.phasing.chunking import PhaseChunk, plan_phase_chunks
 from effet_fondateur.phasing.execution import (
-    PhasedVariant,
+    PhasedGenotypes,
     _carrier_rows,
+    _check_genotype_preservation,
+    _genotype_columns,
     _mendel_errors,
+    _phase_common,
     _transmissions,
 )
 
 
-def _target(*genotypes: str, confidences: tuple[float | None, ...]) -> PhasedVariant:
-    return PhasedVariant(
-        "chr19",
-        100_000,
-        "target_GRCh38_1_100000_A_G",
-        "A",
-        "G",
-        genotypes,
-        confidences,
+def _target(*genotypes: str, confidences: tuple[float | None, ...]) -> PhasedGenotypes:
+    return _genotype_columns(
+        [("chr19", 100_000, "target_GRCh38_1_100000_A_G", "A", "G")],
+        [list(genotypes)],
+        [list(confidences)],
     )
 
 
@@ -25,7 +37,7 @@ def test_carrier_assignment_marks_low_singleton_confidence_unreliable() -> None:
         {"SAMPLE_ID": "noncarrier", "GENOTYPE": "A/A"},
     )
 
-    rows = _carrier_rows(target, ["carrier", "noncarrier"], explicit, 0.9)
+    rows = _carrier_rows(target, 0, ["carrier", "noncarrier"], explicit, 0.9)
 
     assert rows[0]["CARRIER_HAPLOTYPE"] == "H2"
     assert rows[0]["CONFIDENCE_STATUS"] == "SCORED_LOW"
@@ -38,17 +50,263 @@ def test_trio_transmission_identifies_direct_child_haplotype_orientation() -> No
     samples = ["father", "mother", "child"]
     pedigree = [("child", "father", "mother")]
 
-    rows = _transmissions(target, samples, pedigree)
+    rows = _transmissions(target, 0, samples, pedigree)
 
     assert rows[0]["TRANSMISSION_STATUS"] == "DIRECT"
     assert rows[0]["PATERNAL_CHILD_HAPLOTYPE"] == "H1"
     assert rows[0]["MATERNAL_CHILD_HAPLOTYPE"] == "H2"
-    assert _mendel_errors([target], samples, pedigree) == 0
+    assert _mendel_errors(target, samples, pedigree) == 0
 
 
 def test_mendel_error_is_detected_before_phasing() -> None:
     target = _target("0/0", "0/0", "1/1", confidences=(None, None, None))
 
     assert _mendel_errors(
-        [target], ["father", "mother", "child"], [("child", "father", "mother")]
+        target, ["father", "mother", "child"], [("child", "father", "mother")]
     ) == 1
+
+
+def _write_linear_map(path: Path, end_bp: int, cm_per_mb: float) -> Path:
+    payload = "pos\tchr\tcM\n" + "".join(
+        f"{position}\t19\t{position / 1_000_000 * cm_per_mb}\n"
+        for position in range(500_000, end_bp + 500_001, 500_000)
+    )
+    path.write_bytes(gzip.compress(payload.encode("utf-8"), mtime=0))
+    return path
+
+
+def test_chunk_plan_covers_wide_region_with_genetic_overlaps(tmp_path: Path) -> None:
+    map_path = _write_linear_map(tmp_path / "map.tsv.gz", 60_000_000, 1.0)
+
+    chunks = plan_phase_chunks(
+        map_path, "chr19:1000000-51000000", chunk_size_cm=20.0, overlap_cm=2.0
+    )
+    narrow = plan_phase_chunks(
+        map_path, "chr19:1000000-11000000", chunk_size_cm=20.0, overlap_cm=2.0
+    )
+
+    assert [chunk.region for chunk in chunks] == [
+        "chr19:1000000-19000000",
+        "chr19:17000000-35000000",
+        "chr19:33000000-51000000",
+    ]
+    assert narrow == (PhaseChunk(19, 1_000_000, 11_000_000),)
+
+
+class _FakeChunkedShapeit5:
+    """Exécuteur injecté : SHAPEIT5 et bcftools répondent depuis la mémoire."""
+
+    def __init__(self, flipped_chunk: int | None, scrambled: bool = False) -> None:
+        self.flipped_chunk = flipped_chunk
+        self.scrambled = scrambled
+        self.commands: list[list[str]] = []
+        self.active = 0
+        self.peak_active = 0
+        self._lock = threading.Lock()
+
+    def _rows(self, path: Path) -> str:
+        index = int(path.name.split(".")[1].removeprefix("chunk"))
+        start, end = (int(value) for value in path.with_suffix(".region").read_text().split("-"))
+        rows = []
+        for position in range(1_000_000, 51_000_001, 1_000_000):
+            if start <= position <= end:
+                first = "1|0" if position % 3_000_000 else "0|1"
+                second = "0|1"
+                if index == self.flipped_chunk:
+                    first, second = first[::-1], second[::-1]
+                if self.scrambled and index == 1 and position % 2_000_000:
+                    first = first[::-1]
+                rows.append(f"chr19\t{position}\tv{position}\tA\tG\t{first}\t{second}\t0|0\n")
+        return "".join(rows)
+
+    def __call__(self, command: Sequence[str], timeout: float) -> subprocess.CompletedProcess[str]:
+        arguments = list(command)
+        with self._lock:
+            self.commands.append(arguments)
+        stdout = ""
+        if arguments[0].endswith("phase_common"):
+            with self._lock:
+                self.active += 1
+                self.peak_active = max(self.peak_active, self.active)
+            time.sleep(0.05)
+            output = Path(arguments[arguments.index("--output") + 1])
+            output.write_bytes(b"chunk bcf")
+            output.with_suffix(".region").write_text(
+                arguments[arguments.index("--region") + 1].split(":")[1]
+            )
+            Path(arguments[arguments.index("--log") + 1]).write_text("chunk log\n")
+            with self._lock:
+                self.active -= 1
+        elif arguments[1:3] == ["index", "--csi"]:
+            Path(f"{arguments[-1]}.csi").write_bytes(b"csi")
+        elif arguments[1] == "query":
+            stdout = self._rows(Path(arguments[-1]))
+        elif arguments[1:3] == ["concat", "--ligate"]:
+            Path(arguments[arguments.index("--output") + 1]).write_bytes(b"ligated bcf")
+        return subprocess.CompletedProcess(arguments, 0, stdout, "")
+
+
+def _phase_chunks(tmp_path: Path, runner: _FakeChunkedShapeit5) -> dict[str, Any]:
+    chunks = (
+        PhaseChunk(19, 1_000_000, 19_000_000),
+        PhaseChunk(19, 17_000_000, 35_000_000),
+        PhaseChunk(19, 33_000_000, 51_000_000),
+    )
+    probe = Shapeit5Probe("/opt/phase_common", "/opt/phase_rare", "5.1.1", "5.1.1")
+    return _phase_common(
+        probe,
+        "/opt/bcftools",
+        runner,
+        buffered_command_lines(runner),
+        chunks=chunks,
+        study_vcf_path=tmp_path / "study.vcf.gz",
+        reference_vcf_path=tmp_path / "reference.vcf.gz",
+        genetic_map_path=tmp_path / "map.tsv.gz",
+        pedigree_path=None,
+        common_bcf=tmp_path / "common.phased.bcf",
+        common_log=tmp_path / "common.phase.log",
+        sample_count=3,
+        threads=4,
+        seed=15_052_011,
+        maximum_switch_rate=0.1,
+        timeout_seconds=30,
+    )
+
+
+def test_chunks_are_phased_in_parallel_then_ligated(tmp_path: Path) -> None:
+    runner = _FakeChunkedShapeit5(flipped_chunk=1)
+
+    chunking = _phase_chunks(tmp_path, runner)
+
+    phase_commands = [command for command in runner.commands if command[0].endswith("phase_common")]
+    ligation = next(command for command in runner.commands if "--ligate" in command)
+    assert [command[command.index("--region") + 1] for command in phase_commands] == [
+        "chr19:1000000-19000000", "chr19:17000000-35000000", "chr19:33000000-51000000"
+    ]
+    assert {command[command.index("--thread") + 1] for command in phase_commands} == {"1"}
+    assert runner.peak_active > 1
+    assert ligation[-3:] == [
+        str(tmp_path / "common_chunks" / f"common.chunk{index:03d}.bcf") for index in range(3)
+    ]
+    assert chunking["parallel_jobs"] == 3
+    assert [boundary["heterozygous_count"] for boundary in chunking["boundaries"]] == [6, 6]
+    assert [boundary["switch_rate"] for boundary in chunking["boundaries"]] == [0.0, 0.0]
+    assert (tmp_path / "common.phased.bcf").read_bytes() == b"ligated bcf"
+    assert (tmp_path / "common.phase.log").read_text().count("chunk log") == 3
+    assert not (tmp_path / "common_chunks").exists()
+
+
+def test_inconsistent_chunk_overlap_blocks_ligation(tmp_path: Path) -> None:
+    runner = _FakeChunkedShapeit5(flipped_chunk=None, scrambled=True)
+
+    with pytest.raises(
+        Shapeit5ExecutionBlockError, match="shapeit5_chunk_ligation_inconsistent"
+    ):
+        _phase_chunks(tmp_path, runner)
+
+    assert not any("--ligate" in command for command in runner.commands)
+
+
+def _string_alleles(genotype: str) -> tuple[str, str]:
+    separator = "|" if "|" in genotype else "/"
+    values = genotype.split(separator)
+    if len(values) != 2 or any(value not in {"0", "1"} for value in values):
+        raise Shapeit5ExecutionBlockError("unsupported_phasing_genotype")
+    return values[0], values[1]
+
+
+def test_array_family_checks_match_per_genotype_rules() -> None:
+    generator = random.Random(20260806)
+    samples = [f"sample_{index}" for index in range(30)]
+    pedigree = [
+        (samples[index], samples[index + 1], samples[index + 2]) for index in range(0, 12, 3)
+    ] + [
+        (samples[12], samples[13], None),
+        (samples[14], None, samples[15]),
+        (samples[16], None, None),
+    ]
+    rows = [
+        [generator.choice(["0|0", "0|1", "1|0", "1|1"]) for _ in samples] for _ in range(200)
+    ]
+    genotypes = _genotype_columns(
+        [("chr19", 1_000 + index, f"v{index}", "A", "G") for index in range(len(rows))],
+        rows,
+        [[generator.choice([None, 0.6, 0.95]) for _ in samples] for _ in rows],
+    )
+
+    expected_errors = 0
+    for child, father, mother in pedigree:
+        for row in rows:
+            child_alleles = _string_alleles(row[samples.index(child)])
+            father_set = set(_string_alleles(row[samples.index(father)])) if father else None
+            mother_set = set(_string_alleles(row[samples.index(mother)])) if mother else None
+            if father_set is not None and mother_set is not None:
+                compatible = any(
+                    first in father_set and second in mother_set
+                    for first, second in (child_alleles, child_alleles[::-1])
+                )
+            else:
+                known = father_set or mother_set
+                compatible = known is not None and any(allele in known for allele in child_alleles)
+            expected_errors += not compatible
+    transmissions = _transmissions(genotypes, 7, samples, pedigree)
+    carriers = _carrier_rows(
+        genotypes,
+        7,
+        samples,
+        [
+            {
+                "SAMPLE_ID": sample,
+                "GENOTYPE": "/".join(sorted("AG"[int(allele)] for allele in _string_alleles(gt))),
+            }
+            for sample, gt in zip(samples, rows[7])
+        ],
+        0.9,
+    )
+
+    assert _mendel_errors(genotypes, samples, pedigree) == expected_errors
+    for row, (child, father, mother) in zip(transmissions, pedigree):
+        child_alleles = _string_alleles(rows[7][samples.index(child)])
+        assert row["CHILD_PHASED_GT"] == rows[7][samples.index(child)]
+        if father is None or mother is None:
+            assert row["TRANSMISSION_STATUS"] == "DUO_COMPATIBLE"
+            continue
+        father_set = set(_string_alleles(rows[7][samples.index(father)]))
+        mother_set = set(_string_alleles(rows[7][samples.index(mother)]))
+        direct = child_alleles[0] in father_set and child_alleles[1] in mother_set
+        swapped = child_alleles[1] in father_set and child_alleles[0] in mother_set
+        assert row["TRANSMISSION_STATUS"] == (
+            "DIRECT" if direct and not swapped
+            else "SWAPPED" if swapped and not direct
+            else "AMBIGUOUS"
+        )
+    for row, gt, confidence in zip(carriers, rows[7], genotypes.confidences[7].tolist()):
+        heterozygous = gt in {"0|1", "1|0"}
+        assert row["PHASED_GT"] == gt
+        assert row["CARRIER_HAPLOTYPE"] == {
+            "0|0": "NONE", "1|1": "BOTH", "1|0": "H1", "0|1": "H2"
+        }[gt]
+        assert row["RELIABILITY_STATUS"] == (
+            "PASS" if not heterozygous or confidence >= 0.9 else "UNRELIABLE"
+        )
+
+
+def test_genotype_preservation_reports_first_failing_variant() -> None:
+    keys = [("chr19", 1_000 + index, f"v{index}", "A", "G") for index in range(3)]
+    before = _genotype_columns(keys, [["0/1", "0/0"], ["1/1", "0/1"], ["0/0", "./."]], None)
+
+    def after(*rows: list[str]) -> PhasedGenotypes:
+        return _genotype_columns(keys, list(rows), None)
+
+    with pytest.raises(Shapeit5ExecutionBlockError, match="shapeit5_unphased_output_genotype"):
+        _check_genotype_preservation(
+            before, after(["1|0", "0|0"], ["1/1", "0|1"], ["0|0", "1|1"])
+        )
+    with pytest.raises(Shapeit5ExecutionBlockError, match="shapeit5_genotype_not_preserved"):
+        _check_genotype_preservation(
+            before, after(["1|0", "0|0"], ["1|1", "1|1"], ["0|0", "0|0"])
+        )
+    with pytest.raises(Shapeit5ExecutionBlockError, match="unsupported_phasing_genotype"):
+        _check_genotype_preservation(
+            before, after(["1|0", "0|0"], ["1|1", "0|1"], ["0|0", "0|0"])
+        )